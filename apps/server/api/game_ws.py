@@ -3,23 +3,25 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import time
 import uuid
 from collections import deque
 
 from config import Settings
+from core_table.codec import DEFAULT_CODEC, Frame, get_codec, negotiate
+from core_table.protocol import Message
 from database import crud, models
 from database.database import SessionLocal
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
 from service.authentication import AccessTokenRejected, resolve_active_user_from_token
-from service.game_session import ConnectionManager, get_connection_manager
+from service.game_session import ConnectionManager, decode_inbound, get_connection_manager
 from sqlalchemy.orm import Session
 from utils.logger import log_context, setup_logger
 from utils.observability import (
     WS_ACTIVE,
     WS_DURATION,
     record_ws_connection,
+    record_ws_inbound_stage,
     record_ws_message,
 )
 
@@ -27,6 +29,8 @@ logger = setup_logger(__name__)
 router = APIRouter()
 settings = Settings()
 
+SUBPROTOCOL_PREFIX = "ttrpg."
+
 
 def _session_reference(session_code: str) -> str:
     """Pseudonymous session reference safe for diagnostic logs."""
@@ -41,6 +45,28 @@ def _origin_is_allowed(origin: str | None) -> bool:
     return bool(origin and origin in allowed)
 
 
+def _negotiate_codec(offered: list[str]) -> tuple[str, str | None]:
+    """Pick the wire codec from the client's ``ttrpg.<codec>`` subprotocols.
+
+    Returns the codec name and the subprotocol to echo back; clients that
+    offer none get JSON and no subprotocol.
+    """
+    names = [p[len(SUBPROTOCOL_PREFIX):] for p in offered if p.startswith(SUBPROTOCOL_PREFIX)]
+    chosen = negotiate(names)
+    if chosen is None:
+        return DEFAULT_CODEC, None
+    return chosen, SUBPROTOCOL_PREFIX + chosen
+
+
+async def _receive_frame(websocket: WebSocket) -> Frame:
+    """Next text or binary frame; raises WebSocketDisconnect like ``receive_text``."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else (message.get("bytes") or b"")
+
+
 def get_user_from_token(token: str, db: Session):
     """Resolve a user without ever recording token material."""
     try:
@@ -140,6 +166,8 @@ async def websocket_game_endpoint(
             finally:
                 db.close()
 
+            codec_name, subprotocol = _negotiate_codec(list(websocket.scope.get("subprotocols") or []))
+            codec = get_codec(codec_name)
             client_id = await connection_manager.connect(
                 websocket,
                 session_code,
@@ -147,6 +175,8 @@ async def websocket_game_endpoint(
                 username,
                 role,
                 connection_id=connection_id,
+                codec=codec_name,
+                subprotocol=subprotocol,
             )
             connected = True
             WS_ACTIVE.inc()
@@ -158,15 +188,16 @@ async def websocket_game_endpoint(
                     "client_id": client_id,
                     "user_id": user_id,
                     "role": role,
+                    "codec": codec_name,
                     "outcome": "success",
                 },
             )
 
             message_times: deque[float] = deque()
             while True:
-                raw_message = await websocket.receive_text()
+                frame = await _receive_frame(websocket)
                 message_started = time.perf_counter()
-                payload_bytes = len(raw_message.encode("utf-8"))
+                payload_bytes = len(frame) if isinstance(frame, bytes) else len(frame.encode("utf-8"))
                 if payload_bytes > settings.WS_MAX_MESSAGE_BYTES:
                     logger.info(
                         "Oversized WebSocket message rejected",
@@ -196,33 +227,8 @@ async def websocket_game_endpoint(
                     return
                 message_times.append(now)
                 try:
-                    message_data = json.loads(raw_message)
-                    if not isinstance(message_data, dict):
-                        raise ValueError("WebSocket message must be an object")
-                    message_id = message_data.get("message_id")
-                    if not isinstance(message_id, str) or not message_id:
-                        message_id = uuid.uuid4().hex
-                        message_data["message_id"] = message_id
-                    with log_context(message_id=message_id):
-                        await connection_manager.handle_message(websocket, message_data)
-                        record_ws_message(
-                            "inbound",
-                            message_data.get("type"),
-                            "success",
-                            time.perf_counter() - message_started,
-                        )
-                        logger.debug(
-                            "WebSocket message processed",
-                            extra={
-                                "event_name": "websocket.message.processed",
-                                "message_type": str(message_data.get("type", "unknown"))[:80],
-                                "duration_ms": round(
-                                    (time.perf_counter() - message_started) * 1000, 3
-                                ),
-                                "outcome": "success",
-                            },
-                        )
-                except (json.JSONDecodeError, ValueError):
+                    inbound = decode_inbound(frame, codec)
+                except ValueError:
                     record_ws_message(
                         "inbound", "unknown", "rejected", time.perf_counter() - message_started
                     )
@@ -239,6 +245,35 @@ async def websocket_game_endpoint(
                         {"type": "error", "data": {"message": "Invalid message format"}},
                         websocket,
                     )
+                    continue
+                record_ws_inbound_stage("decode", time.perf_counter() - message_started)
+                if isinstance(inbound, Message):
+                    message_id, message_type = inbound.message_id, inbound.type.value
+                else:
+                    message_id = inbound.get("message_id")
+                    if not isinstance(message_id, str) or not message_id:
+                        message_id = uuid.uuid4().hex
+                        inbound["message_id"] = message_id
+                    message_type = inbound.get("type")
+                with log_context(message_id=message_id):
+                    await connection_manager.handle_message(websocket, inbound)
+                    record_ws_message(
+                        "inbound",
+                        message_type,
+                        "success",
+                        time.perf_counter() - message_started,
+                    )
+                    logger.debug(
+                        "WebSocket message processed",
+                        extra={
+                            "event_name": "websocket.message.processed",
+                            "message_type": str(message_type or "unknown")[:80],
+                            "duration_ms": round(
+                                (time.perf_counter() - message_started) * 1000, 3
+                            ),
+                            "outcome": "success",
+                        },
+                    )
         except WebSocketDisconnect as exc:
             record_ws_connection("closed")
             logger.info(
@@ -80,6 +80,12 @@ class Settings(BaseSettings):
     WS_MAX_MESSAGE_BYTES: int = 64 * 1024
     WS_MESSAGES_PER_MINUTE: int = 120
     WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_SEND_QUEUE_MAX_FRAMES: int = 256
+    PREVIEW_FLUSH_HZ: float = 30.0  # sprite preview broadcasts per second; 0 disables coalescing
+    TABLE_DELTA_RING_SIZE: int = 256  # recent broadcasts kept per table for TABLE_RESUME; 0 disables resume
+    PERSISTENCE_QUEUE_MAX: int = 1000
+    PERSISTENCE_WORKERS: int = 2
+    PERSISTENCE_JOURNAL_PATH: str = ""  # JSON-lines crash journal; empty disables it
 
     # Optional complete replacement for the bundled SRD starter artifact.
     COMPENDIUM_DIR: str = ""
@@ -100,6 +106,12 @@ class Settings(BaseSettings):
     r2_bucket_name: str = ""
     r2_endpoint: str = ""        # Full endpoint URL (optional, derived from account_id if absent)
     r2_public_url: str = ""      # Public bucket URL for direct access
+    r2_max_concurrency: int = 8  # Threads and pooled connections for R2 calls
+    r2_connect_timeout_seconds: float = 5.0
+    r2_read_timeout_seconds: float = 30.0
+    r2_max_attempts: int = 3     # Attempts per R2 call, including the first
+    asset_verify_concurrency: int = 2  # Uploaded images verified at once
+    asset_verify_chunk_bytes: int = 1024 * 1024  # Read size while streaming an upload for verification
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -125,6 +137,28 @@ class Settings(BaseSettings):
             raise ValueError("WS_MESSAGES_PER_MINUTE must be between 1 and 6000.")
         if not 0.1 <= self.WS_SEND_TIMEOUT_SECONDS <= 60:
             raise ValueError("WS_SEND_TIMEOUT_SECONDS must be between 0.1 and 60.")
+        if not 8 <= self.WS_SEND_QUEUE_MAX_FRAMES <= 10000:
+            raise ValueError("WS_SEND_QUEUE_MAX_FRAMES must be between 8 and 10000.")
+        if not 0 <= self.PREVIEW_FLUSH_HZ <= 120:
+            raise ValueError("PREVIEW_FLUSH_HZ must be between 0 and 120.")
+        if not 0 <= self.TABLE_DELTA_RING_SIZE <= 10000:
+            raise ValueError("TABLE_DELTA_RING_SIZE must be between 0 and 10000.")
+        if not 1 <= self.PERSISTENCE_QUEUE_MAX <= 100000:
+            raise ValueError("PERSISTENCE_QUEUE_MAX must be between 1 and 100000.")
+        if not 1 <= self.PERSISTENCE_WORKERS <= 16:
+            raise ValueError("PERSISTENCE_WORKERS must be between 1 and 16.")
+        if not 1 <= self.r2_max_concurrency <= 64:
+            raise ValueError("R2_MAX_CONCURRENCY must be between 1 and 64.")
+        if not 0.5 <= self.r2_connect_timeout_seconds <= 60:
+            raise ValueError("R2_CONNECT_TIMEOUT_SECONDS must be between 0.5 and 60.")
+        if not 1 <= self.r2_read_timeout_seconds <= 300:
+            raise ValueError("R2_READ_TIMEOUT_SECONDS must be between 1 and 300.")
+        if not 1 <= self.r2_max_attempts <= 10:
+            raise ValueError("R2_MAX_ATTEMPTS must be between 1 and 10.")
+        if not 1 <= self.asset_verify_concurrency <= 32:
+            raise ValueError("ASSET_VERIFY_CONCURRENCY must be between 1 and 32.")
+        if not 64 * 1024 <= self.asset_verify_chunk_bytes <= 16 * 1024 * 1024:
+            raise ValueError("ASSET_VERIFY_CHUNK_BYTES must be between 65536 and 16777216.")
         if not 1 <= self.DB_POOL_SIZE <= 50:
             raise ValueError("DB_POOL_SIZE must be between 1 and 50.")
         if not 0 <= self.DB_MAX_OVERFLOW <= 50:
@@ -0,0 +1,27 @@
+"""Store table fog of war as an encoded region.
+
+Revision ID: 0004_table_fog_region
+Revises: 0003_shared_canvas_state
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004_table_fog_region"
+down_revision: Union[str, Sequence[str], None] = "0003_shared_canvas_state"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "virtual_tables",
+        sa.Column("fog_json", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("virtual_tables", "fog_json")
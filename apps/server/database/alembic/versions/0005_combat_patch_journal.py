@@ -0,0 +1,41 @@
+"""Journal combat commands as reversible patches over checkpoints.
+
+Revision ID: 0005_combat_patch_journal
+Revises: 0004_table_fog_region
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005_combat_patch_journal"
+down_revision: Union[str, Sequence[str], None] = "0004_table_fog_region"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("combat_encounters") as batch_op:
+        batch_op.add_column(
+            sa.Column("checkpoint_version", sa.Integer(), nullable=False, server_default="0"),
+        )
+    # Existing snapshots were rewritten on every action, so they are current
+    op.execute("UPDATE combat_encounters SET checkpoint_version = state_version")
+    with op.batch_alter_table("combat_encounters") as batch_op:
+        batch_op.alter_column("checkpoint_version", server_default=None)
+
+    with op.batch_alter_table("combat_actions") as batch_op:
+        batch_op.add_column(sa.Column("patch_json", sa.Text(), nullable=True))
+        batch_op.alter_column("state_before_json", existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE combat_actions SET state_before_json = '{}' WHERE state_before_json IS NULL")
+    with op.batch_alter_table("combat_actions") as batch_op:
+        batch_op.alter_column("state_before_json", existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column("patch_json")
+
+    with op.batch_alter_table("combat_encounters") as batch_op:
+        batch_op.drop_column("checkpoint_version")
@@ -0,0 +1,62 @@
+"""Store sealed combat action log pages.
+
+Revision ID: 0006_combat_action_log_pages
+Revises: 0005_combat_patch_journal
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006_combat_action_log_pages"
+down_revision: Union[str, Sequence[str], None] = "0005_combat_patch_journal"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "combat_action_log_pages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("encounter_id", sa.String(length=36), nullable=False),
+        sa.Column("page_index", sa.Integer(), nullable=False),
+        sa.Column("actions_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["encounter_id"],
+            ["combat_encounters.encounter_id"],
+            name=op.f("fk_combat_action_log_pages_encounter_id_combat_encounters"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_combat_action_log_pages")),
+        sa.UniqueConstraint(
+            "encounter_id",
+            "page_index",
+            name="uq_combat_action_log_page",
+        ),
+    )
+    op.create_index(
+        op.f("ix_combat_action_log_pages_id"),
+        "combat_action_log_pages",
+        ["id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_combat_action_log_pages_encounter_id"),
+        "combat_action_log_pages",
+        ["encounter_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_combat_action_log_pages_encounter_id"),
+        table_name="combat_action_log_pages",
+    )
+    op.drop_index(
+        op.f("ix_combat_action_log_pages_id"),
+        table_name="combat_action_log_pages",
+    )
+    op.drop_table("combat_action_log_pages")
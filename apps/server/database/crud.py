@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 import bcrypt
-from sqlalchemy import func, or_
+from sqlalchemy import delete, func, insert, or_, select, update
 from sqlalchemy.orm import Session
 from utils.logger import setup_logger
 from utils.time import utc_now
@@ -612,113 +612,245 @@ def delete_entity(db: Session, sprite_id: str) -> bool:
 
 def save_table_to_db(db: Session, virtual_table_obj, session_id: int) -> Optional[models.VirtualTable]:
     """
-    Save a VirtualTable object from table.py to the database
+    Save a VirtualTable object from table.py to the database.
+
+    Tables that have been loaded or fully saved before only flush the rows
+    recorded in ``virtual_table_obj.changes``; anything else is resynced.
+    """
+    snapshot = snapshot_table_for_save(virtual_table_obj)
+    try:
+        try:
+            return write_table_snapshot(db, snapshot, session_id)
+        except StaleTableSnapshot:
+            # The row the delta was taken against is gone; write everything
+            virtual_table_obj.changes.invalidate()
+            return write_table_snapshot(db, snapshot_table_for_save(virtual_table_obj), session_id)
+    except Exception:
+        # The snapshot consumed the tracked changes; force a full resync next time
+        if hasattr(virtual_table_obj, 'changes'):
+            virtual_table_obj.changes.invalidate()
+        raise
+
+
+class StaleTableSnapshot(RuntimeError):
+    """A changes-only snapshot targets a table row that no longer exists."""
+
+
+def snapshot_table_for_save(virtual_table_obj) -> dict:
+    """Capture what a save writes as plain, JSON-serialisable data.
+
+    Only changed rows are copied when the table has a change baseline;
+    otherwise the snapshot holds every entity and wall and is written as a
+    full resync. Taking a snapshot consumes the tracked changes, so edits
+    made while it is being written are recorded for the next save. If the
+    write fails the caller must ``changes.invalidate()`` the table.
     """
-    # Convert UUID to string if needed
     table_id_str = str(virtual_table_obj.table_id) if virtual_table_obj.table_id else str(uuid.uuid4())
+    delta = virtual_table_obj.pending_changes() if hasattr(virtual_table_obj, 'pending_changes') else None
+    memory_walls = getattr(virtual_table_obj, 'walls', {})
 
-    # Check if table already exists
-    existing_table = get_virtual_table_by_id(db, table_id_str)
-
-    if existing_table:
-        # Update existing table
-        table_update = schemas.VirtualTableUpdate(
-            name=virtual_table_obj.display_name,
-            width=virtual_table_obj.width,
-            height=virtual_table_obj.height,
-            position_x=virtual_table_obj.position[0],
-            position_y=virtual_table_obj.position[1],
-            scale_x=virtual_table_obj.scale[0],
-            scale_y=virtual_table_obj.scale[1],
-            layer_visibility=virtual_table_obj.layer_visibility,
-            dynamic_lighting_enabled=virtual_table_obj.dynamic_lighting_enabled,
-            fog_exploration_mode=virtual_table_obj.fog_exploration_mode,
-            ambient_light_level=virtual_table_obj.ambient_light_level,
-            grid_cell_px=getattr(virtual_table_obj, 'grid_cell_px', 50.0),
-            cell_distance=getattr(virtual_table_obj, 'cell_distance', 5.0),
-            distance_unit=getattr(virtual_table_obj, 'distance_unit', 'ft'),
-            difficult_terrain=_serialize_difficult_terrain(virtual_table_obj),
-            cover_zones=_serialize_cover_zones(virtual_table_obj),
-        )
-        db_table = update_virtual_table(db, table_id_str, table_update)
+    if delta is None:
+        entities = list(virtual_table_obj.entities.values())
+        walls = list(memory_walls.values())
+        deleted_sprites: list[str] = []
+        deleted_walls: list[str] = []
+        if hasattr(virtual_table_obj, 'mark_persisted'):
+            virtual_table_obj.mark_persisted()
     else:
-        # Create new table
-        table_data = schemas.VirtualTableCreate(
-            table_id=table_id_str,
-            name=virtual_table_obj.display_name,
-            width=virtual_table_obj.width,
-            height=virtual_table_obj.height,
-            session_id=session_id,
-            position_x=virtual_table_obj.position[0],
-            position_y=virtual_table_obj.position[1],
-            scale_x=virtual_table_obj.scale[0],
-            scale_y=virtual_table_obj.scale[1],
-            layer_visibility=virtual_table_obj.layer_visibility,
-            dynamic_lighting_enabled=virtual_table_obj.dynamic_lighting_enabled,
-            fog_exploration_mode=virtual_table_obj.fog_exploration_mode,
-            ambient_light_level=virtual_table_obj.ambient_light_level,
-            grid_cell_px=getattr(virtual_table_obj, 'grid_cell_px', 50.0),
-            cell_distance=getattr(virtual_table_obj, 'cell_distance', 5.0),
-            distance_unit=getattr(virtual_table_obj, 'distance_unit', 'ft'),
-            difficult_terrain=_serialize_difficult_terrain(virtual_table_obj),
-            cover_zones=_serialize_cover_zones(virtual_table_obj),
-        )
-        db_table = create_virtual_table(db, table_data)
+        entities = [virtual_table_obj.entities[i] for i in delta.upsert_entities if i in virtual_table_obj.entities]
+        walls = [memory_walls[w] for w in delta.upsert_walls if w in memory_walls]
+        deleted_sprites = sorted(delta.deleted_sprites)
+        deleted_walls = sorted(delta.deleted_walls)
 
-    if db_table is None:
-        logger.error(f"Failed to create/update virtual table {table_id_str}")
-        return None
+    return {
+        'table_id': table_id_str,
+        'name': virtual_table_obj.display_name,
+        'full': delta is None,
+        'taken_at': utc_now().isoformat(),
+        'columns': _table_columns(virtual_table_obj),
+        'entities': [_entity_columns(e) for e in entities],
+        'walls': [w.to_dict() for w in walls],
+        'deleted_sprites': deleted_sprites,
+        'deleted_walls': deleted_walls,
+    }
 
-    # Synchronize entities: First get current entities in database for this table
-    current_db_entities = db.query(models.Entity).filter(models.Entity.table_id == db_table.id).all()
-    current_db_sprite_ids = {entity.sprite_id for entity in current_db_entities}
 
-    # Get current in-memory sprite IDs
-    current_memory_sprite_ids = {entity.sprite_id for entity in virtual_table_obj.entities.values()}
+_DEFAULT_LAYER_VISIBILITY = {
+    'map': True, 'tokens': True, 'dungeon_master': True, 'light': True, 'height': True, 'obstacles': True
+}
 
-    # Delete entities that are in database but not in memory (these were deleted)
-    entities_to_delete = current_db_sprite_ids - current_memory_sprite_ids
-    if entities_to_delete:
-        logger.info(f"Deleting {len(entities_to_delete)} entities from database that were removed from memory")
-        for sprite_id in entities_to_delete:
-            entity_to_delete = db.query(models.Entity).filter(models.Entity.sprite_id == sprite_id).first()
-            if entity_to_delete:
-                db.delete(entity_to_delete)
-                logger.debug(f"Deleted entity from database: {sprite_id}")
+_WALL_UPDATE_FIELDS = (
+    'x1', 'y1', 'x2', 'y2', 'wall_type',
+    'blocks_movement', 'blocks_light', 'blocks_sight', 'blocks_sound',
+    'is_door', 'door_state', 'is_secret', 'direction',
+)
 
-    # Save/update entities that are in memory
-    for entity in virtual_table_obj.entities.values():
-        save_entity_to_db(db, entity, db_table.id)
 
-    # Synchronize wall segments for lighting, movement validation, and doors.
-    memory_walls = getattr(virtual_table_obj, 'walls', {})
-    current_db_walls = get_table_walls(db, table_id_str)
-    current_db_wall_ids = {wall.wall_id for wall in current_db_walls}
-    current_memory_wall_ids = set(memory_walls.keys())
-
-    walls_to_delete = current_db_wall_ids - current_memory_wall_ids
-    for wall_id in walls_to_delete:
-        delete_wall(db, wall_id)
-        logger.debug(f"Deleted wall from database: {wall_id}")
-
-    for wall in memory_walls.values():
-        wall_data = {**wall.to_dict(), 'table_id': table_id_str}
-        if wall.wall_id in current_db_wall_ids:
-            update_wall(db, wall.wall_id, wall_data)
+def write_table_snapshot(db: Session, snapshot: dict, session_id: int) -> models.VirtualTable:
+    """Write one ``snapshot_table_for_save`` result in a single transaction.
+
+    Statement count depends on the kinds of change, not on table size: the
+    table row (one UPDATE, skipped when nothing changed), then per
+    entities/walls at most one DELETE, one SELECT of the ids that already
+    exist, one bulk INSERT and one bulk UPDATE. Rows are upserted by
+    existence so write-through wall actions and rows removed elsewhere do not
+    break the save. A full snapshot also deletes rows it does not contain,
+    unless they were written after the snapshot was taken (by a later save
+    that finished first). Safe to call from a worker thread with that
+    thread's session.
+    """
+    table_id_str = snapshot['table_id']
+    full = snapshot['full']
+    taken_at = datetime.fromisoformat(snapshot['taken_at'])
+    now = utc_now()
+    try:
+        db_table = get_virtual_table_by_id(db, table_id_str)
+        if db_table is None:
+            if not full:
+                raise StaleTableSnapshot(table_id_str)
+            db_table = models.VirtualTable(
+                table_id=table_id_str,
+                session_id=session_id,
+                **{'layer_visibility': json.dumps(_DEFAULT_LAYER_VISIBILITY), **snapshot['columns']},
+            )
+            db.add(db_table)
+            db.flush()
         else:
-            create_wall(db, wall_data)
+            for column, value in snapshot['columns'].items():
+                setattr(db_table, column, value)
+            changed_rows = (snapshot['entities'] or snapshot['walls']
+                            or snapshot['deleted_sprites'] or snapshot['deleted_walls'])
+            if full or changed_rows or db.is_modified(db_table):
+                db_table.updated_at = now
+
+        entity_rows = {row['sprite_id']: row for row in snapshot['entities']}
+        if full:
+            db.execute(delete(models.Entity).where(
+                models.Entity.table_id == db_table.id,
+                models.Entity.sprite_id.not_in(list(entity_rows)),
+                or_(models.Entity.updated_at.is_(None), models.Entity.updated_at < taken_at),
+            ))
+        elif snapshot['deleted_sprites']:
+            db.execute(delete(models.Entity).where(
+                models.Entity.table_id == db_table.id,
+                models.Entity.sprite_id.in_(snapshot['deleted_sprites']),
+            ))
+        if entity_rows:
+            existing = dict(db.execute(
+                select(models.Entity.sprite_id, models.Entity.id).where(models.Entity.sprite_id.in_(list(entity_rows)))
+            ).all())
+            new_rows = [{**row, 'table_id': db_table.id, 'created_at': now, 'updated_at': now}
+                        for sprite_id, row in entity_rows.items() if sprite_id not in existing]
+            changed = [{**row, 'table_id': db_table.id, 'id': existing[sprite_id], 'updated_at': now}
+                       for sprite_id, row in entity_rows.items() if sprite_id in existing]
+            if new_rows:
+                db.execute(insert(models.Entity), new_rows)
+            if changed:
+                db.execute(update(models.Entity), changed)
+
+        wall_rows = {row['wall_id']: row for row in snapshot['walls']}
+        if full:
+            db.execute(delete(models.Wall).where(
+                models.Wall.table_id == db_table.table_id,
+                models.Wall.wall_id.not_in(list(wall_rows)),
+                or_(models.Wall.updated_at.is_(None), models.Wall.updated_at < taken_at),
+            ))
+        elif snapshot['deleted_walls']:
+            db.execute(delete(models.Wall).where(
+                models.Wall.table_id == db_table.table_id,
+                models.Wall.wall_id.in_(snapshot['deleted_walls']),
+            ))
+        if wall_rows:
+            existing = dict(db.execute(
+                select(models.Wall.wall_id, models.Wall.id).where(models.Wall.wall_id.in_(list(wall_rows)))
+            ).all())
+            new_rows = [{**row, 'table_id': db_table.table_id, 'created_at': now, 'updated_at': now}
+                        for wall_id, row in wall_rows.items() if wall_id not in existing]
+            changed = [{**{k: row[k] for k in _WALL_UPDATE_FIELDS}, 'id': existing[wall_id], 'updated_at': now}
+                       for wall_id, row in wall_rows.items() if wall_id in existing]
+            if new_rows:
+                db.execute(insert(models.Wall), new_rows)
+            if changed:
+                db.execute(update(models.Wall), changed)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    # Commit all changes
-    db.commit()
     logger.info(
-        f"Synchronized table {virtual_table_obj.display_name}: "
-        f"{len(entities_to_delete)} entities deleted, {len(virtual_table_obj.entities)} entities saved/updated, "
-        f"{len(walls_to_delete)} walls deleted, {len(memory_walls)} walls saved/updated"
+        f"Saved table {snapshot['name']} ({'full' if full else 'delta'}): "
+        f"{len(entity_rows)} entities and {len(wall_rows)} walls written, "
+        f"{len(snapshot['deleted_sprites'])} entities and {len(snapshot['deleted_walls'])} walls deleted"
     )
-
     return db_table
 
 
+def _table_columns(virtual_table_obj) -> dict:
+    """Table-level settings as VirtualTable model column values."""
+    columns = {
+        'name': virtual_table_obj.display_name,
+        'width': virtual_table_obj.width,
+        'height': virtual_table_obj.height,
+        'position_x': virtual_table_obj.position[0],
+        'position_y': virtual_table_obj.position[1],
+        'scale_x': virtual_table_obj.scale[0],
+        'scale_y': virtual_table_obj.scale[1],
+        'dynamic_lighting_enabled': virtual_table_obj.dynamic_lighting_enabled,
+        'fog_exploration_mode': virtual_table_obj.fog_exploration_mode,
+        'ambient_light_level': virtual_table_obj.ambient_light_level,
+        'grid_cell_px': getattr(virtual_table_obj, 'grid_cell_px', 50.0),
+        'cell_distance': getattr(virtual_table_obj, 'cell_distance', 5.0),
+        'distance_unit': getattr(virtual_table_obj, 'distance_unit', 'ft'),
+        'difficult_terrain_json': json.dumps(_serialize_difficult_terrain(virtual_table_obj)),
+        'cover_zones_json': json.dumps(_serialize_cover_zones(virtual_table_obj)),
+        'fog_json': json.dumps(virtual_table_obj.fog.encode()),
+    }
+    if virtual_table_obj.layer_visibility is not None:
+        columns['layer_visibility'] = json.dumps(virtual_table_obj.layer_visibility)
+    return columns
+
+
+def _entity_columns(entity_obj) -> dict:
+    """Entity model column values for an in-memory Entity (ORM attribute names)."""
+    controlled_by = getattr(entity_obj, 'controlled_by', None)
+    if controlled_by:
+        controlled_by = json.dumps(controlled_by) if isinstance(controlled_by, list) else controlled_by
+    else:
+        controlled_by = None
+    return {
+        'entity_id': entity_obj.entity_id,
+        'sprite_id': entity_obj.sprite_id,
+        'name': entity_obj.name,
+        'position_x': int(entity_obj.position[0]),
+        'position_y': int(entity_obj.position[1]),
+        'layer': entity_obj.layer,
+        'texture_path': entity_obj.texture_path,
+        'asset_id': getattr(entity_obj, 'asset_id', None),
+        'width': entity_obj.width or 0.0,
+        'height': entity_obj.height or 0.0,
+        'scale_x': entity_obj.scale_x,
+        'scale_y': entity_obj.scale_y,
+        'rotation': entity_obj.rotation,
+        'obstacle_type': entity_obj.obstacle_type,
+        'obstacle_data': json.dumps(entity_obj.obstacle_data) if entity_obj.obstacle_data else None,
+        'entity_metadata': getattr(entity_obj, 'metadata', None),
+        'character_id': getattr(entity_obj, 'character_id', None),
+        'controlled_by': controlled_by,
+        'hp': getattr(entity_obj, 'hp', None),
+        'max_hp': getattr(entity_obj, 'max_hp', None),
+        'ac': getattr(entity_obj, 'ac', None),
+        'aura_radius': getattr(entity_obj, 'aura_radius', None),
+        'aura_color': getattr(entity_obj, 'aura_color', None),
+        'aura_radius_units': getattr(entity_obj, 'aura_radius_units', None),
+        'vision_radius': getattr(entity_obj, 'vision_radius', None),
+        'has_darkvision': bool(getattr(entity_obj, 'has_darkvision', False)),
+        'darkvision_radius': getattr(entity_obj, 'darkvision_radius', None),
+        'vision_radius_units': getattr(entity_obj, 'vision_radius_units', None),
+        'darkvision_radius_units': getattr(entity_obj, 'darkvision_radius_units', None),
+    }
+
+
 def _serialize_difficult_terrain(virtual_table_obj) -> list[list[int]]:
     cells: set[tuple[int, int]] = (
         getattr(virtual_table_obj, 'difficult_terrain_cells', set()) or set()
@@ -829,6 +961,7 @@ def load_table_from_db(db: Session, table_id: str):
     """
     try:
         from core_table.entities import Wall
+        from core_table.fog import FogRegion, legacy_fog_region
         from core_table.table import CoverZone, Entity, VirtualTable
 
         db_table = get_virtual_table_by_id(db, table_id)
@@ -924,10 +1057,8 @@ def load_table_from_db(db: Session, table_id: str):
                 virtual_table.sprite_to_entity[entity.sprite_id] = entity.entity_id
 
             # Update grid (skip if position is out of bounds or layer doesn't exist)
-            if (entity.layer in virtual_table.grid and
-                0 <= entity.position[1] < len(virtual_table.grid[entity.layer]) and
-                0 <= entity.position[0] < len(virtual_table.grid[entity.layer][0])):
-                virtual_table.grid[entity.layer][entity.position[1]][entity.position[0]] = entity.entity_id
+            if entity.layer in virtual_table.grid and virtual_table.is_valid_position(entity.position):
+                virtual_table.grid[entity.layer].set(entity.position[0], entity.position[1], entity.entity_id)
 
             # Update next entity ID
             if entity.entity_id is not None and entity.entity_id >= virtual_table.next_entity_id:
@@ -938,6 +1069,14 @@ def load_table_from_db(db: Session, table_id: str):
         for db_wall in get_table_walls(db, db_table.table_id):
             virtual_table.add_wall(Wall.from_dict(db_wall.to_dict()))
 
+        # Tables saved before fog_json existed keep their fog as fog_of_war
+        # entities; the next fog edit replaces those with the region.
+        if db_table.fog_json:
+            virtual_table.fog = FogRegion.decode(json.loads(db_table.fog_json))
+        else:
+            virtual_table.fog = legacy_fog_region(virtual_table.entities.values())
+
+        virtual_table.mark_persisted()
         return virtual_table, True
 
     except Exception as e:
@@ -1033,6 +1172,18 @@ def get_paint_strokes_for_table(db: Session, table_id: str) -> list[models.Paint
     return db.query(models.PaintStroke).filter(models.PaintStroke.table_id == table_id).order_by(models.PaintStroke.created_at).all()
 
 
+def get_table_join_rows(
+    db: Session, table_id: str, include_walls: bool = True,
+) -> tuple[Optional[str], list[models.PaintStroke], list[models.Wall]]:
+    """Layer settings JSON, paint strokes and (optionally) walls a joining client needs, in one session."""
+    layer_settings = db.query(models.VirtualTable.layer_settings).filter(
+        models.VirtualTable.table_id == table_id
+    ).limit(1).scalar()
+    strokes = get_paint_strokes_for_table(db, table_id)
+    walls = get_table_walls(db, table_id) if include_walls else []
+    return layer_settings, strokes, walls
+
+
 def get_paint_stroke(db: Session, table_id: str, stroke_id: str) -> Optional[models.PaintStroke]:
     return db.query(models.PaintStroke).filter(
         models.PaintStroke.table_id == table_id,
@@ -1262,8 +1413,17 @@ def delete_paint_template(
 
 # ── CombatEncounter persistence ───────────────────────────────────────────────
 
-def upsert_combat_encounter(db: Session, session_code: str, state_dict: dict) -> None:
-    """Create or update the persisted CombatEncounter for a session."""
+def upsert_combat_encounter(
+    db: Session,
+    session_code: str,
+    state_dict: dict,
+    log_pages: list[dict] | None = None,
+) -> None:
+    """Create or update the persisted CombatEncounter for a session.
+
+    ``log_pages`` are action log pages sealed since the last save
+    (``CombatLogPage.to_dict()``); they are stored in the same commit.
+    """
     game_session = get_game_session_by_code(db, session_code)
     if not game_session:
         return
@@ -1286,9 +1446,51 @@ def upsert_combat_encounter(db: Session, session_code: str, state_dict: dict) ->
     enc.combatants_json = json.dumps(state_dict.get('combatants', []))
     enc.settings_json = json.dumps(state_dict.get('settings', {}))
     enc.action_log_json = json.dumps(state_dict.get('action_log', []))
+    # Journal patches newer than the snapshot's own version are replayed on load
+    enc.checkpoint_version = int(state_dict.get('state_version', 0) or 0)
+    store_combat_log_pages(db, enc.encounter_id, log_pages or [])
     db.commit()
 
 
+def store_combat_log_pages(db: Session, encounter_id: str, pages: list[dict]) -> None:
+    """Add sealed action log pages that are not stored yet; the caller commits.
+
+    Pages are immutable, so a page already stored (a retried save) is skipped.
+    """
+    if not pages:
+        return
+    stored = {
+        index for (index,) in db.query(models.CombatActionLogPage.page_index).filter(
+            models.CombatActionLogPage.encounter_id == encounter_id,
+            models.CombatActionLogPage.page_index.in_([int(page['index']) for page in pages]),
+        )
+    }
+    for page in pages:
+        index = int(page['index'])
+        if index in stored:
+            continue
+        stored.add(index)
+        db.add(models.CombatActionLogPage(
+            encounter_id=encounter_id,
+            page_index=index,
+            actions_json=json.dumps(page.get('actions', [])),
+        ))
+
+
+def load_combat_log_actions(db: Session, encounter_id: str, first_page: int, last_page: int) -> list[dict]:
+    """Actions of the stored log pages ``first_page``..``last_page``, oldest first."""
+    rows = (
+        db.query(models.CombatActionLogPage.actions_json)
+        .filter(
+            models.CombatActionLogPage.encounter_id == encounter_id,
+            models.CombatActionLogPage.page_index >= first_page,
+            models.CombatActionLogPage.page_index <= last_page,
+        )
+        .order_by(models.CombatActionLogPage.page_index)
+    )
+    return [action for (actions_json,) in rows for action in json.loads(actions_json)]
+
+
 def load_active_combat_encounter(db: Session, session_code: str) -> dict | None:
     """Load the most recent non-ended CombatEncounter for a session."""
     game_session = get_game_session_by_code(db, session_code)
@@ -1308,7 +1510,10 @@ def load_active_combat_encounter(db: Session, session_code: str) -> dict | None:
     if enc is None:
         return None
 
-    return {
+    from core_table.combat_journal import apply_patch
+    from core_table.combat_log import PAGE_SIZE
+
+    state = {
         'combat_id': enc.encounter_id,
         'session_id': session_code,
         'table_id': enc.table_id,
@@ -1318,8 +1523,36 @@ def load_active_combat_encounter(db: Session, session_code: str) -> dict | None:
         'combatants': json.loads(enc.combatants_json or '[]'),
         'settings': json.loads(enc.settings_json or '{}'),
         'action_log': json.loads(enc.action_log_json or '[]'),
-        'state_version': enc.state_version,
     }
+    # The JSON columns are a checkpoint; replay the patches journaled since
+    patches = (
+        db.query(models.CombatActionJournal.patch_json)
+        .filter(
+            models.CombatActionJournal.encounter_id == enc.encounter_id,
+            models.CombatActionJournal.state_version > (enc.checkpoint_version or 0),
+        )
+        .order_by(models.CombatActionJournal.state_version, models.CombatActionJournal.id)
+    )
+    for (patch_json,) in patches:
+        if patch_json:
+            state = apply_patch(state, json.loads(patch_json))
+    # Entries sealed into stored pages since the checkpoint leave the window
+    stored_pages = db.query(func.count(models.CombatActionLogPage.id)).filter(
+        models.CombatActionLogPage.encounter_id == enc.encounter_id,
+    ).scalar() or 0
+    log_base = stored_pages * PAGE_SIZE
+    state['action_log'] = [
+        action for action in state['action_log']
+        if int(action.get('log_index', -1)) < 0 or int(action['log_index']) >= log_base
+    ]
+    state.update(
+        phase=enc.phase,
+        round_number=enc.round_number,
+        current_turn_index=enc.current_turn_index,
+        state_version=enc.state_version,
+        action_log_base=log_base,
+    )
+    return state
 
 
 def mark_combat_encounter_ended(db: Session, combat_id: str) -> None:
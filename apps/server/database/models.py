@@ -131,6 +131,8 @@ class VirtualTable(Base):
     background_color_hex: Mapped[Optional[str]] = mapped_column(String(9), default='#2a3441')
     difficult_terrain_json: Mapped[Optional[str]] = mapped_column(Text, default="[]")
     cover_zones_json: Mapped[Optional[str]] = mapped_column(Text, default="[]")
+    # Fogged area as compact bands (core_table.fog.FogRegion.encode)
+    fog_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=utc_now)
     updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=utc_now, onupdate=utc_now)
@@ -492,9 +494,11 @@ class CombatEncounter(Base):
     round_number: Mapped[int] = mapped_column(Integer, default=0)
     current_turn_index: Mapped[int] = mapped_column(Integer, default=0)
     state_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Version the JSON columns below reflect; later combat_actions patches replay on top
+    checkpoint_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     combatants_json: Mapped[Optional[str]] = mapped_column(Text, default="[]")            # serialised list[Combatant]
     settings_json: Mapped[Optional[str]] = mapped_column(Text, default="{}")              # CombatSettings
-    action_log_json: Mapped[Optional[str]] = mapped_column(Text, default="[]")            # list[CombatAction]
+    action_log_json: Mapped[Optional[str]] = mapped_column(Text, default="[]")            # recent list[CombatAction]; older in combat_action_log_pages
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=utc_now)
@@ -527,7 +531,8 @@ class CombatActionJournal(Base):
     command_type: Mapped[str] = mapped_column(String(50), nullable=False)
     command_payload_json: Mapped[str] = mapped_column(Text, nullable=False)
     result_payload_json: Mapped[str] = mapped_column(Text, nullable=False)
-    state_before_json: Mapped[str] = mapped_column(Text, nullable=False)
+    patch_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)                # core_table.combat_journal patch
+    state_before_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)         # full state (rows before patches)
     state_after_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     state_version: Mapped[int] = mapped_column(Integer, nullable=False)
     created_by: Mapped[Optional[int]] = mapped_column(
@@ -538,6 +543,29 @@ class CombatActionJournal(Base):
     created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=utc_now)
 
 
+class CombatActionLogPage(Base):
+    """Immutable page of ``PAGE_SIZE`` combat log entries (core_table.combat_log)."""
+    __tablename__ = "combat_action_log_pages"
+    __table_args__ = (
+        UniqueConstraint(
+            "encounter_id",
+            "page_index",
+            name="uq_combat_action_log_page",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    encounter_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("combat_encounters.encounter_id"),
+        nullable=False,
+        index=True,
+    )
+    page_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    actions_json: Mapped[str] = mapped_column(Text, nullable=False)                       # list[CombatAction]
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=utc_now)
+
+
 class ChoiceEncounter(Base):
     """Durable snapshot for the lightweight choice encounter workflow."""
     __tablename__ = "choice_encounters"
@@ -27,9 +27,11 @@ from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from routers import audit, auth, compendium, demo, game, invitations, telemetry, users
 from routers.users import get_current_user_optional
 from service.game_session import ConnectionManager
+from service.persistence_worker import get_persistence_worker
 from service.readiness import ReadinessChecker
 from sqlalchemy.orm import Session
 from starlette.middleware.sessions import SessionMiddleware
+from storage.r2_executor import get_r2_executor
 from storage.r2_manager import R2AssetManager
 from utils.audit import persist_http_security_decision
 from utils.http_security import add_security_headers, trusted_origins, unsafe_request_rejection
@@ -94,10 +96,18 @@ async def lifespan(app: FastAPI):
     audit_retention_cleanup = asyncio.create_task(audit_retention_task())
     chat_retention_cleanup = asyncio.create_task(chat_retention_task())
 
+    # Write-behind persistence; replay anything a crashed process left unwritten
+    persistence_worker = get_persistence_worker()
+    persistence_worker.start()
+    await persistence_worker.recover()
+
     yield
 
     # Shutdown
     await app_state.connection_manager.close_all()
+    await persistence_worker.stop(flush=True)
+    # Let in-flight R2 calls finish without blocking the loop
+    await asyncio.get_running_loop().run_in_executor(None, get_r2_executor().shutdown)
     cleanup_task.cancel()
     audit_retention_cleanup.cancel()
     chat_retention_cleanup.cancel()
@@ -9,6 +9,7 @@ from typing import Optional
 import core_table
 from config import Settings
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
 from service.character_rules import (
     ASI_LEVELS,
     MULTICLASS_DATA,
@@ -17,6 +18,7 @@ from service.character_rules import (
     XP_THRESHOLDS,
 )
 from service.compendium_artifact import CompendiumArtifact
+from service.compendium_responses import CACHE_CONTROL, CompendiumResponseCache
 
 
 def _set_cache_headers(request: Request, response: Response) -> None:
@@ -26,13 +28,36 @@ def _set_cache_headers(request: Request, response: Response) -> None:
         return
     if compendium_service.artifact_version:
         response.headers["ETag"] = f'"{compendium_service.artifact_version}"'
-    response.headers["Cache-Control"] = "public, max-age=300, stale-while-revalidate=60"
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+class CachedCompendiumRoute(APIRoute):
+    """Serve successful GETs from the encoded response cache and honour If-None-Match."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if "GET" not in self.methods or self.path.endswith("/status"):
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            key = response_cache.key(request)
+            entry = response_cache.get(key)
+            if entry is not None:
+                return response_cache.respond(request, entry, "hit")
+            response = await handler(request)
+            if response.status_code != 200 or not compendium_service.artifact_version:
+                return response
+            entry = response_cache.put(key, bytes(response.body), response.media_type or "application/json")
+            return response_cache.respond(request, entry, "miss")
+
+        return cached_handler
 
 
 router = APIRouter(
     prefix="/api/compendium",
     tags=["compendium"],
     dependencies=[Depends(_set_cache_headers)],
+    route_class=CachedCompendiumRoute,
 )
 
 assert core_table.__file__ is not None, "core_table must be a file-based module"
@@ -52,6 +77,7 @@ compendium_service = CompendiumArtifact(
     COMPENDIUM_DIR,
     require_manifest=settings.is_production,
 )
+response_cache = CompendiumResponseCache(compendium_service)
 
 
 def _data(name: str) -> dict:
@@ -60,6 +86,66 @@ def _data(name: str) -> dict:
         raise HTTPException(status_code=503, detail="Compendium artifact is not available")
     return value
 
+
+def _lookup(data_key: str, kind: str, name: str) -> Optional[dict]:
+    """Case-insensitive record lookup through the generation's search index."""
+    _data(data_key)
+    return compendium_service.index.get(kind, name)
+
+
+SEARCH_FACETS = {
+    "spell": ("level", "school", "class"),
+    "monster": ("cr", "type", "size"),
+    "equipment": ("category", "rarity"),
+}
+
+@router.get("/search")
+async def search_compendium(
+    q: str = Query("", max_length=200, description="Full-text query; the last word may be a name prefix"),
+    kind: Optional[list[str]] = Query(None, description="Record kinds: spell, monster, equipment, feat, race, class, background"),
+    level: Optional[int] = Query(None, description="Spell level"),
+    school: Optional[str] = Query(None, description="Spell school"),
+    spell_class: Optional[str] = Query(None, alias="class", description="Class that can cast the spell"),
+    cr: Optional[str] = Query(None, description="Monster challenge rating"),
+    monster_type: Optional[str] = Query(None, alias="type", description="Monster type"),
+    size: Optional[str] = Query(None, description="Monster size"),
+    category: Optional[str] = Query(None, description="Equipment category"),
+    rarity: Optional[str] = Query(None, description="Item rarity"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Number of ranked results to skip"),
+):
+    """Ranked full-text, prefix and faceted search across the whole compendium"""
+    if not compendium_service.data:
+        raise HTTPException(status_code=503, detail="Compendium artifact is not available")
+    kinds = kind or []
+    facets = ["kind"] + [
+        facet for record_kind, names in SEARCH_FACETS.items()
+        if not kinds or record_kind in kinds
+        for facet in names
+    ]
+    result = compendium_service.index.search(
+        q,
+        filters={
+            "kind": kinds, "level": level, "school": school, "class": spell_class, "cr": cr,
+            "type": monster_type, "size": size, "category": category, "rarity": rarity,
+        },
+        limit=limit,
+        offset=offset,
+        facets=facets,
+    )
+    return {
+        "query": q,
+        "results": [
+            {"kind": hit.kind, "name": hit.name, "score": hit.score, "record": hit.record}
+            for hit in result.hits
+        ],
+        "count": len(result.hits),
+        "total": result.total,
+        "facets": result.facets,
+        "limit": limit,
+        "offset": offset,
+    }
+
 @router.get("/status")
 async def get_compendium_status():
     """Get compendium API status and data availability"""
@@ -67,6 +153,7 @@ async def get_compendium_status():
         "status": "online" if compendium_service.data else "unavailable",
         "artifact_version": compendium_service.artifact_version,
         "verified": compendium_service.verified,
+        "storage": compendium_service.storage,
         "artifact": compendium_service.metadata,
         "data_availability": {
             "character_data": "character_data" in compendium_service.data,
@@ -87,7 +174,7 @@ async def get_compendium_status():
 @router.get("/races")
 async def get_races():
     """Get all race data"""
-    races = _data("character_data").get('races', [])
+    races = list(_data("character_data").get('races', []))
     return {
         "races": races,
         "count": len(races)
@@ -96,8 +183,7 @@ async def get_races():
 @router.get("/races/{race_name}")
 async def get_race_by_name(race_name: str):
     """Get specific race by name"""
-    races = _data("character_data").get('races', [])
-    race = next((r for r in races if r['name'].lower() == race_name.lower()), None)
+    race = _lookup("character_data", "race", race_name)
 
     if not race:
         raise HTTPException(status_code=404, detail=f"Race '{race_name}' not found")
@@ -107,7 +193,7 @@ async def get_race_by_name(race_name: str):
 @router.get("/classes")
 async def get_classes():
     """Get all class data"""
-    classes = _data("character_data").get('classes', [])
+    classes = list(_data("character_data").get('classes', []))
     return {
         "classes": classes,
         "count": len(classes)
@@ -116,8 +202,7 @@ async def get_classes():
 @router.get("/classes/{class_name}/subclasses")
 async def get_class_subclasses(class_name: str):
     """Get subclasses for a specific class"""
-    classes = _data("character_data").get('classes', [])
-    char_class = next((c for c in classes if c['name'].lower() == class_name.lower()), None)
+    char_class = _lookup("character_data", "class", class_name)
     if not char_class:
         raise HTTPException(status_code=404, detail=f"Class '{class_name}' not found")
 
@@ -128,8 +213,7 @@ async def get_class_subclasses(class_name: str):
 @router.get("/classes/{class_name}")
 async def get_class_by_name(class_name: str):
     """Get specific class by name"""
-    classes = _data("character_data").get('classes', [])
-    char_class = next((c for c in classes if c['name'].lower() == class_name.lower()), None)
+    char_class = _lookup("character_data", "class", class_name)
 
     if not char_class:
         raise HTTPException(status_code=404, detail=f"Class '{class_name}' not found")
@@ -139,7 +223,7 @@ async def get_class_by_name(class_name: str):
 @router.get("/backgrounds")
 async def get_backgrounds():
     """Get all background data"""
-    backgrounds = _data("character_data").get('backgrounds', [])
+    backgrounds = list(_data("character_data").get('backgrounds', []))
     return {
         "backgrounds": backgrounds,
         "count": len(backgrounds)
@@ -148,8 +232,7 @@ async def get_backgrounds():
 @router.get("/backgrounds/{background_name}")
 async def get_background_by_name(background_name: str):
     """Get specific background by name"""
-    backgrounds = _data("character_data").get('backgrounds', [])
-    background = next((b for b in backgrounds if b['name'].lower() == background_name.lower()), None)
+    background = _lookup("character_data", "background", background_name)
 
     if not background:
         raise HTTPException(status_code=404, detail=f"Background '{background_name}' not found")
@@ -158,6 +241,7 @@ async def get_background_by_name(background_name: str):
 
 @router.get("/spells")
 async def get_spells(
+    q: Optional[str] = Query(None, max_length=200, description="Full-text query; results are ranked"),
     level: Optional[int] = Query(None, description="Filter by spell level"),
     school: Optional[str] = Query(None, description="Filter by spell school"),
     spell_class: Optional[str] = Query(None, alias="class", description="Filter by class that can cast the spell"),
@@ -166,30 +250,18 @@ async def get_spells(
 ):
     """Get all spell data with optional filtering"""
     spell_data = _data("spell_data")
-    spells = spell_data['spells']
-    filtered_spells = {}
-
-    count = 0
-    for name, spell in spells.items():
-        # Apply filters
-        if level is not None and spell['level'] != level:
-            continue
-        if school and spell['school'].lower() != school.lower():
-            continue
-        if spell_class and spell_class.lower() not in [c.lower() for c in spell.get('classes', [])]:
-            continue
-
-        if count >= offset:
-            filtered_spells[name] = spell
-        count += 1
-
-        # Apply limit
-        if len(filtered_spells) >= limit:
-            break
+    result = compendium_service.index.search(
+        q or "",
+        filters={"kind": "spell", "level": level, "school": school, "class": spell_class},
+        limit=limit,
+        offset=offset,
+    )
+    filtered_spells = {hit.name: hit.record for hit in result.hits}
 
     return {
         "spells": filtered_spells,
         "count": len(filtered_spells),
+        "total": result.total,
         "metadata": spell_data['metadata'],
         "limit": limit,
         "offset": offset,
@@ -198,12 +270,7 @@ async def get_spells(
 @router.get("/spells/{spell_name}")
 async def get_spell_by_name(spell_name: str):
     """Get specific spell by name"""
-    spells = _data("spell_data")['spells']
-    spell = spells.get(spell_name)
-
-    if not spell:
-        # Try case-insensitive search
-        spell = next((s for name, s in spells.items() if name.lower() == spell_name.lower()), None)
+    spell = _data("spell_data")['spells'].get(spell_name) or _lookup("spell_data", "spell", spell_name)
 
     if not spell:
         raise HTTPException(status_code=404, detail=f"Spell '{spell_name}' not found")
@@ -229,21 +296,24 @@ async def get_equipment(
 @router.get("/monsters")
 async def get_monsters(
     cr: Optional[str] = Query(None, description="Filter by challenge rating"),
+    monster_type: Optional[str] = Query(None, alias="type", description="Filter by creature type"),
+    q: Optional[str] = Query(None, max_length=200, description="Full-text query; results are ranked"),
     limit: int = Query(100, ge=1, le=500, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of matching results to skip"),
 ):
     """Get all monster data with optional filtering"""
     bestiary_data = _data("bestiary_data")
-    monsters = bestiary_data['monsters']
-
-    if cr:
-        monsters = {name: monster for name, monster in monsters.items()
-                    if str(monster.get('challenge_rating', 0)) == str(cr)}
-    page = dict(list(monsters.items())[offset:offset + limit])
+    result = compendium_service.index.search(
+        q or "",
+        filters={"kind": "monster", "cr": cr, "type": monster_type},
+        limit=limit,
+        offset=offset,
+    )
+    page = {hit.name: hit.record for hit in result.hits}
     return {
         "monsters": page,
         "count": len(page),
-        "total": len(monsters),
+        "total": result.total,
         "limit": limit,
         "offset": offset,
         "metadata": bestiary_data.get('metadata', {}),
@@ -252,12 +322,7 @@ async def get_monsters(
 @router.get("/monsters/{monster_name}")
 async def get_monster_by_name(monster_name: str):
     """Get specific monster by name"""
-    monsters = _data("bestiary_data")['monsters']
-    monster = monsters.get(monster_name)
-
-    if not monster:
-        # Try case-insensitive search
-        monster = next((m for name, m in monsters.items() if name.lower() == monster_name.lower()), None)
+    monster = _data("bestiary_data")['monsters'].get(monster_name) or _lookup("bestiary_data", "monster", monster_name)
 
     if not monster:
         raise HTTPException(status_code=404, detail=f"Monster '{monster_name}' not found")
@@ -288,8 +353,7 @@ async def get_feats(
 @router.get("/feats/{feat_name}")
 async def get_feat_by_name(feat_name: str):
     """Get a specific feat by name"""
-    feats = _data("feats_data").get('feats', [])
-    feat = next((f for f in feats if f['name'].lower() == feat_name.lower()), None)
+    feat = _lookup("feats_data", "feat", feat_name)
     if not feat:
         raise HTTPException(status_code=404, detail=f"Feat '{feat_name}' not found")
     return feat
@@ -2,24 +2,25 @@
 Server-side R2 Asset Management Service for TTRPG System
 Handles presigned URLs, asset validation, and client permissions
 """
+import asyncio
 import logging
 import os
 import time
-import warnings
 from dataclasses import dataclass
 from datetime import timedelta
-from io import BytesIO
 from typing import Dict, List, Optional, Tuple
 
-import xxhash
 from config import Settings
 from database.database import SessionLocal
 from database.models import Asset, AssetUploadIntent, GamePlayer, GameSession, SessionAsset
-from PIL import Image, UnidentifiedImageError
+from storage.r2_executor import get_r2_executor
 from storage.r2_manager import R2AssetManager
 from utils.observability import track_asset_operation
 from utils.time import utc_now
 
+from .upload_verifier import ImageHeaderError, verify_image_stream
+
+_settings = Settings()
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -58,6 +59,9 @@ class ServerAssetManager:
 
     def __init__(self):
         self.r2_manager = R2AssetManager()
+        # Blocking R2 calls run here, off the event loop
+        self.r2_executor = get_r2_executor()
+        self._verification_slots = asyncio.Semaphore(_settings.asset_verify_concurrency)
         self.session_permissions: Dict[str, Dict[int, AssetPermission]] = {}  # session_code -> user_id -> permissions
 
         # Rate limiting
@@ -351,7 +355,8 @@ class ServerAssetManager:
 
             # Generate presigned URL (24 hours for session assets)
             expiry_seconds = 86400
-            presigned_url = self.r2_manager.generate_presigned_url(
+            presigned_url = await self.r2_executor.run(
+                self.r2_manager.generate_presigned_url,
                 asset_metadata["r2_key"],
                 method="GET",
                 expiration=expiry_seconds
@@ -406,7 +411,8 @@ class ServerAssetManager:
                 )
             # Generate presigned URL (24 hours for session assets)
             expiry_seconds = 86400
-            presigned_url = self.r2_manager.generate_presigned_url(
+            presigned_url = await self.r2_executor.run(
+                self.r2_manager.generate_presigned_url,
                 asset_metadata["r2_key"],
                 method="GET",
                 expiration=expiry_seconds
@@ -472,7 +478,11 @@ class ServerAssetManager:
                     )
                     return True
 
-                verified, verification_error, object_found, reject_object = self._verify_uploaded_asset(intent)
+                # Bounds concurrent verifications, and with the chunk size their memory
+                async with self._verification_slots:
+                    verified, verification_error, object_found, reject_object = await self.r2_executor.run(
+                        self._verify_uploaded_asset, intent
+                    )
                 if not verified:
                     if not object_found:
                         intent.status = "missing_object"
@@ -484,7 +494,7 @@ class ServerAssetManager:
                     intent.confirmed_at = utc_now()
                     db.commit()
                     if reject_object:
-                        self._delete_rejected_upload(intent.r2_key)
+                        await self.r2_executor.run(self._delete_rejected_upload, intent.r2_key)
                     logger.error(
                         f"Asset {asset_id} failed R2 verification; refusing DB asset commit: "
                         f"{verification_error}"
@@ -493,7 +503,7 @@ class ServerAssetManager:
 
                 final_r2_key = self._generate_r2_key(intent.asset_id, intent.filename)
                 if intent.r2_key != final_r2_key:
-                    if not self.r2_manager.promote_file(intent.r2_key, final_r2_key):
+                    if not await self.r2_executor.run(self.r2_manager.promote_file, intent.r2_key, final_r2_key):
                         intent.status = "promotion_failed"
                         intent.error_message = "Verified upload could not be promoted to durable storage"
                         intent.confirmed_at = utc_now()
@@ -621,6 +631,7 @@ class ServerAssetManager:
             "pending_uploads": pending_uploads,
             "failed_uploads": failed_uploads,
             "r2_configured": self.r2_manager.is_r2_configured(),
+            "r2_executor": self.r2_executor.stats(),
             "active_sessions": len(self.session_permissions),
             "note": "Confirmed assets and pending upload intents are durable"
         }
@@ -711,7 +722,8 @@ class ServerAssetManager:
 
             # Generate presigned URL with xxHash metadata (1 hour expiry)
             expiry_seconds = 3600
-            presigned_url = self.r2_manager.generate_presigned_upload_url(
+            presigned_url = await self.r2_executor.run(
+                self.r2_manager.generate_presigned_upload_url,
                 r2_key,
                 file_xxhash,
                 content_type=request.content_type,
@@ -958,7 +970,7 @@ class ServerAssetManager:
         """Verify if asset exists in R2 storage"""
         try:
             # Use R2Manager to check if object exists
-            exists = self.r2_manager.object_exists(r2_key)
+            exists = await self.r2_executor.run(self.r2_manager.object_exists, r2_key)
             return exists
         except Exception:
             logger.exception("R2 asset verification failed")
@@ -993,37 +1005,28 @@ class ServerAssetManager:
         if not intent.xxhash or actual_xxhash != intent.xxhash:
             return False, "Uploaded xxHash metadata did not match the upload intent", True, True
 
+        # Hash and sniff the header chunk by chunk; the object is never held
+        # in memory or decoded (see service.upload_verifier)
         try:
-            object_bytes = self.r2_manager.get_object_bytes(intent.r2_key, self.max_file_size)
+            result = verify_image_stream(self.r2_manager.iter_object_chunks(
+                intent.r2_key, self.max_file_size, _settings.asset_verify_chunk_bytes
+            ))
+        except ImageHeaderError:
+            return False, "Uploaded image bytes failed validation", True, True
         except Exception:
             logger.exception("R2 object inspection failed")
             return False, "Unable to inspect uploaded image bytes", True, False
 
-        calculated_xxhash = xxhash.xxh64(object_bytes).hexdigest()
-        if calculated_xxhash != intent.xxhash:
+        if result.xxhash != intent.xxhash:
             return False, "Uploaded content hash did not match the upload intent", True, True
 
         file_ext = os.path.splitext(intent.filename.lower())[1]
         expected_format = self.allowed_image_types.get(file_ext, (None, None))[1]
-        try:
-            with warnings.catch_warnings():
-                warnings.simplefilter("error", Image.DecompressionBombWarning)
-                with Image.open(BytesIO(object_bytes)) as image:
-                    if image.format != expected_format:
-                        return False, (
-                            f"Decoded image format {image.format or 'unknown'} did not match "
-                            f"expected format {expected_format or 'unknown'}"
-                        ), True, True
-                    image.verify()
-                with Image.open(BytesIO(object_bytes)) as image:
-                    image.load()
-        except (
-            UnidentifiedImageError,
-            OSError,
-            Image.DecompressionBombError,
-            Image.DecompressionBombWarning,
-        ):
-            return False, "Uploaded image bytes failed validation", True, True
+        if result.header.format != expected_format:
+            return False, (
+                f"Image format {result.header.format} did not match "
+                f"expected format {expected_format or 'unknown'}"
+            ), True, True
 
         return True, "", True, False
 
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import math
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
 from core_table.combat import Combatant, CombatState
 from core_table.dice import DiceEngine, DiceRollResult
 from core_table.session_rules import SessionRules
+from utils.observability import record_cover_lookups
 
 if TYPE_CHECKING:
     from core_table.table import VirtualTable
@@ -23,6 +26,14 @@ class AttackResult:
     reason: str = ""
 
 
+@dataclass
+class AttackOdds:
+    """Exact chances of an attack, without rolling (previews, NPC AI)."""
+    hit_chance: float = 0.0
+    crit_chance: float = 0.0
+    expected_damage: float = 0.0
+
+
 @dataclass
 class SaveResult:
     success: bool
@@ -46,41 +57,13 @@ class AttackResolver:
         attack_type: str = 'melee',
         table: Optional['VirtualTable'] = None,
     ) -> AttackResult:
-        # Advantage/disadvantage from conditions
-        conds = attacker.condition_types()
         target_conds = target.condition_types()
-        if 'poisoned' in conds or 'frightened' in conds:
-            disadvantage = True
-        if 'blinded' in conds:
-            disadvantage = True
-        if 'invisible' in conds:
-            advantage = True
-        # Prone: melee has advantage, ranged has disadvantage
-        if 'prone' in target_conds:
-            advantage = True  # simplified: assume melee
-
-        # Dodge: target used Dodge action → attacker has disadvantage
-        if target.is_dodging:
-            disadvantage = True
-        if attack_type == 'ranged' and combat is not None and table is not None:
-            if self._has_adjacent_hostile(attacker, combat, table):
-                disadvantage = True
-
-        # Cover AC bonus (applies to target's effective AC)
-        cover_ac = 0
-        if table is not None and getattr(self.rules, 'enforce_cover', True):
-            attacker_sprite = table.sprite_to_entity.get(str(getattr(attacker, 'entity_id', '')))
-            target_sprite = table.sprite_to_entity.get(str(getattr(target, 'entity_id', '')))
-            if attacker_sprite is not None and target_sprite is not None:
-                ae = table.entities.get(attacker_sprite)
-                te = table.entities.get(target_sprite)
-                if ae and te:
-                    a_pos = (float(ae.position[0]), float(ae.position[1]))
-                    t_pos = (float(te.position[0]), float(te.position[1]))
-                    cover = AttackResolver.resolve_cover(a_pos, t_pos, table)
-                    cover_ac = {'half': 2, 'three_quarters': 5, 'full': 999}.get(cover, 0)
-                    if cover_ac == 999:
-                        return AttackResult(hit=False, reason="Target has full cover")
+        advantage, disadvantage = self._roll_mode(
+            attacker, target, advantage, disadvantage, combat, attack_type, table,
+        )
+        cover_ac = self._cover_ac(attacker, target, table)
+        if cover_ac == 999:
+            return AttackResult(hit=False, reason="Target has full cover")
 
         effective_ac = target.armor_class + cover_ac
 
@@ -104,6 +87,8 @@ class AttackResolver:
         is_crit = roll.is_critical or any(t in target_conds for t in INCAPACITATING_COND)
         dmg_roll = DiceEngine.roll(damage_formula)
         if is_crit:
+            # apply_critical reads the flag from the damage roll itself
+            dmg_roll.is_critical = True
             dmg_roll = DiceEngine.apply_critical(dmg_roll, self.rules.critical_hit_rule)
 
         return AttackResult(
@@ -111,6 +96,104 @@ class AttackResolver:
             damage_roll=dmg_roll, damage_dealt=max(0, dmg_roll.total),
         )
 
+    def attack_odds(
+        self, attacker: Combatant, target: Combatant,
+        attack_bonus: int, damage_formula: str,
+        advantage: bool = False, disadvantage: bool = False,
+        combat: Optional[CombatState] = None,
+        attack_type: str = 'melee',
+        table: Optional['VirtualTable'] = None,
+    ) -> AttackOdds:
+        """Hit chance, crit chance and expected damage of ``resolve_attack`` with these arguments."""
+        advantage, disadvantage = self._roll_mode(
+            attacker, target, advantage, disadvantage, combat, attack_type, table,
+        )
+        cover_ac = self._cover_ac(attacker, target, table)
+        if cover_ac == 999:
+            return AttackOdds()
+        effective_ac = target.armor_class + cover_ac
+        mode = 'advantage' if advantage and not disadvantage else (
+            'disadvantage' if disadvantage and not advantage else None
+        )
+        auto_crit = any(t in target.condition_types() for t in INCAPACITATING_COND)
+
+        hit = crit = 0.0
+        for face, p in DiceEngine.compile('1d20').distribution(mode).items():
+            if face == 1 and mode != 'advantage':
+                continue  # natural 1; with advantage a 1 needs both dice
+            if face == 20 or face + attack_bonus >= effective_ac:
+                hit += p
+                if face == 20 or auto_crit:
+                    crit += p
+
+        damage = DiceEngine.compile(damage_formula)
+        try:
+            totals = damage.distribution()
+        except ValueError:
+            totals = {round(damage.mean): 1.0}  # too many totals to enumerate: use the mean
+        normal = sum(p * max(0, total) for total, p in totals.items())
+        critical = sum(p * max(0, self._critical_total(total, damage)) for total, p in totals.items())
+        return AttackOdds(
+            hit_chance=hit,
+            crit_chance=crit,
+            expected_damage=(hit - crit) * normal + crit * critical,
+        )
+
+    def _critical_total(self, total: int, damage) -> int:
+        """``DiceEngine.apply_critical`` on a roll of ``total`` (dice sum plus modifier)."""
+        rule = self.rules.critical_hit_rule
+        if rule == 'double_dice':
+            return 2 * total - damage.modifier
+        if rule == 'max_dice':
+            return max(total, damage.max_total)
+        if rule == 'double_total':
+            return 2 * total
+        return total
+
+    def _roll_mode(
+        self, attacker: Combatant, target: Combatant,
+        advantage: bool, disadvantage: bool,
+        combat: Optional[CombatState], attack_type: str,
+        table: Optional['VirtualTable'],
+    ) -> tuple[bool, bool]:
+        """Advantage and disadvantage after conditions, Dodge and adjacent hostiles."""
+        conds = attacker.condition_types()
+        target_conds = target.condition_types()
+        if 'poisoned' in conds or 'frightened' in conds:
+            disadvantage = True
+        if 'blinded' in conds:
+            disadvantage = True
+        if 'invisible' in conds:
+            advantage = True
+        # Prone: melee has advantage, ranged has disadvantage
+        if 'prone' in target_conds:
+            advantage = True  # simplified: assume melee
+
+        # Dodge: target used Dodge action → attacker has disadvantage
+        if target.is_dodging:
+            disadvantage = True
+        if attack_type == 'ranged' and combat is not None and table is not None:
+            if self._has_adjacent_hostile(attacker, combat, table):
+                disadvantage = True
+        return advantage, disadvantage
+
+    def _cover_ac(self, attacker: Combatant, target: Combatant, table: Optional['VirtualTable']) -> int:
+        """Cover AC bonus (applies to target's effective AC); 999 for full cover."""
+        if table is None or not getattr(self.rules, 'enforce_cover', True):
+            return 0
+        attacker_sprite = table.sprite_to_entity.get(str(getattr(attacker, 'entity_id', '')))
+        target_sprite = table.sprite_to_entity.get(str(getattr(target, 'entity_id', '')))
+        if attacker_sprite is None or target_sprite is None:
+            return 0
+        ae = table.entities.get(attacker_sprite)
+        te = table.entities.get(target_sprite)
+        if not (ae and te):
+            return 0
+        a_pos = (float(ae.position[0]), float(ae.position[1]))
+        t_pos = (float(te.position[0]), float(te.position[1]))
+        cover = AttackResolver.resolve_cover(a_pos, t_pos, table)
+        return {'half': 2, 'three_quarters': 5, 'full': 999}.get(cover, 0)
+
     def resolve_saving_throw(
         self, combatant: Combatant, ability: str, dc: int,
         bonus: int = 0
@@ -121,18 +204,12 @@ class AttackResolver:
     @staticmethod
     def resolve_cover(attacker_pos: tuple, target_pos: tuple, table: 'VirtualTable') -> str:
         """Return cover tier ('none'|'half'|'three_quarters'|'full') from cover zones on the table."""
-        zones = getattr(table, 'cover_zones', [])
-        if not zones:
-            return 'none'
-        tier_order = {'none': 0, 'half': 1, 'three_quarters': 2, 'full': 3}
-        best = 'none'
-        ax, ay = attacker_pos
-        tx, ty = target_pos
-        for zone in zones:
-            if _los_blocked_by_zone(ax, ay, tx, ty, zone):
-                if tier_order.get(zone.cover_tier, 0) > tier_order.get(best, 0):
-                    best = zone.cover_tier
-        return best
+        return COVER_CACHE.cover_many(table, attacker_pos, [target_pos])[0]
+
+    @staticmethod
+    def resolve_cover_many(attacker_pos: tuple, target_positions: Iterable[tuple], table: 'VirtualTable') -> list[str]:
+        """Cover tier of each target position from one attacker, in order (e.g. an area attack)."""
+        return COVER_CACHE.cover_many(table, attacker_pos, target_positions)
 
     @staticmethod
     def _has_adjacent_hostile(attacker: Combatant, combat: CombatState, table: 'VirtualTable') -> bool:
@@ -161,6 +238,138 @@ class AttackResolver:
         return False
 
 
+# ── Cover cache ───────────────────────────────────────────────────────────────
+
+COVER_TIERS = ('none', 'half', 'three_quarters', 'full')
+_TIER_RANK = {tier: rank for rank, tier in enumerate(COVER_TIERS)}
+
+# (rank, bounding box, zone), strongest tier first
+_ZoneShape = tuple[int, tuple[float, float, float, float], Any]
+
+
+class _TableCover:
+    def __init__(self, version: int, shapes: list[_ZoneShape]):
+        self.version = version
+        self.shapes = shapes
+        self.tiers: OrderedDict[tuple[tuple[float, float], tuple[float, float]], str] = OrderedDict()
+
+
+class CoverCache:
+    """Cover tiers per table, keyed by attacker point, target point and ``cover_version``.
+
+    Hover previews repeat the same attacker/target pairs many times between
+    cover zone edits. Each table keeps its zones' bounding boxes (strongest
+    tier first) and up to ``max_entries`` computed tiers; editing the zones
+    bumps the table's ``cover_version`` and drops both.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._tables: weakref.WeakKeyDictionary[Any, _TableCover] = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+    def cover_many(self, table: Any, attacker_pos: tuple, target_positions: Iterable[tuple]) -> list[str]:
+        targets = [(float(x), float(y)) for x, y in target_positions]
+        zones = getattr(table, 'cover_zones', None) or []
+        if not zones:
+            return ['none'] * len(targets)
+        attacker = (float(attacker_pos[0]), float(attacker_pos[1]))
+        entry = self._entry(table, zones)
+        if entry is None:
+            # No cover_version to trust (e.g. a stand-in table): compute without caching
+            return _cover_against(attacker, targets, _zone_shapes(zones))
+
+        results: list[Optional[str]] = []
+        missing: list[int] = []
+        for target in targets:
+            tier = entry.tiers.get((attacker, target))
+            if tier is None:
+                missing.append(len(results))
+            else:
+                entry.tiers.move_to_end((attacker, target))
+            results.append(tier)
+        if missing:
+            computed = _cover_against(attacker, [targets[i] for i in missing], entry.shapes)
+            for i, tier in zip(missing, computed):
+                results[i] = entry.tiers[(attacker, targets[i])] = tier
+            while len(entry.tiers) > self.max_entries:
+                entry.tiers.popitem(last=False)
+        hits = len(targets) - len(missing)
+        self.hits += hits
+        self.misses += len(missing)
+        record_cover_lookups(hits, len(missing))
+        return results  # type: ignore[return-value]
+
+    def _entry(self, table: Any, zones: list) -> Optional[_TableCover]:
+        version = getattr(table, 'cover_version', None)
+        if not isinstance(version, int):
+            return None
+        try:
+            entry = self._tables.get(table)
+            if entry is None or entry.version != version:
+                entry = self._tables[table] = _TableCover(version, _zone_shapes(zones))
+        except TypeError:  # not weak-referenceable
+            return None
+        return entry
+
+
+# Shared by every resolver; entries die with their table
+COVER_CACHE = CoverCache()
+
+
+def _zone_shapes(zones: Iterable[Any]) -> list[_ZoneShape]:
+    shapes = []
+    for zone in zones:
+        rank = _TIER_RANK.get(zone.cover_tier, 0)
+        box = _zone_bounds(zone)
+        if rank and box is not None:
+            shapes.append((rank, box, zone))
+    shapes.sort(key=lambda shape: -shape[0])
+    return shapes
+
+
+def _zone_bounds(zone: Any) -> Optional[tuple[float, float, float, float]]:
+    st, c = zone.shape_type, zone.coords
+    if st == 'rect' and len(c) == 4:
+        x, y, w, h = c
+        return min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+    if st == 'circle' and len(c) == 3:
+        cx, cy, r = c
+        return cx - r, cy - r, cx + r, cy + r
+    if st == 'polygon' and len(c) >= 3:
+        xs = [p[0] for p in c]
+        ys = [p[1] for p in c]
+        return min(xs), min(ys), max(xs), max(ys)
+    return None
+
+
+def _cover_against(attacker: tuple[float, float], targets: list[tuple[float, float]], shapes: list[_ZoneShape]) -> list[str]:
+    """Best cover tier of each target; zones whose box misses the line of fire are skipped."""
+    ax, ay = attacker
+    out = []
+    for tx, ty in targets:
+        lo_x, hi_x = (ax, tx) if ax <= tx else (tx, ax)
+        lo_y, hi_y = (ay, ty) if ay <= ty else (ty, ay)
+        best = 0
+        for rank, (x1, y1, x2, y2), zone in shapes:
+            if x1 > hi_x or x2 < lo_x or y1 > hi_y or y2 < lo_y:
+                continue
+            if _los_blocked_by_zone(ax, ay, tx, ty, zone):
+                best = rank  # strongest tier first, so nothing later beats it
+                break
+        out.append(COVER_TIERS[best])
+    return out
+
+
 # ── Geometry helpers ──────────────────────────────────────────────────────────
 
 def _seg_intersect(ax, ay, bx, by, cx, cy, dx, dy) -> bool:
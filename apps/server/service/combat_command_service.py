@@ -2,13 +2,13 @@ from __future__ import annotations
 
 import time
 import uuid
-from copy import deepcopy
 from dataclasses import dataclass
 from dataclasses import field as dataclass_field
 from enum import Enum
 from typing import Any, Awaitable, Callable, Optional
 
 from core_table.combat import CombatAction, CombatState
+from core_table.combat_journal import CombatSnapshot, apply_patch, capture, diff_state
 from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 from service.combat_persistence_service import CombatPersistenceService
 from utils.roles import is_dm
@@ -248,7 +248,7 @@ class CombatCommandService:
         if not state:
             return self._reject(envelope.sequence_id, 0, "No active combat")
 
-        snapshot = deepcopy(state.to_dict())
+        snapshot = capture(state)
         duplicate = self._find_duplicate(envelope, context, state.combat_id)
         if duplicate:
             return duplicate
@@ -333,7 +333,7 @@ class CombatCommandService:
         ):
             return self._reject(envelope.sequence_id, 0, "No active combat")
 
-        snapshot = deepcopy(state.to_dict()) if state else None
+        snapshot = capture(state) if state else None
         duplicate = self._find_duplicate(envelope, context, state.combat_id) if state else None
         if duplicate:
             return duplicate
@@ -610,13 +610,15 @@ class CombatCommandService:
         if (
             last_action is None
             or last_action.command_type in {"dm_revert_action", "revert_action"}
-            or not last_action.state_before
+            or not (last_action.patch or last_action.state_before)
         ):
             return {"error": "Nothing to revert"}
 
-        from core_table.combat import CombatState
-
-        reverted_state = CombatState.from_dict(last_action.state_before)
+        if last_action.patch:
+            reverted = apply_patch(state.to_dict(), last_action.patch, reverse=True)
+        else:
+            reverted = last_action.state_before
+        reverted_state = CombatState.from_dict(reverted)
         self._engine._active[context.session_code] = reverted_state
         return {
             "reverted": True,
@@ -916,8 +918,7 @@ class CombatCommandService:
         if not hasattr(table, "cover_zones"):
             table.cover_zones = []
         previous_zones = list(table.cover_zones)
-        table.cover_zones = [item for item in table.cover_zones if item.zone_id != zone.zone_id]
-        table.cover_zones.append(zone)
+        table.cover_zones = [item for item in table.cover_zones if item.zone_id != zone.zone_id] + [zone]
         persist_error = self._save_table(context, command.table_id)
         if persist_error:
             table.cover_zones = previous_zones
@@ -1144,11 +1145,11 @@ class CombatCommandService:
             CombatCommandType.REMOVE_COVER_ZONE,
         }
 
-    def _restore(self, session_code: str, snapshot: dict[str, Any] | None) -> None:
+    def _restore(self, session_code: str, snapshot: CombatSnapshot | None) -> None:
         if snapshot is None:
             self._engine._active.pop(session_code, None)
             return
-        self._engine._active[session_code] = CombatState.from_dict(snapshot)
+        self._engine._active[session_code] = snapshot.to_state()
 
     def _persist(self, session_code: str) -> None:
         persist = getattr(self._engine, "persist", None)
@@ -1176,18 +1177,23 @@ class CombatCommandService:
         self,
         envelope: CombatCommandEnvelope,
         context: CombatCommandContext,
-        snapshot: dict[str, Any] | None,
+        snapshot: CombatSnapshot | None,
         current: CombatState | None,
         result: CombatCommandResult,
     ) -> CombatCommandResult:
         if self._persistence is None:
             self._persist(context.session_code)
             return result
-        state_after = current.to_dict() if current is not None else result.combat
+        # result.combat is already current.to_dict(), or the ended combat
+        state_after = result.combat
+        if state_after is None and current is not None:
+            state_after = current.to_dict()
         if state_after is None:
             raise RuntimeError("Combat ended before persistence")
 
         command_types = [command.type.value for command in envelope.commands]
+        # Log pages sealed by this command; a failed write restores the snapshot, which still holds them
+        log_pages = current.action_log.drain_pages() if current is not None else []
         persisted = self._persistence.persist_accepted(
             session_code=context.session_code,
             requester_key=self._persistence.requester_key(
@@ -1199,12 +1205,15 @@ class CombatCommandService:
             command_type=command_types[0] if len(command_types) == 1 else "batch",
             command_payload=envelope.model_dump(mode="json"),
             result_payload=result.to_dict(),
-            state_before=snapshot or {},
+            patch=diff_state(snapshot, state_after) if snapshot is not None else None,
             state_after=state_after,
             created_by=context.user_id,
+            log_pages=[page.to_dict() for page in log_pages],
         )
         if current is not None:
             current.state_version = persisted.state_version
+            if persisted.duplicate:
+                current.action_log.requeue_pages(log_pages)
         return CombatCommandResult.from_dict(
             persisted.result,
             duplicate=persisted.duplicate,
@@ -1213,7 +1222,7 @@ class CombatCommandService:
     async def _restore_async(
         self,
         context: CombatCommandContext,
-        snapshot: dict[str, Any] | None,
+        snapshot: CombatSnapshot | None,
         move_undos: list[tuple[str, str, dict[str, float], dict[str, float]]],
     ) -> None:
         if context.move_sprite is not None:
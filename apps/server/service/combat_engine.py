@@ -17,11 +17,21 @@ from core_table.conditions import ActiveCondition, ConditionType
 from core_table.dice import DiceEngine
 from core_table.session_rules import SessionRules
 
+from .persistence_worker import get_persistence_worker, persistence_op
 from .spell_resolver import SpellResolver
 
 logger = logging.getLogger(__name__)
 
 
+@persistence_op('combat.upsert')
+def write_combat_snapshot(payload: dict) -> None:
+    """Upsert one ``CombatState.to_dict()`` snapshot and its newly sealed log pages (runs on a worker thread)."""
+    from database.crud import upsert_combat_encounter
+    from database.database import SessionLocal
+    with SessionLocal() as db:
+        upsert_combat_encounter(db, payload['session_id'], payload['state'], payload.get('log_pages'))
+
+
 class CombatEngine:
     """Server-authoritative combat orchestrator. One per active combat."""
 
@@ -77,16 +87,39 @@ class CombatEngine:
 
     @classmethod
     def persist(cls, session_id: str) -> None:
-        """Synchronously snapshot the current combat state to the DB."""
+        """Snapshot the current combat state to the DB.
+
+        Queued on the persistence worker when it runs (a newer snapshot
+        replaces a queued one); written synchronously otherwise. Sealed
+        action log pages are drained only when the write is about to run and
+        handed back to the log if it fails, so a replaced intent loses none.
+        """
         state = cls._active.get(session_id)
         if not state:
             return
+        drained: list = []
+
+        def payload() -> dict:
+            drained[:] = state.action_log.drain_pages()
+            return {
+                'session_id': session_id,
+                'state': state.to_dict(),
+                'log_pages': [page.to_dict() for page in drained],
+            }
+
+        def requeue(_exc: BaseException | None = None) -> None:
+            state.action_log.requeue_pages(drained)
+            drained.clear()
+
         try:
-            from database.crud import upsert_combat_encounter
-            from database.database import SessionLocal
-            with SessionLocal() as db:
-                upsert_combat_encounter(db, session_id, state.to_dict())
+            worker = get_persistence_worker()
+            if worker.running:
+                if not worker.submit(('combat', session_id), 'combat.upsert', prepare=payload, on_error=requeue):
+                    logger.warning('Persistence queue full; combat state for %s not queued', session_id)
+                return
+            write_combat_snapshot(payload())
         except Exception as exc:  # never let persistence crash combat
+            requeue()
             logger.warning('Failed to persist combat state: %s', exc)
 
     @classmethod
@@ -4,6 +4,7 @@ import json
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from database.crud import store_combat_log_pages
 from database.database import SessionLocal
 from database.models import CombatActionJournal, CombatEncounter, GameSession
 from sqlalchemy.exc import IntegrityError
@@ -19,12 +20,29 @@ class PersistedCombatCommand:
 @dataclass(frozen=True)
 class CombatJournalEntry:
     command_type: str
-    state_before: dict[str, Any]
     state_version: int
+    # Reversible patch (core_table.combat_journal); rows written before
+    # patches existed carry the full state_before instead.
+    patch: dict[str, Any] | None = None
+    state_before: dict[str, Any] | None = None
 
 
 class CombatPersistenceService:
-    """Atomically append an accepted command and update its combat snapshot."""
+    """Atomically append an accepted command and update its combat snapshot.
+
+    Each journal row stores the command's reversible patch. The encounter's
+    combatants, settings and action log are a checkpoint: they are rewritten
+    only every ``CHECKPOINT_INTERVAL`` versions, when combat starts or changes
+    phase, and when no patch is available. In between, only the small turn
+    columns are updated, and loading replays the patches written after
+    ``checkpoint_version``.
+
+    Action log pages sealed by the command (``core_table.combat_log``) are
+    stored in the same transaction, so every accepted action writes a
+    bounded amount no matter how long the encounter runs.
+    """
+
+    CHECKPOINT_INTERVAL = 20
 
     def __init__(self, session_factory: Callable = SessionLocal):
         self._session_factory = session_factory
@@ -63,8 +81,9 @@ class CombatPersistenceService:
                 return None
             return CombatJournalEntry(
                 command_type=action.command_type,
-                state_before=json.loads(action.state_before_json or "{}"),
                 state_version=action.state_version,
+                patch=json.loads(action.patch_json) if action.patch_json else None,
+                state_before=json.loads(action.state_before_json) if action.state_before_json else None,
             )
 
     def persist_accepted(
@@ -77,9 +96,10 @@ class CombatPersistenceService:
         command_type: str,
         command_payload: dict[str, Any],
         result_payload: dict[str, Any],
-        state_before: dict[str, Any],
+        patch: dict[str, Any] | None,
         state_after: dict[str, Any],
         created_by: int | None,
+        log_pages: list[dict[str, Any]] | None = None,
     ) -> PersistedCombatCommand:
         encounter_id = str(state_after['combat_id'])
         with self._session_factory() as db:
@@ -105,7 +125,10 @@ class CombatPersistenceService:
             if isinstance(stored_result.get('combat'), dict):
                 stored_result['combat'] = dict(stored_result['combat'])
                 stored_result['combat']['state_version'] = next_version
-            self._update_snapshot(encounter, state_after, next_version)
+            if self._needs_checkpoint(encounter, patch, next_version):
+                self._update_snapshot(encounter, state_after, next_version)
+            else:
+                self._update_turn(encounter, state_after, next_version)
             action = CombatActionJournal(
                 encounter_id=encounter_id,
                 requester_key=requester_key,
@@ -113,13 +136,14 @@ class CombatPersistenceService:
                 actor_id=actor_id,
                 command_type=command_type,
                 command_payload_json=json.dumps(command_payload),
-                result_payload_json=json.dumps(stored_result),
-                state_before_json=json.dumps(state_before),
+                result_payload_json=json.dumps(self._journal_result(stored_result, state_after)),
+                patch_json=json.dumps(patch) if patch is not None else None,
                 state_after_hash=str(state_after.get('state_hash', '')),
                 state_version=next_version,
                 created_by=created_by,
             )
             db.add(action)
+            store_combat_log_pages(db, encounter_id, log_pages or [])
             try:
                 db.commit()
             except IntegrityError:
@@ -135,6 +159,17 @@ class CombatPersistenceService:
                 raise
             return PersistedCombatCommand(stored_result, next_version)
 
+    @staticmethod
+    def _journal_result(result: dict[str, Any], state_after: dict[str, Any]) -> dict[str, Any]:
+        """The result as journaled for duplicate requests.
+
+        Duplicates of a command in a running combat are answered from the
+        live state, so the full combat snapshot is kept only once combat ended.
+        """
+        if 'combat' not in result or state_after.get('phase') == 'ended':
+            return result
+        return {key: value for key, value in result.items() if key != 'combat'}
+
     @staticmethod
     def _find_action(db, encounter_id, requester_key, sequence_id):
         return db.query(CombatActionJournal).filter(
@@ -179,8 +214,20 @@ class CombatPersistenceService:
         db.flush()
         return encounter
 
+    def _needs_checkpoint(
+        self,
+        encounter: CombatEncounter,
+        patch: dict[str, Any] | None,
+        state_version: int,
+    ) -> bool:
+        if patch is None or state_version == 1:
+            return True
+        if 'phase' in patch.get('fields', {}):
+            return True
+        return state_version - int(encounter.checkpoint_version or 0) >= self.CHECKPOINT_INTERVAL
+
     @staticmethod
-    def _update_snapshot(
+    def _update_turn(
         encounter: CombatEncounter,
         state_after: dict[str, Any],
         state_version: int,
@@ -189,6 +236,16 @@ class CombatPersistenceService:
         encounter.round_number = state_after.get('round_number', 1)
         encounter.current_turn_index = state_after.get('current_turn_index', 0)
         encounter.state_version = state_version
+
+    @classmethod
+    def _update_snapshot(
+        cls,
+        encounter: CombatEncounter,
+        state_after: dict[str, Any],
+        state_version: int,
+    ) -> None:
+        cls._update_turn(encounter, state_after, state_version)
+        encounter.checkpoint_version = state_version
         encounter.combatants_json = json.dumps(state_after.get('combatants', []))
         encounter.settings_json = json.dumps(state_after.get('settings', {}))
         encounter.action_log_json = json.dumps(state_after.get('action_log', []))
@@ -61,14 +61,57 @@ class CombatStatePresenter:
         )
         return view
 
+    @staticmethod
+    def action_log_for_client(
+        state: Any,
+        actions: list[dict[str, Any]],
+        role: str | None,
+    ) -> list[dict[str, Any]]:
+        """Action log entries (e.g. an older history page) as ``role`` may see them."""
+        if is_dm(role):
+            return actions
+        visible_ids = {
+            str(combatant.combatant_id)
+            for combatant in getattr(state, 'combatants', [])
+            if not (getattr(combatant, 'is_hidden', False) and getattr(combatant, 'is_npc', False))
+        }
+        return CombatStatePresenter._sanitize_action_log(actions, visible_ids)
+
+    @staticmethod
+    def view_class(state: Any, role: str | None, user_id: int | None) -> tuple:
+        """Recipients with the same view class get identical views of ``state``.
+
+        Apart from the role, a player's view only depends on which visible
+        combatants they control (those keep ``controlled_by``).
+        """
+        if is_dm(role):
+            return ('dm',)
+        if role == SessionRole.SPECTATOR.value:
+            return ('spectator',)
+        if user_id is None:
+            return ('player', ())
+        user = str(user_id)
+        return ('player', tuple(
+            str(combatant.combatant_id)
+            for combatant in getattr(state, 'combatants', [])
+            if user in (str(value) for value in getattr(combatant, 'controlled_by', ()) or ())
+        ))
+
     @staticmethod
     def message_for_client(
         state: Any,
         role: str | None,
         user_id: int | None,
         context: dict[str, Any] | None = None,
+        combat: dict | None = None,
     ) -> dict[str, Any]:
-        combat = CombatStatePresenter.for_client(state, role, user_id)
+        """Combat message payload for one recipient.
+
+        ``combat`` is the recipient's view when the caller already has it
+        (e.g. from a ``CombatViewCache``); it is shared, not copied.
+        """
+        if combat is None:
+            combat = CombatStatePresenter.for_client(state, role, user_id)
         data = deepcopy(context or {})
         data.pop('combat', None)
         if is_dm(role) or combat is None:
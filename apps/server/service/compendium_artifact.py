@@ -1,4 +1,11 @@
-"""Verified, atomic loading for generated compendium artifacts."""
+"""Verified, atomic loading for generated compendium artifacts.
+
+A generation is read from its JSON files, or from ``compendium.pack`` when
+``scripts/compendium/pack_artifact.py`` has packed them (see
+``core_table.compendium_pack``). The pack is memory-mapped and its records are
+decoded on demand. It is used only when it was packed from exactly the files
+the manifest describes or, without a manifest, when no JSON file is newer.
+"""
 
 from __future__ import annotations
 
@@ -8,6 +15,8 @@ import re
 from pathlib import Path
 from typing import Any
 
+from core_table.compendium_pack import PACK_NAME, CompendiumPack
+from service.compendium_index import CompendiumIndex
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -35,30 +44,38 @@ class CompendiumArtifact:
     def __init__(self, directory: Path, *, require_manifest: bool):
         self.directory = directory.resolve()
         self.require_manifest = require_manifest
-        self.data: dict[str, dict[str, Any]] = {}
+        self.generation = 0
+        self.data = {}
         self.artifact_version: str | None = None
         self.verified = False
         self.metadata: dict[str, Any] = {}
         self.error_code: str | None = None
+        self.storage: str | None = None
         self.load()
 
+    @property
+    def data(self) -> dict[str, dict[str, Any]]:
+        return self._published[0]
+
+    @data.setter
+    def data(self, value: dict[str, dict[str, Any]]) -> None:
+        """Publish a generation together with its search index, never one without the other."""
+        self._published = (value, CompendiumIndex(value))
+        self.generation += 1
+
+    @property
+    def index(self) -> CompendiumIndex:
+        return self._published[1]
+
     def load(self) -> None:
         """Replace the active generation only after every file validates."""
         try:
             manifest = self._read_manifest()
-            loaded: dict[str, dict[str, Any]] = {}
-            content_hash = hashlib.sha256()
-            for data_key, filename in REQUIRED_FILES.items():
-                path = self.directory / filename
-                raw = path.read_bytes()
-                content_hash.update(filename.encode("utf-8"))
-                content_hash.update(raw)
-                if manifest is not None:
-                    self._verify_file(filename, raw, manifest)
-                value = json.loads(raw)
-                if not isinstance(value, dict):
-                    raise CompendiumArtifactError(f"{filename} must contain a JSON object")
-                loaded[data_key] = value
+            pack = self._current_pack(manifest)
+            if pack is not None:
+                loaded, content_digest = self._load_pack(pack)
+            else:
+                loaded, content_digest = self._load_json(manifest)
 
             self._validate_shapes(loaded)
             self.data = loaded
@@ -67,8 +84,9 @@ class CompendiumArtifact:
             self.artifact_version = (
                 manifest["artifact_version"]
                 if manifest is not None
-                else f"unverified-{content_hash.hexdigest()[:16]}"
+                else f"unverified-{content_digest[:16]}"
             )
+            self.storage = "pack" if pack is not None else "json"
             self.error_code = None
             logger.info(
                 "Compendium artifact loaded",
@@ -76,6 +94,7 @@ class CompendiumArtifact:
                     "event_name": "compendium.artifact.loaded",
                     "artifact_version": self.artifact_version,
                     "verified": self.verified,
+                    "storage": self.storage,
                 },
             )
         except (OSError, ValueError, KeyError, json.JSONDecodeError, CompendiumArtifactError):
@@ -85,6 +104,59 @@ class CompendiumArtifact:
                 extra={"event_name": "compendium.artifact.invalid", "outcome": "error"},
             )
 
+    def _load_json(self, manifest: dict[str, Any] | None) -> tuple[dict[str, dict[str, Any]], str]:
+        loaded: dict[str, dict[str, Any]] = {}
+        content_hash = hashlib.sha256()
+        for data_key, filename in REQUIRED_FILES.items():
+            path = self.directory / filename
+            raw = path.read_bytes()
+            content_hash.update(filename.encode("utf-8"))
+            content_hash.update(raw)
+            if manifest is not None:
+                self._verify_file(filename, raw, manifest)
+            value = json.loads(raw)
+            if not isinstance(value, dict):
+                raise CompendiumArtifactError(f"{filename} must contain a JSON object")
+            loaded[data_key] = value
+        return loaded, content_hash.hexdigest()
+
+    def _current_pack(self, manifest: dict[str, Any] | None) -> CompendiumPack | None:
+        """The directory's pack, unless it was packed from other files than the active ones."""
+        path = self.directory / PACK_NAME
+        if not path.is_file():
+            return None
+        pack = CompendiumPack(path)
+        sources = pack.metadata.get("sources")
+        if manifest is not None:
+            stale = sources != {
+                filename: {"bytes": entry["bytes"], "sha256": entry["sha256"]}
+                for filename, entry in manifest["files"].items()
+            }
+        else:
+            packed_at = path.stat().st_mtime
+            stale = any(
+                (self.directory / filename).is_file() and (self.directory / filename).stat().st_mtime > packed_at
+                for filename in REQUIRED_FILES.values()
+            )
+        if stale:
+            logger.warning(
+                "Compendium pack is stale; loading JSON files",
+                extra={"event_name": "compendium.pack.stale", "outcome": "fallback"},
+            )
+            return None
+        return pack
+
+    @staticmethod
+    def _load_pack(pack: CompendiumPack) -> tuple[dict[str, dict[str, Any]], str]:
+        pack.verify()
+        documents = pack.documents()
+        if set(documents) != set(REQUIRED_FILES.values()):
+            raise CompendiumArtifactError("compendium pack must contain exactly the required files")
+        digest = pack.metadata.get("content_sha256")
+        if not isinstance(digest, str) or not _SHA256.fullmatch(digest):
+            raise CompendiumArtifactError("compendium pack has no content digest")
+        return {data_key: documents[filename] for data_key, filename in REQUIRED_FILES.items()}, digest
+
     def readiness(self) -> dict[str, Any]:
         if self.error_code:
             return {"ok": False, "code": self.error_code}
@@ -0,0 +1,313 @@
+"""
+In-memory search index over one compendium generation.
+
+The compendium routes used to scan the loaded JSON on every request, lowering
+names element by element. ``CompendiumIndex`` is built once when a generation
+is published (``CompendiumArtifact.data``) and answers:
+
+- name lookups (case-insensitive, per record kind) from a dict;
+- faceted filters (kind, level, school, class, cr, type, size, category,
+  rarity, source) from per-value posting sets;
+- full-text and prefix queries from inverted indexes over tokenized names and
+  every text field of a record.
+
+A query matches a record only if every query token matches it: exactly as a
+name or text term, or as the prefix of a name term (so ``"fire bo"`` finds
+*Fire Bolt* while the user is still typing). Matches are ranked by term
+weight (exact name > name prefix > body text) scaled by inverse document
+frequency, with a bonus when the whole query is the name or its start. Ties,
+and filter-only queries, keep the artifact's order.
+
+The index is immutable once built and is swapped together with the data it
+was built from, so a request never sees a half-built generation. It is built
+on first use rather than at publication, and it keeps each record's location
+instead of the record itself. A packed generation
+(``core_table.compendium_pack``) therefore stays packed: records are decoded
+while the index is built and again only when a hit or lookup returns them.
+"""
+from __future__ import annotations
+
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional, Union
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# (data key, collection key, record kind)
+SOURCES = (
+    ("character_data", "races", "race"),
+    ("character_data", "classes", "class"),
+    ("character_data", "backgrounds", "background"),
+    ("spell_data", "spells", "spell"),
+    ("bestiary_data", "monsters", "monster"),
+    ("equipment_data", "equipment", "equipment"),
+    ("feats_data", "feats", "feat"),
+)
+
+NAME_EXACT = 4.0
+NAME_PREFIX = 2.0
+TEXT = 1.0
+WHOLE_NAME = 8.0
+NAME_STARTS = 3.0
+
+FacetValue = Union[None, str, int, float, Iterable[Any]]
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower().replace("’", "").replace("'", ""))
+
+
+def normalize_facet(value: Any) -> str:
+    """Facet values compare as lower-case strings; ``0.5`` and ``"1/2"`` are the same CR."""
+    text = str(value).strip().lower()
+    return _FRACTIONS.get(text, text)
+
+
+_FRACTIONS = {"0.125": "1/8", "0.25": "1/4", "0.5": "1/2", ".125": "1/8", ".25": "1/4", ".5": "1/2"}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    name: str
+    score: float
+    record: dict
+
+
+@dataclass
+class SearchResult:
+    hits: list[SearchHit]
+    total: int
+    facets: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+class CompendiumIndex:
+    """Inverted indexes over every record of a loaded compendium; read-only once built."""
+
+    def __init__(self, data: Mapping[str, Mapping[str, Any]]):
+        self._data = data
+        self._built = False
+        self._kinds: list[str] = []
+        self._names: list[str] = []
+        # (collection, key) of each record: collection[key] is the record
+        self._locations: list[tuple[Any, Any]] = []
+        self._doc_facets: list[dict[str, tuple[str, ...]]] = []
+        self._by_name: dict[tuple[str, str], int] = {}
+        self._facets: dict[str, dict[str, set[int]]] = {}
+        self._name_terms: dict[str, set[int]] = {}
+        self._text_terms: dict[str, dict[int, int]] = {}
+        self._name_vocabulary: list[str] = []
+
+    def build(self) -> "CompendiumIndex":
+        """Index every record now instead of on first use."""
+        if not self._built:
+            for data_key, collection_key, kind in SOURCES:
+                collection = (self._data.get(data_key) or {}).get(collection_key)
+                for name, group, record, location in _records(collection):
+                    self._add(kind, name, group, record, location)
+            self._name_vocabulary = sorted(self._name_terms)
+            self._built = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self.build()._locations)
+
+    def get(self, kind: str, name: str) -> Optional[dict]:
+        """The record of ``kind`` named ``name``, ignoring case (first one wins on clashes)."""
+        doc = self.build()._by_name.get((kind, name.lower()))
+        return None if doc is None else self._record(doc)
+
+    def search(
+        self,
+        query: str = "",
+        *,
+        filters: Optional[Mapping[str, FacetValue]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        facets: Iterable[str] = (),
+    ) -> SearchResult:
+        """Rank the records matching ``query`` and ``filters`` and return one page.
+
+        ``filters`` maps a facet to a value, or to several values of which any
+        may match; ``None`` values are ignored. ``facets`` names the facets to
+        count over all matches (not just the page).
+        """
+        self.build()
+        candidates = self._filter(filters or {})
+        tokens = tokenize(query)
+        if tokens:
+            scores = self._score(tokens, candidates)
+            phrase = " ".join(tokens)
+            for doc in scores:
+                name = " ".join(tokenize(self._names[doc]))
+                if name == phrase:
+                    scores[doc] += WHOLE_NAME
+                elif name.startswith(phrase):
+                    scores[doc] += NAME_STARTS
+            ordered = sorted(scores, key=lambda doc: (-scores[doc], doc))
+        else:
+            scores = {}
+            ordered = sorted(candidates) if candidates is not None else list(range(len(self._locations)))
+
+        hits = [
+            SearchHit(self._kinds[doc], self._names[doc], round(scores.get(doc, 0.0), 4), self._record(doc))
+            for doc in ordered[offset:offset + limit]
+        ]
+        return SearchResult(hits=hits, total=len(ordered), facets=self._count_facets(ordered, facets))
+
+    def facet_names(self) -> list[str]:
+        return sorted(self.build()._facets)
+
+    def _record(self, doc: int) -> dict:
+        collection, key = self._locations[doc]
+        return collection[key]
+
+    def _add(self, kind: str, name: str, group: Optional[str], record: Mapping, location: tuple[Any, Any]) -> None:
+        doc = len(self._locations)
+        self._kinds.append(kind)
+        self._names.append(name)
+        self._locations.append(location)
+        self._by_name.setdefault((kind, name.lower()), doc)
+
+        doc_facets = _facet_values(kind, group, record)
+        self._doc_facets.append(doc_facets)
+        for facet, values in doc_facets.items():
+            postings = self._facets.setdefault(facet, {})
+            for value in values:
+                postings.setdefault(value, set()).add(doc)
+
+        for term in tokenize(name):
+            self._name_terms.setdefault(term, set()).add(doc)
+        for key, value in record.items():
+            if key == "name":
+                continue
+            for text in _strings(value):
+                for term in tokenize(text):
+                    term_counts = self._text_terms.setdefault(term, {})
+                    term_counts[doc] = term_counts.get(doc, 0) + 1
+
+    def _filter(self, filters: Mapping[str, FacetValue]) -> Optional[set[int]]:
+        """Docs matching every filter, or ``None`` when nothing is filtered."""
+        selected: Optional[set[int]] = None
+        for facet, wanted in filters.items():
+            values = [wanted] if isinstance(wanted, (str, int, float)) or wanted is None else list(wanted)
+            values = [value for value in values if value is not None and value != ""]
+            if not values:
+                continue
+            postings = self._facets.get(facet, {})
+            docs: set[int] = set()
+            for value in values:
+                docs |= postings.get(normalize_facet(value), set())
+            selected = docs if selected is None else selected & docs
+            if not selected:
+                return set()
+        return selected
+
+    def _score(self, tokens: list[str], candidates: Optional[set[int]]) -> dict[int, float]:
+        scores: Optional[dict[int, float]] = None
+        for token in tokens:
+            matched = self._match(token, candidates if scores is None else scores.keys())
+            if scores is None:
+                scores = matched
+            else:
+                scores = {doc: scores[doc] + weight for doc, weight in matched.items()}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _match(self, token: str, within: Optional[Iterable[int]]) -> dict[int, float]:
+        """Weight of ``token`` in each doc it matches, restricted to ``within``."""
+        allowed = None if within is None else set(within)
+        size = len(self._locations)
+        matched: dict[int, float] = {}
+
+        start = bisect_left(self._name_vocabulary, token)
+        for term in self._name_vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            docs = self._name_terms[term]
+            weight = (NAME_EXACT if term == token else NAME_PREFIX) * _idf(size, len(docs))
+            for doc in docs if allowed is None else docs & allowed:
+                if weight > matched.get(doc, 0.0):
+                    matched[doc] = weight
+
+        postings = self._text_terms.get(token)
+        if postings:
+            idf = _idf(size, len(postings))
+            for doc, count in postings.items():
+                if allowed is None or doc in allowed:
+                    matched[doc] = matched.get(doc, 0.0) + TEXT * idf * (1 + math.log(count))
+        return matched
+
+    def _count_facets(self, docs: list[int], facets: Iterable[str]) -> dict[str, dict[str, int]]:
+        counts: dict[str, dict[str, int]] = {}
+        for facet in facets:
+            counter: Counter[str] = Counter()
+            for doc in docs:
+                counter.update(self._doc_facets[doc].get(facet, ()))
+            counts[facet] = dict(counter.most_common())
+        return counts
+
+
+def _idf(size: int, matches: int) -> float:
+    return math.log(1 + size / matches)
+
+
+def _records(collection: Any) -> Iterator[tuple[str, Optional[str], Mapping, tuple[Any, Any]]]:
+    """(name, group, record, location) per record of a name-keyed mapping, a list, or lists by group.
+
+    ``location`` is ``(container, key)`` with ``container[key]`` the record.
+    """
+    if isinstance(collection, Mapping):
+        for key, value in collection.items():
+            if isinstance(value, Mapping):
+                yield str(key), None, value, (collection, key)
+            elif _is_list(value):
+                for position, name, item in _named_items(value):
+                    yield name, str(key), item, (value, position)
+    elif _is_list(collection):
+        for position, name, item in _named_items(collection):
+            yield name, None, item, (collection, position)
+
+
+def _is_list(value: Any) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+
+def _named_items(items: Sequence) -> Iterator[tuple[int, str, Mapping]]:
+    for position, item in enumerate(items):
+        if isinstance(item, Mapping) and item.get("name"):
+            yield position, str(item["name"]), item
+
+
+def _facet_values(kind: str, group: Optional[str], record: Mapping) -> dict[str, tuple[str, ...]]:
+    fields: dict[str, Any] = {"kind": kind, "source": record.get("source"), "rarity": record.get("rarity")}
+    if kind == "spell":
+        fields.update(level=record.get("level"), school=record.get("school"), **{"class": record.get("classes")})
+    elif kind == "monster":
+        fields.update(cr=record.get("challenge_rating"), type=record.get("type"), size=record.get("size"))
+    elif kind == "equipment":
+        fields.update(category=group)
+
+    facets: dict[str, tuple[str, ...]] = {}
+    for facet, value in fields.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        normalized = tuple(normalize_facet(v) for v in values if v is not None and v != "")
+        if normalized:
+            facets[facet] = normalized
+    return facets
+
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
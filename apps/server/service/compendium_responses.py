@@ -0,0 +1,161 @@
+"""
+Encoded compendium responses, kept per artifact generation.
+
+Compendium payloads only change when ``CompendiumArtifact`` publishes a new
+generation, yet every page load used to re-serialize them (the bestiary alone
+is over 600 KB) and re-send them, because the ETag the router set was never
+compared with ``If-None-Match``.
+
+``CompendiumResponseCache`` stores the JSON body of each successful GET by
+route path and query string, together with a strong ETag derived from the
+body and gzip (and, when the ``brotli`` package is installed, brotli) encodings
+compressed once at store time. A request whose ``If-None-Match`` names the
+entry's ETag gets ``304 Not Modified`` without a body; otherwise the smallest
+encoding the client accepts is sent as is.
+
+Every entry belongs to the generation it was built from: when the artifact
+publishes new data (``CompendiumArtifact.generation``) or a new version, the
+whole cache is dropped.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+from utils.observability import record_compendium_response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=60"
+MIN_COMPRESS_BYTES = 1024
+ETAG_SUFFIX = {"br": "br", "gzip": "gz"}
+
+CacheKey = tuple[Hashable, ...]
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    """One serialized response and its pre-compressed variants."""
+
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+    encodings: dict[str, bytes] = field(default_factory=dict)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong validators differ per content coding: ``"abc"``, ``"abc-gz"``, ``"abc-br"``."""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{ETAG_SUFFIX[encoding]}"'
+
+    @property
+    def etags(self) -> set[str]:
+        return {self.etag_for(None), *(self.etag_for(encoding) for encoding in self.encodings)}
+
+
+class CompendiumResponseCache:
+    """Encoded GET responses for one ``CompendiumArtifact``; dropped whenever it publishes."""
+
+    def __init__(self, artifact: Any, max_entries: int = 256):
+        self.artifact = artifact
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, EncodedResponse] = OrderedDict()
+        self._token: Optional[tuple[int, Optional[str]]] = None
+        self.counters = {"hit": 0, "miss": 0, "not_modified": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(request: Request) -> CacheKey:
+        return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+    def get(self, key: CacheKey) -> Optional[EncodedResponse]:
+        self._check_generation()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: CacheKey, body: bytes, media_type: str = "application/json") -> EncodedResponse:
+        self._check_generation()
+        version = self.artifact.artifact_version or "none"
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        encodings: dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            encodings["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                encodings["br"] = brotli.compress(body, quality=5)
+        entry = EncodedResponse(body, f'"{version}-{digest}"', media_type, encodings)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, entry: EncodedResponse, outcome: str) -> Response:
+        """Serve ``entry``: 304 when the client already holds it, else its best encoding."""
+        encoding = negotiate(request.headers.get("accept-encoding", ""), entry.encodings)
+        headers = {"ETag": entry.etag_for(encoding), "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if if_none_match(request.headers.get("if-none-match"), entry.etags):
+            self._count("not_modified")
+            return Response(status_code=304, headers=headers)
+        self._count(outcome)
+        if encoding is None:
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(entry.encodings[encoding], media_type=entry.media_type, headers=headers)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _check_generation(self) -> None:
+        token = (self.artifact.generation, self.artifact.artifact_version)
+        if token != self._token:
+            self._entries.clear()
+            self._token = token
+
+    def _count(self, outcome: str) -> None:
+        self.counters[outcome] += 1
+        record_compendium_response(outcome)
+
+
+def negotiate(accept_encoding: str, available: dict[str, bytes]) -> Optional[str]:
+    """Pick ``br`` over ``gzip`` among the codings the client accepts (``q`` > 0)."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def if_none_match(header: Optional[str], etags: set[str]) -> bool:
+    """``If-None-Match`` uses the weak comparison: ``W/`` prefixes are ignored."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
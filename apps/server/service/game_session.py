@@ -6,6 +6,7 @@ import uuid
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Union
 
+from core_table.codec import Frame, MessageCodec, decode_frame
 from core_table.protocol import Message, MessageType
 
 # Database imports
@@ -22,6 +23,31 @@ from .game_session_protocol import GameSessionProtocolService
 
 logger = setup_logger(__name__)
 
+_PROTOCOL_TYPES = frozenset(member.value for member in MessageType)
+
+
+def decode_inbound(frame: Frame, codec: Optional[MessageCodec] = None) -> Union[Message, dict]:
+    """Decode a client frame exactly once.
+
+    Protocol messages come back as a ``Message`` that is passed as-is through
+    routing and dispatch. Envelopes whose type is not a MessageType stay dicts
+    for ConnectionManager's legacy handling. Raises ValueError for anything
+    that is not a well-formed message object.
+    """
+    data = decode_frame(frame, codec)
+    if not isinstance(data, dict):
+        raise ValueError("WebSocket message must be an object")
+    message_type = data.get("type")
+    if not isinstance(message_type, str) or message_type not in _PROTOCOL_TYPES:
+        return data
+    if not isinstance(data.get("message_id"), str):
+        data.pop("message_id", None)
+    try:
+        return Message.from_dict(data)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid protocol envelope") from exc
+
+
 class ConnectionManager:
     """Manages WebSocket connections for game sessions with protocol support"""
 
@@ -38,7 +64,8 @@ class ConnectionManager:
 
     async def connect(self, websocket: WebSocket, session_code: str,
                       user_id: int, username: str, role: str = "player",
-                      connection_id: str | None = None) -> str:
+                      connection_id: str | None = None, codec: str = "json",
+                      subprotocol: str | None = None) -> str:
         """Connect a user to a game session with protocol support"""
         client_id = self._generate_client_id()
         if session_code not in self.sessions_protocols:
@@ -67,7 +94,7 @@ class ConnectionManager:
         else:
             protocol_service = self.sessions_protocols[session_code]
 
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections.setdefault(session_code, []).append(websocket)
         self.connection_info[websocket] = {
             "session_code": session_code,
@@ -76,6 +103,7 @@ class ConnectionManager:
             "role": role,
             "client_id": client_id,
             "connection_id": connection_id or uuid.uuid4().hex,
+            "codec": codec,
             "connected_at": datetime.now(timezone.utc),
         }
 
@@ -91,6 +119,7 @@ class ConnectionManager:
                 "role": role,
                 "session_code": session_code,
                 "connection_id": self.connection_info[websocket]["connection_id"],
+                "codec": codec,
             })
         except PermissionError:
             logger.warning(
@@ -139,12 +168,12 @@ class ConnectionManager:
                 if protocol_service:
                     # Save to database before cleanup
                     try:
-                        protocol_service.save_to_database()
+                        await protocol_service.save_async()
                         logger.info(f"Session {session_code} data saved to database before cleanup")
                     except Exception as e:
                         logger.error(f"Error saving session {session_code} to database: {e}")
 
-                    protocol_service.cleanup()
+                    protocol_service.cleanup(save=False)
                     del self.sessions_protocols[session_code]
 
                     # Clean up R2 asset session data
@@ -178,6 +207,9 @@ class ConnectionManager:
 
     async def close_all(self, reason: str = "Service restarting") -> int:
         """Drain all sockets so session state is flushed before process exit."""
+        # Let queued protocol frames go out ahead of the shutdown notice
+        for protocol_service in list(self.sessions_protocols.values()):
+            await protocol_service.flush_sends(timeout=5.0)
         websockets = list(self.connection_info)
         for websocket in websockets:
             try:
@@ -256,11 +288,12 @@ class ConnectionManager:
         for ws in disconnected_websockets:
             await self.disconnect(ws)
 
-    async def handle_message(self, websocket: WebSocket, message_data: dict):
-        """Handle incoming message from a websocket with protocol support"""
+    async def handle_message(self, websocket: WebSocket, message: Union[Message, dict]):
+        """Route an inbound message; protocol ``Message`` objects go to the session unchanged"""
+        message_type = message.type.value if isinstance(message, Message) else message.get("type")
         try:
-            message_type = message_data.get("type")
-            data = message_data.get("data", {})
+            if isinstance(message, dict) and self._is_protocol_message(message):
+                message = Message.from_dict(message)
 
             if websocket not in self.connection_info:
                 await self.send_personal_message({
@@ -273,17 +306,12 @@ class ConnectionManager:
             session_code = info["session_code"]
             username = info["username"]
 
-            # Check if this is a protocol message (contains MessageType fields)
-            if self._is_protocol_message(message_data):
-                logger.debug(f"Processing as protocol message: {message_data.get('type')}")
-                # Handle as protocol message
+            if isinstance(message, Message):
                 protocol_service = self.sessions_protocols.get(session_code)
 
                 if protocol_service:
-                    # Convert to protocol message format
                     try:
-                        protocol_message_str = json.dumps(message_data)
-                        await protocol_service.handle_protocol_message(websocket, protocol_message_str)
+                        await protocol_service.handle_protocol_message(websocket, message)
                         return
                     except Exception:
                         logger.exception(
@@ -306,15 +334,13 @@ class ConnectionManager:
                         "data": {"error": "Error processing message"},
                     }, websocket)
                     return
-            else:
-                logger.debug(f"Processing as regular message: {message_data.get('type')}")
 
             # Handle regular game session messages
             # Add sender info
 
             response_message = {
                 "type": message_type,
-                "data": data,
+                "data": message.get("data", {}),
                 "sender": username,
                 "timestamp": utc_now().isoformat()
             }
@@ -347,7 +373,7 @@ class ConnectionManager:
                 "WebSocket message handling failed",
                 extra={
                     "event_name": "websocket.message.failed",
-                    "message_type": str(message_data.get("type", "unknown"))[:80],
+                    "message_type": str(message_type or "unknown")[:80],
                     "outcome": "error",
                 },
             )
@@ -7,26 +7,44 @@ storage, ban handling, and client management for a multiplayer session.
 import asyncio
 import json
 import time
+from collections.abc import Callable, Iterable
 from typing import Dict, List, Optional
 
 from config import Settings
+from core_table.codec import Frame, get_codec
 from core_table.protocol import Message, MessageType
 from core_table.server import TableManager
+from database import crud
 from database import models as db_models
 from database.crud import append_ban_to_session
+from database.database import SessionLocal
 from fastapi import WebSocket
 from utils.logger import log_context, setup_logger
+from utils.observability import record_ws_inbound_stage
 from utils.roles import get_permissions, get_visible_layers
 from utils.roles import is_dm as _is_dm
 from utils.time import utc_now
 
 from .asset_manager import get_server_asset_manager
+from .persistence_worker import get_persistence_worker, persistence_op
+from .send_queue import ClientSendQueue, OverflowPolicy, overflow_policy
 from .server_protocol import ServerProtocol
 
 logger = setup_logger(__name__)
 settings = Settings()
 
 
+@persistence_op('session.save')
+def write_session_snapshot(payload: dict) -> None:
+    """Write a ``GameSessionProtocolService._session_snapshot`` on a worker thread."""
+    with SessionLocal() as db:
+        for table in payload['tables']:
+            crud.write_table_snapshot(db, table, payload['session_id'])
+        game_session = db.get(db_models.GameSession, payload['session_id'])
+        if game_session:
+            game_session.game_data = json.dumps(payload['game_data'])
+            db.commit()
+
 
 class GameSessionProtocolService:
     """Manages table protocol within a game session with database persistence"""
@@ -37,12 +55,15 @@ class GameSessionProtocolService:
         self.game_session_db_id = game_session_db_id
 
         self.table_manager = TableManager(db_session)
+        self.table_manager.write_behind = self._schedule_table_save
         logger.info(f"TableManager initialized for session {session_code}")
 
         self.server_protocol = ServerProtocol(
             self.table_manager,
             session_manager=self,
             transport_send=self.send_to_client,
+            preview_interval=1 / settings.PREVIEW_FLUSH_HZ if settings.PREVIEW_FLUSH_HZ > 0 else 0.0,
+            delta_ring_size=settings.TABLE_DELTA_RING_SIZE,
         )
         logger.info(f"ServerProtocol initialized for session {session_code}")
 
@@ -51,6 +72,7 @@ class GameSessionProtocolService:
         self.clients: Dict[str, WebSocket] = {}  # client_id -> websocket
         self.client_info: Dict[str, dict] = {}   # client_id -> user info
         self.websocket_to_client: Dict[WebSocket, str] = {}  # websocket -> client_id
+        self.send_queues: Dict[str, ClientSendQueue] = {}  # client_id -> outbound frames
 
         if not db_session or not game_session_db_id:
             raise ValueError("A durable database session is required")
@@ -106,6 +128,16 @@ class GameSessionProtocolService:
                 logger.debug(f"Session {self.session_code} - Skipping auto-save, only {time_since_last_save:.1f}s since last save")
                 return
 
+            worker = get_persistence_worker()
+            if worker.running:
+                # Write-behind: the snapshot is taken when a thread picks the save up
+                if worker.submit(('session', self.session_code), 'session.save',
+                                 prepare=self._session_snapshot, on_error=self._save_failed):
+                    self._last_save_time = current_time
+                else:
+                    logger.warning(f"Session {self.session_code} - Auto-save deferred, persistence queue full")
+                return
+
             success = self.save_to_database()
             if success:
                 self._last_save_time = current_time
@@ -127,6 +159,49 @@ class GameSessionProtocolService:
             logger.error(f"Session {self.session_code} - Force save failed: {e}")
             return False
 
+    async def save_async(self) -> bool:
+        """Save without blocking the event loop; waits for the write to land."""
+        worker = get_persistence_worker()
+        if not worker.running or not self.game_session_db_id:
+            return self.force_save()
+        try:
+            await worker.execute('session.save', key=('session', self.session_code),
+                                 prepare=self._session_snapshot)
+        except Exception as e:
+            self._save_failed(e)
+            return False
+        self._last_save_time = time.time()
+        logger.info(f"Session {self.session_code} - Saved to database")
+        return True
+
+    def _schedule_table_save(self, table_id: str, session_id: int) -> bool:
+        """Debounced table saves join the session's queued save when the worker runs."""
+        worker = get_persistence_worker()
+        if not worker.running:
+            return self.table_manager.save_table(table_id, session_id)
+        # One key per session: saves of its tables must never overlap
+        return worker.submit(('session', self.session_code), 'session.save',
+                             prepare=self._session_snapshot, on_error=self._save_failed)
+
+    def _session_snapshot(self) -> dict:
+        """Everything ``write_session_snapshot`` needs, captured on the event loop."""
+        return {
+            'session_id': self.game_session_db_id,
+            'game_data': {
+                'client_count': len(self.clients),
+                'table_count': len(self.table_manager.tables),
+            },
+            'tables': [crud.snapshot_table_for_save(table) for table in self.table_manager.tables.values()],
+        }
+
+    def _save_failed(self, error: BaseException) -> None:
+        logger.error(f"Session {self.session_code} - Save failed: {error}")
+        # The failed snapshot consumed tracked changes; resync every table next time
+        for table in self.table_manager.tables.values():
+            changes = getattr(table, 'changes', None)
+            if changes is not None:
+                changes.invalidate()
+
     async def add_client(self, websocket: WebSocket, client_id: str, user_info: dict):
         """Add a client to this game session. Raises PermissionError if the player is banned."""
         game_mode = 'free_roam'
@@ -212,15 +287,20 @@ class GameSessionProtocolService:
         del self.clients[client_id]
         del self.client_info[client_id]
         del self.websocket_to_client[websocket]
+        queue = self.send_queues.pop(client_id, None)
+        if queue is not None:
+            queue.close()
         # Notify server protocol
         #self.server_protocol.disconnect_client(client_id)
 
         logger.info(f"Client {client_id} ({username}) removed from session {self.session_code}")
 
-    async def handle_protocol_message(self, websocket: WebSocket, message_str: str):
-        """Handle incoming protocol message from a client"""
+    async def handle_protocol_message(self, websocket: WebSocket, message: Message | str):
+        """Handle an inbound protocol message; ``message`` is normally already decoded"""
+        started = time.perf_counter()
         try:
-            message = Message.from_json(message_str)
+            if isinstance(message, str):
+                message = Message.from_json(message)
             client_id = self.websocket_to_client.get(websocket)
             if not client_id:
                 await self._send_error(
@@ -239,7 +319,10 @@ class GameSessionProtocolService:
                 if client_id in self.client_info:
                     self.client_info[client_id]["last_ping"] = time.time()
                 if message.type in self.server_protocol.handlers:
+                    dispatched = time.perf_counter()
+                    record_ws_inbound_stage("authorize", dispatched - started)
                     await self.server_protocol.handle_client(message, client_id)
+                    record_ws_inbound_stage("dispatch", time.perf_counter() - dispatched)
                     if message.type in [MessageType.SPRITE_UPDATE, MessageType.TABLE_UPDATE]:
                         self.auto_save()
                 else:
@@ -270,22 +353,14 @@ class GameSessionProtocolService:
 
     async def broadcast_to_session(self, message: Message, exclude_client: Optional[str] = None):
         """Broadcast message to all clients in this game session"""
-        disconnected_clients = []
+        frames: Dict[str, Frame] = {}
+        policy = overflow_policy(message.type)
         broadcast_count = 0
-
-        for client_id, websocket in self.clients.items():
-            if client_id != exclude_client:
-                try:
-                    await self._send_message(websocket, message)
-                    broadcast_count += 1
-                except Exception:
-                    logger.exception(
-                        "WebSocket broadcast send failed",
-                        extra={"event_name": "websocket.broadcast.failed", "outcome": "error"},
-                    )
-                    disconnected_clients.append(websocket)
+        for client_id in list(self.clients):
+            if client_id != exclude_client and self._enqueue(client_id, message, policy, frames):
+                broadcast_count += 1
         logger.debug(
-            "WebSocket broadcast completed",
+            "WebSocket broadcast queued",
             extra={
                 "event_name": "websocket.broadcast.completed",
                 "message_type": message.type.value,
@@ -293,55 +368,103 @@ class GameSessionProtocolService:
             },
         )
 
-        # Clean up disconnected clients
-        for websocket in disconnected_clients:
-            await self.remove_client(websocket)
-
-    async def broadcast_filtered(self, message: Message, layer: str, exclude_client: Optional[str] = None):
-        """Broadcast to clients who can see the given layer."""
-        disconnected = []
-        for cid, ws in self.clients.items():
+    async def broadcast_filtered(
+        self,
+        message: Message,
+        layer: str,
+        exclude_client: Optional[str] = None,
+        can_see: Optional[Callable[[str], bool]] = None,
+    ):
+        """Broadcast to clients who can see the given layer (and pass ``can_see``, if given)."""
+        frames: Dict[str, Frame] = {}
+        policy = overflow_policy(message.type)
+        for cid in list(self.clients):
             if cid == exclude_client:
                 continue
             role = self.client_info.get(cid, {}).get('role', 'player')
             if not _is_dm(role) and layer not in get_visible_layers(role):
                 continue
-            try:
-                await self._send_message(ws, message)
-            except Exception as e:
-                logger.error(f"BROADCAST: Failed to send to {cid}: {e}")
-                disconnected.append(ws)
-        for ws in disconnected:
-            await self.remove_client(ws)
+            if can_see is not None and not can_see(cid):
+                continue
+            self._enqueue(cid, message, policy, frames)
 
     async def send_to_client(self, message: Message, client_id: str):
-        """Send message to specific client"""
-        if message.type == MessageType.PONG:
-            logger.info(f"PONG: Sending to client {client_id} in session {self.session_code}")
-
+        """Queue a message for one client; delivery order matches call order"""
         if client_id in self.clients:
-            websocket = self.clients[client_id]
-            try:
-                await self._send_message(websocket, message)
-                if message.type == MessageType.PONG:
-                    logger.info(f"PONG: Successfully sent to client {client_id}")
-            except Exception as e:
-                logger.error(f"Failed to send to {client_id}: {e}")
-                if message.type == MessageType.PONG:
-                    logger.error(f"PONG: FAILED to send to client {client_id}: {e}")
-                await self.remove_client(websocket)
+            self._enqueue(client_id, message, overflow_policy(message.type))
         else:
             logger.warning(f"Client {client_id} not found in session {self.session_code}")
             if message.type == MessageType.PONG:
                 logger.warning(f"PONG: Client {client_id} NOT FOUND in session {self.session_code}")
 
+    async def send_to_clients(self, message: Message, client_ids: Iterable[str]):
+        """Queue one message for several clients, encoding it once per codec"""
+        frames: Dict[str, Frame] = {}
+        policy = overflow_policy(message.type)
+        for client_id in client_ids:
+            if client_id in self.clients:
+                self._enqueue(client_id, message, policy, frames)
+
+    async def flush_sends(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every client's queued frames are sent or abandoned."""
+        results = await asyncio.gather(*(queue.flush(timeout) for queue in list(self.send_queues.values())))
+        return all(results)
+
+    def _send_queue(self, client_id: str) -> ClientSendQueue:
+        queue = self.send_queues.get(client_id)
+        if queue is None:
+            queue = self.send_queues[client_id] = ClientSendQueue(
+                self.clients[client_id],
+                client_id,
+                max_frames=settings.WS_SEND_QUEUE_MAX_FRAMES,
+                send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+                on_failure=self._send_failed,
+                codec=get_codec(self.client_info.get(client_id, {}).get('codec')),
+            )
+        return queue
+
+    def _enqueue(
+        self,
+        client_id: str,
+        message: Message,
+        policy: OverflowPolicy,
+        frames: Optional[Dict[str, Frame]] = None,
+    ) -> bool:
+        """Queue ``message`` for one client; ``frames`` caches one encoding per codec across a fan-out."""
+        queue = self._send_queue(client_id)
+        if frames is None:
+            return queue.put(message.encode(queue.codec), policy)
+        frame = frames.get(queue.codec.name)
+        if frame is None:
+            frame = frames[queue.codec.name] = message.encode(queue.codec)
+        return queue.put(frame, policy)
+
+    async def _send_failed(self, queue: ClientSendQueue, reason: str) -> None:
+        """A client's writer gave up: drop it from the session (and hang up if it fell behind)."""
+        if self.send_queues.get(queue.client_id) is not queue:
+            return
+        await self.remove_client(queue.websocket)
+        if reason == "overflow":
+            try:
+                await asyncio.wait_for(queue.websocket.close(code=1013), timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+            except Exception:
+                logger.debug(
+                    "Lagging WebSocket could not be closed",
+                    extra={"event_name": "websocket.send_queue.close_failed"},
+                )
+
     # Protocol Message Handlers
 
 
     # Utility Methods
 
     async def _send_message(self, websocket: WebSocket, message: Message):
-        """Send one message without allowing a slow peer to stall fan-out."""
+        """Send one message and wait for it, behind anything already queued for the socket."""
+        client_id = self.websocket_to_client.get(websocket)
+        if client_id in self.clients:
+            queue = self._send_queue(client_id)
+            await queue.deliver(message.encode(queue.codec))
+            return
         await asyncio.wait_for(
             websocket.send_text(message.to_json()),
             timeout=settings.WS_SEND_TIMEOUT_SECONDS,
@@ -383,26 +506,35 @@ class GameSessionProtocolService:
         """Check if session has any connected clients"""
         return len(self.clients) > 0
 
-    def cleanup(self):
-        """Cleanup resources when session is closed"""
+    def cleanup(self, save: bool = True):
+        """Cleanup resources when session is closed; ``save=False`` when the caller already saved"""
         logger.info(f"Cleaning up GameSessionProtocolService for session {self.session_code}")
-          # Save to database before clearing data
-        if self.db_session and self.game_session_db_id:
-            try:
-                success = self.force_save()
-                if success:
-                    logger.info(f"Session {self.session_code} - Data saved to database before cleanup")
-                else:
-                    logger.warning(f"Session {self.session_code} - Failed to save data before cleanup")
-            except Exception as e:
-                logger.error(f"Session {self.session_code} - Error saving to database during cleanup: {e}")
-        else:
-            logger.warning(f"Session {self.session_code} - No database session available for saving during cleanup")
+        if save:
+            self._save_before_cleanup()
+        coalescer = getattr(self.server_protocol, 'preview_coalescer', None)
+        if coalescer is not None:
+            coalescer.close()
+        for queue in self.send_queues.values():
+            queue.close()
+        self.send_queues.clear()
         self.clients.clear()
         self.client_info.clear()
         self.websocket_to_client.clear()
         self.table_manager.clear_tables()
 
+    def _save_before_cleanup(self):
+        if not (self.db_session and self.game_session_db_id):
+            logger.warning(f"Session {self.session_code} - No database session available for saving during cleanup")
+            return
+        try:
+            success = self.force_save()
+            if success:
+                logger.info(f"Session {self.session_code} - Data saved to database before cleanup")
+            else:
+                logger.warning(f"Session {self.session_code} - Failed to save data before cleanup")
+        except Exception as e:
+            logger.error(f"Session {self.session_code} - Error saving to database during cleanup: {e}")
+
     def to_db(self) -> bool:
         """Save GameSessionProtocolService state to database"""
         try:
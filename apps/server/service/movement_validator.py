@@ -4,7 +4,7 @@ import math
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Optional
 
-from core_table.pathfinding import PathfindingSystem, SpatialHashGrid
+from core_table.pathfinding import PathfindingSystem, SpatialHashGrid, TableSpatialIndex
 from core_table.session_rules import SessionRules
 
 if TYPE_CHECKING:
@@ -29,8 +29,10 @@ class MovementResult:
 class MovementValidator:
     """Server-side movement validation using active SessionRules and table state."""
 
-    def __init__(self, rules: SessionRules):
+    def __init__(self, rules: SessionRules, engine: str = "python"):
         self.rules = rules
+        # 'python' (heap A*) or 'grid' (numpy distance field, needs numpy)
+        self.engine = engine
 
     def validate(
         self,
@@ -51,23 +53,7 @@ class MovementValidator:
             if not (0 <= tx <= max_x and 0 <= ty <= max_y):
                 return MovementResult(valid=False, reason="Outside table bounds")
 
-        walls = []
-        if self.rules.walls_block_movement:
-            walls = [
-                w for w in table.walls.values()
-                if hasattr(w, 'blocks_movement') and w.blocks_movement
-            ]
-
-        obstacles = []
-        if self.rules.obstacles_block_movement:
-            obstacles = [
-                e for e in table.entities.values()
-                if getattr(e, 'layer', None) == 'obstacles'
-                and str(getattr(e, 'entity_id', '')) != str(entity_id)
-            ]
-
-        # Build spatial hash once for all collision checks
-        sh = SpatialHashGrid.build(walls, obstacles, table.grid_cell_px) if walls or obstacles else None
+        walls, obstacles, sh = self._collision_index(entity_id, table)
 
         # Build or accept path
         path = client_path
@@ -89,6 +75,8 @@ class MovementValidator:
                         exclude_entity_id=entity_id,
                         grid_bounds=(table.width - 1, table.height - 1) if table.width > 0 else None,
                         spatial_hash=sh,
+                        engine=self.engine,
+                        grid_engine=self._grid_engine(table),
                     )
                     if path is None:
                         return MovementResult(valid=False, reason="No clear path to destination")
@@ -205,6 +193,38 @@ class MovementValidator:
             ]
         return walls, obstacles
 
+    def _collision_index(self, entity_id: str, table) -> tuple[list, list, Optional[SpatialHashGrid]]:
+        """Walls, obstacles and the hash that addresses them.
+
+        Real tables keep a persistent ``TableSpatialIndex`` that is reused
+        as-is; the moving entity stays in its obstacle slots and is skipped
+        through ``exclude_entity_id`` instead. Anything else (plain fakes,
+        tables without an index) gets a throwaway hash per call.
+
+        A kind the session rules switch off comes back as an empty list while
+        the shared hash still holds its buckets. The pathfinding checks skip
+        hash hits past the end of their list, so it never blocks a move.
+        """
+        index = getattr(table, 'spatial_index', None)
+        if isinstance(index, TableSpatialIndex):
+            index = table.get_spatial_index()
+            walls = index.walls if self.rules.walls_block_movement and index.wall_count else []
+            obstacles = index.obstacles if self.rules.obstacles_block_movement and index.obstacle_count else []
+            return walls, obstacles, (index.grid if walls or obstacles else None)
+        walls, obstacles = self._get_walls_and_obstacles(entity_id, table)
+        sh = SpatialHashGrid.build(walls, obstacles, table.grid_cell_px) if walls or obstacles else None
+        return walls, obstacles, sh
+
+    def _grid_engine(self, table):
+        """Cached raster for the grid engine, or None to let A* build a one-off."""
+        index = getattr(table, 'spatial_index', None)
+        if self.engine != 'grid' or not isinstance(index, TableSpatialIndex):
+            return None
+        return table.get_spatial_index().grid_pathfinder(
+            walls=self.rules.walls_block_movement,
+            obstacles=self.rules.obstacles_block_movement,
+        )
+
     def validate_lightweight(
         self,
         entity_id: str,
@@ -230,8 +250,7 @@ class MovementValidator:
             if not (0 <= to_pos[0] <= max_x and 0 <= to_pos[1] <= max_y):
                 return MovementResult(valid=False, reason="Outside table bounds")
 
-        walls, obstacles = self._get_walls_and_obstacles(entity_id, table)
-        sh = SpatialHashGrid.build(walls, obstacles, grid) if walls or obstacles else None
+        walls, obstacles, sh = self._collision_index(entity_id, table)
         path = client_path or [from_pos, to_pos]
 
         for seg_start, seg_end in zip(path, path[1:]):
@@ -0,0 +1,461 @@
+"""
+Write-behind persistence for WebSocket handlers.
+
+Handlers hand a write to the worker and return; the blocking SQLAlchemy work
+runs on a small thread pool so the event loop keeps serving sockets while
+the database is slow.
+
+- Intents are keyed. A newer intent for a key that is still queued replaces
+  the queued one (latest snapshot wins), and writes for one key never run
+  concurrently, so they land in submission order.
+- The queue is bounded. ``submit`` refuses new keys when full (the caller
+  keeps its dirty state and tries again later); ``execute`` waits for room.
+- Journaled operations are appended to a JSON-lines file when they are
+  accepted (queued intents included) and marked done once written;
+  ``recover`` replays anything left unfinished by a crash. The journal is off
+  unless PERSISTENCE_JOURNAL_PATH is set.
+
+Operations are plain functions registered with ``@persistence_op(name)``.
+They take one JSON-serialisable payload, open their own database session and
+run on a worker thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from config import Settings
+from utils.logger import setup_logger
+from utils.observability import (
+    observe_persistence_write,
+    record_persistence,
+    set_persistence_queue_depth,
+)
+
+logger = setup_logger(__name__)
+settings = Settings()
+
+PersistenceFn = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class _Operation:
+    fn: PersistenceFn
+    journaled: bool
+
+
+_OPERATIONS: Dict[str, _Operation] = {}
+# Modules defining journaled operations; imported before a replay so every op is registered
+_OPERATION_MODULES = ('service.game_session_protocol', 'service.combat_engine')
+
+
+def persistence_op(name: str, *, journaled: bool = True) -> Callable[[PersistenceFn], PersistenceFn]:
+    """Register a blocking write the worker can run (and replay) by name."""
+    def decorator(fn: PersistenceFn) -> PersistenceFn:
+        _OPERATIONS[name] = _Operation(fn, journaled)
+        return fn
+    return decorator
+
+
+@dataclass
+class _Intent:
+    op: str
+    payload: Any = None
+    prepare: Optional[Callable[[], Any]] = None
+    on_error: Optional[Callable[[BaseException], None]] = None
+    waiters: List[asyncio.Future] = field(default_factory=list)
+    # Journal record covering this intent while it is queued or running
+    seq: Optional[int] = None
+
+
+class PersistenceJournal:
+    """Append-only record of journaled writes that have not finished yet."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._open = 0
+        # Held while replaying so a momentarily idle worker keeps the records
+        self.hold = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Continue numbering after anything already on disk so replays never reuse a seq
+        self._seq = itertools.count(max((int(r.get('seq', 0)) for r in self._records()), default=0) + 1)
+
+    def _append(self, record: dict) -> None:
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write(line + '\n')
+            handle.flush()
+
+    def begin(self, op: str, payload: Any) -> int:
+        with self._lock:
+            seq = next(self._seq)
+            self._open += 1
+        self._append({'seq': seq, 'op': op, 'payload': payload})
+        return seq
+
+    def done(self, seq: int) -> None:
+        self._append({'seq': seq, 'done': True})
+        with self._lock:
+            self._open -= 1
+
+    def _records(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; that write never ran
+                    continue
+        return records
+
+    def pending(self) -> List[dict]:
+        """Records written by ``begin`` with no matching ``done``, oldest first."""
+        started: Dict[int, dict] = {}
+        with self._lock:
+            for record in self._records():
+                if record.get('done'):
+                    started.pop(record['seq'], None)
+                elif 'op' in record:
+                    started[record['seq']] = record
+        return [started[seq] for seq in sorted(started)]
+
+    def compact(self) -> None:
+        """Truncate the file once nothing journaled is running."""
+        with self._lock:
+            if self._open == 0 and not self.hold and os.path.exists(self.path):
+                open(self.path, 'w', encoding='utf-8').close()
+
+
+class PersistenceWorker:
+    """Bounded, coalescing write-behind queue drained by a thread pool."""
+
+    def __init__(self, max_pending: int = 1000, workers: int = 2, journal_path: str = ''):
+        self.max_pending = max_pending
+        self.workers = workers
+        self.journal = PersistenceJournal(journal_path) if journal_path else None
+        self._pending: OrderedDict[Hashable, _Intent] = OrderedDict()
+        self._in_flight: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._anonymous = itertools.count(1)
+        self.counters = {'queued': 0, 'coalesced': 0, 'rejected': 0, 'success': 0, 'error': 0, 'replayed': 0}
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='persistence')
+        logger.info(
+            "Persistence worker started",
+            extra={"event_name": "persistence.worker.started", "workers": self.workers},
+        )
+
+    async def stop(self, flush: bool = True, timeout: float = 30.0) -> None:
+        """Stop accepting work; by default wait for queued writes to land first."""
+        if not self.running:
+            return
+        if flush:
+            await self.flush(timeout)
+        executor, self._executor = self._executor, None
+        assert executor is not None
+        # Only reachable when the flush timed out; these were never handed to a
+        # thread, but their journal records stay open so ``recover`` replays them
+        dropped = len(self._pending)
+        self._pending.clear()
+        set_persistence_queue_depth(0)
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        if dropped:
+            logger.error(
+                "Persistence worker stopped with unwritten intents",
+                extra={"event_name": "persistence.worker.dropped", "count": dropped},
+            )
+        logger.info("Persistence worker stopped", extra={"event_name": "persistence.worker.stopped"})
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued and running write has finished."""
+        if not self.running or self._idle is None:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Persistence flush timed out",
+                extra={"event_name": "persistence.flush.timeout", "pending": self.depth},
+            )
+            return False
+
+    async def recover(self) -> int:
+        """Replay journaled writes a previous process did not finish."""
+        if self.journal is None:
+            return 0
+        for module in _OPERATION_MODULES:
+            importlib.import_module(module)
+        self.journal.hold = True
+        try:
+            replayed = await self._replay(self.journal.pending())
+        finally:
+            self.journal.hold = False
+        self.journal.compact()
+        if replayed:
+            logger.info(
+                "Replayed unfinished persistence intents",
+                extra={"event_name": "persistence.recover.completed", "count": replayed},
+            )
+        return replayed
+
+    async def _replay(self, records: List[dict]) -> int:
+        replayed = 0
+        for record in records:
+            if record['op'] not in _OPERATIONS:
+                logger.error(
+                    "Journaled persistence operation is unknown",
+                    extra={"event_name": "persistence.recover.unknown", "operation": record['op']},
+                )
+                continue
+            try:
+                await self.execute(record['op'], record.get('payload'), key=('recover', record['seq']))
+                self._count(record['op'], 'replayed')
+                replayed += 1
+            except Exception:
+                logger.exception(
+                    "Journaled persistence replay failed",
+                    extra={"event_name": "persistence.recover.failed", "operation": record['op']},
+                )
+        return replayed
+
+    # ── Submission ───────────────────────────────────────────────────────
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending) + len(self._in_flight)
+
+    def submit(
+        self,
+        key: Hashable,
+        op: str,
+        payload: Any = None,
+        *,
+        prepare: Optional[Callable[[], Any]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> bool:
+        """Queue a write without waiting for it.
+
+        ``prepare`` runs on the event loop right before the write is handed to
+        a thread and returns the payload, so a snapshot reflects every change
+        made while the intent was queued. Returns False when the queue is full.
+        """
+        return self._enqueue(key, _Intent(op, payload, prepare, on_error))
+
+    async def execute(
+        self,
+        op: str,
+        payload: Any = None,
+        *,
+        key: Optional[Hashable] = None,
+        prepare: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """Run a write off the loop and return its result, waiting for queue room."""
+        if not self.running:
+            raise RuntimeError("Persistence worker is not running")
+        if key is None:
+            key = ('execute', next(self._anonymous))
+        assert self._loop is not None and self._space is not None
+        while key not in self._pending and len(self._pending) >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        waiter = self._loop.create_future()
+        self._enqueue(key, _Intent(op, payload, prepare, waiters=[waiter]))
+        return await waiter
+
+    def _enqueue(self, key: Hashable, intent: _Intent) -> bool:
+        if not self.running:
+            raise RuntimeError("Persistence worker is not running")
+        queued = self._pending.get(key)
+        if queued is not None:
+            # Latest snapshot wins; whoever waited on the old one gets this result
+            intent.waiters = queued.waiters + intent.waiters
+            if queued.seq is not None:
+                if intent.prepare is not None and intent.op == queued.op:
+                    # The snapshot is retaken at dispatch; until then the old record covers it
+                    intent.seq = queued.seq
+                else:
+                    self._journal(intent)
+                    self._settle(queued.seq)
+            self._pending[key] = intent
+            self._count(intent.op, 'coalesced')
+            return True
+        if len(self._pending) >= self.max_pending:
+            self._count(intent.op, 'rejected')
+            return False
+        self._pending[key] = intent
+        self._count(intent.op, 'queued')
+        assert self._idle is not None
+        self._idle.clear()
+        self._pump()
+        if self._pending.get(key) is intent:
+            # Still waiting for a thread: record it now so a crash cannot lose it
+            self._journal(intent)
+        return True
+
+    # ── Dispatch (event loop) ────────────────────────────────────────────
+
+    def _pump(self) -> None:
+        """Hand queued intents to idle threads, oldest key first."""
+        for key in list(self._pending):
+            if len(self._in_flight) >= self.workers:
+                break
+            if key in self._in_flight:
+                continue
+            intent = self._pending.pop(key)
+            self._dispatch(key, intent)
+        assert self._space is not None
+        if len(self._pending) < self.max_pending:
+            self._space.set()
+        set_persistence_queue_depth(self.depth)
+        self._check_idle()
+
+    def _dispatch(self, key: Hashable, intent: _Intent) -> None:
+        try:
+            if intent.prepare is not None:
+                intent.payload = intent.prepare()
+        except Exception as exc:
+            self._settle(intent.seq)
+            self._failed(intent, exc)
+            return
+        if intent.seq is None or intent.prepare is not None:
+            # Journal exactly what the thread will write, superseding a queued snapshot
+            stale = intent.seq
+            intent.seq = None
+            self._journal(intent)
+            self._settle(stale)
+        assert self._loop is not None and self._executor is not None
+        self._in_flight.add(key)
+        future = self._loop.run_in_executor(self._executor, self._run, intent.op, intent.payload, intent.seq)
+        future.add_done_callback(lambda done: self._finished(key, intent, done))
+
+    def _finished(self, key: Hashable, intent: _Intent, done: asyncio.Future) -> None:
+        self._in_flight.discard(key)
+        exc = done.exception()
+        if exc is not None:
+            self._failed(intent, exc)
+        else:
+            self._count(intent.op, 'success')
+            for waiter in intent.waiters:
+                if not waiter.done():
+                    waiter.set_result(done.result())
+        if self.running:
+            self._pump()
+
+    def _failed(self, intent: _Intent, exc: BaseException) -> None:
+        self._count(intent.op, 'error')
+        logger.error(
+            "Persistence write failed",
+            extra={"event_name": "persistence.write.failed", "operation": intent.op, "outcome": "error"},
+            exc_info=exc,
+        )
+        if intent.on_error is not None:
+            try:
+                intent.on_error(exc)
+            except Exception:
+                logger.exception("Persistence error callback failed")
+        for waiter in intent.waiters:
+            if not waiter.done():
+                waiter.set_exception(exc)
+
+    def _check_idle(self) -> None:
+        if not self._pending and not self._in_flight:
+            assert self._idle is not None
+            self._idle.set()
+            if self.journal is not None:
+                self.journal.compact()
+
+    def _journal(self, intent: _Intent) -> None:
+        """Open a journal record for a journaled intent that has none yet."""
+        operation = _OPERATIONS.get(intent.op)
+        if self.journal is None or operation is None or not operation.journaled or intent.seq is not None:
+            return
+        if intent.prepare is None:
+            payload = intent.payload
+        else:
+            try:
+                payload = intent.prepare()
+            except Exception:
+                # Dispatch calls prepare again and reports the failure to the caller
+                logger.exception("Persistence snapshot for the journal failed")
+                return
+        intent.seq = self.journal.begin(intent.op, payload)
+
+    def _settle(self, seq: Optional[int]) -> None:
+        if seq is not None and self.journal is not None:
+            self.journal.done(seq)
+
+    def _count(self, op: str, outcome: str) -> None:
+        self.counters[outcome] += 1
+        record_persistence(op, outcome)
+
+    # ── Execution (worker thread) ────────────────────────────────────────
+
+    def _run(self, op: str, payload: Any, seq: Optional[int]) -> Any:
+        operation = _OPERATIONS.get(op)
+        if operation is None:
+            # Never journaled, so there is no record to settle
+            raise KeyError(f"Unknown persistence operation: {op}")
+        started = time.perf_counter()
+        try:
+            return operation.fn(payload)
+        finally:
+            observe_persistence_write(op, time.perf_counter() - started)
+            # A failed write is not retried from the journal: the caller's
+            # on_error already arranged for the next save to cover it
+            self._settle(seq)
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'pending': len(self._pending),
+            'in_flight': len(self._in_flight),
+            **self.counters,
+        }
+
+
+_worker: Optional[PersistenceWorker] = None
+
+
+def get_persistence_worker() -> PersistenceWorker:
+    """Process-wide worker, configured from settings on first use."""
+    global _worker
+    if _worker is None:
+        _worker = PersistenceWorker(
+            max_pending=settings.PERSISTENCE_QUEUE_MAX,
+            workers=settings.PERSISTENCE_WORKERS,
+            journal_path=settings.PERSISTENCE_JOURNAL_PATH,
+        )
+    return _worker
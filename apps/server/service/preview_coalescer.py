@@ -0,0 +1,96 @@
+"""
+Coalescing for live sprite previews.
+
+Clients stream drag/resize/rotate previews at pointer rate (often 60 Hz or
+more). Each one used to be rebroadcast to the whole session. A
+PreviewCoalescer keeps only the latest preview per (sprite, kind) and flushes
+at a fixed tick, so outbound traffic is bounded by the tick rate rather than
+by how fast the pointer moves.
+
+The first preview after a quiet period goes out immediately, so a drag starts
+without a tick of lag. The last one is always flushed on the next tick. When
+the move, scale or rotate is committed, the handler discards what is still
+pending for that sprite so a stale preview cannot arrive after the commit.
+There is one coalescer per session, which makes the key effectively
+(session, sprite, kind).
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any, Dict, Optional, Tuple
+
+from core_table.protocol import Message
+from utils.logger import setup_logger
+from utils.observability import record_preview
+
+logger = setup_logger(__name__)
+
+PreviewSender = Callable[[Message, Optional[str]], Coroutine[Any, Any, None]]
+
+
+class PreviewCoalescer:
+    """Latest-wins buffer of preview messages, flushed every ``interval`` seconds."""
+
+    def __init__(self, send: PreviewSender, *, interval: float):
+        self._send = send
+        self.interval = interval
+        self._pending: Dict[Tuple[str, str], Tuple[Message, Optional[str]]] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self.counters = {'in': 0, 'out': 0, 'dropped': 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def offer(self, kind: str, sprite_id: str, message: Message, client_id: Optional[str]) -> None:
+        """Send ``message`` now if idle, otherwise replace the pending preview for the sprite."""
+        self._count(kind, 'in')
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.get_running_loop().create_task(self._tick())
+            await self._emit(kind, message, client_id)
+            return
+        key = (str(sprite_id), kind)
+        if key in self._pending:
+            self._count(kind, 'dropped')
+        self._pending[key] = (message, client_id)
+
+    def discard(self, sprite_id: str, kind: str) -> None:
+        """Forget the pending preview for a sprite whose change was just committed."""
+        if self._pending.pop((str(sprite_id), kind), None) is not None:
+            self._count(kind, 'dropped')
+
+    async def flush(self) -> None:
+        """Send every pending preview now."""
+        for key in list(self._pending):
+            # Popped one at a time: a commit during the await can still discard the rest
+            item = self._pending.pop(key, None)
+            if item is not None:
+                await self._emit(key[1], *item)
+
+    def close(self) -> None:
+        """Stop the ticker and drop anything pending."""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        self._pending.clear()
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self._pending:
+                return
+            await self.flush()
+
+    async def _emit(self, kind: str, message: Message, client_id: Optional[str]) -> None:
+        self._count(kind, 'out')
+        try:
+            await self._send(message, client_id)
+        except Exception:
+            logger.exception(
+                "Preview broadcast failed",
+                extra={"event_name": "sprite.preview.broadcast_failed", "preview_kind": kind},
+            )
+
+    def _count(self, kind: str, direction: str) -> None:
+        self.counters[direction] += 1
+        record_preview(kind, direction)
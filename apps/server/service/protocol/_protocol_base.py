@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Iterable
 from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from core_table.protocol import Message
 
 if TYPE_CHECKING:
     from service.combat_persistence_service import CombatPersistenceService
+    from service.preview_coalescer import PreviewCoalescer
+
+    from .combat_views import CombatViewCache
+    from .sight import SightFilter
+    from .table_deltas import TableDeltaLog
+    from .table_snapshots import TableSnapshotCache
 
 
 class _ProtocolBase:
@@ -25,19 +31,30 @@ class _ProtocolBase:
     _rules_cache: Dict[str, Any]
     _transport_send: Callable[[Message, str], Awaitable[None]] | None
     combat_persistence_service: CombatPersistenceService | None
+    preview_coalescer: PreviewCoalescer | None = None
+    table_snapshots: TableSnapshotCache | None = None
+    combat_views: CombatViewCache | None = None
+    table_deltas: TableDeltaLog | None = None
+    sight: SightFilter | None = None
     # ── transport ────────────────────────────────────────────────────────────
     async def send_to_client(self, message: Message, client_id: str) -> None:
         raise NotImplementedError
 
+    async def send_to_clients(self, message: Message, client_ids: Iterable[str]) -> None:
+        raise NotImplementedError
+
     async def broadcast_to_session(self, message: Message, client_id: str) -> None:
         raise NotImplementedError
 
-    async def broadcast_filtered(self, message: Message, layer: str, client_id: str) -> None:
+    async def broadcast_filtered(self, message: Message, layer: str, client_id: Optional[str]) -> None:
         raise NotImplementedError
 
     async def _broadcast_error(self, client_id: str, error_message: str) -> None:
         raise NotImplementedError
 
+    def _sight_allows_replay(self, message: Message, layer: Optional[str], client_id: str) -> bool:
+        raise NotImplementedError
+
     # ── session resolution ────────────────────────────────────────────────────
     def _get_session_code(self, msg: Optional[Message] = None) -> str:
         raise NotImplementedError
@@ -342,7 +342,7 @@ class _AssetsMixin(_ProtocolBase):
 
                 if should_delete_object:
                     asset_manager = get_server_asset_manager()
-                    if not asset_manager.r2_manager.delete_file(r2_key):
+                    if not await asset_manager.r2_executor.run(asset_manager.r2_manager.delete_file, r2_key):
                         db.rollback()
                         db.add(audit_event(
                             "asset.delete",
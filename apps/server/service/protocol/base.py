@@ -4,13 +4,16 @@ from typing import Any, Dict
 
 from core_table.actions_core import ActionsCore
 from core_table.protocol import Message, MessageType
+from service.preview_coalescer import PreviewCoalescer
 from utils.logger import setup_logger
 
 from .assets import _AssetsMixin
 from .auth import _AuthMixin
+from .batching import BroadcastCollector, run_ordered
 from .characters import _CharactersMixin
 from .chat import _ChatMixin
 from .combat import _CombatMixin
+from .combat_views import CombatViewCache
 from .encounter import _EncounterMixin
 from .helpers import _HelpersMixin
 from .measurements import _MeasurementsMixin
@@ -18,7 +21,10 @@ from .paint import _PaintMixin
 from .paint_templates import _PaintTemplatesMixin
 from .players import _PlayersMixin
 from .session import _SessionMixin
+from .sight import SightFilter
 from .sprites import _SpritesMixin
+from .table_deltas import TableDeltaLog
+from .table_snapshots import TableSnapshotCache
 from .tables import _TablesMixin
 from .walls import _WallsMixin
 
@@ -65,6 +71,8 @@ class ServerProtocol(
         table_manager,
         session_manager=None,
         transport_send: Callable[[Message, str], Awaitable[None]] | None = None,
+        preview_interval: float = 0.0,
+        delta_ring_size: int = 0,
     ):
         logger.info("Initializing ServerProtocol")
         self.table_manager = table_manager
@@ -83,6 +91,13 @@ class ServerProtocol(
                 f"Initialized tables_id with {len(self.table_manager.tables_id)} tables"
             )
         self._rules_cache: Dict[str, Any] = {}
+        self.table_snapshots = TableSnapshotCache()
+        self.combat_views = CombatViewCache()
+        self.sight = SightFilter()
+        if delta_ring_size > 0:
+            self.table_deltas = TableDeltaLog(delta_ring_size)
+        if preview_interval > 0:
+            self.preview_coalescer = PreviewCoalescer(self.broadcast_to_session, interval=preview_interval)
 
     def register_handler(self, msg_type: MessageType, handler: Callable):
         """Extension point for custom message handlers."""
@@ -107,6 +122,7 @@ class ServerProtocol(
         # Tables
         self.register_handler(MessageType.NEW_TABLE_REQUEST, self.handle_new_table_request)
         self.register_handler(MessageType.TABLE_REQUEST, self.handle_table_request)
+        self.register_handler(MessageType.TABLE_RESUME, self.handle_table_resume)
         self.register_handler(MessageType.TABLE_UPDATE, self.handle_table_update)
         self.register_handler(MessageType.TABLE_SCALE, self.handle_table_scale)
         self.register_handler(MessageType.TABLE_MOVE, self.handle_table_move)
@@ -203,6 +219,7 @@ class ServerProtocol(
 
         # Combat
         self.register_handler(MessageType.COMBAT_STATE_REQUEST,  self.handle_combat_state_request)
+        self.register_handler(MessageType.COMBAT_LOG_REQUEST,    self.handle_combat_log_request)
         self.register_handler(MessageType.COVER_ZONES_SYNC,      self.handle_cover_zones_sync)
         self.register_handler(MessageType.ATTACK_PREVIEW,        self.handle_attack_preview)
         self.register_handler(MessageType.AI_ACTION,             self.handle_ai_action)
@@ -232,7 +249,7 @@ class ServerProtocol(
             },
         )
         if msg.type in self.handlers:
-            response = await self.handlers[msg.type](msg, client_id)
+            response = await self._run_handler(msg, client_id)
             if response:
                 response.correlation_id = msg.correlation_id or msg.message_id
                 response.causation_id = msg.message_id
@@ -241,6 +258,17 @@ class ServerProtocol(
         logger.warning(f"No handler registered for message type: {msg.type}")
         return False
 
+    async def _run_handler(self, msg: Message, client_id: str) -> Any:
+        """Call the handler for ``msg``, dropping join snapshots it may make stale."""
+        if self.table_snapshots is None:
+            return await self.handlers[msg.type](msg, client_id)
+        # Before: no join served mid-change from an old snapshot; after: none built mid-change is kept
+        self.table_snapshots.invalidate_for(msg)
+        try:
+            return await self.handlers[msg.type](msg, client_id)
+        finally:
+            self.table_snapshots.invalidate_for(msg)
+
     # ── Misc handlers ─────────────────────────────────────────────────────────
 
     async def handle_ping(self, msg: Message, client_id: str) -> Message:
@@ -267,16 +295,30 @@ class ServerProtocol(
         })
 
     async def handle_batch(self, msg: Message, client_id: str) -> Message:
-        """Process a batch of messages and return aggregated responses."""
+        """Process a batch of messages and return aggregated responses.
+
+        Sub-messages on unrelated resources run concurrently (see
+        ``batching``); responses keep batch order and the broadcasts they
+        trigger go out merged once the whole batch has run.
+        """
         if not msg.data:
             return Message(MessageType.ERROR, {'error': 'No data provided in batch message'})
         messages_data = msg.data.get('messages', [])
         sequence_id = msg.data.get('seq', 0)
         logger.debug(f"Batch of {len(messages_data)} messages from {client_id}")
-        responses = []
-        for msg_data in messages_data:
+
+        def batch_error(exc: Exception, msg_data: Any) -> Message:
+            logger.exception("Batch message processing failed")
+            return Message(MessageType.ERROR, {
+                'error': f'Batch message processing error: {str(exc)}',
+                'original_message': msg_data,
+            })
+
+        parsed: list[tuple[int, Message]] = []
+        results: list[Message | None] = [None] * len(messages_data)
+        for index, msg_data in enumerate(messages_data):
             try:
-                individual_msg = Message(
+                parsed.append((index, Message(
                     type=MessageType(msg_data.get('type')),
                     data=msg_data.get('data', {}),
                     client_id=msg_data.get('client_id'),
@@ -284,20 +326,33 @@ class ServerProtocol(
                     version=msg_data.get('version', '0.1'),
                     priority=msg_data.get('priority', 5),
                     sequence_id=msg_data.get('sequence_id'),
-                )
-                handler = self.handlers.get(individual_msg.type)
-                if handler:
-                    response = await handler(individual_msg, client_id)
+                )))
+            except Exception as exc:
+                results[index] = batch_error(exc, msg_data)
+
+        async def run_one(position: int) -> Message | None:
+            index, individual_msg = parsed[position]
+            try:
+                if individual_msg.type in self.handlers:
+                    response = await self._run_handler(individual_msg, client_id)
                     if response and hasattr(response, 'to_json'):
-                        responses.append(response)
+                        return response
                 else:
                     logger.warning(f"No handler for batch message type: {individual_msg.type}")
             except Exception as exc:
-                logger.exception("Batch message processing failed")
-                responses.append(Message(MessageType.ERROR, {
-                    'error': f'Batch message processing error: {str(exc)}',
-                    'original_message': msg_data,
-                }))
+                return batch_error(exc, messages_data[index])
+            return None
+
+        with BroadcastCollector() as collector:
+            outcomes = await run_ordered(
+                [m for _, m in parsed], run_one, on_task_done=self._release_task_db_session,
+            )
+        for (index, _), outcome in zip(parsed, outcomes):
+            results[index] = outcome
+        for message, exclude, layer in collector.merged():
+            await self._deliver_broadcast(message, exclude, layer)
+
+        responses = [r for r in results if r is not None]
         if responses:
             return Message(MessageType.BATCH, {
                 'messages': [
@@ -318,3 +373,9 @@ class ServerProtocol(
             'seq': sequence_id,
             'processed_count': len(messages_data),
         })
+
+    def _release_task_db_session(self) -> None:
+        """Release the scoped DB session of a batch worker task."""
+        release = getattr(self.session_manager, '_release_db_session', None)
+        if callable(release):
+            release()
@@ -0,0 +1,220 @@
+"""
+Dependency-aware execution for BATCH sub-messages.
+
+Each sub-message is mapped to the resource it touches:
+
+- ``('sprite', table_id, sprite_id)`` for sprite edits and previews
+- ``('table', table_id)`` for table, wall, paint and measurement changes and
+  sprite creation
+- ``('combat',)`` for combat and encounter commands
+- ``None`` for everything else, which is a barrier
+
+A sub-message waits for every earlier one it conflicts with and runs
+concurrently with the rest. Same sprite, same table, and table-versus-sprite
+on that table conflict; combat conflicts with combat. Barriers conflict with
+everything, so unknown message types keep their strict batch order.
+
+Broadcasts made while a batch runs are collected and sent once it finishes,
+with consecutive broadcasts to the same audience merged into one BATCH frame.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, List, Optional, Tuple
+
+from core_table.protocol import Message, MessageType
+from service.send_queue import OverflowPolicy, overflow_policy
+
+ResourceKey = Optional[Tuple[Any, ...]]
+
+_SPRITE_TYPES = frozenset({
+    MessageType.SPRITE_MOVE,
+    MessageType.SPRITE_SCALE,
+    MessageType.SPRITE_ROTATE,
+    MessageType.SPRITE_UPDATE,
+    MessageType.SPRITE_REMOVE,
+    MessageType.SPRITE_DRAG_PREVIEW,
+    MessageType.SPRITE_RESIZE_PREVIEW,
+    MessageType.SPRITE_ROTATE_PREVIEW,
+    MessageType.COMPENDIUM_SPRITE_UPDATE,
+    MessageType.COMPENDIUM_SPRITE_REMOVE,
+})
+_TABLE_TYPES = frozenset({
+    MessageType.SPRITE_CREATE,
+    MessageType.COMPENDIUM_SPRITE_ADD,
+    MessageType.TABLE_UPDATE,
+    MessageType.TABLE_SCALE,
+    MessageType.TABLE_MOVE,
+    MessageType.TABLE_DELETE,
+    MessageType.TABLE_SETTINGS_UPDATE,
+    MessageType.WALL_CREATE,
+    MessageType.WALL_UPDATE,
+    MessageType.WALL_REMOVE,
+    MessageType.WALL_BATCH_CREATE,
+    MessageType.DOOR_TOGGLE,
+    MessageType.PAINT_STROKE_CREATE,
+    MessageType.PAINT_STROKE_DELETE,
+    MessageType.PAINT_STROKE_CLEAR,
+    MessageType.MEASUREMENT_UPSERT,
+    MessageType.MEASUREMENT_DELETE,
+    MessageType.MEASUREMENT_CLEAR,
+})
+_COMBAT_TYPES = frozenset({
+    MessageType.COMBAT_COMMAND,
+    MessageType.COMBAT_STATE_REQUEST,
+    MessageType.COMBAT_LOG_REQUEST,
+    MessageType.ATTACK_PREVIEW,
+    MessageType.AI_ACTION,
+    MessageType.COVER_ZONES_SYNC,
+    MessageType.ENCOUNTER_START,
+    MessageType.ENCOUNTER_END,
+    MessageType.ENCOUNTER_CHOICE,
+    MessageType.ENCOUNTER_ROLL,
+})
+
+
+def _scalar(value: Any) -> Optional[str]:
+    return str(value) if isinstance(value, (str, int)) and value != '' else None
+
+
+def resource_key(msg: Message) -> ResourceKey:
+    """The resource ``msg`` reads or writes, or None when it must act as a barrier."""
+    data = msg.data if isinstance(msg.data, dict) else {}
+    if msg.type in _COMBAT_TYPES:
+        return ('combat',)
+    table_id = _scalar(data.get('table_id'))
+    if msg.type in _SPRITE_TYPES:
+        sprite_data = data.get('sprite_data')
+        sprite_id = _scalar(data.get('sprite_id') or data.get('id')
+                            or (sprite_data.get('sprite_id') if isinstance(sprite_data, dict) else None))
+        if sprite_id is not None:
+            return ('sprite', table_id, sprite_id)
+        return ('table', table_id) if table_id is not None else None
+    if msg.type in _TABLE_TYPES and table_id is not None:
+        return ('table', table_id)
+    return None
+
+
+def _same_table(a: Optional[str], b: Optional[str]) -> bool:
+    return a is None or b is None or a == b
+
+
+def conflicts(a: ResourceKey, b: ResourceKey) -> bool:
+    """True when two sub-messages must keep their batch order."""
+    if a is None or b is None:
+        return True
+    if a[0] == 'combat' or b[0] == 'combat':
+        return a[0] == b[0]
+    if a[0] == 'sprite' and b[0] == 'sprite':
+        return a[2] == b[2]
+    return _same_table(a[1], b[1])
+
+
+async def run_ordered(
+    messages: Sequence[Message],
+    run_one: Callable[[int], Awaitable[Any]],
+    on_task_done: Optional[Callable[[], None]] = None,
+) -> List[Any]:
+    """Call ``run_one(i)`` for every message, concurrently where keys allow; results keep batch order.
+
+    ``i`` is the message's position in ``messages``. ``run_one`` must not raise. ``on_task_done`` runs at the end of each
+    spawned task (e.g. to release a task-scoped DB session).
+    """
+    keys = [resource_key(msg) for msg in messages]
+    deps = [[j for j in range(i) if conflicts(keys[i], keys[j])] for i in range(len(messages))]
+    if all(len(d) == i for i, d in enumerate(deps)):
+        # Every message depends on all earlier ones: plain sequential order
+        return [await run_one(index) for index in range(len(messages))]
+
+    async def run_after(index: int, waits: List[asyncio.Task]) -> Any:
+        try:
+            if waits:
+                await asyncio.wait(waits)
+            return await run_one(index)
+        finally:
+            if on_task_done is not None:
+                on_task_done()
+
+    tasks: List[asyncio.Task] = []
+    try:
+        for index, waits in enumerate(deps):
+            tasks.append(asyncio.ensure_future(run_after(index, [tasks[j] for j in waits])))
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+# ── Broadcast merging ──────────────────────────────────────────────────────
+
+_collector: contextvars.ContextVar[Optional['BroadcastCollector']] = contextvars.ContextVar(
+    'batch_broadcast_collector', default=None,
+)
+
+
+class BroadcastCollector:
+    """Broadcasts deferred until the batch that made them has finished."""
+
+    def __init__(self):
+        self.entries: List[Tuple[Message, Optional[str], Optional[str]]] = []
+        self.closed = False
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> 'BroadcastCollector':
+        self._token = _collector.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.closed = True
+        if self._token is not None:
+            _collector.reset(self._token)
+
+    def merged(self) -> List[Tuple[Message, Optional[str], Optional[str]]]:
+        """Entries in order, with runs of unfiltered broadcasts to the same audience folded into a BATCH.
+
+        Previews are never folded, so the send queue can still drop them under pressure.
+        """
+        out: List[Tuple[Message, Optional[str], Optional[str]]] = []
+        run: List[Message] = []
+        run_exclude: Optional[str] = None
+
+        def close_run():
+            if len(run) == 1:
+                out.append((run[0], run_exclude, None))
+            elif run:
+                out.append((Message(MessageType.BATCH, {
+                    'messages': [m.to_dict() for m in run],
+                    'merged': True,
+                }), run_exclude, None))
+            run.clear()
+
+        for message, exclude, layer in self.entries:
+            if layer is None and overflow_policy(message.type) is OverflowPolicy.DROP_OLDEST:
+                # Previews stay droppable frames of their own
+                close_run()
+                out.append((message, exclude, layer))
+                continue
+            if layer is None and (not run or exclude == run_exclude):
+                run.append(message)
+                run_exclude = exclude
+                continue
+            close_run()
+            if layer is None:
+                run.append(message)
+                run_exclude = exclude
+            else:
+                out.append((message, exclude, layer))
+        close_run()
+        return out
+
+
+def collect_broadcast(message: Message, exclude_client: Optional[str], layer: Optional[str] = None) -> bool:
+    """Defer a broadcast if a batch is collecting; False means send it now."""
+    collector = _collector.get()
+    if collector is None or collector.closed:
+        return False
+    collector.entries.append((message, exclude_client, layer))
+    return True
@@ -9,6 +9,7 @@ from utils.logger import setup_logger
 from utils.roles import is_dm
 from utils.time import utc_now
 
+from ..persistence_worker import get_persistence_worker, persistence_op
 from ._protocol_base import _ProtocolBase
 
 logger = setup_logger(__name__)
@@ -16,6 +17,38 @@ _CLIENT_OPERATION_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
 _CHANNELS = {"public", "whisper"}
 
 
+@persistence_op('chat.insert', journaled=False)
+def insert_chat_message(record: dict) -> dict:
+    """Store one chat message unless its client operation id was already seen.
+
+    Runs on a persistence worker thread. Not journaled: the sender only gets
+    a confirmation once this returns and retries with the same operation id.
+    Returns ``{'error': ...}`` or ``{'message': <row dict>, 'existing': bool}``.
+    """
+    db = SessionLocal()
+    try:
+        if record['recipient_user_id'] is not None:
+            recipient = db.query(models.GamePlayer.id).filter(
+                models.GamePlayer.session_id == record['session_id'],
+                models.GamePlayer.user_id == record['recipient_user_id'],
+            ).first()
+            if recipient is None:
+                return {'error': 'Whisper recipient is not in this session'}
+
+        existing = crud.get_chat_message_by_client_operation(
+            db,
+            session_id=record['session_id'],
+            user_id=int(record['user_id']),
+            client_operation_id=record['client_operation_id'],
+        )
+        if existing:
+            return {'message': existing.to_dict(), 'existing': True}
+        saved = crud.create_chat_message(db, schemas.ChatMessageCreate(**record))
+        return {'message': saved.to_dict(), 'existing': False}
+    finally:
+        db.close()
+
+
 class _ChatMixin(_ProtocolBase):
     """Handler methods for chat-related messages"""
 
@@ -98,45 +131,33 @@ class _ChatMixin(_ProtocolBase):
         if table_id:
             saved_message_payload['table_id'] = table_id
 
-        db = SessionLocal()
+        record = {
+            'message_id': server_message_id,
+            'client_operation_id': client_operation_id,
+            'session_id': session_id,
+            'user_id': user_id,
+            'username': username,
+            'channel': channel,
+            'recipient_user_id': recipient_id,
+            'table_id': table_id,
+            'text': text.strip(),
+            'message_json': saved_message_payload,
+            'attachments': attachments if isinstance(attachments, list) else None,
+            'client_timestamp': float(client_timestamp) if client_timestamp is not None else None,
+        }
         try:
-            if recipient_id is not None:
-                recipient = db.query(models.GamePlayer.id).filter(
-                    models.GamePlayer.session_id == session_id,
-                    models.GamePlayer.user_id == recipient_id,
-                ).first()
-                if recipient is None:
-                    return Message(MessageType.ERROR, {'error': 'Whisper recipient is not in this session'})
-
-            existing = crud.get_chat_message_by_client_operation(
-                db,
-                session_id=session_id,
-                user_id=int(user_id),
-                client_operation_id=client_operation_id,
-            )
-            if existing:
-                saved = existing
+            worker = get_persistence_worker()
+            if worker.running:
+                outcome = await worker.execute('chat.insert', record)
             else:
-                saved = crud.create_chat_message(db, schemas.ChatMessageCreate(
-                    message_id=server_message_id,
-                    client_operation_id=client_operation_id,
-                    session_id=session_id,
-                    user_id=user_id,
-                    username=username,
-                    channel=channel,
-                    recipient_user_id=recipient_id,
-                    table_id=table_id,
-                    text=text.strip(),
-                    message_json=saved_message_payload,
-                    attachments=attachments if isinstance(attachments, list) else None,
-                    client_timestamp=float(client_timestamp) if client_timestamp is not None else None,
-                ))
-            persisted_message = saved.to_dict()
+                outcome = insert_chat_message(record)
         except Exception:
             logger.exception("Chat persistence failed")
             return Message(MessageType.ERROR, {'error': 'Chat message could not be persisted'})
-        finally:
-            db.close()
+        if 'error' in outcome:
+            return Message(MessageType.ERROR, {'error': outcome['error']})
+        persisted_message = outcome['message']
+        existing = outcome['existing']
 
         if not existing:
             outbound = Message(MessageType.CHAT, {'message': persisted_message})
@@ -2,9 +2,12 @@ import json
 import time
 from typing import Any
 
+from core_table.combat import CombatState
+from core_table.combat_journal import capture, diff_state
+from core_table.combat_log import PAGE_SIZE
 from core_table.protocol import Message, MessageType
 from core_table.session_rules import SessionRules
-from database.crud import get_game_mode, get_session_rules_json
+from database.crud import get_game_mode, get_session_rules_json, load_combat_log_actions
 from database.database import SessionLocal
 from pydantic import ValidationError
 from service.combat_command_service import CombatCommandContext, CombatCommandService
@@ -33,6 +36,11 @@ class _CombatMixin(_ProtocolBase):
 
         return list(getattr(self, 'clients', {}))
 
+    def _combat_view(self, state: Any, role: str | None, user_id: int | None, rebuild: bool = False) -> dict | None:
+        if self.combat_views is None:
+            return CombatStatePresenter.for_client(state, role, user_id)
+        return self.combat_views.view(state, role, user_id, rebuild=rebuild)
+
     def _combat_state_message(
         self,
         state: Any,
@@ -40,12 +48,14 @@ class _CombatMixin(_ProtocolBase):
         recipient_id: str,
         context: dict[str, Any] | None = None,
     ) -> Message:
-        client_info = self._get_client_info(recipient_id)
+        role = self._get_client_role(recipient_id)
+        user_id = self._get_client_info(recipient_id).get('user_id')
         data = CombatStatePresenter.message_for_client(
             state,
-            self._get_client_role(recipient_id),
-            client_info.get('user_id'),
+            role,
+            user_id,
             context,
+            combat=self._combat_view(state, role, user_id),
         )
         return Message(message_type, data)
 
@@ -56,15 +66,36 @@ class _CombatMixin(_ProtocolBase):
         client_id: str,
         context: dict[str, Any] | None = None,
     ) -> Message:
-        for recipient_id in self._combat_client_ids():
-            if recipient_id == client_id:
-                continue
-            await self.send_to_client(
-                self._combat_state_message(state, message_type, recipient_id, context),
-                recipient_id,
-            )
-
-        return self._combat_state_message(state, message_type, client_id, context)
+        """Send each recipient its view of ``state``; returns the requester's message.
+
+        Recipients with the same view class share one view and one message,
+        so each class is sanitized and encoded once per broadcast.
+        """
+        groups: dict[tuple, tuple[str | None, int | None, list[str]]] = {}
+        for recipient_id in [*self._combat_client_ids(), client_id]:
+            role = self._get_client_role(recipient_id)
+            user_id = self._get_client_info(recipient_id).get('user_id')
+            view_class = CombatStatePresenter.view_class(state, role, user_id)
+            group = groups.setdefault(view_class, (role, user_id, []))
+            if recipient_id not in group[2]:
+                group[2].append(recipient_id)
+
+        response = None
+        for view_role, view_user_id, recipient_ids in groups.values():
+            message = Message(message_type, CombatStatePresenter.message_for_client(
+                state,
+                view_role,
+                view_user_id,
+                context,
+                combat=self._combat_view(state, view_role, view_user_id, rebuild=True),
+            ))
+            others = [recipient_id for recipient_id in recipient_ids if recipient_id != client_id]
+            if others:
+                await self.send_to_clients(message, others)
+            if client_id in recipient_ids:
+                # The requester's reply is its own message (the transport stamps replies)
+                response = Message(message_type, message.data)
+        return response
 
     def _get_combat_persistence_service(self) -> CombatPersistenceService | None:
         if hasattr(self, 'combat_persistence_service'):
@@ -126,15 +157,18 @@ class _CombatMixin(_ProtocolBase):
                     }],
                 },
                 result_payload=result,
-                state_before=state_before or {},
-                state_after=state_after.to_dict(),
+                patch=(
+                    diff_state(capture(CombatState.from_dict(state_before)), result['combat'])
+                    if state_before else None
+                ),
+                state_after=result['combat'],
                 created_by=self._get_user_id(msg, client_id),
+                log_pages=[page.to_dict() for page in state_after.action_log.drain_pages()],
             )
             state_after.state_version = persisted.state_version
             return None
         except Exception as exc:
             if state_before is not None:
-                from core_table.combat import CombatState
                 from service.combat_engine import CombatEngine
                 CombatEngine._active[session_code] = CombatState.from_dict(state_before)
             logger.warning('Failed to persist direct combat mutation %s: %s', command_type, exc)
@@ -148,13 +182,48 @@ class _CombatMixin(_ProtocolBase):
         if not state:
             return Message(MessageType.COMBAT_STATE, {'combat': None})
         return Message(MessageType.COMBAT_STATE, {
-            'combat': CombatStatePresenter.for_client(
+            'combat': self._combat_view(
                 state,
                 self._get_client_role(client_id),
                 self._get_user_id(msg, client_id),
             )
         })
 
+    async def handle_combat_log_request(self, msg: Message, client_id: str) -> Message:
+        """Page backwards through the combat action log.
+
+        ``before`` is the ``log_index`` cursor from the previous response
+        (omit it for the newest entries); entries older than the in-memory
+        window come from the stored log pages.
+        """
+        from service.combat_engine import CombatEngine
+        session_code = self._get_session_code()
+        state = CombatEngine.get_state(session_code) or CombatEngine.restore(session_code)
+        if not state:
+            return Message(MessageType.COMBAT_LOG_RESPONSE, {'combat_id': None, 'actions': [], 'next_before': None})
+        d = msg.data or {}
+        try:
+            before = int(d['before']) if d.get('before') is not None else None
+            limit = int(d.get('limit') or PAGE_SIZE)
+        except (TypeError, ValueError):
+            return Message(MessageType.ERROR, {'error': 'before and limit must be integers'})
+
+        def load_pages(first: int, last: int) -> list[dict[str, Any]]:
+            with SessionLocal() as db:
+                return load_combat_log_actions(db, state.combat_id, first, last)
+
+        actions, next_before = state.action_log.history(before, limit, load_pages)
+        return Message(MessageType.COMBAT_LOG_RESPONSE, {
+            'combat_id': state.combat_id,
+            'actions': CombatStatePresenter.action_log_for_client(
+                state,
+                actions,
+                self._get_client_role(client_id),
+            ),
+            'next_before': next_before,
+            'total': state.action_log.total,
+        })
+
     async def handle_ai_action(self, msg: Message, client_id: str) -> Message:
         if not is_dm(self._get_client_role(client_id)):
             return Message(MessageType.ERROR, {'error': 'DMs only'})
@@ -400,12 +469,16 @@ class _CombatMixin(_ProtocolBase):
             return Message(MessageType.ERROR, {'error': 'No active combat'})
         attacker_id = d.get('attacker_id', '')
         target_id = d.get('target_id', '')
+        table_id = str(d.get('table_id', ''))
+        table = self._get_table_by_id(table_id)
         atk = next((c for c in state.combatants if c.combatant_id == attacker_id), None)
+        if isinstance(d.get('target_ids'), list):
+            if not atk:
+                return Message(MessageType.ERROR, {'error': 'Combatant not found'})
+            return self._area_attack_preview(atk, d['target_ids'], state, table)
         tgt = next((c for c in state.combatants if c.combatant_id == target_id), None)
         if not atk or not tgt:
             return Message(MessageType.ERROR, {'error': 'Combatant not found'})
-        table_id = str(d.get('table_id', ''))
-        table = self._get_table_by_id(table_id)
         from core_table.session_rules import SessionRules
         rules = SessionRules.defaults(session_code or 'default')
         resolver = AttackResolver(rules)
@@ -413,13 +486,9 @@ class _CombatMixin(_ProtocolBase):
         # Look up real entity positions for accurate cover calculation
         cover = 'none'
         if table:
-            atk_sprite = table.sprite_to_entity.get(str(atk.entity_id))
-            tgt_sprite = table.sprite_to_entity.get(str(tgt.entity_id))
-            atk_ent = table.entities.get(atk_sprite) if atk_sprite else None
-            tgt_ent = table.entities.get(tgt_sprite) if tgt_sprite else None
-            if atk_ent and tgt_ent:
-                atk_pos = (float(atk_ent.position[0]), float(atk_ent.position[1]))
-                tgt_pos = (float(tgt_ent.position[0]), float(tgt_ent.position[1]))
+            atk_pos = self._combatant_position(table, atk)
+            tgt_pos = self._combatant_position(table, tgt)
+            if atk_pos is not None and tgt_pos is not None:
                 cover = AttackResolver.resolve_cover(atk_pos, tgt_pos, table)
         # Resolve with attack_bonus=0 just for preview info
         attack_bonus = int(d.get('attack_bonus', 0))
@@ -429,11 +498,51 @@ class _CombatMixin(_ProtocolBase):
             damage_type=d.get('damage_type', 'bludgeoning'),
             attack_type=attack_type, table=table, combat=state,
         )
+        odds = resolver.attack_odds(
+            atk, tgt, attack_bonus=attack_bonus,
+            damage_formula=d.get('damage_formula', '1d6'),
+            attack_type=attack_type, table=table, combat=state,
+        )
         return Message(MessageType.ATTACK_PREVIEW_RESULT, {
             'hit': result.hit, 'is_critical': result.is_critical,
             'attack_roll': result.attack_roll.total if result.attack_roll else None,
             'damage_dealt': result.damage_dealt, 'reason': result.reason,
             'cover': cover,
             'effective_ac': tgt.armor_class + {'half': 2, 'three_quarters': 5}.get(cover, 0),
+            'hit_chance': round(odds.hit_chance, 4),
+            'crit_chance': round(odds.crit_chance, 4),
+            'expected_damage': round(odds.expected_damage, 2),
+        })
+
+    @staticmethod
+    def _combatant_position(table: Any, combatant: Any) -> tuple[float, float] | None:
+        sprite = table.sprite_to_entity.get(str(combatant.entity_id))
+        entity = table.entities.get(sprite) if sprite else None
+        if not entity:
+            return None
+        return float(entity.position[0]), float(entity.position[1])
+
+    def _area_attack_preview(self, atk: Any, target_ids: list, state: Any, table: Any) -> Message:
+        """Cover and effective AC of every target of an area attack, without rolling."""
+        from service.attack_resolver import AttackResolver
+        by_id = {c.combatant_id: c for c in state.combatants}
+        targets = [by_id[target_id] for target_id in target_ids if target_id in by_id]
+        covers = ['none'] * len(targets)
+        atk_pos = self._combatant_position(table, atk) if table else None
+        if atk_pos is not None:
+            placed = [(i, self._combatant_position(table, tgt)) for i, tgt in enumerate(targets)]
+            placed = [(i, pos) for i, pos in placed if pos is not None]
+            tiers = AttackResolver.resolve_cover_many(atk_pos, [pos for _, pos in placed], table)
+            for (i, _), tier in zip(placed, tiers):
+                covers[i] = tier
+        return Message(MessageType.ATTACK_PREVIEW_RESULT, {
+            'targets': [
+                {
+                    'target_id': tgt.combatant_id,
+                    'cover': cover,
+                    'effective_ac': tgt.armor_class + {'half': 2, 'three_quarters': 5}.get(cover, 0),
+                }
+                for tgt, cover in zip(targets, covers)
+            ],
         })
 
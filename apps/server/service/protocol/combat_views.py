@@ -0,0 +1,82 @@
+"""
+Per-role combat views, built once per combat revision.
+
+After every accepted combat command the combat state goes to every client in
+the session. Recipients fall into a few view classes
+(``CombatStatePresenter.view_class``): the DM view, the spectator view, and
+one player view per set of controlled combatants. ``CombatViewCache`` builds
+each class's sanitized view once and hands the same dict to every recipient
+of that class, and the broadcast sends one message per class so its encoding
+is shared too.
+
+Entries are keyed by the combat's ``state_version`` and ``compute_hash()``.
+The command journal bumps the version on every accepted command, and
+``compute_hash`` alone does not see HP or condition changes. A state that has
+never been persisted (version 0) has no reliable revision, so it is never
+cached.
+
+A broadcast follows a state change, so it rebuilds its views (``rebuild``)
+instead of trusting an entry a mutation outside the command journal could
+have left stale; state requests between changes are then served from cache.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from service.combat_state_presenter import CombatStatePresenter
+from utils.observability import record_combat_view
+
+ViewKey = Tuple[Hashable, ...]
+
+
+class CombatViewCache:
+    """Sanitized combat views by (encounter, revision, view class); shared, never mutate them."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[ViewKey, Optional[dict]] = OrderedDict()
+        self.counters = {'hit': 0, 'miss': 0, 'uncached': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def view(
+        self,
+        state: Any,
+        role: Optional[str],
+        user_id: Optional[int],
+        rebuild: bool = False,
+    ) -> Optional[dict]:
+        if state is None:
+            return None
+        version = getattr(state, 'state_version', 0)
+        if not isinstance(version, int) or version <= 0:
+            self._count('uncached')
+            return CombatStatePresenter.for_client(state, role, user_id)
+
+        key = (
+            state.combat_id,
+            version,
+            state.compute_hash(),
+            CombatStatePresenter.view_class(state, role, user_id),
+        )
+        if not rebuild and key in self._entries:
+            self._entries.move_to_end(key)
+            self._count('hit')
+            return self._entries[key]
+
+        self._count('miss')
+        view = CombatStatePresenter.for_client(state, role, user_id)
+        self._entries[key] = view
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return view
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _count(self, outcome: str) -> None:
+        self.counters[outcome] += 1
+        record_combat_view(outcome)
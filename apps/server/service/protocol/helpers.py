@@ -1,13 +1,16 @@
 import json
 import time
-from typing import Optional
+from collections.abc import Callable, Iterable
+from typing import Optional, Tuple
 
 from core_table.protocol import Message, MessageType
 from database.database import SessionLocal
 from database.models import GameSession
 from utils.logger import setup_logger
+from utils.roles import is_dm
 
 from ._protocol_base import _ProtocolBase
+from .batching import collect_broadcast
 
 logger = setup_logger(__name__)
 
@@ -21,21 +24,98 @@ class _HelpersMixin(_ProtocolBase):
             raise RuntimeError("No client transport is configured")
         await self._transport_send(message, client_id)
 
+    async def send_to_clients(self, message: Message, client_ids: Iterable[str]):
+        """Send one message to several clients; the session transport encodes it once"""
+        client_ids = list(client_ids)
+        if self.session_manager and hasattr(self.session_manager, 'send_to_clients'):
+            await self.session_manager.send_to_clients(message, client_ids)
+            return
+        for client in client_ids:
+            await self.send_to_client(message, client)
+
     async def broadcast_to_session(self, message: Message, client_id: Optional[str] = None):
-        """Send message to all clients in the session. Excludes client_id if provided."""
-        if self.session_manager and hasattr(self.session_manager, 'broadcast_to_session'):
+        """Send message to all clients in the session. Excludes client_id if provided.
+
+        A sprite message that line of sight may hide goes through ``broadcast_filtered`` instead.
+        """
+        sight_layer = self._sight_layer(message)
+        if sight_layer is not None:
+            await self.broadcast_filtered(message, sight_layer, client_id)
+            return
+        if self.table_deltas is not None:
+            self.table_deltas.record(message)
+        if not collect_broadcast(message, client_id):
+            await self._deliver_broadcast(message, client_id)
+        await self._reveal_withheld(message)
+
+    async def broadcast_filtered(self, message: Message, layer: str, client_id: Optional[str]):
+        """Broadcast only to clients who can see the given layer."""
+        if self.table_deltas is not None:
+            self.table_deltas.record(message, layer)
+        if not collect_broadcast(message, client_id, layer):
+            await self._deliver_broadcast(message, client_id, layer)
+        await self._reveal_withheld(message)
+
+    async def _deliver_broadcast(self, message: Message, client_id: Optional[str], layer: Optional[str] = None):
+        """Hand an already-recorded broadcast to the session transport."""
+        can_see = self._sight_predicate(message, layer) if layer is not None else None
+        if layer is not None and self.session_manager and hasattr(self.session_manager, 'broadcast_filtered'):
+            extra = {'can_see': can_see} if can_see is not None else {}
+            await self.session_manager.broadcast_filtered(message, layer, exclude_client=client_id, **extra)
+        elif self.session_manager and hasattr(self.session_manager, 'broadcast_to_session'):
             await self.session_manager.broadcast_to_session(message, exclude_client=client_id)
         else:
             for client in self.clients:
-                if client != client_id:
+                if client != client_id and (can_see is None or can_see(client)):
                     await self.send_to_client(message, client)
 
-    async def broadcast_filtered(self, message: Message, layer: str, client_id: str):
-        """Broadcast only to clients who can see the given layer."""
-        if self.session_manager and hasattr(self.session_manager, 'broadcast_filtered'):
-            await self.session_manager.broadcast_filtered(message, layer, exclude_client=client_id)
-        else:
-            await self.broadcast_to_session(message, client_id)
+    def _sight_table(self, message: Message):
+        table_id = (message.data or {}).get('table_id')
+        if not isinstance(table_id, str):
+            return None
+        return self.table_manager.tables_id.get(table_id) or self.table_manager.tables.get(table_id)
+
+    def _sight_viewer(self, client_id: str) -> Tuple[bool, Optional[int]]:
+        user_id = self._get_client_info(client_id).get('user_id')
+        return is_dm(self._get_client_role(client_id)), int(user_id) if user_id is not None else None
+
+    def _sight_layer(self, message: Message) -> Optional[str]:
+        """Layer to filter a session-wide broadcast on for line of sight, if any."""
+        if self.sight is None:
+            return None
+        table = self._sight_table(message)
+        if table is None:
+            return None
+        return self.sight.layer_of(table, message)
+
+    def _sight_predicate(self, message: Message, layer: str) -> Optional[Callable[[str], bool]]:
+        """Per-client line-of-sight check for a layer broadcast, if its table has dynamic lighting."""
+        if self.sight is None:
+            return None
+        table = self._sight_table(message)
+        if table is None:
+            return None
+        return self.sight.predicate(table, message, layer, self._sight_viewer)
+
+    def _sight_allows_replay(self, message: Message, layer: Optional[str], client_id: str) -> bool:
+        """Whether a missed broadcast may be replayed to ``client_id`` on resume.
+
+        Applies the line-of-sight check live delivery applied, on the layer the
+        broadcast was recorded with, against the table as it is now.
+        """
+        can_see = self._sight_predicate(message, layer) if layer is not None else None
+        return can_see is None or can_see(client_id)
+
+    async def _reveal_withheld(self, message: Message):
+        """Send held-back sprite creations that became visible after ``message``'s change."""
+        if self.sight is None:
+            return
+        table = self._sight_table(message)
+        if table is None or not self.sight.has_withheld(str(table.table_id)):
+            return
+        connected = getattr(self.session_manager, 'clients', None) or self.clients
+        for target, creation in self.sight.reveal(table, self._sight_viewer, connected):
+            await self.send_to_client(creation, target)
 
     async def _broadcast_error(self, client_id: str, error_message: str):
         """Send error message to specific client"""
@@ -0,0 +1,117 @@
+"""
+Line-of-sight filtering for layer broadcasts.
+
+When a table has dynamic lighting on, a broadcast about a sprite on the
+tokens layer is only sent to players who can see it (``core_table.visibility``).
+That covers creations, moves, resizes, rotations, updates and previews alike.
+DMs always get them. A player who was skipped for a sprite creation is
+remembered. They are also not sent the sprite's removal. When a later
+broadcast on that table lets the player see the sprite, they are sent its
+creation with the sprite's current state. This happens when a token moves, a
+door opens, or lighting is switched off.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import Dict, List, Optional, Set, Tuple
+
+from core_table.protocol import Message, MessageType
+from core_table.visibility import VisibilityCache
+
+# (is_dm, user_id) of a connected client
+Viewer = Callable[[str], Tuple[bool, Optional[int]]]
+
+_FILTERED_LAYER = 'tokens'
+
+
+class SightFilter:
+    """Per-player visibility of token sprites, plus the creations held back from each player."""
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self.cache = VisibilityCache(use_numpy)
+        # table_id -> client_id -> sprite ids whose creation the client has not received
+        self._withheld: Dict[str, Dict[str, Set[str]]] = {}
+
+    def layer_of(self, table, message: Message) -> Optional[str]:
+        """The layer to filter a session-wide sprite broadcast on, or None when everyone gets it."""
+        sprite_id = (message.data or {}).get('sprite_id')
+        if not sprite_id:
+            return None
+        entity = table.find_entity_by_sprite_id(sprite_id)
+        if entity is None:
+            # Removed: still kept from whoever never received its creation
+            pending = self._withheld.get(str(table.table_id), {})
+            return _FILTERED_LAYER if any(sprite_id in ids for ids in pending.values()) else None
+        if entity.layer == _FILTERED_LAYER and table.dynamic_lighting_enabled:
+            return _FILTERED_LAYER
+        return None
+
+    def predicate(self, table, message: Message, layer: str, viewer: Viewer) -> Optional[Callable[[str], bool]]:
+        """A per-client check for ``message``, or None when it goes to the whole layer."""
+        data = message.data or {}
+        if layer != _FILTERED_LAYER:
+            return None
+        sprite_id = data.get('sprite_id')
+        if not sprite_id:
+            return None
+        table_id = str(table.table_id)
+        entity = table.find_entity_by_sprite_id(sprite_id)
+        if entity is None:
+            pending = self._withheld.get(table_id, {})
+            never_sent = {client_id for client_id, ids in pending.items() if sprite_id in ids}
+            return (lambda client_id: client_id not in never_sent) if never_sent else None
+        if not table.dynamic_lighting_enabled:
+            return None
+        is_create = data.get('operation') == 'create'
+
+        def can_see(client_id: str) -> bool:
+            dm, user_id = viewer(client_id)
+            if dm or self.cache.can_see(table, user_id, entity):
+                return True
+            if is_create:
+                self._withheld.setdefault(table_id, {}).setdefault(client_id, set()).add(entity.sprite_id)
+            return False
+
+        return can_see
+
+    def has_withheld(self, table_id: str) -> bool:
+        return bool(self._withheld.get(table_id))
+
+    def reveal(self, table, viewer: Viewer, connected: Iterable[str]) -> List[Tuple[str, Message]]:
+        """(client_id, creation) for every held-back sprite its client can see now."""
+        table_id = str(table.table_id)
+        pending = self._withheld.get(table_id)
+        if not pending:
+            return []
+        connected = set(connected)
+        out = []
+        for client_id in list(pending):
+            sprite_ids = pending[client_id]
+            if client_id not in connected:
+                del pending[client_id]
+                continue
+            dm, user_id = viewer(client_id)
+            for sprite_id in list(sprite_ids):
+                entity = table.find_entity_by_sprite_id(sprite_id)
+                if entity is None:
+                    sprite_ids.discard(sprite_id)
+                elif (dm or not table.dynamic_lighting_enabled or entity.layer != _FILTERED_LAYER
+                        or self.cache.can_see(table, user_id, entity)):
+                    sprite_ids.discard(sprite_id)
+                    sprite_data = entity.to_dict()
+                    sprite_data['table_id'] = table_id
+                    out.append((client_id, Message(MessageType.SPRITE_UPDATE, {
+                        'sprite_id': sprite_id,
+                        'operation': 'create',
+                        'sprite_data': sprite_data,
+                        'table_id': table_id,
+                    })))
+            if not sprite_ids:
+                del pending[client_id]
+        if not pending:
+            del self._withheld[table_id]
+        return out
+
+    def forget(self, table_id: str) -> None:
+        self._withheld.pop(table_id, None)
+        self.cache.forget(table_id)
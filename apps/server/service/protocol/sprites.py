@@ -316,6 +316,7 @@ class _SpritesMixin(_ProtocolBase):
                 'y': to_pos.get('y') if isinstance(to_pos, dict) else to_pos[1],
                 'table_id': table_id
             })
+            self._discard_preview(sprite_id, 'drag')
             await self.broadcast_to_session(move_message, client_id)
 
             return Message(MessageType.SPRITE_RESPONSE, response_data)
@@ -361,6 +362,7 @@ class _SpritesMixin(_ProtocolBase):
             if action_id:
                 response_data['action_id'] = action_id
 
+            self._discard_preview(sprite_id, 'resize')
             await self.broadcast_to_session(
                 Message(MessageType.SPRITE_SCALE, {'sprite_id': sprite_id, 'width': width, 'height': height, 'table_id': table_id}),
                 client_id
@@ -411,6 +413,7 @@ class _SpritesMixin(_ProtocolBase):
             if action_id:
                 response_data['action_id'] = action_id
 
+            self._discard_preview(sprite_id, 'rotate')
             await self.broadcast_to_session(
                 Message(MessageType.SPRITE_ROTATE, {
                     'sprite_id': sprite_id,
@@ -441,10 +444,7 @@ class _SpritesMixin(_ProtocolBase):
             user_id = self._get_user_id(msg, client_id)
             if not await self._can_control_sprite(sprite_id, user_id):
                 return  # silently drop — player doesn't own this sprite
-        await self.broadcast_to_session(
-            Message(MessageType.SPRITE_DRAG_PREVIEW, {'id': sprite_id, 'x': x, 'y': y}),
-            client_id
-        )
+        await self._broadcast_preview('drag', sprite_id, Message(MessageType.SPRITE_DRAG_PREVIEW, {'id': sprite_id, 'x': x, 'y': y}), client_id)
 
     async def handle_sprite_resize_preview(self, msg: Message, client_id: str) -> None:
         """Broadcast live resize preview — no DB write, no confirmation."""
@@ -460,10 +460,7 @@ class _SpritesMixin(_ProtocolBase):
             user_id = self._get_user_id(msg, client_id)
             if not await self._can_control_sprite(sprite_id, user_id):
                 return
-        await self.broadcast_to_session(
-            Message(MessageType.SPRITE_RESIZE_PREVIEW, {'id': sprite_id, 'width': width, 'height': height}),
-            client_id
-        )
+        await self._broadcast_preview('resize', sprite_id, Message(MessageType.SPRITE_RESIZE_PREVIEW, {'id': sprite_id, 'width': width, 'height': height}), client_id)
 
     async def handle_sprite_rotate_preview(self, msg: Message, client_id: str) -> None:
         """Broadcast live rotate preview — no DB write, no confirmation."""
@@ -479,10 +476,19 @@ class _SpritesMixin(_ProtocolBase):
             user_id = self._get_user_id(msg, client_id)
             if not await self._can_control_sprite(sprite_id, user_id):
                 return
-        await self.broadcast_to_session(
-            Message(MessageType.SPRITE_ROTATE_PREVIEW, {'id': sprite_id, 'rotation': rotation}),
-            client_id
-        )
+        await self._broadcast_preview('rotate', sprite_id, Message(MessageType.SPRITE_ROTATE_PREVIEW, {'id': sprite_id, 'rotation': rotation}), client_id)
+
+    async def _broadcast_preview(self, kind: str, sprite_id: str, message: Message, client_id: str) -> None:
+        """Hand a preview to the session's coalescer, or broadcast it when coalescing is off."""
+        if self.preview_coalescer is None:
+            await self.broadcast_to_session(message, client_id)
+        else:
+            await self.preview_coalescer.offer(kind, sprite_id, message, client_id)
+
+    def _discard_preview(self, sprite_id: str, kind: str) -> None:
+        """A committed change supersedes any preview still waiting for the next tick."""
+        if self.preview_coalescer is not None:
+            self.preview_coalescer.discard(sprite_id, kind)
 
     async def handle_sprite_update(self, msg: Message, client_id: str) -> Message:
         """Handle sprite update message with character binding and token stats support"""
@@ -0,0 +1,95 @@
+"""
+Per-table sequence numbers and a ring of recent table broadcasts.
+
+Each broadcast that changes a table (sprite, wall, paint, measurement, layer
+and table-setting updates carrying a ``table_id``) is stamped with
+``data['table_seq']``, a counter that only grows for that table, and kept in a
+bounded ring. A join snapshot reports the table's sequence and the log's
+``epoch``. A reconnecting client sends TABLE_RESUME with both. If nothing it
+missed has fallen off the ring, it gets back just those broadcasts, filtered by
+the same layer and line-of-sight checks as live delivery. Otherwise it gets a
+fresh snapshot.
+
+The epoch changes whenever the log is recreated (e.g. after a server
+restart), so a sequence number from an earlier process is never trusted.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from core_table.protocol import Message, MessageType
+
+_DELTA_TYPES = frozenset({
+    MessageType.SPRITE_UPDATE,
+    MessageType.SPRITE_REMOVE,
+    MessageType.SPRITE_MOVE,
+    MessageType.SPRITE_SCALE,
+    MessageType.SPRITE_ROTATE,
+    MessageType.TABLE_UPDATE,
+    MessageType.TABLE_SETTINGS_CHANGED,
+    MessageType.WALL_DATA,
+    MessageType.PAINT_STROKE_CREATE,
+    MessageType.PAINT_STROKE_DELETE,
+    MessageType.PAINT_STROKE_CLEAR,
+    MessageType.MEASUREMENT_UPSERT,
+    MessageType.MEASUREMENT_DELETE,
+    MessageType.MEASUREMENT_CLEAR,
+    MessageType.LAYER_SETTINGS_UPDATE,
+})
+
+Delta = Tuple[int, Message, Optional[str]]
+
+
+class TableDeltaLog:
+    """Sequence counters and the last ``capacity`` deltas of every table."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.epoch = uuid.uuid4().hex[:12]
+        self._seq: Dict[str, int] = {}
+        self._rings: Dict[str, Deque[Delta]] = {}
+
+    def seq(self, table_id: str) -> int:
+        return self._seq.get(str(table_id), 0)
+
+    def record(self, message: Message, layer: Optional[str] = None) -> Optional[int]:
+        """Stamp and keep ``message`` if it is a table delta; returns its sequence."""
+        data = message.data
+        if message.type not in _DELTA_TYPES or not isinstance(data, dict):
+            return None
+        table_id = data.get('table_id')
+        if not isinstance(table_id, str) or not table_id:
+            return None
+        seq = self._seq.get(table_id, 0) + 1
+        self._seq[table_id] = seq
+        data['table_seq'] = seq
+        ring = self._rings.get(table_id)
+        if ring is None:
+            ring = self._rings[table_id] = deque(maxlen=self.capacity)
+        ring.append((seq, message, layer))
+        return seq
+
+    def since(
+        self, table_id: str, last_seq: int, epoch: Optional[str],
+        can_see: Callable[[Message, Optional[str]], bool] = lambda message, layer: True,
+    ) -> Optional[List[Message]]:
+        """Deltas after ``last_seq`` the caller may see, or None when a snapshot is needed.
+
+        ``can_see`` gets each delta with the layer it was broadcast to.
+        """
+        table_id = str(table_id)
+        current = self.seq(table_id)
+        if epoch != self.epoch or last_seq < 0 or last_seq > current:
+            return None
+        if last_seq == current:
+            return []
+        ring = self._rings.get(table_id)
+        if not ring or ring[0][0] > last_seq + 1:
+            return None
+        return [message for seq, message, layer in ring if seq > last_seq and can_see(message, layer)]
+
+    def forget(self, table_id: str) -> None:
+        """Drop the ring of a deleted table; its counter stays so sequences never repeat."""
+        self._rings.pop(str(table_id), None)
@@ -0,0 +1,142 @@
+"""
+Cached join snapshots for TABLE_REQUEST.
+
+A join needs the table's layered entities, walls, layer settings and paint
+strokes. That is the most expensive read in the protocol, and a reconnect
+storm asks for the same table many times in a row. TableSnapshotCache keeps
+one snapshot per (table, role), tagged with a version. The version combines
+the table's own ``VirtualTable.version``, which moves on every entity, wall
+or fog change whoever makes it (handlers, REST routes, services), with a
+counter bumped around every handler that may change a table, which covers
+the settings and database rows the table object does not track. A request
+for a snapshot that is already being built waits for that build instead of
+starting its own.
+
+Snapshots hold nothing specific to a user: asset hashes depend on the
+requesting user's session assets and are added to a copy after the lookup.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Dict, Optional, Tuple
+
+from core_table.protocol import Message, MessageType
+from utils.observability import record_table_snapshot
+
+from .batching import resource_key
+
+Snapshot = Dict[str, Any]
+Version = Tuple[int, int, int]
+
+# Handlers that never change what a join snapshot contains
+_READ_ONLY_TYPES = frozenset({
+    MessageType.PING,
+    MessageType.PONG,
+    MessageType.TEST,
+    MessageType.SUCCESS,
+    MessageType.ERROR,
+    MessageType.BATCH,  # sub-messages are checked one by one
+    MessageType.TABLE_REQUEST,
+    MessageType.TABLE_RESUME,
+    MessageType.TABLE_LIST_REQUEST,
+    MessageType.TABLE_ACTIVE_REQUEST,
+    MessageType.PLAYER_LIST_REQUEST,
+    MessageType.CONNECTION_STATUS_REQUEST,
+    MessageType.SPRITE_REQUEST,
+    MessageType.SPRITE_DRAG_PREVIEW,
+    MessageType.SPRITE_RESIZE_PREVIEW,
+    MessageType.SPRITE_ROTATE_PREVIEW,
+    MessageType.ASSET_DOWNLOAD_REQUEST,
+    MessageType.ASSET_LIST_REQUEST,
+    MessageType.CHARACTER_LOAD_REQUEST,
+    MessageType.CHARACTER_LIST_REQUEST,
+    MessageType.CHARACTER_LOG_REQUEST,
+    MessageType.CHARACTER_DRAFT_LIST_REQUEST,
+    MessageType.CHARACTER_DRAFT_LOAD_REQUEST,
+    MessageType.SESSION_RULES_REQUEST,
+    MessageType.STATE_SYNC_REQUEST,
+    MessageType.COMBAT_STATE_REQUEST,
+    MessageType.COMBAT_LOG_REQUEST,
+    MessageType.ATTACK_PREVIEW,
+    MessageType.CHAT,
+    MessageType.CHAT_REQUEST,
+})
+
+
+class TableSnapshotCache:
+    """Latest join snapshot per (table, role), dropped as soon as the table may have changed."""
+
+    def __init__(self):
+        self._epoch = 0
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[Tuple[str, str], Tuple[Version, Snapshot]] = {}
+        self._building: Dict[Tuple[str, str, Version], asyncio.Future] = {}
+        self.counters = {'hit': 0, 'shared': 0, 'miss': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, table_id: str, table_version: int = 0) -> Version:
+        return self._epoch, self._versions.get(table_id, 0), table_version
+
+    async def get(
+        self, table_id: str, role: str, build: Callable[[], Awaitable[Snapshot]], table_version: int = 0,
+    ) -> Snapshot:
+        """The cached snapshot for the current version, building it at most once.
+
+        ``table_version`` is the table's ``VirtualTable.version``, read before
+        ``build`` runs.
+        """
+        self._versions.setdefault(table_id, 0)
+        version = self.version(table_id, table_version)
+        entry = self._entries.get((table_id, role))
+        if entry is not None and entry[0] == version:
+            self._count('hit')
+            return entry[1]
+
+        flight = (table_id, role, version)
+        pending = self._building.get(flight)
+        if pending is not None:
+            snapshot = await asyncio.shield(pending)
+            if snapshot is not None:
+                self._count('shared')
+                return snapshot
+
+        self._count('miss')
+        future = asyncio.get_running_loop().create_future()
+        self._building.setdefault(flight, future)
+        snapshot = None
+        try:
+            snapshot = await build()
+            if self.version(table_id, table_version) == version:
+                self._entries[(table_id, role)] = (version, snapshot)
+            return snapshot
+        finally:
+            # Waiters rebuild for themselves if this build failed
+            future.set_result(snapshot)
+            if self._building.get(flight) is future:
+                del self._building[flight]
+
+    def invalidate(self, table_id: Optional[str] = None) -> None:
+        """Forget snapshots of ``table_id``, or of every table when it is None or unknown."""
+        if table_id is None or table_id not in self._versions:
+            # Unknown ids may be a table name rather than its UUID
+            self._epoch += 1
+            self._entries.clear()
+            return
+        self._versions[table_id] += 1
+        for key in [key for key in self._entries if key[0] == table_id]:
+            del self._entries[key]
+
+    def invalidate_for(self, msg: Message) -> None:
+        """Drop whatever snapshots the handler for ``msg`` may change."""
+        if msg.type in _READ_ONLY_TYPES:
+            return
+        key = resource_key(msg)
+        table_id = key[1] if key is not None and key[0] in ('table', 'sprite') else None
+        self.invalidate(table_id)
+
+    def _count(self, outcome: str) -> None:
+        self.counters[outcome] += 1
+        record_table_snapshot(outcome)
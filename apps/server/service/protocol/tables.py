@@ -1,3 +1,5 @@
+from typing import Optional
+
 from core_table.async_actions_protocol import Position
 from core_table.protocol import Message, MessageType
 from utils.logger import setup_logger
@@ -34,6 +36,10 @@ class _TablesMixin(_ProtocolBase):
                 'table_id': table_id
             })
             await self.broadcast_to_session(update_message, client_id)
+            if self.table_deltas is not None:
+                self.table_deltas.forget(table_id)
+            if self.sight is not None:
+                self.sight.forget(table_id)
 
             return Message(MessageType.SUCCESS, {
                 'table_id': table_id,
@@ -130,89 +136,132 @@ class _TablesMixin(_ProtocolBase):
             return Message(MessageType.ERROR, {'error': 'No data provided in table request'})
         table_name = msg.data.get('table_name', 'default')
         table_id = msg.data.get('table_id', table_name)
-        user_id = self._get_user_id(msg, client_id) or 0
         result = await self.actions.get_table(table_id)
 
         if not result.success or not result.data or result.data.get('table') is None:
             return Message(MessageType.ERROR, {'error': 'Failed to get table'})
+
+        table_obj = result.data['table']
+        role = self._get_client_role(client_id)
+        snapshot_key = str(getattr(table_obj, 'table_id', None) or table_id)
+
+        async def build() -> dict:
+            return await self._build_table_snapshot(table_obj, table_id, role)
+
+        if self.table_snapshots is None:
+            snapshot = await build()
         else:
-            # Get table data and add xxHash information
-            table_obj = (result.data or {}).get('table')
-            to_dict_fn = getattr(table_obj, 'to_dict', None)
-            table_data: dict = {}
-            if callable(to_dict_fn):
+            snapshot = await self.table_snapshots.get(snapshot_key, role, build, getattr(table_obj, 'version', 0))
+        snapshot = await self._with_asset_hashes(snapshot, msg, client_id)
+        return Message(MessageType.TABLE_RESPONSE, {'name': table_name, 'client_id': client_id, **snapshot})
+
+    async def _with_asset_hashes(self, snapshot: dict, msg: Message, client_id: str) -> dict:
+        """Copy of ``snapshot`` with asset hashes for the requesting user; the shared one is left as is."""
+        table_data = dict(snapshot['table_data'])
+        table_data['layers'] = {
+            layer: {key: dict(entity) for key, entity in entities.items()} if isinstance(entities, dict) else entities
+            for layer, entities in table_data.get('layers', {}).items()
+        }
+        user_id = self._get_user_id(msg, client_id) or 0
+        table_data = await self.add_asset_hashes_to_table(table_data, session_code=msg.data.get('session_code', 'default'), user_id=user_id)
+        return {**snapshot, 'table_data': table_data}
+
+    async def _build_table_snapshot(self, table_obj, table_id, role: str) -> dict:
+        """Everything a client needs to show a table, filtered for ``role``.
+
+        The result is shared between all clients of the same role, so it holds
+        nothing user-specific; treat it as read-only.
+        """
+        # Read first: a change landing mid-build is then replayed on resume, never skipped
+        table_seq = self.table_deltas.seq(str(getattr(table_obj, 'table_id', table_id))) if self.table_deltas else None
+        to_dict_fn = getattr(table_obj, 'to_dict', None)
+        table_data: dict = {}
+        if callable(to_dict_fn):
+            try:
+                result_data = to_dict_fn()
+                table_data = result_data if isinstance(result_data, dict) else {}
+            except Exception:
+                pass
+        elif isinstance(table_obj, dict):
+            table_data = table_obj
+
+        if not is_dm(role):
+            allowed_layers = set(get_visible_layers(role))
+            layers = table_data.get('layers', {})
+            table_data = {**table_data, 'layers': {k: v for k, v in layers.items() if k in allowed_layers}}
+
+        # Include walls for join-time sync
+        walls_list = []
+        if hasattr(table_obj, 'walls'):
+            walls_list = [w.to_dict() for w in table_obj.walls.values()]
+
+        # Walls (when not in memory, e.g. after a restart), layer settings and paint strokes in one session
+        layer_settings_data = {}
+        paint_strokes_list: list = []
+        if table_id:
+            try:
+                import json as _json
+
+                from database import crud
+                from database.database import SessionLocal
+                db = SessionLocal()
                 try:
-                    result_data = to_dict_fn()
-                    table_data = result_data if isinstance(result_data, dict) else {}
-                except Exception:
-                    pass
-            elif isinstance(table_obj, dict):
-                table_data = table_obj
-            table_data_with_hashes = await self.add_asset_hashes_to_table(table_data, session_code=msg.data.get('session_code', 'default'), user_id=user_id)
+                    layer_settings_json, db_strokes, db_walls = crud.get_table_join_rows(
+                        db, str(table_id), include_walls=not walls_list,
+                    )
+                finally:
+                    db.close()
+                if db_walls:
+                    walls_list = [w.to_dict() for w in db_walls if hasattr(w, 'to_dict')]
+                if layer_settings_json:
+                    layer_settings_data = _json.loads(layer_settings_json)
+                paint_strokes_list = [s.to_dict() for s in db_strokes]
+            except Exception as _e:
+                logger.warning(f"Could not load join data from DB for table {table_id}: {_e}")
+
+        snapshot: dict = {
+            'table_data': table_data,
+            'walls': walls_list,
+            'layer_settings': layer_settings_data,
+            'paint_strokes': paint_strokes_list,
+        }
+        if self.table_deltas is not None:
+            snapshot['table_seq'] = table_seq
+            snapshot['table_epoch'] = self.table_deltas.epoch
+        return snapshot
 
+    async def handle_table_resume(self, msg: Message, client_id: str) -> Message:
+        """Send a reconnecting client the table broadcasts it missed, or a full snapshot."""
+        if not msg.data:
+            return Message(MessageType.ERROR, {'error': 'No data provided in table resume'})
+        table_id = msg.data.get('table_id')
+        if not table_id:
+            return Message(MessageType.ERROR, {'error': 'table_id is required'})
+
+        since_seq = msg.data.get('since_seq')
+        if self.table_deltas is not None and isinstance(since_seq, int) and not isinstance(since_seq, bool):
             role = self._get_client_role(client_id)
-            if not is_dm(role):
-                allowed_layers = set(get_visible_layers(role))
-                layers = table_data_with_hashes.get('layers', {})
-                table_data_with_hashes['layers'] = {k: v for k, v in layers.items() if k in allowed_layers}
-
-            # Include walls for join-time sync
-            table_obj2 = (result.data or {}).get('table')
-            walls_list = []
-            if table_obj2 and hasattr(table_obj2, 'walls'):
-                walls_list = [w.to_dict() for w in table_obj2.walls.values()]
-
-            # Fall back to DB if in-memory walls are empty (e.g. after server restart)
-            if not walls_list and table_id:
-                try:
-                    from database.database import SessionLocal
-                    from database.models import Wall as WallModel
-                    _db = SessionLocal()
-                    try:
-                        db_walls = _db.query(WallModel).filter(WallModel.table_id == str(table_id)).all()
-                        walls_list = [w.to_dict() for w in db_walls if hasattr(w, 'to_dict')]
-                    finally:
-                        _db.close()
-                except Exception as _e:
-                    logger.warning(f"Could not load walls from DB for table {table_id}: {_e}")
-
-            # Include persisted layer settings for join-time sync
-            layer_settings_data = {}
-            if table_id:
-                try:
-                    import json as _json
-
-                    from database import crud as _crud
-                    from database.database import SessionLocal
-                    _db = SessionLocal()
-                    try:
-                        _db_table = _crud.get_virtual_table_by_id(_db, str(table_id))
-                        if _db_table and _db_table.layer_settings:
-                            layer_settings_data = _json.loads(_db_table.layer_settings)
-                    finally:
-                        _db.close()
-                except Exception as _e:
-                    logger.warning(f"Could not load layer_settings from DB: {_e}")
-
-            # Include paint strokes for join-time sync
-            paint_strokes_list: list = []
-            if table_id:
-                try:
-                    from database import crud as _crud2
-                    from database.database import SessionLocal
-                    _db2 = SessionLocal()
-                    try:
-                        paint_strokes_list = [s.to_dict() for s in _crud2.get_paint_strokes_for_table(_db2, str(table_id))]
-                    finally:
-                        _db2.close()
-                except Exception as _e:
-                    logger.warning(f"Could not load paint strokes from DB for table {table_id}: {_e}")
-
-            return Message(MessageType.TABLE_RESPONSE, {'name': table_name, 'client_id': client_id,
-                                                            'table_data': table_data_with_hashes,
-                                                            'walls': walls_list,
-                                                            'layer_settings': layer_settings_data,
-                                                            'paint_strokes': paint_strokes_list})
+            visible = None if is_dm(role) else set(get_visible_layers(role))
+            missed = self.table_deltas.since(
+                str(table_id), since_seq, msg.data.get('table_epoch'),
+                lambda delta, layer: (
+                    (visible is None or layer is None or layer in visible)
+                    and self._sight_allows_replay(delta, layer, client_id)
+                ),
+            )
+            if missed is not None:
+                return Message(MessageType.TABLE_RESUME_RESPONSE, {
+                    'table_id': table_id,
+                    'table_seq': self.table_deltas.seq(str(table_id)),
+                    'table_epoch': self.table_deltas.epoch,
+                    'messages': [delta.to_dict() for delta in missed],
+                })
+
+        logger.debug("Table resume fell back to snapshot", extra={"event_name": "table.resume.snapshot"})
+        return await self.handle_table_request(Message(MessageType.TABLE_REQUEST, {
+            'table_id': table_id,
+            'session_code': msg.data.get('session_code', 'default'),
+        }), client_id)
 
     async def handle_table_settings_update(self, msg: Message, client_id: str) -> Message:
         """Handle DM request to change dynamic lighting / fog exploration settings for a table."""
@@ -386,6 +435,7 @@ class _TablesMixin(_ProtocolBase):
 
                 response_error = None
                 response = None
+                broadcast: Optional[Message] = msg
                 if update_category == 'table':
                     if not is_dm(role):
                         return Message(MessageType.ERROR, {'error': 'Only DMs can modify table settings'})
@@ -396,20 +446,40 @@ class _TablesMixin(_ProtocolBase):
                                 'table_id': table_id,
                                 'message': f'Table {update_type} successfully'
                             })
-                        case 'fog_update':
+                        case 'fog_update' | 'fog_edit':
                             session_id = self._get_session_id(msg)
                             hide_rectangles = update_data.get('hide_rectangles', [])
                             reveal_rectangles = update_data.get('reveal_rectangles', [])
 
-                            result = await self.actions.update_fog_rectangles(table_id, hide_rectangles, reveal_rectangles, session_id)
+                            # fog_update carries the whole fog, fog_edit only the rectangles to apply
+                            apply_fog = (self.actions.update_fog_rectangles if update_type == 'fog_update'
+                                         else self.actions.edit_fog)
+                            result = await apply_fog(table_id, hide_rectangles, reveal_rectangles, session_id)
 
                             if result.success:
-                                fog_data = result.data.get('fog_rectangles') if result.data else {}
+                                fog_data = result.data or {}
                                 response = Message(MessageType.SUCCESS, {
                                     'table_id': table_id,
                                     'message': 'Fog updated successfully',
-                                    'fog_rectangles': fog_data
+                                    'fog_rectangles': fog_data.get('fog_rectangles', {}),
+                                    'fog_version': fog_data.get('fog_version'),
                                 })
+                                # Clients redraw fog from the full rectangles, so the diff only gates the broadcast
+                                fog_diff = fog_data.get('fog_diff') or {}
+                                if fog_diff.get('hide') or fog_diff.get('reveal'):
+                                    fog_rectangles = fog_data.get('fog_rectangles', {})
+                                    broadcast = Message(MessageType.TABLE_UPDATE, {
+                                        'category': 'table',
+                                        'type': 'fog_update',
+                                        'data': {
+                                            'table_id': table_id,
+                                            'hide_rectangles': fog_rectangles.get('hide', []),
+                                            'reveal_rectangles': [],
+                                            'fog_version': fog_data.get('fog_version'),
+                                        },
+                                    })
+                                else:
+                                    broadcast = None
                             else:
                                 response_error = Message(MessageType.ERROR, {'error': result.message})
                         case _:
@@ -423,7 +493,8 @@ class _TablesMixin(_ProtocolBase):
                     return response_error
                 elif response:
                     await self.send_to_client(response, client_id)
-                    await self.broadcast_to_session(message=msg, client_id=client_id)
+                    if broadcast is not None:
+                        await self.broadcast_to_session(message=broadcast, client_id=client_id)
                     return response
                 else:
                     raise ValueError("No response generated for table update")
@@ -0,0 +1,205 @@
+"""
+Per-connection outbound queues for session fan-out.
+
+A broadcast encodes its message once and appends the same frame to each
+recipient's ClientSendQueue; every queue has its own writer task, so a slow
+peer only delays itself. Queues are bounded. What happens when one is full
+depends on the frame's overflow policy:
+
+- DROP_OLDEST: the oldest queued droppable frame is discarded. Used for
+  previews, where the next frame supersedes the last.
+- DISCONNECT: the client is too far behind to trust its state, so it is
+  dropped from the session and reconnects.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable, Coroutine
+from enum import Enum
+from typing import Any, Deque, Optional
+
+from core_table.codec import Frame, MessageCodec, get_codec
+from core_table.protocol import MessageType
+from utils.logger import setup_logger
+from utils.observability import WS_SEND_QUEUE_DEPTH, record_ws_send, record_ws_send_overflow
+
+logger = setup_logger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+
+
+_DROPPABLE_TYPES = frozenset({
+    MessageType.SPRITE_DRAG_PREVIEW,
+    MessageType.SPRITE_RESIZE_PREVIEW,
+    MessageType.SPRITE_ROTATE_PREVIEW,
+})
+
+
+def overflow_policy(message_type: MessageType) -> OverflowPolicy:
+    """Previews may be dropped under pressure; everything else is critical."""
+    return OverflowPolicy.DROP_OLDEST if message_type in _DROPPABLE_TYPES else OverflowPolicy.DISCONNECT
+
+
+class _Frame:
+    __slots__ = ("text", "policy", "queued_at", "waiter")
+
+    def __init__(self, text: Frame, policy: OverflowPolicy, waiter: Optional[asyncio.Future]):
+        self.text = text
+        self.policy = policy
+        self.queued_at = time.perf_counter()
+        self.waiter = waiter
+
+
+FailureHandler = Callable[["ClientSendQueue", str], Coroutine[Any, Any, None]]
+
+
+class ClientSendQueue:
+    """Bounded outbound frames for one WebSocket, written by one task."""
+
+    def __init__(
+        self,
+        websocket: Any,
+        client_id: str,
+        *,
+        max_frames: int,
+        send_timeout: float,
+        on_failure: FailureHandler,
+        codec: Optional[MessageCodec] = None,
+    ):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.codec = codec or get_codec()
+        self.max_frames = max_frames
+        self.send_timeout = send_timeout
+        self._on_failure = on_failure
+        self._frames: Deque[_Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, text: Frame, policy: OverflowPolicy = OverflowPolicy.DISCONNECT) -> bool:
+        """Queue an encoded frame; False if it was dropped or the client was cut off."""
+        return self._put(_Frame(text, policy, None))
+
+    async def deliver(self, text: Frame) -> bool:
+        """Queue a frame behind everything already queued and wait until it is sent."""
+        waiter = asyncio.get_running_loop().create_future()
+        if not self._put(_Frame(text, OverflowPolicy.DISCONNECT, waiter)):
+            return False
+        return await waiter
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the writer has nothing left to send (or has given up)."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def close(self) -> None:
+        """Stop the writer and discard unsent frames."""
+        if self.closed:
+            return
+        self.closed = True
+        self._discard()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self._idle.set()
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _put(self, frame: _Frame) -> bool:
+        if self.closed:
+            return False
+        if len(self._frames) >= self.max_frames and not self._make_room(frame):
+            return False
+        self._frames.append(frame)
+        WS_SEND_QUEUE_DEPTH.inc()
+        self._idle.clear()
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        return True
+
+    def _make_room(self, frame: _Frame) -> bool:
+        if frame.policy is OverflowPolicy.DROP_OLDEST:
+            for queued in self._frames:
+                if queued.policy is OverflowPolicy.DROP_OLDEST:
+                    self._frames.remove(queued)
+                    WS_SEND_QUEUE_DEPTH.dec()
+                    self.dropped += 1
+                    record_ws_send_overflow(frame.policy.value, "dropped")
+                    return True
+            # Nothing droppable ahead of it: the new preview is the one to lose
+            self.dropped += 1
+            record_ws_send_overflow(frame.policy.value, "dropped")
+            return False
+        record_ws_send_overflow(frame.policy.value, "disconnected")
+        logger.warning(
+            "WebSocket send queue overflow",
+            extra={
+                "event_name": "websocket.send_queue.overflow",
+                "client_id": self.client_id,
+                "queued_frames": len(self._frames),
+                "outcome": "disconnected",
+            },
+        )
+        self._fail("overflow")
+        return False
+
+    async def _drain(self) -> None:
+        while not self.closed:
+            if not self._frames:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            frame = self._frames.popleft()
+            WS_SEND_QUEUE_DEPTH.dec()
+            try:
+                send = self.websocket.send_bytes if isinstance(frame.text, bytes) else self.websocket.send_text
+                await asyncio.wait_for(send(frame.text), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                if frame.waiter is not None and not frame.waiter.done():
+                    frame.waiter.set_result(False)
+                raise
+            except Exception as exc:
+                if frame.waiter is not None and not frame.waiter.done():
+                    frame.waiter.set_result(False)
+                reason = "timeout" if isinstance(exc, asyncio.TimeoutError) else "send_failed"
+                logger.warning(
+                    "WebSocket send failed",
+                    extra={"event_name": "websocket.send.failed", "client_id": self.client_id, "reason": reason},
+                )
+                self._fail(reason)
+                return
+            record_ws_send(time.perf_counter() - frame.queued_at)
+            if frame.waiter is not None and not frame.waiter.done():
+                frame.waiter.set_result(True)
+
+    def _fail(self, reason: str) -> None:
+        """Give up on this client: drop its frames and let the session remove it."""
+        if self.closed:
+            return
+        self.close()
+        self._idle.clear()
+        task = asyncio.get_running_loop().create_task(self._on_failure(self, reason))
+        task.add_done_callback(lambda _task: self._idle.set())
+
+    def _discard(self) -> None:
+        for frame in self._frames:
+            if frame.waiter is not None and not frame.waiter.done():
+                frame.waiter.set_result(False)
+        WS_SEND_QUEUE_DEPTH.dec(len(self._frames))
+        self._frames.clear()
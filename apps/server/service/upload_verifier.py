@@ -0,0 +1,229 @@
+"""
+Streaming verification of uploaded images.
+
+An upload is checked against its intent after the client PUTs it to R2. The
+object is read in fixed-size chunks: each chunk updates the xxh64 digest and,
+until the image header is found, feeds ``ImageHeaderSniffer``, then is
+dropped. The object is never held in memory or decoded, so one verification
+needs about one chunk plus a small header buffer, whatever the image size.
+
+The sniffer reads format and dimensions from the container header (PNG IHDR,
+JPEG SOFn, GIF screen descriptor, BMP DIB header, WebP VP8/VP8L/VP8X). JPEG
+segments before the frame header (EXIF, ICC profiles) are skipped without
+buffering. Each format's end is checked too, so a truncated or padded
+upload is still rejected: PNG must end with IEND, JPEG with EOI and GIF with
+its trailer byte, and the file size recorded in a BMP or WebP (RIFF) header
+must match the object size.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import xxhash
+from PIL import Image
+
+# Bytes kept while looking for a header; real headers fit in a few dozen
+HEADER_BUDGET = 64 * 1024
+TAIL_BYTES = 12
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_END = b"IEND\xaeB`\x82"
+JPEG_END = b"\xff\xd9"
+GIF_END = b"\x3b"
+# Start-of-frame markers carrying the frame dimensions (not DHT, JPG or DAC)
+JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = frozenset({0x01, *range(0xD0, 0xD9)})
+
+
+class ImageHeaderError(ValueError):
+    """Raised when the bytes do not start with a supported, well-formed image header."""
+
+
+@dataclass(frozen=True)
+class ImageHeader:
+    format: str  # Pillow format name: PNG, JPEG, GIF, BMP or WEBP
+    width: int
+    height: int
+
+
+class ImageHeaderSniffer:
+    """Incremental header parser: ``feed`` chunks until ``header`` is set.
+
+    Holds at most ``budget`` bytes; a header not found within them raises
+    ``ImageHeaderError``.
+    """
+
+    def __init__(self, budget: int = HEADER_BUDGET):
+        self.budget = budget
+        self.header: Optional[ImageHeader] = None
+        self._buffer = bytearray()
+        self._format: Optional[str] = None
+        self._skip = 0  # JPEG segment bytes still to discard
+        self.declared_size: Optional[int] = None  # BMP and WebP: file length the header records
+
+    def feed(self, chunk: bytes) -> Optional[ImageHeader]:
+        if self.header is not None:
+            return self.header
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            self._skip -= skipped
+            chunk = chunk[skipped:]
+        self._buffer += chunk
+        self.header = self._parse()
+        if self.header is None and len(self._buffer) > self.budget:
+            raise ImageHeaderError(f"No image header within {self.budget} bytes")
+        if self.header is not None:
+            self._buffer = bytearray()
+        return self.header
+
+    def _parse(self) -> Optional[ImageHeader]:
+        data = self._buffer
+        if self._format is None:
+            if len(data) < 12:
+                return None
+            if data.startswith(PNG_SIGNATURE):
+                self._format = "PNG"
+            elif data.startswith(b"\xff\xd8"):
+                self._format = "JPEG"
+                del data[:2]
+            elif data[:6] in (b"GIF87a", b"GIF89a"):
+                self._format = "GIF"
+            elif data.startswith(b"BM"):
+                self._format = "BMP"
+                self.declared_size = struct.unpack_from("<I", data, 2)[0]
+            elif data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+                self._format = "WEBP"
+                # The RIFF size leaves out the 8-byte chunk header
+                self.declared_size = struct.unpack_from("<I", data, 4)[0] + 8
+            else:
+                raise ImageHeaderError("Unrecognized image format")
+
+        if self._format == "JPEG":
+            return self._parse_jpeg()
+        if self._format == "PNG":
+            if len(data) < 24:
+                return None
+            if data[12:16] != b"IHDR":
+                raise ImageHeaderError("PNG does not start with IHDR")
+            width, height = struct.unpack_from(">II", data, 16)
+        elif self._format == "GIF":
+            width, height = struct.unpack_from("<HH", data, 6)
+        elif self._format == "BMP":
+            if len(data) < 26:
+                return None
+            if struct.unpack_from("<I", data, 14)[0] == 12:  # OS/2 BITMAPCOREHEADER
+                width, height = struct.unpack_from("<HH", data, 18)
+            else:
+                width, height = struct.unpack_from("<ii", data, 18)
+                height = abs(height)  # negative for top-down rows
+        else:
+            dimensions = self._parse_webp()
+            if dimensions is None:
+                return None
+            width, height = dimensions
+        return self._header(width, height)
+
+    def _parse_webp(self) -> Optional[tuple]:
+        data = self._buffer
+        if len(data) < 30:
+            return None
+        kind = bytes(data[12:16])
+        if kind == b"VP8 ":
+            if data[23:26] != b"\x9d\x01\x2a":
+                raise ImageHeaderError("Corrupt WebP VP8 frame header")
+            width, height = struct.unpack_from("<HH", data, 26)
+            return width & 0x3FFF, height & 0x3FFF
+        if kind == b"VP8L":
+            if data[20] != 0x2F:
+                raise ImageHeaderError("Corrupt WebP VP8L header")
+            bits = struct.unpack_from("<I", data, 21)[0]
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if kind == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        raise ImageHeaderError("Unrecognized WebP chunk")
+
+    def _parse_jpeg(self) -> Optional[ImageHeader]:
+        # The buffer always starts at the next marker; segments are dropped once passed
+        data = self._buffer
+        while True:
+            fill = 0
+            while fill < len(data) and data[fill] == 0xFF:
+                fill += 1
+            if fill == len(data):
+                return None
+            if fill == 0:
+                raise ImageHeaderError("Corrupt JPEG marker")
+            marker = data[fill]
+            if marker in JPEG_STANDALONE_MARKERS:
+                del data[:fill + 1]
+                continue
+            if marker in (0xD9, 0xDA):
+                raise ImageHeaderError("JPEG has no frame header before its image data")
+            if len(data) < fill + 3:
+                return None
+            length = struct.unpack_from(">H", data, fill + 1)[0]
+            if length < 2:
+                raise ImageHeaderError("Corrupt JPEG segment length")
+            if marker in JPEG_SOF_MARKERS:
+                if len(data) < fill + 8:
+                    return None
+                height, width = struct.unpack_from(">HH", data, fill + 4)
+                return self._header(width, height)
+            end = fill + 1 + length
+            if end > len(data):
+                self._skip = end - len(data)
+                data.clear()
+                return None
+            del data[:end]
+
+    def _header(self, width: int, height: int) -> ImageHeader:
+        if width <= 0 or height <= 0:
+            raise ImageHeaderError(f"{self._format} header has invalid dimensions {width}x{height}")
+        assert self._format is not None
+        return ImageHeader(self._format, width, height)
+
+
+@dataclass(frozen=True)
+class StreamVerification:
+    size: int
+    xxhash: str
+    header: ImageHeader
+
+
+def verify_image_stream(chunks: Iterable[bytes], header_budget: int = HEADER_BUDGET) -> StreamVerification:
+    """Hash ``chunks`` and read the image header they start with.
+
+    Raises ``ImageHeaderError`` if the bytes are not a supported image, are
+    truncated, or exceed Pillow's decompression-bomb pixel limit. Errors
+    raised by ``chunks`` itself (storage reads) propagate unchanged.
+    """
+    digest = xxhash.xxh64()
+    sniffer = ImageHeaderSniffer(header_budget)
+    size = 0
+    tail = b""
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+        if sniffer.header is None:
+            sniffer.feed(chunk)
+        tail = (tail + chunk)[-TAIL_BYTES:]
+
+    header = sniffer.header
+    if header is None:
+        raise ImageHeaderError("Image is truncated before its header")
+    # Same limit Pillow warns at when opening; the previous full decode
+    # treated that warning as a failure
+    if Image.MAX_IMAGE_PIXELS and header.width * header.height > Image.MAX_IMAGE_PIXELS:
+        raise ImageHeaderError(f"Image of {header.width}x{header.height} pixels exceeds the pixel limit")
+    if header.format == "PNG" and not tail.endswith(PNG_END):
+        raise ImageHeaderError("PNG is truncated before IEND")
+    if header.format == "JPEG" and not tail.endswith(JPEG_END):
+        raise ImageHeaderError("JPEG does not end with EOI")
+    if header.format == "GIF" and not tail.endswith(GIF_END):
+        raise ImageHeaderError("GIF does not end with its trailer")
+    if header.format == "WEBP" and size != sniffer.declared_size:
+        raise ImageHeaderError(f"WebP RIFF size does not match its {size} bytes")
+    if header.format == "BMP" and size != sniffer.declared_size:
+        raise ImageHeaderError(f"BMP file size does not match its {size} bytes")
+    return StreamVerification(size=size, xxhash=digest.hexdigest(), header=header)
@@ -1,6 +1,9 @@
 # Storage system for TTRPG
+from .r2_executor import R2Executor, get_r2_executor
 from .r2_manager import R2AssetManager
 
 __all__ = [
     'R2AssetManager',
+    'R2Executor',
+    'get_r2_executor',
 ]
@@ -0,0 +1,89 @@
+"""
+Bounded thread pool for R2 (boto3) calls made from async handlers.
+
+boto3 is blocking: a HEAD, GET, copy or even the first presign (which builds
+the client) would stall every socket served by the event loop. ``R2Executor``
+runs those calls on a dedicated pool sized by ``r2_max_concurrency``. The
+boto3 client is shared by the pool's threads and keeps the same number of
+pooled connections (``max_pool_connections``), so at most that many requests
+reach R2 at once and each reuses a warm connection; extra calls wait in the
+pool's queue instead of opening new sockets.
+
+Timeouts and retries are set on the client (``r2_connect_timeout_seconds``,
+``r2_read_timeout_seconds``, ``r2_max_attempts``), so a call never holds a
+thread longer than its attempts allow.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from config import Settings
+
+_settings = Settings()
+
+T = TypeVar("T")
+
+
+class R2Executor:
+    """Runs blocking storage calls off the event loop, at most ``max_workers`` at a time."""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0}
+        self.in_flight = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="r2")
+            return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call ``func(*args, **kwargs)`` on the pool and await its result.
+
+        The caller's context variables (request and trace ids) are carried to
+        the worker thread, as with ``asyncio.to_thread``.
+        """
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        self.counters["submitted"] += 1
+        self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        except BaseException:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.counters["completed"] += 1
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Release the pool's threads; the next ``run`` starts a fresh pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._executor is not None,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            **self.counters,
+        }
+
+
+_r2_executor: Optional[R2Executor] = None
+
+
+def get_r2_executor() -> R2Executor:
+    """Process-wide executor, sized from settings on first use."""
+    global _r2_executor
+    if _r2_executor is None:
+        _r2_executor = R2Executor(max_workers=_settings.r2_max_concurrency)
+    return _r2_executor
@@ -4,7 +4,8 @@ Production-ready boto3-based implementation following Cloudflare best practices.
 """
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, Iterator, List, Optional
 
 import boto3
 from botocore.config import Config
@@ -21,34 +22,49 @@ class R2AssetManager:
     """
     def __init__(self):
         self._s3_client = None
+        self._client_lock = threading.Lock()
 
     @property
     def s3_client(self):
         """Lazy-loaded S3 client for R2 following Cloudflare best practices"""
         if self._s3_client is None:
-            if not self.is_r2_configured():
-                raise ValueError("R2 configuration missing or invalid")
-
-            # Following Cloudflare R2 boto3 documentation
-            # https://developers.cloudflare.com/r2/examples/aws/boto3/
-            endpoint_url = self._build_endpoint_url()
-
-            # Config for boto3 1.36.0+ compatibility
-            config = Config(
-                region_name='auto',
-                s3={'addressing_style': 'path'},
-                signature_version='s3v4'
-            )
-
-            self._s3_client = boto3.client(
-                's3',
-                endpoint_url=endpoint_url,
-                aws_access_key_id=_settings.r2_access_key,
-                aws_secret_access_key=_settings.r2_secret_key,
-                config=config
-            )
+            # Calls arrive from R2Executor threads; build the shared client once
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_client()
         return self._s3_client
 
+    def _create_client(self):
+        if not self.is_r2_configured():
+            raise ValueError("R2 configuration missing or invalid")
+
+        # Following Cloudflare R2 boto3 documentation
+        # https://developers.cloudflare.com/r2/examples/aws/boto3/
+        endpoint_url = self._build_endpoint_url()
+
+        return boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            aws_access_key_id=_settings.r2_access_key,
+            aws_secret_access_key=_settings.r2_secret_key,
+            config=self.client_config()
+        )
+
+    @staticmethod
+    def client_config() -> Config:
+        """boto3 config: R2 addressing plus the timeout, retry and pool settings"""
+        # Config for boto3 1.36.0+ compatibility
+        return Config(
+            region_name='auto',
+            s3={'addressing_style': 'path'},
+            signature_version='s3v4',
+            connect_timeout=_settings.r2_connect_timeout_seconds,
+            read_timeout=_settings.r2_read_timeout_seconds,
+            retries={'max_attempts': _settings.r2_max_attempts, 'mode': 'standard'},
+            # One pooled connection per R2Executor thread, reused across calls
+            max_pool_connections=_settings.r2_max_concurrency,
+        )
+
     def _build_endpoint_url(self) -> str:
         """Build the R2 endpoint URL"""
         if _settings.r2_endpoint:
@@ -197,6 +213,29 @@ class R2AssetManager:
             raise ValueError(f"R2 object exceeds inspection limit of {max_bytes} bytes")
         return data
 
+    def iter_object_chunks(self, file_key: str, max_bytes: int, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Stream a private object in chunks of at most ``chunk_size`` bytes.
+
+        Raises ValueError once more than ``max_bytes`` have been read.
+        """
+        response = self.s3_client.get_object(
+            Bucket=_settings.r2_bucket_name,
+            Key=file_key
+        )
+        body = response["Body"]
+        try:
+            total = 0
+            while True:
+                chunk = body.read(chunk_size)
+                if not chunk:
+                    return
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ValueError(f"R2 object exceeds inspection limit of {max_bytes} bytes")
+                yield chunk
+        finally:
+            body.close()
+
     def generate_presigned_url(self, file_key: str, method: str = "GET", expiration: int = 3600) -> Optional[str]:
         """
         Generate presigned URL for R2 object following Cloudflare best practices.
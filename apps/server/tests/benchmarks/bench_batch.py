@@ -0,0 +1,66 @@
+"""Benchmarks for BATCH execution latency (pytest-benchmark).
+
+A 50-message batch touching 10 sprites on one table (5 moves each), where
+every handler awaits 1 ms of simulated storage I/O and broadcasts an update:
+
+- ``sequential``: the previous one-at-a-time loop with a broadcast per message
+- ``concurrent``: ``ServerProtocol.handle_batch``, which runs the ten sprites
+  concurrently, keeps each sprite's moves in order and sends one merged broadcast
+"""
+import asyncio
+
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from service.server_protocol import ServerProtocol
+
+IO_SECONDS = 0.001
+
+BATCH = Message(MessageType.BATCH, {'seq': 1, 'messages': [
+    {'type': MessageType.SPRITE_MOVE.value, 'data': {'table_id': 't1', 'sprite_id': f'sp-{i % 10}', 'x': i}}
+    for i in range(50)
+]})
+
+
+class _Session:
+    def __init__(self):
+        self.frames = 0
+
+    async def broadcast_to_session(self, message, exclude_client=None):
+        self.frames += 1
+
+
+def _protocol():
+    session = _Session()
+    proto = ServerProtocol(TableManager(), session_manager=session)
+
+    async def move(msg, client_id):
+        await asyncio.sleep(IO_SECONDS)
+        await proto.broadcast_to_session(Message(MessageType.SPRITE_UPDATE, msg.data), client_id)
+        return None
+
+    proto.register_handler(MessageType.SPRITE_MOVE, move)
+    return proto, session
+
+
+def _run(benchmark, batch_fn):
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(lambda: loop.run_until_complete(batch_fn()))
+    finally:
+        loop.close()
+
+
+def test_bench_batch_sequential(benchmark):
+    proto, _ = _protocol()
+
+    async def sequential():
+        for msg_data in BATCH.data['messages']:
+            msg = Message(MessageType(msg_data['type']), msg_data['data'])
+            await proto.handlers[msg.type](msg, 'c1')
+
+    _run(benchmark, sequential)
+
+
+def test_bench_batch_concurrent(benchmark):
+    proto, _ = _protocol()
+    _run(benchmark, lambda: proto.handle_batch(BATCH, 'c1'))
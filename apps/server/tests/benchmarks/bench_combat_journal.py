@@ -0,0 +1,144 @@
+"""Benchmarks for the combat command journal (pytest-benchmark).
+
+A 20-combatant encounter with a full 50-entry action log. One turn is a DM
+damage override on the next combatant followed by ``end_turn``: two accepted
+commands, each persisted through ``CombatPersistenceService`` into in-memory
+SQLite.
+
+- ``undo_snapshot[deepcopy]`` / ``undo_snapshot[capture]``: the per-command
+  before-image, old (``deepcopy(state.to_dict())``) and new
+  (``combat_journal.capture``)
+- ``turn_persisted[full]``: previous write pattern, every version rewrites the
+  encounter's combatants/settings/action log and journals the full state
+  before the command and the full result
+- ``turn_persisted[journal]``: patch rows (results without the combat
+  snapshot), with a checkpoint every ``CHECKPOINT_INTERVAL`` versions
+
+``extra_info['bytes_per_turn']`` is the size of the string parameters sent to
+the database per turn.
+"""
+import itertools
+import json
+import uuid
+from copy import deepcopy
+
+import pytest
+from core_table.combat import CombatAction
+from core_table.combat_journal import apply_patch, capture
+from service.combat_command_service import CombatCommandContext, CombatCommandService
+from service.combat_engine import CombatEngine
+from service.combat_persistence_service import CombatPersistenceService
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+COMBATANTS = 20
+SESSION = "TEST01"
+
+
+class _FullSnapshotPersistence(CombatPersistenceService):
+    """The write pattern before patches: full snapshot plus full state_before, every version."""
+
+    CHECKPOINT_INTERVAL = 1
+
+    def __init__(self, session_factory, counter):
+        super().__init__(session_factory)
+        self._counter = counter
+
+    def persist_accepted(self, *, patch, state_after, **kwargs):
+        # The old journal row carried the whole state before the command
+        if patch is not None:
+            self._counter['bytes'] += len(json.dumps(apply_patch(state_after, patch, reverse=True)))
+        return super().persist_accepted(patch=None, state_after=state_after, **kwargs)
+
+    @staticmethod
+    def _journal_result(result, state_after):
+        return result
+
+
+@pytest.fixture(autouse=True)
+def _no_engine_snapshots(monkeypatch):
+    # start_combat would also write a snapshot through the default SessionLocal
+    monkeypatch.setattr(CombatEngine, "persist", classmethod(lambda cls, session_id: None))
+
+
+def _encounter():
+    CombatEngine._active.pop(SESSION, None)
+    state = CombatEngine.start_combat(SESSION, "bench-table", [], combatants=[
+        {
+            "entity_id": f"sprite-{i}",
+            "name": f"Combatant {i}",
+            "hp": 10_000,
+            "max_hp": 10_000,
+            "armor_class": 12 + i % 6,
+            "controlled_by": [str(i)] if i % 4 == 0 else [],
+            "spell_slots": {"1": 4, "2": 3, "3": 2},
+            "spell_slots_max": {"1": 4, "2": 3, "3": 2},
+            "save_modifiers": {"str": 1, "dex": 2, "con": 1, "int": 0, "wis": 3, "cha": -1},
+            "actor_actions": [
+                {"name": "Longsword", "attack_bonus": 5, "damage": "1d8+3", "damage_type": "slashing"},
+                {"name": "Shortbow", "attack_bonus": 4, "damage": "1d6+2", "range": 80},
+            ],
+        }
+        for i in range(COMBATANTS)
+    ])
+    for i in range(50):
+        actor = state.combatants[i % COMBATANTS]
+        state.action_log.append(CombatAction(
+            action_id=str(uuid.uuid4()), combat_id=state.combat_id, round_number=1, turn_index=i % COMBATANTS,
+            actor_id=actor.combatant_id, action_type="attack", action_cost="action",
+            target_ids=[state.combatants[(i + 1) % COMBATANTS].combatant_id],
+            rolls=[{"formula": "1d20+5", "total": 17}, {"formula": "1d8+3", "total": 7}],
+            outcome="hit", damage_dealt=7, state_before=actor.to_dict(),
+        ))
+    return state
+
+
+@pytest.mark.parametrize("method", ["deepcopy", "capture"])
+def test_bench_undo_snapshot(benchmark, method):
+    state = _encounter()
+    take = (lambda: deepcopy(state.to_dict())) if method == "deepcopy" else (lambda: capture(state))
+    benchmark(take)
+
+
+@pytest.mark.parametrize("mode", ["full", "journal"])
+def test_bench_turn_persisted(benchmark, mode, test_db, test_game_session):
+    engine = test_db.get_bind()
+    counter = {'bytes': 0, 'turns': 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        rows = parameters if executemany else [parameters]
+        for row in rows:
+            values = row.values() if isinstance(row, dict) else row
+            counter['bytes'] += sum(len(v) for v in values if isinstance(v, str))
+
+    factory = sessionmaker(bind=engine, expire_on_commit=False)
+    persistence = (
+        _FullSnapshotPersistence(factory, counter) if mode == "full"
+        else CombatPersistenceService(factory)
+    )
+    service = CombatCommandService(persistence=persistence)
+    context = CombatCommandContext(session_code=SESSION, client_id="dm", role="owner", user_id=None)
+    sequence = itertools.count(1)
+    _encounter()
+
+    def turn():
+        state = CombatEngine.get_state(SESSION)
+        current = state.get_current_combatant()
+        target = state.get_next_combatant()
+        for command in (
+            {"type": "dm_override", "actor_id": target.combatant_id,
+             "override_type": "apply_damage", "value": 3},
+            {"type": "end_turn", "actor_id": current.combatant_id},
+        ):
+            result = service.apply(
+                service.parse_envelope({"sequence_id": next(sequence), "commands": [command]}),
+                context,
+            )
+            assert result.accepted, result.reason
+        counter['turns'] += 1
+
+    counter['bytes'] = 0
+    benchmark(turn)
+    event.remove(engine, "before_cursor_execute", count)
+    benchmark.extra_info['bytes_per_turn'] = counter['bytes'] // max(counter['turns'], 1)
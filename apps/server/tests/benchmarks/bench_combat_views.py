@@ -0,0 +1,119 @@
+"""Benchmarks for combat state broadcasts (pytest-benchmark).
+
+A 40-combatant encounter (12 player characters, 28 NPCs, 4 of them hidden)
+with a full action log, broadcast to 30 clients after every accepted command:
+1 DM, 6 players who each control two characters, 17 players who control
+none and 6 spectators. Every message is encoded with the JSON codec, as the
+session transport would.
+
+- ``combat_broadcast[per_client]``: a sanitized view, message and encoding
+  per recipient (previous behaviour)
+- ``combat_broadcast[view_cache]``: ``_broadcast_combat_state`` with a
+  ``CombatViewCache``; one view, message and encoding per view class
+
+``extra_info['views_built']`` is the number of views built per broadcast.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from core_table.codec import get_codec
+from core_table.combat import CombatAction, Combatant, CombatPhase, CombatState
+from core_table.protocol import Message, MessageType
+from service.combat_state_presenter import CombatStatePresenter
+from service.protocol.combat import _CombatMixin
+from service.protocol.combat_views import CombatViewCache
+
+COMBATANTS = 40
+CONTEXT = {"accepted": True, "sequence_id": 1, "applied": [{"actor_id": "c0", "action_type": "end_turn"}]}
+
+
+def _encounter() -> CombatState:
+    combatants = [
+        Combatant(
+            combatant_id=f"c{i}",
+            entity_id=f"sprite-{i}",
+            name=f"Combatant {i}",
+            hp=40,
+            max_hp=40,
+            armor_class=12 + i % 6,
+            initiative=20 - i % 20,
+            is_npc=i >= 12,
+            is_hidden=i >= 36,
+            controlled_by=[str(100 + i // 2)] if i < 12 else [],
+            damage_resistances=["fire"] if i % 5 == 0 else [],
+            save_modifiers={"str": 1, "dex": 2, "con": 1, "int": 0, "wis": 3, "cha": -1},
+            actor_actions=[{"name": "Longsword", "attack_bonus": 5, "damage": "1d8+3"}],
+        )
+        for i in range(COMBATANTS)
+    ]
+    state = CombatState(
+        combat_id="bench-combat", session_id="BENCH", table_id="bench-table",
+        phase=CombatPhase.ACTIVE, combatants=combatants, state_version=1,
+    )
+    for i in range(40):
+        state.action_log.append(CombatAction(
+            action_id=f"a{i}", combat_id=state.combat_id, round_number=1, turn_index=i % COMBATANTS,
+            actor_id=f"c{i % COMBATANTS}", action_type="attack", action_cost="action",
+            target_ids=[f"c{(i + 1) % COMBATANTS}"], rolls=[{"formula": "1d20+5", "total": 17}],
+            outcome="hit", damage_dealt=7,
+        ))
+    return state
+
+
+def _clients() -> dict:
+    clients = {"dm": {"user_id": 1, "role": "owner"}}
+    clients.update({f"pc{n}": {"user_id": 100 + n, "role": "player"} for n in range(6)})
+    clients.update({f"p{n}": {"user_id": 200 + n, "role": "player"} for n in range(17)})
+    clients.update({f"s{n}": {"user_id": 300 + n, "role": "spectator"} for n in range(6)})
+    return clients
+
+
+class _Proto(_CombatMixin):
+    """Broadcast path of the combat mixin over a transport that encodes what it sends."""
+
+    def __init__(self, clients):
+        self.client_info = clients
+        self.session_manager = SimpleNamespace(client_info=clients)
+        self.combat_views = CombatViewCache()
+        self.codec = get_codec("json")
+        self.bytes_out = 0
+
+    def _get_client_role(self, client_id):
+        return self.client_info[client_id]["role"]
+
+    def _get_client_info(self, client_id):
+        return self.client_info[client_id]
+
+    async def send_to_client(self, message, client_id):
+        self.bytes_out += len(message.encode(self.codec))
+
+    async def send_to_clients(self, message, client_ids):
+        frame = message.encode(self.codec)
+        self.bytes_out += len(frame) * len(client_ids)
+
+
+@pytest.mark.parametrize("mode", ["per_client", "view_cache"])
+def test_bench_combat_broadcast(benchmark, mode):
+    state, proto = _encounter(), _Proto(_clients())
+    loop = asyncio.new_event_loop()
+    broadcasts = []
+
+    def per_client():
+        broadcasts.append(len(proto.client_info))
+        for recipient_id, info in proto.client_info.items():
+            data = CombatStatePresenter.message_for_client(state, info["role"], info["user_id"], CONTEXT)
+            proto.bytes_out += len(Message(MessageType.ACTION_RESULT, data).encode(proto.codec))
+
+    def view_cache():
+        state.state_version += 1
+        misses = proto.combat_views.counters["miss"]
+        loop.run_until_complete(proto._broadcast_combat_state(state, MessageType.ACTION_RESULT, "dm", CONTEXT))
+        broadcasts.append(proto.combat_views.counters["miss"] - misses)
+
+    try:
+        benchmark(per_client if mode == "per_client" else view_cache)
+    finally:
+        loop.close()
+    benchmark.extra_info["views_built"] = broadcasts[-1]
+    benchmark.extra_info["bytes_per_broadcast"] = proto.bytes_out // len(broadcasts)
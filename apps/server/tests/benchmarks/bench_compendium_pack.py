@@ -0,0 +1,87 @@
+"""Benchmarks for compendium artifact startup (pytest-benchmark).
+
+Loading the bundled SRD artifact (manifest-verified) the way a server
+worker does at import:
+
+- ``compendium_load[json]``: read, hash and parse the five JSON documents
+  (previous behaviour)
+- ``compendium_load[pack]``: map ``compendium.pack``, check it against the
+  manifest and its record digest, and parse only its offset index
+
+The timed part runs in this process. ``extra_info`` also holds the growth of
+a fresh interpreter that loads the artifact and reads one monster, from
+``/proc/self/status``: ``rss_kib`` (resident set) and ``private_kib``
+(anonymous pages; the pack's mapped pages are file-backed and shared between
+workers), plus ``cold_seconds`` for that first load.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from routers.compendium import BUNDLED_COMPENDIUM_DIR
+from service.compendium_artifact import CompendiumArtifact
+
+SERVER_DIR = Path(__file__).resolve().parents[2]
+SCRIPT = SERVER_DIR.parents[1] / "scripts" / "compendium" / "pack_artifact.py"
+
+RSS_PROBE = """
+import json, sys, time
+from pathlib import Path
+from service.compendium_artifact import CompendiumArtifact
+
+def rss_kib():
+    with open("/proc/self/status") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return int(fields["VmRSS"].split()[0]), int(fields["RssAnon"].split()[0])
+
+before = rss_kib()
+started = time.perf_counter()
+artifact = CompendiumArtifact(Path(sys.argv[1]), require_manifest=True)
+assert artifact.data["bestiary_data"]["monsters"]["Aboleth"]["name"] == "Aboleth"
+seconds = time.perf_counter() - started
+after = rss_kib()
+print(json.dumps({"storage": artifact.storage, "rss_kib": after[0] - before[0],
+                  "private_kib": after[1] - before[1], "seconds": seconds}))
+"""
+
+
+@pytest.fixture(scope="module")
+def generations(tmp_path_factory):
+    json_dir = tmp_path_factory.mktemp("json")
+    for path in BUNDLED_COMPENDIUM_DIR.iterdir():
+        if path.is_file():
+            shutil.copy(path, json_dir / path.name)
+    pack_dir = tmp_path_factory.mktemp("pack")
+    shutil.copytree(json_dir, pack_dir, dirs_exist_ok=True)
+    subprocess.run(
+        [sys.executable, str(SCRIPT), str(pack_dir)],
+        check=True, capture_output=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return {"json": json_dir, "pack": pack_dir}
+
+
+def _probe(directory: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", RSS_PROBE, str(directory)],
+        check=True, capture_output=True, text=True, cwd=SERVER_DIR,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("storage", ["json", "pack"])
+def test_bench_compendium_load(benchmark, generations, storage):
+    directory = generations[storage]
+    artifact = benchmark(CompendiumArtifact, directory, require_manifest=True)
+    assert artifact.storage == storage and artifact.verified
+
+    if Path("/proc/self/status").is_file():
+        probe = _probe(directory)
+        assert probe["storage"] == storage
+        benchmark.extra_info["rss_kib"] = probe["rss_kib"]
+        benchmark.extra_info["private_kib"] = probe["private_kib"]
+        benchmark.extra_info["cold_seconds"] = round(probe["seconds"], 4)
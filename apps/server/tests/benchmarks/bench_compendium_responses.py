@@ -0,0 +1,74 @@
+"""Benchmarks for repeated compendium fetches (pytest-benchmark).
+
+A client loading the compendium screens fetches the full bestiary
+(``/monsters?limit=500``), spells, equipment and races from the bundled SRD
+artifact, then does it again on the next page load. Requests go through the
+ASGI stack with httpx; the client accepts gzip.
+
+- ``compendium_fetch[uncached]``: the same endpoints on plain routes;
+  serialized per request, never 304 (previous behaviour)
+- ``compendium_fetch[cached]``: ``CompendiumResponseCache`` serves the stored
+  gzip body
+- ``compendium_fetch[revalidate]``: the client sends the ETag it holds and
+  gets ``304 Not Modified``
+
+``extra_info`` holds ``requests_per_second`` and ``bytes_out`` per page load.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from routers import compendium
+
+PATHS = ("/monsters?limit=500", "/spells?limit=500", "/equipment", "/races")
+
+
+def _plain_app() -> FastAPI:
+    app = FastAPI()
+    for path, endpoint in (
+        ("/monsters", compendium.get_monsters),
+        ("/spells", compendium.get_spells),
+        ("/equipment", compendium.get_equipment),
+        ("/races", compendium.get_races),
+    ):
+        app.add_api_route(f"{compendium.router.prefix}{path}", endpoint, methods=["GET"])
+    return app
+
+
+def _cached_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(compendium.router)
+    return app
+
+
+@pytest.mark.parametrize("mode", ["uncached", "cached", "revalidate"])
+def test_bench_compendium_fetch(benchmark, mode):
+    assert compendium.compendium_service.data, "bundled compendium must load"
+    app = _plain_app() if mode == "uncached" else _cached_app()
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    urls = [f"{compendium.router.prefix}{path}" for path in PATHS]
+    etags: dict[str, str] = {}
+    sent: list[int] = []
+
+    async def page_load():
+        total = 0
+        for url in urls:
+            headers = {"Accept-Encoding": "gzip"}
+            if mode == "revalidate" and url in etags:
+                headers["If-None-Match"] = etags[url]
+            response = await client.get(url, headers=headers)
+            assert response.status_code in (200, 304)
+            etags[url] = response.headers.get("etag", "")
+            total += int(response.headers.get("content-length", 0))
+        sent.append(total)
+
+    try:
+        loop.run_until_complete(page_load())
+        benchmark(lambda: loop.run_until_complete(page_load()))
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+    benchmark.extra_info["requests_per_second"] = round(len(urls) / benchmark.stats.stats.mean)
+    benchmark.extra_info["bytes_out"] = sent[-1]
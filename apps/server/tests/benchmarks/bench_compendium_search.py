@@ -0,0 +1,68 @@
+"""Benchmarks for compendium search (pytest-benchmark).
+
+Latency of one search request against the whole bundled SRD artifact (races,
+classes, backgrounds, spells, monsters, equipment and feats), for the queries
+a typing user or a filtering panel sends:
+
+- ``prefix``: ``"red dra"``, a name still being typed
+- ``full_text``: ``"fire damage"``, words anywhere in a record
+- ``faceted``: dragons of CR 10, no text
+- ``faceted_text``: ``"breath"`` among dragons
+
+``compendium_search[scan-Q]`` lowers and scans every record's name and text
+fields per request (the routes' previous approach); ``compendium_search[index-Q]``
+asks the ``CompendiumIndex`` of the loaded generation. ``index_build`` is the
+one-off cost paid on a generation's first query.
+"""
+import pytest
+from routers.compendium import BUNDLED_COMPENDIUM_DIR
+from service.compendium_artifact import CompendiumArtifact
+from service.compendium_index import SOURCES, CompendiumIndex, _facet_values, _records, _strings, normalize_facet
+
+QUERIES = {
+    "prefix": ("red dra", {}),
+    "full_text": ("fire damage", {}),
+    "faceted": ("", {"kind": "monster", "type": "dragon", "cr": "10"}),
+    "faceted_text": ("breath", {"kind": "monster", "type": "dragon"}),
+}
+
+
+@pytest.fixture(scope="module")
+def artifact():
+    return CompendiumArtifact(BUNDLED_COMPENDIUM_DIR, require_manifest=False)
+
+
+def _scan(data, query, filters, limit=20):
+    """Per-request scan: every record's name and text lowered and searched."""
+    words = query.lower().split()
+    matches = []
+    for data_key, collection_key, kind in SOURCES:
+        for name, group, record, _ in _records(data[data_key].get(collection_key)):
+            facets = _facet_values(kind, group, record)
+            if any(normalize_facet(value) not in facets.get(facet, ()) for facet, value in filters.items()):
+                continue
+            lowered = name.lower()
+            text = " ".join(_strings(record)).lower()
+            if all(word in lowered or word in text for word in words):
+                matches.append((sum(word in lowered for word in words), name))
+    matches.sort(key=lambda match: -match[0])
+    return len(matches), [name for _, name in matches[:limit]]
+
+
+@pytest.mark.parametrize("query", list(QUERIES))
+@pytest.mark.parametrize("mode", ["scan", "index"])
+def test_bench_compendium_search(benchmark, artifact, mode, query):
+    text, filters = QUERIES[query]
+    index = artifact.index
+    assert index.search(text, filters=filters).total > 0
+
+    if mode == "scan":
+        benchmark(_scan, artifact.data, text, filters)
+    else:
+        benchmark(index.search, text, filters=filters, facets=("kind", "cr"))
+    benchmark.extra_info["records"] = len(index)
+
+
+def test_bench_index_build(benchmark, artifact):
+    index = benchmark(lambda: CompendiumIndex(artifact.data).build())
+    benchmark.extra_info["records"] = len(index)
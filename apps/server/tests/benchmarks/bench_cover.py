@@ -0,0 +1,71 @@
+"""Benchmarks for cover resolution (pytest-benchmark).
+
+An area attack preview: one attacker against the 16 combatants inside a
+fireball on a 60x60 table with 80 DM-placed cover zones (rectangles,
+circles and polygons). A hovering DM sends the same preview over and over.
+
+- ``aoe_cover_preview[per_target]``: every target tested against every
+  zone (previous behaviour)
+- ``aoe_cover_preview[batch_cold]``: ``AttackResolver.resolve_cover_many``
+  with an empty cover cache (zone bounding boxes, strongest tier first)
+- ``aoe_cover_preview[batch_warm]``: the same call repeated, served from the
+  cover cache
+"""
+import pytest
+from core_table.table import CoverZone, VirtualTable
+from service.attack_resolver import COVER_CACHE, AttackResolver, _los_blocked_by_zone
+
+CELL = 50
+TIERS = ("half", "three_quarters", "full")
+
+
+def _table() -> VirtualTable:
+    table = VirtualTable("bench", 60, 60)
+    zones = []
+    for i in range(80):
+        x, y = (i * 7) % 58 * CELL, (i * 13) % 58 * CELL
+        if i % 3 == 0:
+            zones.append(CoverZone(f"z{i}", "rect", [x, y, CELL * 2, CELL // 2], TIERS[i % 3]))
+        elif i % 3 == 1:
+            zones.append(CoverZone(f"z{i}", "circle", [x, y, CELL * 0.75], TIERS[i % 3]))
+        else:
+            zones.append(CoverZone(f"z{i}", "polygon", [[x, y], [x + CELL, y], [x + CELL // 2, y + CELL]], TIERS[i % 3]))
+    table.cover_zones = zones
+    return table
+
+
+def _targets():
+    return [(20 * CELL + dx * CELL, 30 * CELL + dy * CELL) for dx in range(4) for dy in range(4)]
+
+
+def _per_target(attacker, targets, table):
+    order = {"none": 0, "half": 1, "three_quarters": 2, "full": 3}
+    out = []
+    for tx, ty in targets:
+        best = "none"
+        for zone in table.cover_zones:
+            if _los_blocked_by_zone(attacker[0], attacker[1], tx, ty, zone):
+                if order.get(zone.cover_tier, 0) > order.get(best, 0):
+                    best = zone.cover_tier
+        out.append(best)
+    return out
+
+
+@pytest.mark.parametrize("mode", ["per_target", "batch_cold", "batch_warm"])
+def test_bench_aoe_cover_preview(benchmark, mode):
+    table, attacker, targets = _table(), (5 * CELL, 5 * CELL), _targets()
+    COVER_CACHE.clear()
+    expected = _per_target(attacker, targets, table)
+    assert AttackResolver.resolve_cover_many(attacker, targets, table) == expected
+
+    if mode == "per_target":
+        benchmark(_per_target, attacker, targets, table)
+    elif mode == "batch_cold":
+        def cold():
+            COVER_CACHE.clear()
+            return AttackResolver.resolve_cover_many(attacker, targets, table)
+        benchmark(cold)
+    else:
+        hits = COVER_CACHE.hits
+        benchmark(AttackResolver.resolve_cover_many, attacker, targets, table)
+        benchmark.extra_info["hits"] = COVER_CACHE.hits - hits
@@ -0,0 +1,92 @@
+"""Benchmarks for the inbound WebSocket pipeline (pytest-benchmark).
+
+A realistic mix of 1000 client frames (mostly drag previews and moves, some
+pings, chat and combat commands) is pushed through:
+
+- ``legacy_parse``: the previous json.loads -> json.dumps -> Message.from_json chain
+- ``decode_inbound``: one decode straight to a Message
+- ``ingest``: decode_inbound + ConnectionManager routing + session dispatch to
+  no-op handlers, i.e. everything except the handlers themselves
+"""
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+from core_table.protocol import Message, MessageType
+from service.game_session import ConnectionManager, decode_inbound
+from service.game_session_protocol import GameSessionProtocolService
+
+MIX = [
+    (0.55, MessageType.SPRITE_DRAG_PREVIEW, {'id': 'sp-1', 'x': 120.5, 'y': 64.0}),
+    (0.15, MessageType.SPRITE_MOVE, {
+        'table_id': 't1', 'sprite_id': 'sp-1', 'from': {'x': 0, 'y': 0}, 'to': {'x': 128, 'y': 64},
+        'action_id': 'a-1',
+    }),
+    (0.10, MessageType.PING, {}),
+    (0.10, MessageType.CHAT, {'text': 'I swing my axe at the goblin!', 'channel': 'party'}),
+    (0.10, MessageType.COMBAT_COMMAND, {
+        'command': 'attack', 'actor_id': 'c1', 'target_id': 'c2', 'weapon': 'longsword',
+    }),
+]
+
+
+def _frames(n=1000, seed=0):
+    rng = random.Random(seed)
+    weights = [w for w, _, _ in MIX]
+    return [
+        Message(message_type, dict(data)).to_json()
+        for _, message_type, data in rng.choices(MIX, weights=weights, k=n)
+    ]
+
+
+FRAMES = _frames()
+
+
+def test_bench_inbound_legacy_parse(benchmark):
+    def run():
+        return [Message.from_json(json.dumps(json.loads(frame))) for frame in FRAMES]
+    benchmark(run)
+
+
+def test_bench_inbound_decode_once(benchmark):
+    benchmark(lambda: [decode_inbound(frame) for frame in FRAMES])
+
+
+def _session():
+    async def handle_client(message, client_id):
+        return True
+
+    svc = GameSessionProtocolService.__new__(GameSessionProtocolService)
+    svc.session_code = 'BENCH'
+    svc.db_session = None
+    svc.clients = {}
+    svc.client_info = {'c1': {'role': 'owner'}}
+    svc.websocket_to_client = {}
+    svc.send_queues = {}
+    svc.server_protocol = SimpleNamespace(
+        handlers={message_type: None for _, message_type, _ in MIX},
+        handle_client=handle_client,
+    )
+    svc.auto_save = lambda: None
+    return svc
+
+
+def test_bench_inbound_ingest(benchmark):
+    manager = ConnectionManager()
+    websocket = object()
+    svc = _session()
+    svc.websocket_to_client[websocket] = 'c1'
+    manager.sessions_protocols['BENCH'] = svc
+    manager.connection_info[websocket] = {'session_code': 'BENCH', 'username': 'bench'}
+
+    async def ingest():
+        for frame in FRAMES:
+            await manager.handle_message(websocket, decode_inbound(frame))
+
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(lambda: loop.run_until_complete(ingest()))
+    finally:
+        loop.close()
+    benchmark.extra_info['frames'] = len(FRAMES)
@@ -62,3 +62,65 @@ def test_bench_validate_full(benchmark, env):
 def test_bench_validate_lightweight(benchmark, env):
     validator, table = env
     benchmark(validator.validate_lightweight, "e1", (0, 0), (256, 256), table)
+
+
+# --- persistent per-table index (500+ walls) ---
+
+def _make_virtual_table(n_walls, n_obstacles, grid=64):
+    from core_table.entities import Wall
+    from core_table.table import VirtualTable
+
+    table = VirtualTable("bench", 40, 40, grid_cell_px=grid)
+    for i in range(n_walls):
+        # Short segments scattered on a lattice, like a dense dungeon map
+        x, y = (i % 25) * 100 + 80, (i // 25) * 100 + 10
+        table.add_wall(Wall("bench", x, y, x, y + 60))
+    for i in range(n_obstacles):
+        table.add_entity({
+            "name": f"o{i}", "x": (i * 7) % 40, "y": (i * 11) % 40,
+            "layer": "obstacles", "width": 20, "height": 20,
+        })
+    return table
+
+
+LARGE_SIZES = [500, 1000]
+
+
+@pytest.fixture(params=LARGE_SIZES, ids=[f"walls={s}" for s in LARGE_SIZES])
+def large_env(request):
+    rules = SessionRules(
+        session_id="bench",
+        movement_mode="cell",
+        server_validation_tier="full",
+    )
+    return MovementValidator(rules), _make_virtual_table(request.param, request.param // 10)
+
+
+def test_bench_moves_persistent_index(benchmark, large_env):
+    """Steady-state moves: the table's TableSpatialIndex is reused as-is."""
+    validator, table = large_env
+    benchmark(validator.validate_lightweight, "e1", (32, 32), (160, 32), table)
+
+
+def test_bench_moves_rebuilt_index(benchmark, large_env):
+    """Previous behaviour: plain wall/entity dicts force a hash rebuild per move."""
+    validator, table = large_env
+    flat = SimpleNamespace(
+        grid_cell_px=table.grid_cell_px, width=table.width, height=table.height,
+        walls=dict(table.walls), entities=dict(table.entities),
+    )
+    benchmark(validator.validate_lightweight, "e1", (32, 32), (160, 32), flat)
+
+
+def test_bench_moves_after_wall_edit(benchmark, large_env):
+    """A door toggle between moves costs one incremental re-file, not a rebuild."""
+    validator, table = large_env
+    wall_id = next(iter(table.walls))
+    state = {"open": False}
+
+    def edit_then_move():
+        state["open"] = not state["open"]
+        table.update_wall(wall_id, {"door_state": "open" if state["open"] else "closed"})
+        return validator.validate_lightweight("e1", (32, 32), (160, 32), table)
+
+    benchmark(edit_then_move)
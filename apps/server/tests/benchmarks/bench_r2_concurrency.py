@@ -0,0 +1,92 @@
+"""Benchmarks for concurrent R2 asset operations (pytest-benchmark).
+
+48 asset operations issued at once from one event loop, as when a table of
+players loads a scene: each is a HEAD, a presign, or a 256 KiB GET against an
+in-memory S3 stub whose network calls block for 10 ms (boto3 is blocking).
+A ticker coroutine sleeping 1 ms alongside them measures event-loop lag.
+
+- ``r2_concurrent_ops[inline]``: the boto3 calls made directly in the
+  coroutines (previous behaviour); each one stalls the loop
+- ``r2_concurrent_ops[pool]``: the same calls through ``R2Executor`` with
+  8 workers
+
+``extra_info`` holds ``max_loop_lag_ms`` (a burst's worst ticker overshoot,
+median over rounds) and ``ops_per_second``.
+"""
+import asyncio
+import statistics
+import time
+
+import pytest
+from config import Settings
+from storage import r2_manager as r2_manager_module
+from storage.r2_executor import R2Executor
+from storage.r2_manager import R2AssetManager
+from tests.unit.test_r2_executor import InMemoryS3Client
+
+OPERATIONS = 48
+WORKERS = 8
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(r2_manager_module, "_settings", Settings(
+        r2_bucket_name="assets", r2_public_url="https://cdn.example"
+    ))
+    client = InMemoryS3Client()
+    for index in range(OPERATIONS):
+        client.put_object(Bucket="assets", Key=f"assets/{index}.png", Body=bytes(256 * 1024),
+                          ContentType="image/png", Metadata={"xxhash": f"{index:016x}"})
+    client.latency = 0.01
+    manager = R2AssetManager()
+    manager._s3_client = client
+    return manager
+
+
+def _operation(manager, index):
+    key = f"assets/{index}.png"
+    if index % 3 == 0:
+        return manager.get_object_info, (key,)
+    if index % 3 == 1:
+        return manager.generate_presigned_url, (key, "GET", 3600)
+    return manager.get_object_bytes, (key, 1024 * 1024)
+
+
+@pytest.mark.parametrize("mode", ["inline", "pool"])
+def test_bench_r2_concurrent_ops(benchmark, manager, mode):
+    executor = R2Executor(max_workers=WORKERS)
+    loop = asyncio.new_event_loop()
+    worst_lags = []
+
+    async def call(index):
+        func, args = _operation(manager, index)
+        if mode == "inline":
+            return func(*args)
+        return await executor.run(func, *args)
+
+    async def ticker(done, lags):
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def burst():
+        done = asyncio.Event()
+        lags = []
+        ticking = asyncio.create_task(ticker(done, lags))
+        await asyncio.sleep(0)
+        results = await asyncio.gather(*(call(index) for index in range(OPERATIONS)))
+        done.set()
+        await ticking
+        assert all(results)
+        worst_lags.append(max(lags))
+
+    try:
+        benchmark.pedantic(lambda: loop.run_until_complete(burst()), rounds=5, iterations=1, warmup_rounds=1)
+    finally:
+        executor.shutdown()
+        loop.close()
+    # Median over rounds of each burst's worst stall; a single round can
+    # include an unrelated garbage collection pause
+    benchmark.extra_info["max_loop_lag_ms"] = round(statistics.median(worst_lags) * 1000, 1)
+    benchmark.extra_info["ops_per_second"] = round(OPERATIONS / benchmark.stats.stats.mean)
@@ -0,0 +1,82 @@
+"""Benchmarks for table joins (pytest-benchmark).
+
+A 60x60 table with 300 tokens, 100 walls and 100 DM-layer entities, joined
+by a reconnect storm of 20 players. The join data is read from an in-memory
+SQLite database.
+
+- ``uncached``: every join builds its own snapshot (previous behaviour)
+- ``storm_cold``: the snapshot cache starts empty, so the first join builds
+  and the other 19 reuse its result
+- ``warm``: the snapshot is already cached for the players' role
+"""
+import asyncio
+
+import pytest
+from core_table.entities import Wall
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from database.models import Base
+from service.server_protocol import ServerProtocol
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+PLAYERS = 20
+
+
+@pytest.fixture
+def join_env(monkeypatch):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr("database.database.SessionLocal", sessionmaker(bind=engine))
+
+    manager = TableManager()
+    table = manager.create_table("bench", 60, 60)
+    for i in range(400):
+        table.add_entity({
+            "name": f"e{i}", "x": (i * 7) % 60, "y": (i * 13) % 60,
+            "layer": "tokens" if i < 300 else "dungeon_master",
+            "texture_path": f"assets/token_{i % 40}.png",
+        })
+    for i in range(100):
+        x, y = (i % 10) * 300 + 40, (i // 10) * 300 + 40
+        table.add_wall(Wall("bench", x, y, x, y + 120))
+
+    proto = ServerProtocol(manager)
+    monkeypatch.setattr(proto, "_get_client_role", lambda cid: "player")
+    monkeypatch.setattr(proto, "_get_user_id", lambda msg, cid=None: 1)
+
+    async def no_hashes(table_data, session_code, user_id):
+        return table_data
+
+    monkeypatch.setattr(proto, "add_asset_hashes_to_table", no_hashes)
+    loop = asyncio.new_event_loop()
+    yield proto, Message(MessageType.TABLE_REQUEST, {"table_id": str(table.table_id)}), loop
+    loop.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+async def _storm(proto, join):
+    return await asyncio.gather(*(proto.handle_table_request(join, f"c{i}") for i in range(PLAYERS)))
+
+
+def test_bench_table_join_uncached(benchmark, join_env):
+    proto, join, loop = join_env
+    proto.table_snapshots = None
+    benchmark(lambda: loop.run_until_complete(_storm(proto, join)))
+
+
+def test_bench_table_join_storm_cold(benchmark, join_env):
+    proto, join, loop = join_env
+
+    def run():
+        proto.table_snapshots.invalidate()
+        return loop.run_until_complete(_storm(proto, join))
+
+    benchmark(run)
+
+
+def test_bench_table_join_warm(benchmark, join_env):
+    proto, join, loop = join_env
+    loop.run_until_complete(proto.handle_table_request(join, "c0"))
+    benchmark(lambda: loop.run_until_complete(_storm(proto, join)))
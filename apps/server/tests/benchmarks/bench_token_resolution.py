@@ -0,0 +1,86 @@
+"""Benchmarks for token name resolution (pytest-benchmark).
+
+``batch_resolve`` of 200 encounter names against a catalog of about 2000
+token names (the SRD bestiary with variant qualifiers). Exact and normalized
+hits are dictionary lookups; the names timed here are the ones that reach
+the fuzzy step: misspellings of catalog names and names with no token.
+
+- ``token_batch_resolve[scan]``: ``SequenceMatcher`` against every catalog
+  name per lookup (previous behaviour)
+- ``token_batch_resolve[index]``: ``FuzzyNameIndex``, same matches
+
+The ``resolve_token_url`` cache is cleared every round. ``extra_info`` holds
+``catalog`` size and ``fuzzy_hits``.
+"""
+import json
+import random
+
+import pytest
+from core_table.compendiums.name_index import FuzzyNameIndex
+from core_table.compendiums.token_resolution_service import TokenResolutionService
+from routers.compendium import BUNDLED_COMPENDIUM_DIR
+
+QUALIFIERS = ("", "Young", "Elder", "Greater", "Lesser", "Undead", "Giant", "Shadow", "Spectral", "Feral")
+BATCH = 200
+
+
+class ScanResolutionService(TokenResolutionService):
+    """The linear fuzzy step the index replaced."""
+
+    def _fuzzy_lookup(self, monster_name, threshold=0.85):
+        normalized_search = self.normalize_name(monster_name)
+        best_match = None
+        best_score = threshold
+        for normalized_name, original_name in self.normalized_index.items():
+            score = self.similarity_score(normalized_search, normalized_name)
+            if score > best_score:
+                best_score = score
+                best_match = original_name
+        return best_match
+
+
+def _misspell(rng, name):
+    chars = list(name)
+    at = rng.randrange(1, len(chars) - 1)
+    chars[at], chars[at + 1] = chars[at + 1], chars[at]
+    return "".join(chars)
+
+
+@pytest.fixture(scope="module")
+def workload():
+    with open(BUNDLED_COMPENDIUM_DIR / "bestiary_optimized.json", encoding="utf-8") as handle:
+        monsters = sorted(json.load(handle)["monsters"])
+    catalog = {
+        f"{qualifier} {name}".strip(): f"tokens/{qualifier}{name}.webp".replace(" ", "_")
+        for name in monsters for qualifier in QUALIFIERS
+    }
+    rng = random.Random(23)
+    names = [_misspell(rng, rng.choice(list(catalog))) for _ in range(BATCH * 3 // 4)]
+    names += [f"Wandering {rng.choice(monsters)} Horror" for _ in range(BATCH - len(names))]
+    return catalog, names
+
+
+def _service(cls, catalog):
+    service = cls()
+    service.token_mapping = catalog
+    service.normalized_index = service._build_normalized_index()
+    service.fuzzy_index = FuzzyNameIndex(service.normalized_index)
+    return service
+
+
+@pytest.mark.parametrize("mode", ["scan", "index"])
+def test_bench_token_batch_resolve(benchmark, workload, mode):
+    catalog, names = workload
+    service = _service(ScanResolutionService if mode == "scan" else TokenResolutionService, catalog)
+    expected = _service(ScanResolutionService, catalog)
+    fallback = service._get_generic_fallback()
+
+    def run():
+        TokenResolutionService.resolve_token_url.cache_clear()
+        return service.batch_resolve(names, use_r2=False)
+
+    # A scan round takes seconds; a few rounds are enough to compare
+    resolved = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert [service._fuzzy_lookup(name) for name in names[:40]] == [expected._fuzzy_lookup(name) for name in names[:40]]
+    benchmark.extra_info["catalog"] = len(catalog)
+    benchmark.extra_info["fuzzy_hits"] = sum(url != fallback for url in resolved.values())
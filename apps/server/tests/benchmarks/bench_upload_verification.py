@@ -0,0 +1,137 @@
+"""Benchmarks for uploaded image verification (pytest-benchmark).
+
+Confirming an upload reads the object back from R2 and checks its xxh64 and
+image format. Objects are random-noise PNG maps of 5, 20 and 50 MB, served
+by an S3 stub that streams the file from disk like boto3's StreamingBody:
+
+- ``upload_verify[buffered-N]``: read the whole object, hash it, then
+  ``Image.open`` + ``verify()`` and a second ``Image.open`` + ``load()``
+  (previous behaviour)
+- ``upload_verify[streaming-N]``: ``verify_image_stream`` over 1 MiB chunks;
+  hash plus header sniffing, no decode
+
+The timed part runs in this process. ``extra_info["peak_rss_mib"]`` is the
+peak resident-set growth of a fresh interpreter verifying the same object
+once (``/proc/self/status`` VmHWM after resetting it).
+"""
+import json
+import os
+import subprocess
+import sys
+import warnings
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+import xxhash
+from config import Settings
+from PIL import Image
+from service.upload_verifier import verify_image_stream
+from storage import r2_manager as r2_manager_module
+from storage.r2_manager import R2AssetManager
+
+SERVER_DIR = Path(__file__).resolve().parents[2]
+SIZES_MB = (5, 20, 50)
+MAX_FILE_SIZE = 64 * 1024 * 1024
+CHUNK = 1024 * 1024
+
+PEAK_PROBE = """
+import json, sys
+from pathlib import Path
+from storage import r2_manager
+from tests.benchmarks.bench_upload_verification import MODES, file_manager, stub_settings
+
+def status(field):
+    with open("/proc/self/status") as handle:
+        return int(next(line.split()[1] for line in handle if line.startswith(field + ":")))
+
+path, mode = Path(sys.argv[1]), sys.argv[2]
+r2_manager._settings = stub_settings()
+manager = file_manager(path)
+try:
+    with open("/proc/self/clear_refs", "w") as handle:
+        handle.write("5")  # reset VmHWM to the current RSS
+except OSError:
+    pass
+before = status("VmRSS")
+MODES[mode](manager, path.name)
+print(json.dumps({"peak_rss_kib": status("VmHWM") - before}))
+"""
+
+
+class FileS3Client:
+    """get_object streams a file from disk, as boto3 streams the HTTP body."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def get_object(self, Bucket, Key):
+        return {"Body": open(self.directory / Key, "rb")}
+
+
+def stub_settings() -> Settings:
+    return Settings(r2_bucket_name="assets", r2_public_url="https://cdn.example")
+
+
+def file_manager(path: Path) -> R2AssetManager:
+    manager = R2AssetManager()
+    manager._s3_client = FileS3Client(path.parent)
+    return manager
+
+
+def buffered(manager, key):
+    data = manager.get_object_bytes(key, MAX_FILE_SIZE)
+    digest = xxhash.xxh64(data).hexdigest()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        with Image.open(BytesIO(data)) as image:
+            image_format = image.format
+            image.verify()
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+    return digest, image_format
+
+
+def streaming(manager, key):
+    result = verify_image_stream(manager.iter_object_chunks(key, MAX_FILE_SIZE, CHUNK))
+    return result.xxhash, result.header.format
+
+
+MODES = {"buffered": buffered, "streaming": streaming}
+
+
+@pytest.fixture(scope="module")
+def images(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("uploads")
+    paths = {}
+    for size_mb in SIZES_MB:
+        side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+        path = directory / f"map-{size_mb}mb.png"
+        Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(path, "PNG", compress_level=0)
+        paths[size_mb] = path
+    return paths
+
+
+def _peak_rss_kib(path: Path, mode: str) -> int:
+    result = subprocess.run(
+        [sys.executable, "-c", PEAK_PROBE, str(path), mode],
+        check=True, capture_output=True, text=True, cwd=SERVER_DIR,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])["peak_rss_kib"]
+
+
+@pytest.mark.parametrize("size_mb", SIZES_MB)
+@pytest.mark.parametrize("mode", list(MODES))
+def test_bench_upload_verify(benchmark, monkeypatch, images, mode, size_mb):
+    path = images[size_mb]
+    monkeypatch.setattr(r2_manager_module, "_settings", stub_settings())
+    manager = file_manager(path)
+    expected = xxhash.xxh64(path.read_bytes()).hexdigest()
+
+    digest, image_format = benchmark.pedantic(MODES[mode], args=(manager, path.name), rounds=3, iterations=1)
+
+    assert (digest, image_format) == (expected, "PNG")
+    benchmark.extra_info["object_mib"] = round(path.stat().st_size / 2**20, 1)
+    if Path("/proc/self/status").is_file():
+        benchmark.extra_info["peak_rss_mib"] = round(_peak_rss_kib(path, mode) / 1024, 1)
@@ -112,6 +112,14 @@ class TestCompendiumSpells:
     def test_get_spell_not_found(self, client):
         assert client.get(f"{BASE}/spells/nonexistent_spell_xyz").status_code == 404
 
+    def test_get_spell_ignores_case(self, client):
+        assert client.get(f"{BASE}/spells/test%20SPARK").json()["name"] == "Test Spark"
+
+    def test_get_spells_with_query(self, client):
+        data = client.get(f"{BASE}/spells?q=spa&school=EVOCATION").json()
+        assert list(data["spells"]) == ["Test Spark"]
+        assert data["total"] == 1
+
 
 @pytest.mark.integration
 class TestCompendiumMonsters:
@@ -127,6 +135,33 @@ class TestCompendiumMonsters:
     def test_get_monster_not_found(self, client):
         assert client.get(f"{BASE}/monsters/nonexistent_monster_xyz").status_code == 404
 
+    def test_get_monsters_cr_filter_matches_numeric_rating(self, client):
+        data = client.get(f"{BASE}/monsters?cr=1").json()
+        assert list(data["monsters"]) == ["Test Beast"]
+        assert client.get(f"{BASE}/monsters?cr=2").json()["total"] == 0
+
+
+@pytest.mark.integration
+class TestCompendiumSearch:
+    def test_search_ranks_across_kinds_with_facets(self, client):
+        response = client.get(f"{BASE}/search?q=test")
+        data = response.json()
+        assert response.status_code == 200
+        assert data["total"] == 7
+        assert data["facets"]["kind"]["spell"] == 1
+        assert {"name", "kind", "score", "record"} <= set(data["results"][0])
+
+    def test_search_prefix_and_kind_filter(self, client):
+        data = client.get(f"{BASE}/search?q=test%20bea&kind=monster&cr=1").json()
+        assert [r["name"] for r in data["results"]] == ["Test Beast"]
+
+    def test_search_paginates(self, client):
+        data = client.get(f"{BASE}/search?q=test&limit=3&offset=6").json()
+        assert data["count"] == 1 and data["total"] == 7
+
+    def test_search_rejects_unbounded_limit(self, client):
+        assert client.get(f"{BASE}/search?limit=101").status_code == 422
+
 
 @pytest.mark.integration
 class TestCompendiumFeats:
@@ -155,3 +190,42 @@ class TestCompendiumMutationBoundary:
         response = client.post(f"{BASE}/reload")
         assert response.status_code == 404
 
+
+
+@pytest.mark.integration
+class TestCompendiumConditionalGet:
+    def test_matching_etag_returns_304_without_body(self, client):
+        first = client.get(f"{BASE}/monsters")
+        etag = first.headers["etag"]
+
+        again = client.get(f"{BASE}/monsters", headers={"If-None-Match": etag})
+
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        assert "max-age=300" in again.headers["cache-control"]
+
+    def test_etag_depends_on_the_query(self, client):
+        everything = client.get(f"{BASE}/spells").headers["etag"]
+        filtered = client.get(f"{BASE}/spells?level=9")
+        assert filtered.headers["etag"] != everything
+        assert client.get(f"{BASE}/spells?level=9", headers={"If-None-Match": everything}).status_code == 200
+
+    def test_reload_invalidates_cached_bodies(self, client, monkeypatch):
+        from routers.compendium import compendium_service
+
+        etag = client.get(f"{BASE}/races").headers["etag"]
+        data = dict(compendium_service.data)
+        data["character_data"] = {**data["character_data"], "races": [{"name": "New Folk"}]}
+        monkeypatch.setattr(compendium_service, "data", data)
+
+        response = client.get(f"{BASE}/races", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json()["races"] == [{"name": "New Folk"}]
+
+    def test_errors_and_status_are_not_cached(self, client):
+        assert client.get(f"{BASE}/races/unknown").status_code == 404
+        status = client.get(f"{BASE}/status", headers={"If-None-Match": "*"})
+        assert status.status_code == 200
+        assert status.headers["cache-control"] == "no-store"
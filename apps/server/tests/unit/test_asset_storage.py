@@ -1,10 +1,12 @@
 # pyright: reportAttributeAccessIssue=false
 
 import base64
+import io
 
 import xxhash
 from core_table.protocol import Message, MessageType
 from database import crud, models, schemas
+from PIL import Image
 from service import asset_manager as asset_manager_module
 from service.asset_manager import AssetRequest, ServerAssetManager
 from service.protocol import assets as asset_protocol_module
@@ -66,6 +68,12 @@ class FakeR2Manager:
             raise ValueError("object too large")
         return self.object_data
 
+    def iter_object_chunks(self, file_key, max_bytes, chunk_size=1024 * 1024):
+        if len(self.object_data) > max_bytes:
+            raise ValueError("object too large")
+        for start in range(0, len(self.object_data), chunk_size):
+            yield self.object_data[start:start + chunk_size]
+
     def delete_file(self, file_key):
         self.deleted_keys.append(file_key)
         return self.delete_success
@@ -207,6 +215,27 @@ async def test_upload_confirmation_rejects_spoofed_image_bytes(
     assert intent.r2_key.startswith("pending/")
 
 
+async def test_upload_confirmation_rejects_image_in_another_format(
+    monkeypatch, test_db, test_user, test_game_session
+):
+    jpeg = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(jpeg, "JPEG")
+    jpeg_bytes = jpeg.getvalue()
+    jpeg_hash = xxhash.xxh64(jpeg_bytes).hexdigest()
+    manager = _manager(monkeypatch, test_db, object_data=jpeg_bytes, xxhash=jpeg_hash)
+    response = await _request_upload(
+        manager, test_user, test_game_session, xxhash=jpeg_hash, file_size=len(jpeg_bytes)
+    )
+
+    confirmed = await manager.confirm_upload(response.asset_id, test_user.id, upload_success=True)
+
+    assert confirmed is False
+    intent = test_db.query(models.AssetUploadIntent).one()
+    assert intent.status == "verification_failed"
+    assert intent.error_message == "Image format JPEG did not match expected format PNG"
+    assert manager.r2_manager.deleted_keys == [intent.r2_key]
+
+
 async def test_upload_confirmation_keeps_pending_state_when_promotion_fails(
     monkeypatch, test_db, test_user, test_game_session
 ):
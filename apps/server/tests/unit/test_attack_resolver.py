@@ -117,3 +117,33 @@ def test_no_dodge_uses_normal_roll(resolver):
         resolver.resolve_attack(attacker, target, attack_bonus=0, damage_formula='1d6')
 
     mock_dis.assert_not_called()
+
+
+@pytest.mark.parametrize('advantage,disadvantage', [(False, False), (True, False), (False, True)])
+def test_attack_odds_agree_with_rolled_attacks(resolver, advantage, disadvantage):
+    import random
+    random.seed(7)
+    attacker, target = make_attacker(), make_target(ac=15)
+    trials = 20_000
+    hits = crits = damage = 0
+    for _ in range(trials):
+        r = resolver.resolve_attack(attacker, target, 4, '2d6+3', advantage=advantage, disadvantage=disadvantage)
+        hits += r.hit
+        crits += r.is_critical
+        damage += r.damage_dealt
+
+    odds = resolver.attack_odds(attacker, target, 4, '2d6+3', advantage=advantage, disadvantage=disadvantage)
+
+    assert abs(hits / trials - odds.hit_chance) < 0.015
+    assert abs(crits / trials - odds.crit_chance) < 0.006
+    assert abs(damage / trials - odds.expected_damage) < 0.15
+
+
+def test_critical_hit_doubles_damage_dice(resolver):
+    attacker, target = make_attacker(), make_target(ac=10)
+    with patch('service.attack_resolver.DiceEngine.roll', side_effect=[
+        DiceRollResult(total=25, rolls=[20], modifier=5, formula='1d20+5', is_critical=True),
+        DiceRollResult(total=7, rolls=[4], modifier=3, formula='1d6+3'),
+    ]):
+        result = resolver.resolve_attack(attacker=attacker, target=target, attack_bonus=5, damage_formula='1d6+3')
+    assert result.damage_dealt == 11
@@ -0,0 +1,150 @@
+"""
+Tests for dependency-aware BATCH execution: per-resource ordering, overlap
+of independent sub-messages, barriers, and merged broadcasts.
+"""
+import asyncio
+
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from service.protocol.batching import conflicts, resource_key
+from service.server_protocol import ServerProtocol
+
+
+class _Session:
+    def __init__(self):
+        self.broadcasts = []
+        self.filtered = []
+        self.released = 0
+
+    async def broadcast_to_session(self, message, exclude_client=None):
+        self.broadcasts.append((message, exclude_client))
+
+    async def broadcast_filtered(self, message, layer, exclude_client=None):
+        self.filtered.append((message, layer, exclude_client))
+
+    def _release_db_session(self):
+        self.released += 1
+
+
+def _protocol():
+    session = _Session()
+    return ServerProtocol(TableManager(), session_manager=session), session
+
+
+def _batch(*messages):
+    return Message(MessageType.BATCH, {
+        'seq': 7,
+        'messages': [{'type': t.value, 'data': d} for t, d in messages],
+    })
+
+
+def _recording_handler(log, delays):
+    async def handler(msg, client_id):
+        key = msg.data.get('sprite_id') or msg.data.get('table_id')
+        log.append(('start', msg.data['n']))
+        await asyncio.sleep(delays.get(key, 0))
+        log.append(('end', msg.data['n']))
+        return Message(MessageType.SUCCESS, {'n': msg.data['n']})
+    return handler
+
+
+def test_resource_keys_and_conflicts():
+    move_a = resource_key(Message(MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'a'}))
+    move_b = resource_key(Message(MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'b'}))
+    table = resource_key(Message(MessageType.TABLE_UPDATE, {'table_id': 't1'}))
+    other_table = resource_key(Message(MessageType.WALL_CREATE, {'table_id': 't2'}))
+    combat = resource_key(Message(MessageType.COMBAT_COMMAND, {}))
+    chat = resource_key(Message(MessageType.CHAT, {}))
+
+    assert move_a == ('sprite', 't1', 'a')
+    assert not conflicts(move_a, move_b)
+    assert conflicts(move_a, table)
+    assert not conflicts(move_a, other_table)
+    assert not conflicts(combat, table)
+    assert conflicts(combat, combat)
+    assert chat is None and conflicts(chat, move_a)
+
+
+async def test_same_sprite_keeps_order_and_other_sprites_overlap():
+    proto, session = _protocol()
+    log = []
+    proto.register_handler(MessageType.SPRITE_MOVE, _recording_handler(log, {'a': 0.02}))
+
+    response = await proto.handle_batch(_batch(
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'a', 'n': 1}),
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'b', 'n': 2}),
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'a', 'n': 3}),
+    ), 'c1')
+
+    # b ran while the first move of a was still sleeping; a's moves stayed in order
+    assert log.index(('start', 2)) < log.index(('end', 1))
+    assert log.index(('end', 1)) < log.index(('start', 3))
+    assert [m['data']['n'] for m in response.data['messages']] == [1, 2, 3]
+    assert response.data['seq'] == 7
+    assert session.released == 3
+
+
+async def test_barrier_waits_for_everything_before_it():
+    proto, _ = _protocol()
+    log = []
+    proto.register_handler(MessageType.SPRITE_MOVE, _recording_handler(log, {'a': 0.02}))
+    proto.register_handler(MessageType.CHAT, _recording_handler(log, {}))
+
+    await proto.handle_batch(_batch(
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'a', 'n': 1}),
+        (MessageType.CHAT, {'n': 2}),
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'b', 'n': 3}),
+    ), 'c1')
+
+    assert log == [('start', 1), ('end', 1), ('start', 2), ('end', 2), ('start', 3), ('end', 3)]
+
+
+async def test_errors_keep_their_batch_position():
+    proto, _ = _protocol()
+
+    async def boom(msg, client_id):
+        raise RuntimeError('nope')
+
+    proto.register_handler(MessageType.SPRITE_MOVE, _recording_handler([], {}))
+    proto.register_handler(MessageType.SPRITE_SCALE, boom)
+    response = await proto.handle_batch(Message(MessageType.BATCH, {'messages': [
+        {'type': 'not_a_type'},
+        {'type': MessageType.SPRITE_SCALE.value, 'data': {'table_id': 't1', 'sprite_id': 'a'}},
+        {'type': MessageType.SPRITE_MOVE.value, 'data': {'table_id': 't1', 'sprite_id': 'b', 'n': 3}},
+    ]}), 'c1')
+
+    types = [m['type'] for m in response.data['messages']]
+    assert types == [MessageType.ERROR.value, MessageType.ERROR.value, MessageType.SUCCESS.value]
+    assert response.data['processed_count'] == 3
+
+
+async def test_broadcasts_are_merged_after_the_batch():
+    proto, session = _protocol()
+
+    async def move(msg, client_id):
+        await proto.broadcast_to_session(Message(MessageType.SPRITE_UPDATE, {'id': msg.data['sprite_id']}), client_id)
+        assert session.broadcasts == []
+        return None
+
+    async def hidden(msg, client_id):
+        await proto.broadcast_filtered(Message(MessageType.SPRITE_UPDATE, {'id': 'gm'}), 'dungeon_master', client_id)
+        return None
+
+    proto.register_handler(MessageType.SPRITE_MOVE, move)
+    proto.register_handler(MessageType.SPRITE_SCALE, hidden)
+    response = await proto.handle_batch(_batch(
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'a'}),
+        (MessageType.SPRITE_MOVE, {'table_id': 't1', 'sprite_id': 'b'}),
+        (MessageType.SPRITE_SCALE, {'table_id': 't1', 'sprite_id': 'c'}),
+    ), 'c1')
+
+    assert response.type == MessageType.SUCCESS
+    assert len(session.broadcasts) == 1
+    merged, exclude = session.broadcasts[0]
+    assert merged.type == MessageType.BATCH and exclude == 'c1'
+    assert [m['data']['id'] for m in merged.data['messages']] == ['a', 'b']
+    assert [(m.data['id'], layer) for m, layer, _ in session.filtered] == [('gm', 'dungeon_master')]
+
+    # Outside a batch broadcasts go straight out
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_UPDATE, {'id': 'z'}), 'c1')
+    assert session.broadcasts[-1][0].data == {'id': 'z'}
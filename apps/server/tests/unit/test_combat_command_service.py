@@ -2,6 +2,7 @@
 
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from core_table.combat_journal import capture, diff_state
 from service.attack_resolver import AttackResult
 from service.combat_command_service import (
     CombatCommandContext,
@@ -824,8 +825,8 @@ def test_dm_revert_restores_prior_state_and_persists_revert():
     persistence.find_result.return_value = None
     persistence.last_action.return_value = CombatJournalEntry(
         command_type="dm_override",
-        state_before=state_before_damage,
         state_version=4,
+        state_before=state_before_damage,
     )
 
     def persist(**kwargs):
@@ -859,10 +860,47 @@ def test_dm_revert_restores_prior_state_and_persists_revert():
     assert live_state.state_version == 5
     assert persisted["command_type"] == "revert_action"
     assert persisted["actor_id"] is None
-    assert persisted["state_before"]["combatants"][0]["hp"] == 7
+    assert persisted["patch"]["combatants"][actor.combatant_id]["hp"] == [7, 20]
     assert persisted["state_after"]["combatants"][0]["hp"] == 20
 
 
+def test_dm_revert_undoes_journaled_patch():
+    state, actor, _target = _state()
+    before = capture(state)
+    actor.hp = 7
+    actor.has_reaction = False
+    patch_record = diff_state(before, state.to_dict())
+    persistence = MagicMock()
+    persistence.requester_key.return_value = "user:1"
+    persistence.find_result.return_value = None
+    persistence.last_action.return_value = CombatJournalEntry(
+        command_type="dm_override",
+        state_version=4,
+        patch=patch_record,
+    )
+    persistence.persist_accepted.side_effect = lambda **kwargs: PersistedCombatCommand(
+        result=dict(kwargs["result_payload"], state_version=5),
+        state_version=5,
+    )
+    service = CombatCommandService(persistence=persistence)
+    envelope = service.parse_envelope({
+        "sequence_id": 46,
+        "commands": [{"type": "revert_action", "actor_id": "__dm__"}],
+    })
+
+    result = service.apply(envelope, _context(role="owner"))
+
+    live_state = CombatEngine.get_state("cmd")
+    persisted = persistence.persist_accepted.call_args.kwargs
+    assert result.accepted is True
+    assert live_state.combatants[0].hp == 20
+    assert live_state.combatants[0].has_reaction is True
+    assert persisted["patch"]["combatants"][actor.combatant_id] == {
+        "hp": [7, 20],
+        "has_reaction": [False, True],
+    }
+
+
 def test_player_resolves_owned_opportunity_attack_outside_their_turn():
     state, target, attacker = _state()
     persistence = MagicMock()
@@ -907,9 +945,9 @@ def test_player_resolves_owned_opportunity_attack_outside_their_turn():
     assert live_state.combatants[1].has_reaction is False
     assert live_state.combatants[0].hp == 15
     assert persisted["command_type"] == "resolve_opportunity_attack"
-    assert persisted["state_before"]["combatants"][1]["has_reaction"] is True
+    assert persisted["patch"]["combatants"][attacker.combatant_id] == {"has_reaction": [True, False]}
+    assert persisted["patch"]["combatants"][target.combatant_id]["hp"] == [20, 15]
     assert persisted["state_after"]["combatants"][1]["has_reaction"] is False
-    assert persisted["state_before"]["combatants"][0]["hp"] == 20
     assert persisted["state_after"]["combatants"][0]["hp"] == 15
 
 
@@ -1379,7 +1417,7 @@ def test_invalid_payload_is_rejected_before_application():
         raise AssertionError("Expected validation error")
 
 
-def test_accepted_command_is_persisted_with_before_and_after_snapshots():
+def test_accepted_command_is_persisted_with_patch_and_after_snapshot():
     state, actor, _target = _state()
     persistence = MagicMock()
     persistence.requester_key.return_value = "user:1"
@@ -1403,7 +1441,8 @@ def test_accepted_command_is_persisted_with_before_and_after_snapshots():
     assert result.accepted is True
     assert result.state_version == 1
     assert CombatEngine.get_state("cmd").state_version == 1
-    assert persisted["state_before"]["combatants"][0]["has_action"] is True
+    assert persisted["patch"]["combatants"][actor.combatant_id]["has_action"] == [True, False]
+    assert set(persisted["patch"]) == {"v", "combatants", "log"}
     assert persisted["state_after"]["combatants"][0]["has_action"] is False
     assert persisted["command_type"] == "dash"
     assert persisted["requester_key"] == "user:1"
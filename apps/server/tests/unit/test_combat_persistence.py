@@ -1,10 +1,13 @@
 import json
 
 import pytest
-from core_table.combat import CombatState
-from database.crud import load_active_combat_encounter
-from database.models import CombatActionJournal, CombatEncounter
+from core_table.combat import CombatAction, CombatState
+from core_table.combat_journal import capture, diff_state
+from core_table.combat_log import PAGE_SIZE
+from database.crud import load_active_combat_encounter, load_combat_log_actions
+from database.models import CombatActionJournal, CombatActionLogPage, CombatEncounter
 from service.combat_persistence_service import CombatPersistenceService
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
@@ -87,7 +90,7 @@ def test_accepted_command_atomically_updates_snapshot_and_journal(
             "sequence_id": 42,
             "combat": state_after,
         },
-        state_before=state_before,
+        patch=_patch(state_before, state_after),
         state_after=state_after,
         created_by=test_game_session.owner_id,
     )
@@ -103,7 +106,8 @@ def test_accepted_command_atomically_updates_snapshot_and_journal(
     assert encounter.state_version == 1
     assert json.loads(encounter.combatants_json)[0]["hp"] == 15
     assert action.state_version == 1
-    assert json.loads(action.state_before_json)["combatants"][0]["hp"] == 20
+    assert json.loads(action.patch_json)["combatants"]["actor-1"] == {"hp": [20, 15]}
+    assert action.state_before_json is None
 
     restored_data = load_active_combat_encounter(
         test_db,
@@ -131,7 +135,7 @@ def test_duplicate_command_returns_stored_result_without_advancing_snapshot(
         "command_type": "attack",
         "command_payload": {"commands": [{"type": "attack"}]},
         "result_payload": {"accepted": True, "sequence_id": 42},
-        "state_before": _state("combat-duplicate", hp=20),
+        "patch": _patch(_state("combat-duplicate", hp=20), _state("combat-duplicate", hp=15)),
         "state_after": _state("combat-duplicate", hp=15),
         "created_by": test_game_session.owner_id,
     }
@@ -194,9 +198,152 @@ def test_last_action_returns_newest_journal_entry(
     assert entry is not None
     assert entry.command_type == "dm_set_hp"
     assert entry.state_version == 2
+    assert entry.patch is None
     assert entry.state_before["combatants"][0]["hp"] == 15
 
 
+@pytest.mark.unit
+def test_snapshot_columns_are_rewritten_only_at_checkpoints(
+    test_db,
+    test_game_session,
+):
+    service = CombatPersistenceService(
+        sessionmaker(bind=test_db.get_bind(), expire_on_commit=False)
+    )
+    service.CHECKPOINT_INTERVAL = 3
+    hp = [20, 18, 15, 11, 6]
+    for sequence_id, (before, after) in enumerate(zip(hp, hp[1:]), start=1):
+        state_before = _state("combat-checkpoint", hp=before)
+        state_after = _state("combat-checkpoint", hp=after)
+        service.persist_accepted(
+            session_code=test_game_session.session_code,
+            requester_key="user:1",
+            sequence_id=sequence_id,
+            actor_id="actor-1",
+            command_type="dm_override",
+            command_payload={"commands": [{"type": "dm_override"}]},
+            result_payload={"accepted": True},
+            patch=_patch(state_before, state_after),
+            state_after=state_after,
+            created_by=test_game_session.owner_id,
+        )
+
+    test_db.expire_all()
+    encounter = test_db.query(CombatEncounter).filter_by(
+        encounter_id="combat-checkpoint"
+    ).one()
+    # Version 1 is always a checkpoint, the next one is due at version 4
+    assert encounter.state_version == 4
+    assert encounter.checkpoint_version == 4
+    assert json.loads(encounter.combatants_json)[0]["hp"] == 6
+
+    service.persist_accepted(
+        session_code=test_game_session.session_code,
+        requester_key="user:1",
+        sequence_id=5,
+        actor_id="actor-1",
+        command_type="dm_override",
+        command_payload={"commands": [{"type": "dm_override"}]},
+        result_payload={"accepted": True},
+        patch=_patch(_state("combat-checkpoint", hp=6), _state("combat-checkpoint", hp=2)),
+        state_after=_state("combat-checkpoint", hp=2),
+        created_by=test_game_session.owner_id,
+    )
+    test_db.expire_all()
+    encounter = test_db.query(CombatEncounter).filter_by(
+        encounter_id="combat-checkpoint"
+    ).one()
+    assert encounter.state_version == 5
+    assert encounter.checkpoint_version == 4
+    assert json.loads(encounter.combatants_json)[0]["hp"] == 6
+
+    restored = load_active_combat_encounter(test_db, test_game_session.session_code)
+    assert restored["state_version"] == 5
+    assert restored["combatants"][0]["hp"] == 2
+
+
+@pytest.mark.unit
+def test_long_encounter_writes_a_constant_amount_per_action(
+    test_db,
+    test_game_session,
+):
+    engine = test_db.get_bind()
+    service = CombatPersistenceService(
+        sessionmaker(bind=engine, expire_on_commit=False)
+    )
+    state = CombatState.from_dict(_state("combat-long", hp=10_000))
+    written = []
+    sent = {"bytes": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        rows = parameters if executemany else [parameters]
+        for row in rows:
+            values = row.values() if isinstance(row, dict) else row
+            sent["bytes"] += sum(len(value) for value in values if isinstance(value, str))
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        for n in range(2000):
+            before = capture(state)
+            actor = state.combatants[0]
+            state.action_log.append(CombatAction(
+                action_id=f"action-{n:04d}", combat_id="combat-long", round_number=1,
+                turn_index=0, actor_id=actor.combatant_id, action_type="attack",
+                action_cost="action", target_ids=[actor.combatant_id], damage_dealt=1,
+                state_before={"combatant_id": actor.combatant_id, "hp": actor.hp},
+            ))
+            actor.hp -= 1
+            state_after = state.to_dict()
+            sent["bytes"] = 0
+            service.persist_accepted(
+                session_code=test_game_session.session_code,
+                requester_key="user:1",
+                sequence_id=n + 1,
+                actor_id=actor.combatant_id,
+                command_type="attack",
+                command_payload={"commands": [{"type": "attack"}]},
+                result_payload={"accepted": True},
+                patch=diff_state(before, state_after),
+                state_after=state_after,
+                created_by=test_game_session.owner_id,
+                log_pages=[page.to_dict() for page in state.action_log.drain_pages()],
+            )
+            written.append(sent["bytes"])
+            assert len(state.action_log) < 2 * PAGE_SIZE
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    # Checkpoints and sealed pages repeat every 100 actions; a late stretch of
+    # the encounter writes as much as an early one
+    early, late = sum(written[200:400]), sum(written[1800:2000])
+    assert abs(late - early) < early * 0.05
+    assert max(written[1000:]) < max(written[:1000]) * 1.05
+    assert test_db.query(CombatActionLogPage).count() == state.action_log.base // PAGE_SIZE
+
+    restored = CombatState.from_dict(
+        load_active_combat_encounter(test_db, test_game_session.session_code)
+    )
+    assert restored.action_log.base == state.action_log.base
+    assert [a.action_id for a in restored.action_log] == [a.action_id for a in state.action_log]
+    assert restored.combatants[0].hp == 8_000
+
+    history, before_index = [], None
+    while True:
+        actions, before_index = restored.action_log.history(
+            before_index,
+            100,
+            lambda first, last: load_combat_log_actions(test_db, "combat-long", first, last),
+        )
+        history[:0] = [action["action_id"] for action in actions]
+        if before_index is None:
+            break
+    assert history == [f"action-{n:04d}" for n in range(2000)]
+
+
+def _patch(before: dict, after: dict) -> dict:
+    return diff_state(capture(CombatState.from_dict(before)), after)
+
+
 def _state(combat_id: str, hp: int) -> dict:
     return {
         "combat_id": combat_id,
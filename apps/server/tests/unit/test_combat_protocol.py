@@ -7,6 +7,7 @@ from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from core_table.combat import CombatAction, Combatant, CombatPhase, CombatState
 from core_table.protocol import Message, MessageType
 from core_table.session_rules import SessionRules
 from service.attack_resolver import AttackResult
@@ -57,6 +58,9 @@ class _ProtoStub(_CombatMixin):
     async def send_to_client(self, message, client_id):
         self.sent.append((message, client_id))
 
+    async def send_to_clients(self, message, client_ids):
+        self.sent.extend((message, client_id) for client_id in client_ids)
+
     async def _broadcast_error(self, client_id, error_message):
         pass
 
@@ -242,6 +246,69 @@ class TestCombatStateRequest:
         assert resp.type == MessageType.COMBAT_STATE
 
 
+@pytest.mark.unit
+class TestCombatLogRequest:
+    @staticmethod
+    def _state(actions):
+        state = CombatState(combat_id="combat-1", session_id="TST", table_id="t1", phase=CombatPhase.ACTIVE)
+        state.combatants = [
+            Combatant(combatant_id="pc-1", entity_id="e1", name="Hero"),
+            Combatant(combatant_id="npc-1", entity_id="e2", name="Lurker", is_npc=True, is_hidden=True),
+        ]
+        for n in range(actions):
+            state.action_log.append(CombatAction(
+                action_id=f"a{n}", combat_id="combat-1", round_number=1, turn_index=0,
+                actor_id="npc-1" if n % 10 == 9 else "pc-1", action_type="attack",
+                action_cost="action", target_ids=["npc-1"], state_before={"hp": 10},
+            ))
+        return state
+
+    @patch("service.combat_engine.CombatEngine")
+    async def test_cursor_walks_back_through_memory_and_stored_pages(self, mock_engine):
+        state = self._state(120)
+        stored = {page.index: page for page in state.action_log.drain_pages()}
+        mock_engine.get_state.return_value = state
+        proto = _ProtoStub(role="owner")
+
+        def load(db, combat_id, first, last):
+            return [action for index in range(first, last + 1) for action in stored[index].actions]
+
+        seen, before = [], None
+        with patch("service.protocol.combat.load_combat_log_actions", side_effect=load):
+            while True:
+                resp = await proto.handle_combat_log_request(
+                    Message(MessageType.COMBAT_LOG_REQUEST, {"before": before, "limit": 30}), "c1",
+                )
+                assert resp.type == MessageType.COMBAT_LOG_RESPONSE
+                assert resp.data["total"] == 120
+                seen[:0] = [action["action_id"] for action in resp.data["actions"]]
+                before = resp.data["next_before"]
+                if before is None:
+                    break
+
+        assert seen == [f"a{n}" for n in range(120)]
+
+    @patch("service.combat_engine.CombatEngine")
+    async def test_player_history_hides_hidden_actors_and_snapshots(self, mock_engine):
+        mock_engine.get_state.return_value = self._state(20)
+        proto = _ProtoStub(role="player")
+
+        resp = await proto.handle_combat_log_request(Message(MessageType.COMBAT_LOG_REQUEST, {}), "c1")
+
+        actions = resp.data["actions"]
+        assert len(actions) == 18
+        assert all("state_before" not in action and action["target_ids"] == [] for action in actions)
+
+    async def test_invalid_cursor_is_an_error(self):
+        proto = _ProtoStub(role="owner")
+        with patch("service.combat_engine.CombatEngine") as mock_engine:
+            mock_engine.get_state.return_value = self._state(1)
+            resp = await proto.handle_combat_log_request(
+                Message(MessageType.COMBAT_LOG_REQUEST, {"before": "soon"}), "c1",
+            )
+        assert resp.type == MessageType.ERROR
+
+
 @pytest.mark.unit
 class TestCombatCommand:
     async def test_invalid_payload_returns_rejected(self):
@@ -496,3 +563,56 @@ class TestCoverZoneSync:
         assert resp.data["zones"] == []
 
 
+
+
+# ---------------------------------------------------------------------------
+# handle_attack_preview
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+class TestAttackPreview:
+    @patch("service.combat_engine.CombatEngine")
+    async def test_area_preview_reports_cover_for_each_target(self, mock_engine):
+        from core_table.table import CoverZone, VirtualTable
+
+        state = CombatState(combat_id="combat", session_id="TST", table_id="t1", phase=CombatPhase.ACTIVE, combatants=[
+            Combatant(combatant_id=cid, entity_id=f"s-{cid}", name=cid, hp=10, max_hp=10, armor_class=12)
+            for cid in ("caster", "behind", "open", "offboard")
+        ])
+        mock_engine.get_state.return_value = state
+        table = VirtualTable("t1", 20, 20)
+        table.cover_zones = [CoverZone(zone_id="wall", shape_type="rect", coords=[4, -1, 2, 2], cover_tier="half")]
+        for cid, x, y in (("caster", 0, 0), ("behind", 10, 0), ("open", 0, 10)):
+            entity = table.add_entity({"name": cid, "x": x, "y": y, "layer": "tokens"})
+            table.sprite_to_entity[f"s-{cid}"] = entity.entity_id
+        proto = _ProtoStub(role="owner")
+        proto.table_manager.tables_id = {"t1": table}
+
+        resp = await proto.handle_attack_preview(Message(MessageType.ATTACK_PREVIEW, {
+            "attacker_id": "caster", "table_id": "t1", "target_ids": ["behind", "open", "offboard", "missing"],
+        }), "c1")
+
+        assert resp.type == MessageType.ATTACK_PREVIEW_RESULT
+        assert resp.data["targets"] == [
+            {"target_id": "behind", "cover": "half", "effective_ac": 14},
+            {"target_id": "open", "cover": "none", "effective_ac": 12},
+            {"target_id": "offboard", "cover": "none", "effective_ac": 12},
+        ]
+
+    @patch("service.combat_engine.CombatEngine")
+    async def test_single_target_preview_includes_odds(self, mock_engine):
+        state = CombatState(combat_id="combat", session_id="TST", table_id="t1", phase=CombatPhase.ACTIVE, combatants=[
+            Combatant(combatant_id=cid, entity_id=f"s-{cid}", name=cid, hp=10, max_hp=10, armor_class=15)
+            for cid in ("fighter", "goblin")
+        ])
+        mock_engine.get_state.return_value = state
+        proto = _ProtoStub(role="owner")
+
+        resp = await proto.handle_attack_preview(Message(MessageType.ATTACK_PREVIEW, {
+            "attacker_id": "fighter", "target_id": "goblin", "attack_bonus": 5, "damage_formula": "1d8+3",
+        }), "c1")
+
+        # 1d20+5 against AC 15 hits on 10-20; a 20 also doubles the d8
+        assert resp.data["hit_chance"] == 0.55
+        assert resp.data["crit_chance"] == 0.05
+        assert resp.data["expected_damage"] == round(0.5 * 7.5 + 0.05 * 12, 2)
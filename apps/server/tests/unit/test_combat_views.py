@@ -0,0 +1,110 @@
+"""
+Tests for per-role combat views: one build per (revision, view class),
+and one message per view class when a combat state is broadcast.
+"""
+from types import SimpleNamespace
+
+from core_table.combat import Combatant, CombatPhase, CombatState
+from core_table.protocol import MessageType
+from service.combat_state_presenter import CombatStatePresenter
+from service.protocol.combat import _CombatMixin
+from service.protocol.combat_views import CombatViewCache
+
+
+def _state(version=3) -> CombatState:
+    return CombatState(
+        combat_id='combat-1',
+        session_id='session-1',
+        table_id='table-1',
+        phase=CombatPhase.ACTIVE,
+        state_version=version,
+        combatants=[
+            Combatant(combatant_id='pc-1', entity_id='s1', name='Ada', hp=20, max_hp=20, controlled_by=['7']),
+            Combatant(combatant_id='pc-2', entity_id='s2', name='Bo', hp=20, max_hp=20, controlled_by=['8']),
+            Combatant(combatant_id='npc-1', entity_id='s3', name='Goblin', hp=7, max_hp=7, is_npc=True),
+        ],
+    )
+
+
+def test_view_class_separates_controllers_only():
+    state = _state()
+    assert CombatStatePresenter.view_class(state, 'owner', 1) == ('dm',)
+    assert CombatStatePresenter.view_class(state, 'spectator', 7) == ('spectator',)
+    assert CombatStatePresenter.view_class(state, 'player', 7) == ('player', ('pc-1',))
+    assert CombatStatePresenter.view_class(state, 'player', 9) == CombatStatePresenter.view_class(state, 'player', 10)
+
+
+def test_same_class_shares_one_view_until_the_version_moves():
+    cache, state = CombatViewCache(), _state()
+
+    first = cache.view(state, 'player', 9)
+    assert cache.view(state, 'player', 10) is first
+    assert cache.view(state, 'player', 7) is not first
+    assert cache.view(state, 'player', 7) == CombatStatePresenter.for_client(state, 'player', 7)
+
+    state.combatants[2].hp = 1
+    state.state_version += 1
+    assert cache.view(state, 'player', 9) is not first
+    assert cache.view(state, 'owner', 1)['combatants'][2]['hp'] == 1
+    assert cache.counters == {'hit': 2, 'miss': 4, 'uncached': 0}
+
+
+def test_unversioned_state_and_rebuild_bypass_the_cache():
+    cache = CombatViewCache()
+    state = _state(version=0)
+    cache.view(state, 'owner', 1)
+    cache.view(state, 'owner', 1)
+    assert len(cache) == 0
+
+    state.state_version = 1
+    first = cache.view(state, 'owner', 1)
+    state.combatants[0].hp = 5  # changed without a version bump
+    rebuilt = cache.view(state, 'owner', 1, rebuild=True)
+    assert rebuilt is not first and rebuilt['combatants'][0]['hp'] == 5
+    assert cache.view(state, 'owner', 1) is rebuilt
+    assert cache.counters == {'hit': 1, 'miss': 2, 'uncached': 2}
+
+
+def test_entries_are_bounded():
+    cache, state = CombatViewCache(max_entries=2), _state()
+    for version in range(1, 5):
+        state.state_version = version
+        cache.view(state, 'owner', 1)
+    assert len(cache) == 2
+
+
+class _Proto(_CombatMixin):
+    def __init__(self, client_info):
+        self.client_info = client_info
+        self.session_manager = SimpleNamespace(client_info=client_info)
+        self.combat_views = CombatViewCache()
+        self.sends = []
+
+    def _get_client_role(self, client_id):
+        return self.client_info[client_id]['role']
+
+    def _get_client_info(self, client_id):
+        return self.client_info[client_id]
+
+    async def send_to_clients(self, message, client_ids):
+        self.sends.append((message, list(client_ids)))
+
+
+async def test_broadcast_builds_and_sends_each_view_class_once():
+    proto = _Proto({
+        'dm': {'user_id': 1, 'role': 'owner'},
+        'ada': {'user_id': 7, 'role': 'player'},
+        'p9': {'user_id': 9, 'role': 'player'},
+        'p10': {'user_id': 10, 'role': 'player'},
+        'watcher': {'user_id': 11, 'role': 'spectator'},
+    })
+
+    response = await proto._broadcast_combat_state(_state(), MessageType.COMBAT_STATE, 'p9', {'sequence_id': 4})
+
+    recipients = sorted(sorted(ids) for _, ids in proto.sends)
+    assert recipients == [['ada'], ['dm'], ['p10'], ['watcher']]
+    assert proto.combat_views.counters['miss'] == 4
+    shared = next(message for message, ids in proto.sends if ids == ['p10'])
+    assert response.data == shared.data and response is not shared
+    assert response.data['sequence_id'] == 4
+    assert all('controlled_by' not in c for c in response.data['combat']['combatants'])
@@ -0,0 +1,122 @@
+"""
+Tests for the compendium search index: name lookups, prefix and full-text
+ranking, faceted filters with counts, pagination, and publication together
+with the artifact's data.
+"""
+import json
+
+from service.compendium_artifact import REQUIRED_FILES, CompendiumArtifact
+from service.compendium_index import CompendiumIndex, normalize_facet
+
+DATA = {
+    "character_data": {
+        "races": [{"name": "Hill Dwarf", "description": "Stout folk of the hills."}],
+        "classes": [{"name": "Wizard", "subclasses": []}],
+        "backgrounds": [{"name": "Sage"}],
+    },
+    "spell_data": {
+        "metadata": {},
+        "spells": {
+            "Fire Bolt": {"name": "Fire Bolt", "level": 0, "school": "Evocation", "classes": ["Wizard"],
+                          "description": "A mote of fire deals fire damage."},
+            "Fireball": {"name": "Fireball", "level": 3, "school": "Evocation", "classes": ["Wizard", "Sorcerer"],
+                         "description": "A bright streak blossoms into an explosion of flame."},
+            "Burning Hands": {"name": "Burning Hands", "level": 1, "school": "Evocation", "classes": ["Sorcerer"],
+                              "description": "A thin sheet of flames. Each creature takes fire damage."},
+            "Mage Hand": {"name": "Mage Hand", "level": 0, "school": "Conjuration", "classes": ["Wizard"],
+                          "description": "A spectral, floating hand appears."},
+        },
+    },
+    "equipment_data": {
+        "metadata": {},
+        "equipment": {
+            "weapons": [{"name": "Longsword", "damage_type": "slashing"}],
+            "magic_items": [{"name": "Flame Tongue", "rarity": "Rare", "description": "Deals extra fire damage."}],
+        },
+    },
+    "bestiary_data": {
+        "metadata": {},
+        "monsters": {
+            "Red Dragon Wyrmling": {"name": "Red Dragon Wyrmling", "challenge_rating": "4", "type": "dragon",
+                                    "size": "Medium", "actions": [{"name": "Fire Breath", "description": "fire damage"}]},
+            "Young Red Dragon": {"name": "Young Red Dragon", "challenge_rating": "10", "type": "dragon", "size": "Large"},
+            "Goblin": {"name": "Goblin", "challenge_rating": "1/4", "type": "humanoid", "size": "Small"},
+        },
+    },
+    "feats_data": {"feats": [{"name": "Grappler", "prerequisite": "Strength 13 or higher"}]},
+}
+
+
+def names(result):
+    return [hit.name for hit in result.hits]
+
+
+def test_lookup_ignores_case_and_separates_kinds():
+    index = CompendiumIndex(DATA)
+
+    assert index.get("spell", "fire BOLT")["level"] == 0
+    assert index.get("race", "hill dwarf")["name"] == "Hill Dwarf"
+    assert index.get("class", "wizard") is not None
+    assert index.get("spell", "wizard") is None
+    assert len(index) == 13
+
+
+def test_prefix_of_the_name_finds_and_ranks_the_name_first():
+    index = CompendiumIndex(DATA)
+
+    assert names(index.search("fire bo"))[0] == "Fire Bolt"
+    assert names(index.search("red dra")) == ["Red Dragon Wyrmling", "Young Red Dragon"]
+    assert names(index.search("longsw")) == ["Longsword"]
+
+
+def test_full_text_requires_every_token_and_prefers_name_matches():
+    index = CompendiumIndex(DATA)
+
+    result = index.search("fire damage")
+
+    assert names(result)[0] == "Fire Bolt"
+    assert set(names(result)) == {"Fire Bolt", "Burning Hands", "Flame Tongue", "Red Dragon Wyrmling"}
+    assert [hit.score for hit in result.hits] == sorted((hit.score for hit in result.hits), reverse=True)
+    assert index.search("fire zzz").total == 0
+
+
+def test_facets_filter_and_count_over_all_matches():
+    index = CompendiumIndex(DATA)
+
+    result = index.search(filters={"kind": "spell", "school": "evocation", "class": ["sorcerer", "cleric"]},
+                          facets=["level", "class"])
+
+    assert names(result) == ["Fireball", "Burning Hands"]
+    assert result.facets == {"level": {"3": 1, "1": 1}, "class": {"sorcerer": 2, "wizard": 1}}
+    assert names(index.search("dragon", filters={"cr": "10"})) == ["Young Red Dragon"]
+    assert names(index.search(filters={"cr": 0.25})) == ["Goblin"]
+    assert names(index.search(filters={"rarity": "RARE", "category": "magic_items"})) == ["Flame Tongue"]
+    assert index.search(filters={"kind": "spell", "level": 9}).total == 0
+
+
+def test_filters_without_query_keep_artifact_order_and_paginate():
+    index = CompendiumIndex(DATA)
+
+    first = index.search(filters={"kind": "spell"}, limit=2)
+    second = index.search(filters={"kind": "spell"}, limit=2, offset=2)
+
+    assert names(first) + names(second) == list(DATA["spell_data"]["spells"])
+    assert first.total == second.total == 4
+    assert index.search(filters={"kind": [], "level": None}).total == len(index)
+
+
+def test_normalize_facet():
+    assert normalize_facet(0.5) == "1/2"
+    assert normalize_facet(" Evocation ") == "evocation"
+    assert normalize_facet(3) == "3"
+
+
+def test_artifact_publishes_the_index_with_its_data(tmp_path):
+    for key, filename in REQUIRED_FILES.items():
+        (tmp_path / filename).write_text(json.dumps(DATA[key]), encoding="utf-8")
+
+    artifact = CompendiumArtifact(tmp_path, require_manifest=False)
+    assert artifact.index.get("monster", "goblin") is not None
+
+    artifact.data = {}
+    assert len(artifact.index) == 0
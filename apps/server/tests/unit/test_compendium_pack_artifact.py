@@ -0,0 +1,118 @@
+"""
+Tests for loading a compendium generation from its packed form: the pack
+build script, trust checks against the manifest and JSON files, and routes
+served from lazily decoded records.
+"""
+import importlib.util
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from core_table.compendium_pack import PACK_NAME, PackedRecords
+from routers.compendium import BUNDLED_COMPENDIUM_DIR
+from service.compendium_artifact import REQUIRED_FILES, CompendiumArtifact
+
+SCRIPT = Path(__file__).resolve().parents[4] / "scripts" / "compendium" / "pack_artifact.py"
+SPEC = importlib.util.spec_from_file_location("pack_compendium_artifact", SCRIPT)
+assert SPEC is not None and SPEC.loader is not None
+pack_tool = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(pack_tool)
+
+
+@pytest.fixture
+def generation(tmp_path):
+    for path in BUNDLED_COMPENDIUM_DIR.iterdir():
+        if path.suffix == ".json":
+            shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def _age_json_files(directory: Path) -> None:
+    for filename in REQUIRED_FILES.values():
+        os.utime(directory / filename, (1, 1))
+
+
+def test_packed_generation_matches_the_json_generation(generation):
+    from_json = CompendiumArtifact(generation, require_manifest=True)
+    pack_tool.pack_artifact(generation)
+
+    packed = CompendiumArtifact(generation, require_manifest=True)
+
+    assert (from_json.storage, packed.storage) == ("json", "pack")
+    assert packed.verified and packed.artifact_version == from_json.artifact_version
+    monsters = packed.data["bestiary_data"]["monsters"]
+    assert isinstance(monsters, PackedRecords)
+    assert dict(monsters) == from_json.data["bestiary_data"]["monsters"]
+    assert list(packed.data["character_data"]["races"]) == from_json.data["character_data"]["races"]
+    assert packed.index.get("monster", "aboleth") == from_json.data["bestiary_data"]["monsters"]["Aboleth"]
+
+
+def test_unverified_version_is_the_same_for_both_forms(generation):
+    (generation / "manifest.json").unlink()
+    from_json = CompendiumArtifact(generation, require_manifest=False)
+    pack_tool.pack_artifact(generation)
+    _age_json_files(generation)
+
+    packed = CompendiumArtifact(generation, require_manifest=False)
+
+    assert packed.storage == "pack"
+    assert packed.artifact_version == from_json.artifact_version
+    assert packed.artifact_version.startswith("unverified-")
+
+
+def test_pack_from_other_files_than_the_manifest_is_ignored(generation):
+    feats = json.loads((generation / "feats_data.json").read_text(encoding="utf-8"))
+    feats["feats"].append({"name": "Alert", "prerequisite": None})
+    (generation / "feats_data.json").write_text(json.dumps(feats), encoding="utf-8")
+    pack_tool.pack_artifact(generation)
+
+    artifact = CompendiumArtifact(generation, require_manifest=True)
+
+    # The pack is passed over, and the edited JSON does not match the manifest either
+    assert artifact.storage is None
+    assert artifact.error_code == "compendium_artifact_invalid"
+
+
+def test_json_edited_after_packing_wins_without_a_manifest(generation):
+    (generation / "manifest.json").unlink()
+    path = pack_tool.pack_artifact(generation)
+    _age_json_files(generation)
+    os.utime(path, (100, 100))
+    os.utime(generation / "feats_data.json", (200, 200))
+
+    artifact = CompendiumArtifact(generation, require_manifest=False)
+
+    assert artifact.storage == "json"
+    assert artifact.error_code is None
+
+
+def test_corrupt_pack_makes_the_artifact_invalid(generation):
+    path = pack_tool.pack_artifact(generation)
+    raw = bytearray(path.read_bytes())
+    raw[200] ^= 0xFF
+    path.write_bytes(bytes(raw))
+
+    artifact = CompendiumArtifact(generation, require_manifest=True)
+
+    assert artifact.error_code == "compendium_artifact_invalid"
+    assert artifact.readiness() == {"ok": False, "code": "compendium_artifact_invalid"}
+
+
+def test_routes_serve_packed_records(generation, client, monkeypatch):
+    from routers.compendium import compendium_service
+
+    pack_tool.pack_artifact(generation)
+    packed = CompendiumArtifact(generation, require_manifest=True)
+    assert (generation / PACK_NAME).is_file() and packed.storage == "pack"
+    monkeypatch.setattr(compendium_service, "data", packed.data)
+
+    races = client.get("/api/compendium/races").json()
+    monsters = client.get("/api/compendium/monsters?limit=3&cr=10").json()
+    equipment = client.get("/api/compendium/equipment?limit_per_category=2").json()
+
+    assert races["count"] == 9 and races["races"][0]["name"]
+    assert monsters["total"] == 6 and len(monsters["monsters"]) == 3
+    assert all(len(items) == 2 for items in equipment["equipment"].values())
+    assert client.get("/api/compendium/monsters/adult%20red%20dragon").json()["name"] == "Adult Red Dragon"
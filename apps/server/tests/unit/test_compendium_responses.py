@@ -0,0 +1,102 @@
+"""
+Tests for the encoded compendium response cache: content negotiation,
+If-None-Match comparison, compression and generation invalidation.
+"""
+import gzip
+import json
+from types import SimpleNamespace
+
+from service.compendium_responses import (
+    CompendiumResponseCache,
+    EncodedResponse,
+    if_none_match,
+    negotiate,
+)
+from starlette.requests import Request
+
+BODY = json.dumps({"monsters": {f"m{i}": {"name": f"Monster {i}"} for i in range(100)}}).encode()
+
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/compendium/monsters",
+                    "query_string": b"limit=5&cr=1", "headers": raw})
+
+
+def artifact(version="v1"):
+    return SimpleNamespace(generation=1, artifact_version=version)
+
+
+def test_negotiate_prefers_brotli_and_respects_zero_quality():
+    both = {"gzip": b"", "br": b""}
+    assert negotiate("gzip, deflate, br", both) == "br"
+    assert negotiate("gzip, br;q=0", both) == "gzip"
+    assert negotiate("identity", both) is None
+    assert negotiate("*", {"gzip": b""}) == "gzip"
+    assert negotiate("br", {}) is None
+
+
+def test_if_none_match_uses_weak_comparison():
+    etags = {'"v1-abc"', '"v1-abc-gz"'}
+    assert if_none_match('"x", W/"v1-abc-gz"', etags)
+    assert if_none_match("*", etags)
+    assert not if_none_match('"v1-abd"', etags)
+    assert not if_none_match(None, etags)
+
+
+def test_etag_varies_by_content_coding():
+    entry = EncodedResponse(b"{}", '"v1-abc"', encodings={"gzip": b""})
+    assert entry.etag_for("gzip") == '"v1-abc-gz"'
+    assert entry.etags == {'"v1-abc"', '"v1-abc-gz"'}
+
+
+def test_large_bodies_are_compressed_once_and_served_per_client():
+    cache = CompendiumResponseCache(artifact())
+    key = cache.key(request())
+    assert key == ("/api/compendium/monsters", (("cr", "1"), ("limit", "5")))
+
+    entry = cache.put(key, BODY)
+    plain = cache.respond(request(), entry, "miss")
+    zipped = cache.respond(request(accept_encoding="gzip"), entry, "hit")
+
+    assert plain.body == BODY and "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(zipped.body) == BODY
+    assert len(zipped.body) < len(BODY) // 4
+    assert cache.put(("small",), b"{}").encodings == {}
+
+
+def test_not_modified_carries_validators_only():
+    cache = CompendiumResponseCache(artifact())
+    entry = cache.put(cache.key(request()), BODY)
+
+    response = cache.respond(request(if_none_match=entry.etag, accept_encoding="gzip"), entry, "hit")
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == entry.etag_for("gzip")
+    assert cache.counters == {"hit": 0, "miss": 0, "not_modified": 1}
+
+
+def test_new_generation_or_version_drops_every_entry():
+    source = artifact()
+    cache = CompendiumResponseCache(source)
+    key = cache.key(request())
+    first = cache.put(key, BODY)
+    assert cache.get(key) is first
+
+    source.generation += 1
+    assert cache.get(key) is None
+
+    cache.put(key, BODY)
+    source.artifact_version = "v2"
+    assert cache.get(key) is None
+    assert cache.put(key, BODY).etag != first.etag
+
+
+def test_entries_are_bounded():
+    cache = CompendiumResponseCache(artifact(), max_entries=2)
+    for n in range(4):
+        cache.put((n,), b"{}")
+    assert len(cache) == 2
+    assert cache.get((0,)) is None and cache.get((3,)) is not None
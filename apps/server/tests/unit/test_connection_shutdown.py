@@ -34,7 +34,7 @@ async def test_connect_retains_registry_and_releases_initialization_session(monk
     )
     registry.remove.assert_called_once_with()
     assert manager.sessions_protocols["ROOM"] is protocol_service
-    websocket.accept.assert_awaited_once_with()
+    websocket.accept.assert_awaited_once_with(subprotocol=None)
 
 
 @pytest.mark.asyncio
@@ -103,3 +103,47 @@ def test_full_cover_blocks_attack():
     result = resolver.resolve_attack(attacker, target, 10, '1d6', table=table)
     assert not result.hit
     assert result.reason == 'Target has full cover'
+
+
+def test_batch_matches_single_target_resolution():
+    zones = [
+        rect_zone(30, -10, 10, 20, tier='half'),
+        circle_zone(50, 60, 15, tier='three_quarters'),
+        CoverZone(zone_id='z3', shape_type='polygon', coords=[[70, -40], [90, -40], [80, -20]], cover_tier='full'),
+    ]
+    table = make_table(zones)
+    targets = [(100, 0), (100, 120), (160, -60), (-50, 0), (0, 0)]
+
+    tiers = AttackResolver.resolve_cover_many((0, 0), targets, table)
+
+    assert tiers == [AttackResolver.resolve_cover((0, 0), target, table) for target in targets]
+    assert tiers == ['half', 'three_quarters', 'full', 'none', 'none']
+
+
+def test_cache_reuses_tiers_until_zones_change():
+    from core_table.table import VirtualTable
+    from service.attack_resolver import CoverCache
+
+    cache = CoverCache()
+    table = VirtualTable('cover', 20, 20)
+    table.cover_zones = [rect_zone(45, -10, 10, 20, tier='half')]
+
+    assert cache.cover_many(table, (0, 0), [(100, 0), (0, 100)]) == ['half', 'none']
+    assert cache.cover_many(table, (0, 0), [(100, 0)]) == ['half']
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    table.cover_zones = [rect_zone(45, -10, 10, 20, tier='full')]
+    assert cache.cover_many(table, (0, 0), [(100, 0)]) == ['full']
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.hit_rate == 0.25
+
+
+def test_tables_without_a_cover_version_are_not_cached():
+    from service.attack_resolver import CoverCache
+
+    cache = CoverCache()
+    table = make_table([rect_zone(45, -10, 10, 20, tier='half')])
+    assert cache.cover_many(table, (0, 0), [(100, 0)]) == ['half']
+    table.cover_zones = []
+    assert cache.cover_many(table, (0, 0), [(100, 0)]) == ['none']
+    assert (cache.hits, cache.misses) == (0, 0)
@@ -1,7 +1,10 @@
+import json
+from contextlib import contextmanager
 from datetime import timedelta
 
 import pytest
 from database import crud, schemas
+from sqlalchemy import event
 from utils.time import utc_now
 
 
@@ -223,3 +226,125 @@ class TestChatCRUD:
 
         assert resolved is not None
         assert resolved.message_id == "server-2"
+
+
+@pytest.mark.unit
+class TestTableDeltaPersistence:
+    @staticmethod
+    def _table(n_entities):
+        from core_table.entities import Wall
+        from core_table.table import VirtualTable
+
+        table = VirtualTable("Delta", 200, 200)
+        for i in range(n_entities):
+            table.add_entity({'name': f'e{i}', 'x': i % 200, 'y': i // 200, 'layer': 'tokens'})
+        table.add_wall(Wall(table_id=str(table.table_id), x1=0, y1=0, x2=100, y2=0))
+        return table
+
+    @staticmethod
+    @contextmanager
+    def _count_statements(engine):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    @staticmethod
+    def _edit(table):
+        from core_table.entities import Wall
+
+        first, second = list(table.entities)[:2]
+        table.move_entity(first, (150, 150))
+        table.entities[second].hp = 7
+        table.remove_entity(list(table.entities)[-1])
+        table.add_entity({'name': 'new', 'x': 199, 'y': 199, 'layer': 'tokens'})
+        wall_id = next(iter(table.walls))
+        table.update_wall(wall_id, {'door_state': 'open', 'is_door': True})
+        table.add_wall(Wall(table_id=str(table.table_id), x1=5, y1=5, x2=5, y2=50))
+
+    def test_delta_save_round_trips(self, test_db, test_game_session):
+        table = self._table(10)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        self._edit(table)
+        assert len(table.changes) > 0
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        assert len(table.changes) == 0
+
+        loaded, ok = crud.load_table_from_db(test_db, str(table.table_id))
+        assert ok
+        assert {e.sprite_id: (e.position, e.hp) for e in loaded.entities.values()} == \
+            {e.sprite_id: (e.position, e.hp) for e in table.entities.values()}
+        assert {w: loaded.walls[w].to_dict() for w in loaded.walls} == \
+            {w: table.walls[w].to_dict() for w in table.walls}
+
+    def test_statements_scale_with_changes_not_table_size(self, test_db, test_db_engine, test_game_session):
+        counts = []
+        for size in (20, 400):
+            table = self._table(size)
+            crud.save_table_to_db(test_db, table, test_game_session.id)
+            self._edit(table)
+            with self._count_statements(test_db_engine) as statements:
+                crud.save_table_to_db(test_db, table, test_game_session.id)
+            counts.append(len(statements))
+        assert counts[0] == counts[1]
+        assert counts[0] <= 12
+
+    def test_unchanged_table_saves_without_writes(self, test_db, test_db_engine, test_game_session):
+        table = self._table(5)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        with self._count_statements(test_db_engine) as statements:
+            crud.save_table_to_db(test_db, table, test_game_session.id)
+        assert not [s for s in statements if s.lstrip().split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+    def test_untracked_dict_write_falls_back_to_full_resync(self, test_db, test_game_session):
+        from core_table.table import Entity
+
+        table = self._table(3)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        stray = Entity("stray", (9, 9), "tokens", entity_id=99)
+        table.entities[99] = stray
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+
+        loaded, _ = crud.load_table_from_db(test_db, str(table.table_id))
+        assert stray.sprite_id in {e.sprite_id for e in loaded.entities.values()}
+
+    def test_write_through_wall_does_not_collide(self, test_db, test_game_session):
+        from core_table.entities import Wall
+
+        table = self._table(1)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        wall = Wall(table_id=str(table.table_id), x1=1, y1=1, x2=2, y2=2)
+        crud.create_wall(test_db, wall.to_dict())
+        table.add_wall(wall)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        assert len(crud.get_table_walls(test_db, str(table.table_id))) == 2
+
+    def test_snapshot_is_json_and_written_later(self, test_db, test_game_session):
+        table = self._table(3)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        table.move_entity(next(iter(table.entities)), (50, 50))
+        snapshot = json.loads(json.dumps(crud.snapshot_table_for_save(table)))
+        assert not snapshot['full'] and len(snapshot['entities']) == 1
+        crud.write_table_snapshot(test_db, snapshot, test_game_session.id)
+
+        loaded, _ = crud.load_table_from_db(test_db, str(table.table_id))
+        assert (50, 50) in {e.position for e in loaded.entities.values()}
+
+    def test_full_snapshot_keeps_rows_written_after_it(self, test_db, test_game_session):
+        table = self._table(2)
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        table.changes.invalidate()
+        full = crud.snapshot_table_for_save(table)
+        # A later delta save lands before the older full snapshot is written
+        table.add_entity({'name': 'late', 'x': 10, 'y': 10, 'layer': 'tokens'})
+        crud.save_table_to_db(test_db, table, test_game_session.id)
+        crud.write_table_snapshot(test_db, full, test_game_session.id)
+
+        loaded, _ = crud.load_table_from_db(test_db, str(table.table_id))
+        assert 'late' in {e.name for e in loaded.entities.values()}
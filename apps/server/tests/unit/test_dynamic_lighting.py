@@ -361,6 +361,38 @@ class TestEntityVisionPersistence:
             table.cover_zones[0].to_dict()
         ]
 
+    def test_fog_survives_full_table_save_and_load(self, test_db, session):
+        table = VirtualTable("Fog Round-trip Table", 50, 50)
+        table.fog_rectangles = {
+            "hide": [((0, 0), (400, 300))],
+            "reveal": [((100, 100), (200, 200))],
+        }
+
+        crud.save_table_to_db(test_db, table, session.id)
+
+        loaded_table, ok = crud.load_table_from_db(test_db, str(table.table_id))
+
+        assert ok is True
+        assert loaded_table is not None
+        assert loaded_table.fog == table.fog
+        assert not loaded_table.entities
+
+    def test_legacy_fog_entities_load_as_region(self, test_db, session):
+        table = VirtualTable("Legacy Fog Table", 50, 50)
+        table.add_entity({
+            "name": "fog_hide_0", "position": (0, 0), "layer": "fog_of_war",
+            "texture_path": "__FOG_HIDE__", "scale_x": 400, "scale_y": 300,
+        })
+        crud.save_table_to_db(test_db, table, session.id)
+        db_table = crud.get_virtual_table_by_id(test_db, str(table.table_id))
+        db_table.fog_json = None
+        test_db.commit()
+
+        loaded_table, ok = crud.load_table_from_db(test_db, str(table.table_id))
+
+        assert ok is True
+        assert loaded_table.fog_rectangles["hide"] == [((0.0, 0.0), (400.0, 300.0))]
+
 
 # ---------------------------------------------------------------------------
 # Server-side validation of TABLE_SETTINGS_UPDATE
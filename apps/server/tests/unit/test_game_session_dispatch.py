@@ -1,8 +1,8 @@
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from core_table.protocol import MessageType
-from service.game_session import ConnectionManager
+from core_table.protocol import Message, MessageType
+from service.game_session import ConnectionManager, decode_inbound
 
 
 def _connected_manager(protocol_service=None):
@@ -83,3 +83,48 @@ async def test_unknown_message_type_still_uses_legacy_error():
         },
         websocket,
     )
+
+
+@pytest.mark.unit
+def test_decode_inbound_returns_message_for_protocol_types():
+    message = decode_inbound('{"type": "sprite_move", "data": {"sprite_id": "s1"}, "message_id": "m1"}')
+    assert isinstance(message, Message)
+    assert message.type == MessageType.SPRITE_MOVE
+    assert message.message_id == "m1"
+
+
+@pytest.mark.unit
+def test_decode_inbound_keeps_legacy_envelopes_as_dicts():
+    assert decode_inbound('{"type": "chat_message", "data": {}}') == {"type": "chat_message", "data": {}}
+
+
+@pytest.mark.unit
+def test_decode_inbound_replaces_non_string_message_id():
+    message = decode_inbound('{"type": "ping", "message_id": 7}')
+    assert isinstance(message.message_id, str) and len(message.message_id) == 32
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("frame", ["[1, 2]", "{bad", '{"type": "ping"} trailing'])
+def test_decode_inbound_rejects_malformed_frames(frame):
+    with pytest.raises(ValueError):
+        decode_inbound(frame)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_decoded_message_reaches_session_without_reparsing(monkeypatch):
+    protocol_service = MagicMock()
+    protocol_service.handle_protocol_message = AsyncMock()
+    manager, websocket, send_personal_message, _ = _connected_manager(protocol_service)
+    message = decode_inbound('{"type": "ping", "data": {}}')
+
+    def reparsed(*_args, **_kwargs):
+        raise AssertionError("message was parsed again")
+
+    monkeypatch.setattr(Message, "from_dict", reparsed)
+    monkeypatch.setattr(Message, "from_json", reparsed)
+    await manager.handle_message(websocket, message)
+
+    protocol_service.handle_protocol_message.assert_awaited_once_with(websocket, message)
+    send_personal_message.assert_not_awaited()
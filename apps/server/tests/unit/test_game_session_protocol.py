@@ -30,6 +30,7 @@ def _make_service(session_code="TST"):
         svc.clients = {}
         svc.client_info = {}
         svc.websocket_to_client = {}
+        svc.send_queues = {}
         svc.table_manager = MagicMock()
         svc.table_manager.tables = {}
         svc.server_protocol = mock_sp.return_value
@@ -129,6 +130,7 @@ class TestClientLifecycle:
         )
 
         await svc.send_to_client(Message(MessageType.PING, {}), "c1")
+        await svc.flush_sends()
 
         assert "c1" not in svc.clients
 
@@ -214,6 +216,7 @@ class TestBroadcast:
     async def test_broadcast_reaches_all_except_sender(self):
         svc, ws1, ws2 = await self._setup_two_clients()
         await svc.broadcast_to_session(Message(MessageType.PING, {}), exclude_client="c1")
+        await svc.flush_sends()
         ws1.send_text.assert_not_awaited()
         ws2.send_text.assert_awaited_once()
 
@@ -223,12 +226,14 @@ class TestBroadcast:
         await svc.broadcast_filtered(
             Message(MessageType.PING, {}), "dungeon_master", exclude_client=None
         )
+        await svc.flush_sends()
         ws1.send_text.assert_awaited_once()  # owner can see DM layer
         ws2.send_text.assert_not_awaited()  # player cannot
 
     async def test_send_to_client_delivers_message(self):
         svc, ws1, _ = await self._setup_two_clients()
         await svc.send_to_client(Message(MessageType.PING, {}), "c1")
+        await svc.flush_sends()
         ws1.send_text.assert_awaited_once()
 
     async def test_send_to_unknown_client_logs_warning(self):
@@ -362,6 +367,7 @@ class TestKickBanPlayer:
 
         result = await svc.ban_player("5", "Troll", "cheating", "permanent", "dm1")
         assert result is True
+        await svc.flush_sends()
         # ban notification broadcast
         dm_ws.send_text.assert_awaited()
 
@@ -431,6 +437,7 @@ class TestBroadcastCleanup:
         ws_bad.send_text = AsyncMock(side_effect=Exception("connection lost"))
 
         await svc.broadcast_to_session(Message(MessageType.PING, {}))
+        await svc.flush_sends()
         assert "c2" not in svc.clients
 
 
@@ -0,0 +1,31 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from api import game_ws
+from core_table.codec import available_codecs
+from fastapi import WebSocketDisconnect
+
+
+def test_clients_without_codec_subprotocol_get_json():
+    assert game_ws._negotiate_codec([]) == ("json", None)
+    assert game_ws._negotiate_codec(["graphql-ws"]) == ("json", None)
+
+
+def test_first_supported_codec_subprotocol_is_echoed():
+    assert game_ws._negotiate_codec(["ttrpg.cbor", "ttrpg.json"]) == ("json", "ttrpg.json")
+    if "msgpack" in available_codecs():
+        assert game_ws._negotiate_codec(["ttrpg.msgpack", "ttrpg.json"]) == ("msgpack", "ttrpg.msgpack")
+
+
+async def test_receive_frame_returns_text_or_bytes():
+    websocket = MagicMock()
+    websocket.receive = AsyncMock(side_effect=[
+        {"type": "websocket.receive", "text": "{}"},
+        {"type": "websocket.receive", "bytes": b"\x80"},
+        {"type": "websocket.disconnect", "code": 1001},
+    ])
+    assert await game_ws._receive_frame(websocket) == "{}"
+    assert await game_ws._receive_frame(websocket) == b"\x80"
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        await game_ws._receive_frame(websocket)
+    assert excinfo.value.code == 1001
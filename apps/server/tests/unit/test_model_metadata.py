@@ -11,6 +11,7 @@ EXPECTED_TABLES = {
     "chat_messages",
     "choice_encounter_events",
     "choice_encounters",
+    "combat_action_log_pages",
     "combat_actions",
     "combat_encounters",
     "email_verification_tokens",
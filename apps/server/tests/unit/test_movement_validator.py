@@ -174,3 +174,65 @@ def test_validate_lightweight_blocked_path():
     r = v.validate_lightweight('e1', (25, 500), (200, 500), table)
     assert not r.valid
     assert 'wall' in r.reason.lower()
+
+
+def _virtual_table(width=20, height=20):
+    from core_table.table import VirtualTable
+    return VirtualTable('Index', width, height, grid_cell_px=50.0)
+
+
+def test_virtual_table_index_reused_across_moves():
+    from core_table.entities import Wall
+    rules = make_rules(walls_block_movement=True, obstacles_block_movement=True)
+    table = _virtual_table()
+    for i in range(10):
+        table.add_wall(Wall('t', 500 + i * 10, 0, 500 + i * 10, 1000))
+    v = MovementValidator(rules)
+    assert v.validate_lightweight('e1', (25, 25), (75, 25), table).valid
+    rebuilds = table.spatial_index.rebuild_count
+    for _ in range(5):
+        assert v.validate('e1', (25, 25), (125, 25), table).valid
+    assert table.spatial_index.rebuild_count == rebuilds
+
+
+def test_virtual_table_wall_added_between_moves_blocks():
+    from core_table.entities import Wall
+    rules = make_rules(walls_block_movement=True, obstacles_block_movement=False)
+    table = _virtual_table()
+    v = MovementValidator(rules)
+    assert v.validate_lightweight('e1', (25, 500), (200, 500), table).valid
+    table.add_wall(Wall('t', 100, 0, 100, 1000))
+    assert not v.validate_lightweight('e1', (25, 500), (200, 500), table).valid
+
+
+def test_virtual_table_moving_obstacle_does_not_block_itself():
+    rules = make_rules(walls_block_movement=False, obstacles_block_movement=True)
+    table = _virtual_table()
+    mover = table.add_entity({'name': 'Boulder', 'x': 0, 'y': 0, 'layer': 'obstacles', 'width': 50, 'height': 50})
+    v = MovementValidator(rules)
+    assert v.validate_lightweight(mover.entity_id, (25, 25), (25, 175), table).valid
+    assert not v.validate_lightweight('other', (25, 25), (25, 175), table).valid
+
+
+def test_grid_engine_routes_around_wall_like_python():
+    import pytest
+    pytest.importorskip("numpy")
+    from core_table.entities import Wall
+    rules = make_rules(walls_block_movement=True, obstacles_block_movement=False)
+    table = _virtual_table()
+    table.add_wall(Wall('t', 100, 0, 100, 500))
+    python_result = MovementValidator(rules).validate('e1', (25, 250), (200, 250), table)
+    grid_result = MovementValidator(rules, engine='grid').validate('e1', (25, 250), (200, 250), table)
+    assert python_result.valid and grid_result.valid
+    assert len(grid_result.valid_path) == len(python_result.valid_path)
+
+
+def test_virtual_table_walls_off_with_obstacle_on_the_line():
+    from core_table.entities import Wall
+    rules = make_rules(walls_block_movement=False, obstacles_block_movement=True)
+    table = _virtual_table(2000, 2000)
+    table.add_wall(Wall('t', 500, 0, 500, 1000))
+    table.add_entity({'name': 'Boulder', 'x': 600, 'y': 100, 'layer': 'obstacles', 'width': 50, 'height': 50})
+    result = MovementValidator(rules).validate('tok', (125, 125), (925, 125), table)
+    assert result.valid and result.valid_path
+    assert MovementValidator(rules).validate_lightweight('tok', (125, 125), (925, 925), table).valid
@@ -0,0 +1,265 @@
+"""
+Tests for the write-behind PersistenceWorker.
+
+Covers coalescing, per-key ordering, backpressure, flush, journal replay and
+the event-loop stall the worker exists to remove. Operations are fakes that
+sleep or record their payloads; no database is involved.
+"""
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from service import persistence_worker as pw
+from service.persistence_worker import PersistenceWorker, persistence_op
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Fresh operation registry with a recording 'test.write' op."""
+    monkeypatch.setattr(pw, '_OPERATIONS', {})
+    recorded = SimpleNamespace(payloads=[], release=threading.Event())
+    recorded.release.set()
+
+    @persistence_op('test.write')
+    def write(payload):
+        recorded.release.wait(5)
+        recorded.payloads.append(payload)
+        return payload
+
+    return recorded
+
+
+async def _started(**kwargs) -> PersistenceWorker:
+    worker = PersistenceWorker(**kwargs)
+    worker.start()
+    return worker
+
+
+async def test_execute_returns_result_off_loop(calls):
+    worker = await _started()
+    assert await worker.execute('test.write', {'n': 1}) == {'n': 1}
+    assert worker.stats()['success'] == 1
+    await worker.stop()
+
+
+async def test_queued_intent_for_same_key_is_replaced(calls):
+    worker = await _started(workers=1)
+    calls.release.clear()
+    worker.submit('k', 'test.write', 1)   # picked up immediately, blocks
+    worker.submit('k', 'test.write', 2)   # queued behind it
+    worker.submit('k', 'test.write', 3)   # replaces 2
+    calls.release.set()
+    await worker.flush(5)
+    assert calls.payloads == [1, 3]
+    assert worker.counters['coalesced'] == 1
+    await worker.stop()
+
+
+async def test_prepare_snapshots_at_dispatch(calls):
+    worker = await _started(workers=1)
+    state = {'value': 0}
+    calls.release.clear()
+    worker.submit('busy', 'test.write', 'first')
+    worker.submit('k', 'test.write', prepare=lambda: dict(state))
+    state['value'] = 42  # changed while queued
+    calls.release.set()
+    await worker.flush(5)
+    assert calls.payloads == ['first', {'value': 42}]
+    await worker.stop()
+
+
+async def test_writes_for_one_key_never_overlap(monkeypatch):
+    monkeypatch.setattr(pw, '_OPERATIONS', {})
+    active = {'k': 0, 'max': 0}
+    lock = threading.Lock()
+
+    @persistence_op('test.slow')
+    def slow(_payload):
+        with lock:
+            active['k'] += 1
+            active['max'] = max(active['max'], active['k'])
+        time.sleep(0.02)
+        with lock:
+            active['k'] -= 1
+
+    worker = await _started(workers=4)
+    worker.submit('same', 'test.slow', 0)
+    await asyncio.sleep(0.005)  # first write is running
+    await asyncio.gather(*(worker.execute('test.slow', i, key='same') for i in range(1, 4)))
+    assert active['max'] == 1
+    await worker.stop()
+
+
+async def test_submit_rejects_new_keys_when_full(calls):
+    worker = await _started(max_pending=2, workers=1)
+    calls.release.clear()
+    assert worker.submit('a', 'test.write', 'a')    # running
+    assert worker.submit('b', 'test.write', 'b')
+    assert worker.submit('c', 'test.write', 'c')
+    assert not worker.submit('d', 'test.write', 'd')
+    assert worker.submit('c', 'test.write', 'c2')   # existing keys still coalesce
+    assert worker.counters['rejected'] == 1
+    calls.release.set()
+    await worker.flush(5)
+    assert calls.payloads == ['a', 'b', 'c2']
+    await worker.stop()
+
+
+async def test_execute_waits_for_room(calls):
+    worker = await _started(max_pending=1, workers=1)
+    calls.release.clear()
+    worker.submit('a', 'test.write', 'a')
+    worker.submit('b', 'test.write', 'b')
+    waiting = asyncio.create_task(worker.execute('test.write', 'c'))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    calls.release.set()
+    assert await asyncio.wait_for(waiting, 5) == 'c'
+    await worker.stop()
+
+
+async def test_failure_reaches_on_error_and_waiters(monkeypatch):
+    monkeypatch.setattr(pw, '_OPERATIONS', {})
+
+    @persistence_op('test.fail')
+    def fail(_payload):
+        raise RuntimeError('db down')
+
+    worker = await _started()
+    on_error = MagicMock()
+    worker.submit('k', 'test.fail', on_error=on_error)
+    await worker.flush(5)
+    assert isinstance(on_error.call_args.args[0], RuntimeError)
+    with pytest.raises(RuntimeError, match='db down'):
+        await worker.execute('test.fail')
+    assert worker.counters['error'] == 2
+    await worker.stop()
+
+
+async def test_stop_flushes_queued_writes(calls):
+    worker = await _started(workers=1)
+    for i in range(5):
+        worker.submit(i, 'test.write', i)
+    await worker.stop(flush=True)
+    assert calls.payloads == [0, 1, 2, 3, 4]
+    assert not worker.running
+
+
+async def test_journal_replays_unfinished_writes(calls, tmp_path):
+    path = tmp_path / 'persistence.jsonl'
+    path.write_text(
+        json.dumps({'seq': 1, 'op': 'test.write', 'payload': 'done-already'}) + '\n'
+        + json.dumps({'seq': 1, 'done': True}) + '\n'
+        + json.dumps({'seq': 2, 'op': 'test.write', 'payload': 'lost'}) + '\n'
+        + json.dumps({'seq': 3, 'op': 'test.write', 'payload': 'lost-too'}) + '\n'
+        + '{"seq": 4, "op": "test.wr'  # torn by the crash
+    )
+    worker = await _started(journal_path=str(path))
+    assert await worker.recover() == 2
+    assert calls.payloads == ['lost', 'lost-too']
+    assert path.read_text() == ''
+    await worker.stop()
+
+
+async def test_journal_is_compacted_after_writes(calls, tmp_path):
+    path = tmp_path / 'persistence.jsonl'
+    worker = await _started(journal_path=str(path))
+    calls.release.clear()
+    worker.submit('k', 'test.write', 'x')
+    await asyncio.sleep(0.05)
+    # Begun but not finished: a crash here would replay it
+    assert [r['payload'] for r in worker.journal.pending()] == ['x']
+    calls.release.set()
+    await worker.flush(5)
+    assert path.read_text() == ''
+    await worker.stop()
+
+
+async def test_queued_intents_survive_a_crash(calls, tmp_path):
+    path = tmp_path / 'persistence.jsonl'
+    worker = await _started(workers=1, journal_path=str(path))
+    state = {'value': 1}
+    calls.release.clear()
+    worker.submit('a', 'test.write', 'a')      # running, blocks
+    worker.submit('b', 'test.write', 'b-old')
+    worker.submit('b', 'test.write', 'b')      # coalesced while queued
+    worker.submit('c', 'test.write', prepare=lambda: dict(state))
+    # Killed before the queue drains: queued intents are never handed to a thread
+    stopping = asyncio.create_task(worker.stop(flush=False))
+    await asyncio.sleep(0.05)
+    calls.release.set()
+    await stopping
+    assert calls.payloads == ['a']
+
+    restarted = await _started(journal_path=str(path))
+    assert await restarted.recover() == 2
+    assert calls.payloads == ['a', 'b', {'value': 1}]
+    assert path.read_text() == ''
+    await restarted.stop()
+
+
+async def test_combat_persist_is_queued_when_worker_runs(monkeypatch):
+    from service.combat_engine import CombatEngine
+
+    monkeypatch.setattr(pw, '_OPERATIONS', {})
+    written = []
+    persistence_op('combat.upsert')(written.append)
+    worker = await _started()
+    monkeypatch.setattr(pw, '_worker', worker)
+    state = MagicMock()
+    state.to_dict.return_value = {'combat_id': 'c1'}
+    monkeypatch.setitem(CombatEngine._active, 'S1', state)
+
+    CombatEngine.persist('S1')
+    CombatEngine.persist('S1')
+    await worker.flush(5)
+    assert written[-1] == {'session_id': 'S1', 'state': {'combat_id': 'c1'}, 'log_pages': []}
+    assert len(written) <= 2
+    await worker.stop()
+
+
+async def _max_loop_gap(work, duration=0.3) -> float:
+    """Largest gap between 5 ms heartbeats while ``work`` runs."""
+    gaps = []
+
+    async def heartbeat():
+        last = time.perf_counter()
+        end = last + duration
+        while last < end:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    await work()
+    await beat
+    return max(gaps)
+
+
+async def test_event_loop_keeps_ticking_during_slow_writes(monkeypatch):
+    """A 150 ms write stalls the loop when run inline, not through the worker."""
+    monkeypatch.setattr(pw, '_OPERATIONS', {})
+
+    @persistence_op('test.slow')
+    def slow_write(_payload):
+        time.sleep(0.15)
+
+    async def inline():
+        slow_write(None)
+
+    worker = await _started()
+
+    async def write_behind():
+        worker.submit('k', 'test.slow')
+
+    blocking_gap = await _max_loop_gap(inline)
+    worker_gap = await _max_loop_gap(write_behind)
+    await worker.stop()
+    assert blocking_gap >= 0.15
+    assert worker_gap < 0.1
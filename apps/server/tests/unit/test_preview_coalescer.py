@@ -0,0 +1,78 @@
+"""
+Tests for PreviewCoalescer: leading-edge send, latest-wins per sprite,
+trailing flush on the tick, and commit-time discard.
+"""
+import asyncio
+
+from core_table.protocol import Message, MessageType
+from service.preview_coalescer import PreviewCoalescer
+
+
+def _drag(sprite_id, x):
+    return Message(MessageType.SPRITE_DRAG_PREVIEW, {'id': sprite_id, 'x': x, 'y': 0})
+
+
+def _coalescer(interval=0.02):
+    sent = []
+
+    async def send(message, client_id):
+        sent.append((message.data['id'], message.data['x'], client_id))
+
+    return PreviewCoalescer(send, interval=interval), sent
+
+
+async def test_first_preview_is_sent_immediately():
+    coalescer, sent = _coalescer()
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 1), 'c1')
+    assert sent == [('sp-1', 1, 'c1')]
+    coalescer.close()
+
+
+async def test_storm_collapses_to_latest_per_sprite():
+    coalescer, sent = _coalescer()
+    for x in range(1, 11):
+        await coalescer.offer('drag', 'sp-1', _drag('sp-1', x), 'c1')
+        await coalescer.offer('drag', 'sp-2', _drag('sp-2', x * 10), 'c2')
+    await asyncio.sleep(0.05)
+    assert sent[0] == ('sp-1', 1, 'c1')
+    assert sorted(sent[1:]) == [('sp-1', 10, 'c1'), ('sp-2', 100, 'c2')]
+    assert coalescer.counters == {'in': 20, 'out': 3, 'dropped': 17}
+    coalescer.close()
+
+
+async def test_ticker_stops_when_quiet_and_next_preview_leads_again():
+    coalescer, sent = _coalescer(interval=0.01)
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 1), 'c1')
+    await asyncio.sleep(0.05)
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 2), 'c1')
+    assert sent == [('sp-1', 1, 'c1'), ('sp-1', 2, 'c1')]
+    coalescer.close()
+
+
+async def test_commit_discards_pending_preview():
+    coalescer, sent = _coalescer()
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 1), 'c1')
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 2), 'c1')
+    coalescer.discard('sp-1', 'drag')
+    await asyncio.sleep(0.05)
+    assert sent == [('sp-1', 1, 'c1')]
+    assert len(coalescer) == 0
+    coalescer.close()
+
+
+async def test_send_failure_does_not_stop_the_ticker():
+    calls = []
+
+    async def send(message, client_id):
+        calls.append(message.data['x'])
+        if len(calls) == 2:
+            raise RuntimeError('socket gone')
+
+    coalescer = PreviewCoalescer(send, interval=0.01)
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 1), 'c1')
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 2), 'c1')
+    await asyncio.sleep(0.03)
+    await coalescer.offer('drag', 'sp-1', _drag('sp-1', 3), 'c1')
+    await asyncio.sleep(0.03)
+    assert calls[-1] == 3
+    coalescer.close()
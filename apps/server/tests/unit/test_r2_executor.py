@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import io
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from config import Settings
+from storage import r2_manager as r2_manager_module
+from storage.r2_executor import R2Executor
+from storage.r2_manager import R2AssetManager
+
+
+class InMemoryS3Client:
+    """Thread-safe stand-in for the boto3 S3 client, with optional blocking latency."""
+
+    def __init__(self, latency=0.0, gate=None):
+        self.objects = {}
+        self.latency = latency
+        self.gate = gate
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.gate is not None:
+                self.gate.wait(5)
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _missing(self, operation):
+        return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType="application/octet-stream", Metadata=None):
+        self._call()
+        self.objects[Key] = (bytes(Body), ContentType, dict(Metadata or {}))
+
+    def head_object(self, Bucket, Key):
+        self._call()
+        if Key not in self.objects:
+            raise self._missing("HeadObject")
+        body, content_type, metadata = self.objects[Key]
+        return {"ContentLength": len(body), "LastModified": None, "ContentType": content_type, "Metadata": metadata}
+
+    def get_object(self, Bucket, Key):
+        self._call()
+        if Key not in self.objects:
+            raise self._missing("GetObject")
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def copy_object(self, Bucket, CopySource, Key, MetadataDirective):
+        self._call()
+        self.objects[Key] = self.objects[CopySource["Key"]]
+
+    def delete_object(self, Bucket, Key):
+        self._call()
+        self.objects.pop(Key, None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://r2.example/{operation}/{Params['Key']}?expires={ExpiresIn}"
+
+
+@pytest.fixture(autouse=True)
+def storage_settings(monkeypatch):
+    monkeypatch.setattr(r2_manager_module, "_settings", Settings(
+        r2_bucket_name="assets", r2_public_url="https://cdn.example"
+    ))
+
+
+def _manager(client):
+    manager = R2AssetManager()
+    manager._s3_client = client
+    return manager
+
+
+async def test_manager_operations_run_on_the_pool_against_the_stub():
+    client = InMemoryS3Client()
+    client.put_object(Bucket="b", Key="pending/a.png", Body=b"png-bytes", ContentType="image/png",
+                      Metadata={"xxhash": "abc"})
+    manager = _manager(client)
+    executor = R2Executor(max_workers=2)
+    try:
+        info = await executor.run(manager.get_object_info, "pending/a.png")
+        assert info["size"] == 9 and info["content_type"] == "image/png" and info["metadata"] == {"xxhash": "abc"}
+        assert await executor.run(manager.get_object_bytes, "pending/a.png", 100) == b"png-bytes"
+        assert await executor.run(manager.object_exists, "assets/a.png") is False
+        assert await executor.run(manager.promote_file, "pending/a.png", "assets/a.png") is True
+        assert set(client.objects) == {"assets/a.png"}
+        url = await executor.run(manager.generate_presigned_url, "assets/a.png", method="GET", expiration=60)
+        assert url == "https://r2.example/get_object/assets/a.png?expires=60"
+        assert await executor.run(manager.delete_file, "assets/a.png") is True
+        assert client.objects == {}
+        assert executor.stats()["completed"] == 6
+    finally:
+        executor.shutdown()
+
+
+def test_objects_stream_in_chunks_up_to_the_inspection_limit():
+    client = InMemoryS3Client()
+    client.put_object(Bucket="b", Key="pending/map.png", Body=bytes(10))
+    manager = _manager(client)
+
+    assert [len(chunk) for chunk in manager.iter_object_chunks("pending/map.png", 10, chunk_size=4)] == [4, 4, 2]
+    with pytest.raises(ValueError, match="inspection limit"):
+        list(manager.iter_object_chunks("pending/map.png", 9, chunk_size=4))
+
+
+async def test_concurrent_calls_are_bounded_by_the_pool():
+    client = InMemoryS3Client(latency=0.02)
+    for index in range(12):
+        client.put_object(Bucket="b", Key=f"k{index}", Body=b"x" * index)
+    client.max_active = 0
+    manager = _manager(client)
+    executor = R2Executor(max_workers=3)
+    try:
+        infos = await asyncio.gather(*(executor.run(manager.get_object_info, f"k{index}") for index in range(12)))
+    finally:
+        executor.shutdown()
+
+    assert [info["size"] for info in infos] == list(range(12))
+    assert client.max_active == 3
+
+
+async def test_event_loop_keeps_running_while_storage_calls_block():
+    gate = threading.Event()
+    client = InMemoryS3Client(gate=gate)
+    manager = _manager(client)
+    executor = R2Executor(max_workers=4)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while not gate.is_set():
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    try:
+        calls = asyncio.gather(*(executor.run(manager.object_exists, f"k{index}") for index in range(4)))
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(0.05)
+        assert client.active == 4 and ticks > 5
+        gate.set()
+        assert await calls == [False] * 4
+        await ticking
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+async def test_context_errors_and_restart_after_shutdown():
+    request_id = contextvars.ContextVar("request_id", default=None)
+    executor = R2Executor(max_workers=1)
+
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        request_id.set("req-1")
+        assert await executor.run(request_id.get) == "req-1"
+        with pytest.raises(RuntimeError):
+            await executor.run(failing)
+        assert executor.stats()["failed"] == 1 and executor.stats()["in_flight"] == 0
+
+        executor.shutdown()
+        assert executor.stats()["running"] is False
+        assert await executor.run(sum, [1, 2]) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_client_config_uses_storage_settings(monkeypatch):
+    settings = Settings(
+        r2_max_concurrency=12,
+        r2_connect_timeout_seconds=2.5,
+        r2_read_timeout_seconds=20,
+        r2_max_attempts=4,
+    )
+    monkeypatch.setattr(r2_manager_module, "_settings", settings)
+
+    config = R2AssetManager.client_config()
+
+    assert config.connect_timeout == 2.5
+    assert config.read_timeout == 20
+    assert config.retries == {"max_attempts": 4, "mode": "standard"}
+    assert config.max_pool_connections == 12
+
+
+@pytest.mark.parametrize("field, value", [
+    ("r2_max_concurrency", 0),
+    ("r2_connect_timeout_seconds", 0.1),
+    ("r2_read_timeout_seconds", 600),
+    ("r2_max_attempts", 11),
+])
+def test_storage_settings_are_range_checked(field, value):
+    with pytest.raises(ValueError):
+        Settings(**{field: value})
@@ -30,5 +30,5 @@ def test_schema_lifecycle_tracks_repository_head(tmp_path):
 
 
 def test_repository_baseline_matches_all_model_tables():
-    assert len(Base.metadata.tables) == 26
-    assert repository_heads() == ("0003_shared_canvas_state",)
+    assert len(Base.metadata.tables) == 27
+    assert repository_heads() == ("0006_combat_action_log_pages",)
@@ -0,0 +1,157 @@
+"""
+Tests for per-client send queues and serialize-once fan-out.
+
+Covers encode-once broadcasts, slow-peer isolation, the drop-oldest policy for
+previews and the disconnect policy for critical frames.
+"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from core_table.codec import get_codec
+from core_table.protocol import Message, MessageType
+from service.send_queue import ClientSendQueue, OverflowPolicy, overflow_policy
+
+
+def _ws(delay: float = 0.0):
+    ws = AsyncMock()
+    sent = []
+
+    async def send_text(text):
+        if delay:
+            await asyncio.sleep(delay)
+        sent.append(text)
+
+    ws.send_text = AsyncMock(side_effect=send_text)
+    ws.sent = sent
+    return ws
+
+
+def _queue(ws, *, max_frames=4, send_timeout=1.0):
+    failures = []
+
+    async def on_failure(queue, reason):
+        failures.append(reason)
+
+    queue = ClientSendQueue(ws, "c1", max_frames=max_frames, send_timeout=send_timeout, on_failure=on_failure)
+    return queue, failures
+
+
+def test_overflow_policy_by_message_type():
+    assert overflow_policy(MessageType.SPRITE_DRAG_PREVIEW) is OverflowPolicy.DROP_OLDEST
+    assert overflow_policy(MessageType.SPRITE_ROTATE_PREVIEW) is OverflowPolicy.DROP_OLDEST
+    assert overflow_policy(MessageType.SPRITE_MOVE) is OverflowPolicy.DISCONNECT
+
+
+async def test_frames_are_sent_in_order():
+    ws = _ws()
+    queue, _ = _queue(ws)
+    for text in ("a", "b", "c"):
+        assert queue.put(text)
+    assert await queue.deliver("d")
+    assert ws.sent == ["a", "b", "c", "d"]
+    queue.close()
+
+
+async def test_full_queue_drops_oldest_preview():
+    ws = _ws()
+    queue, failures = _queue(ws, max_frames=2)
+    queue.put("move", OverflowPolicy.DISCONNECT)
+    queue.put("p1", OverflowPolicy.DROP_OLDEST)
+    assert queue.put("p2", OverflowPolicy.DROP_OLDEST)
+    await queue.flush(1)
+    assert ws.sent == ["move", "p2"]
+    assert queue.dropped == 1
+    assert failures == []
+    queue.close()
+
+
+async def test_preview_is_dropped_when_nothing_droppable_is_queued():
+    ws = _ws()
+    queue, failures = _queue(ws, max_frames=1)
+    queue.put("move", OverflowPolicy.DISCONNECT)
+    assert not queue.put("p1", OverflowPolicy.DROP_OLDEST)
+    await queue.flush(1)
+    assert ws.sent == ["move"]
+    assert failures == []
+    queue.close()
+
+
+async def test_critical_overflow_disconnects():
+    ws = _ws()
+    queue, failures = _queue(ws, max_frames=1)
+    queue.put("a")
+    assert not queue.put("b")
+    await queue.flush(1)
+    assert failures == ["overflow"]
+    assert queue.closed
+    assert ws.sent == []
+
+
+async def test_send_timeout_reports_failure():
+    queue, failures = _queue(_ws(delay=0.5), send_timeout=0.01)
+    assert not await queue.deliver("a")
+    await queue.flush(1)
+    assert failures == ["timeout"]
+
+
+def _service():
+    from service.game_session_protocol import GameSessionProtocolService
+    with patch("service.game_session_protocol.TableManager"), \
+         patch("service.game_session_protocol.ServerProtocol"), \
+         patch("service.game_session_protocol.get_server_asset_manager"):
+        svc = GameSessionProtocolService.__new__(GameSessionProtocolService)
+        svc.session_code = "TST"
+        svc.clients = {}
+        svc.client_info = {}
+        svc.websocket_to_client = {}
+        svc.send_queues = {}
+        svc.db_session = None
+        svc.game_session_db_id = None
+        return svc
+
+
+async def test_broadcast_encodes_once_for_all_clients():
+    svc = _service()
+    for i in range(5):
+        svc.clients[f"c{i}"] = _ws()
+    message = Message(MessageType.PING, {})
+    with patch.object(Message, "encode", autospec=True, return_value='{"type":"ping"}') as encode:
+        await svc.broadcast_to_session(message)
+        await svc.flush_sends()
+    assert encode.call_count == 1
+    assert all(ws.sent == ['{"type":"ping"}'] for ws in svc.clients.values())
+
+
+async def test_slow_client_does_not_delay_others():
+    svc = _service()
+    slow, fast = _ws(delay=0.3), _ws()
+    svc.clients = {"slow": slow, "fast": fast}
+    start = asyncio.get_running_loop().time()
+    await svc.broadcast_to_session(Message(MessageType.PING, {}))
+    await svc.send_queues["fast"].flush(1)
+    assert asyncio.get_running_loop().time() - start < 0.1
+    assert len(fast.sent) == 1 and slow.sent == []
+    await svc.flush_sends()
+    assert len(slow.sent) == 1
+
+
+async def test_broadcast_encodes_once_per_codec(monkeypatch):
+    svc = _service()
+    svc.clients = {"j1": _ws(), "j2": _ws(), "m1": _ws(), "m2": _ws()}
+    for cid in svc.clients:
+        svc.client_info[cid] = {"codec": "msgpack" if cid.startswith("m") else "json"}
+    encoded = []
+    original = Message.encode
+
+    def encode(self, codec=None):
+        encoded.append(codec.name)
+        return original(self, codec)
+
+    monkeypatch.setattr(Message, "encode", encode)
+    await svc.broadcast_to_session(Message(MessageType.PING, {"n": 1}))
+    await svc.flush_sends()
+    assert sorted(encoded) == ["json", "msgpack"]
+    assert isinstance(svc.clients["j1"].sent[0], str)
+    m1 = svc.clients["m1"]
+    assert m1.sent == [] and m1.send_bytes.await_count == 1
+    assert Message.decode(m1.send_bytes.await_args.args[0], get_codec("msgpack")).data == {"n": 1}
@@ -0,0 +1,202 @@
+"""
+Tests for line-of-sight filtering of token broadcasts: players behind walls
+do not receive sprite creations, DMs always do, and held-back creations are
+delivered once the player's tokens can see the sprite. Resumed clients get
+missed broadcasts through the same check.
+"""
+from collections import defaultdict
+
+import pytest
+from core_table.entities import Wall
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from service.protocol.table_deltas import TableDeltaLog
+from service.server_protocol import ServerProtocol
+
+
+class _Session:
+    def __init__(self):
+        self.client_info = {
+            'dm': {'role': 'owner', 'user_id': 99},
+            'p1': {'role': 'player', 'user_id': 1},
+            'p2': {'role': 'player', 'user_id': 2},
+        }
+        self.clients = dict.fromkeys(self.client_info)
+        self.received = defaultdict(list)
+
+    async def broadcast_to_session(self, message, exclude_client=None):
+        for cid in self.clients:
+            if cid != exclude_client:
+                self.received[cid].append(message)
+
+    async def broadcast_filtered(self, message, layer, exclude_client=None, can_see=None):
+        for cid in self.clients:
+            if cid != exclude_client and (can_see is None or can_see(cid)):
+                self.received[cid].append(message)
+
+    def creations(self, cid):
+        return [m.data['sprite_id'] for m in self.received[cid]
+                if m.type == MessageType.SPRITE_UPDATE and m.data.get('operation') == 'create']
+
+
+@pytest.fixture
+def env():
+    manager = TableManager()
+    table = manager.create_table('Crypt', 2000, 2000)
+    table.dynamic_lighting_enabled = True
+    table.add_wall(Wall(str(table.table_id), 600, 0, 600, 2000, wall_type='normal', is_door=True))
+    session = _Session()
+
+    async def transport(message, client_id):
+        session.received[client_id].append(message)
+
+    proto = ServerProtocol(manager, session_manager=session, transport_send=transport)
+    hero = table.add_entity({'name': 'hero', 'x': 375, 'y': 475, 'layer': 'tokens', 'width': 50, 'height': 50,
+                             'controlled_by': [1], 'vision_radius': 300})
+    table.add_entity({'name': 'scout', 'x': 900, 'y': 475, 'layer': 'tokens', 'width': 50, 'height': 50,
+                      'controlled_by': [2], 'vision_radius': 300})
+    return proto, table, session, hero
+
+
+async def _create(proto, table, x, y, layer='tokens'):
+    goblin = table.add_entity({'name': 'goblin', 'x': x, 'y': y, 'layer': layer, 'width': 50, 'height': 50})
+    await proto.broadcast_filtered(Message(MessageType.SPRITE_UPDATE, {
+        'sprite_id': goblin.sprite_id, 'operation': 'create',
+        'sprite_data': goblin.to_dict(), 'table_id': str(table.table_id),
+    }), layer, 'dm')
+    return goblin
+
+
+async def _move(proto, table, entity, x, y):
+    table.move_entity(entity.entity_id, (x, y))
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': entity.sprite_id, 'table_id': str(table.table_id), 'to': {'x': x, 'y': y},
+    }), 'p1')
+
+
+async def test_creation_reaches_only_players_who_can_see_it(env):
+    proto, table, session, _ = env
+    goblin = await _create(proto, table, 700, 475)
+    assert session.creations('p2') == [goblin.sprite_id]
+    assert session.creations('p1') == []
+
+
+async def test_withheld_creation_is_sent_when_the_player_comes_into_view(env):
+    proto, table, session, hero = env
+    goblin = await _create(proto, table, 700, 475)
+    table.move_entity(goblin.entity_id, (720, 500))
+
+    await _move(proto, table, hero, 400, 475)  # still behind the wall
+    assert session.creations('p1') == []
+
+    wall_id = next(iter(table.walls))
+    table.update_wall(wall_id, {'door_state': 'open'})
+    await proto.broadcast_to_session(Message(MessageType.WALL_DATA, {'table_id': str(table.table_id)}), 'dm')
+    revealed = [m for m in session.received['p1'] if m.type == MessageType.SPRITE_UPDATE]
+    assert [m.data['sprite_id'] for m in revealed] == [goblin.sprite_id]
+    assert revealed[0].data['sprite_data']['position'] == [720, 500]
+
+    # Delivered once only
+    await _move(proto, table, hero, 410, 475)
+    assert session.creations('p1') == [goblin.sprite_id]
+
+
+async def test_turning_lighting_off_releases_everything(env):
+    proto, table, session, _ = env
+    goblin = await _create(proto, table, 1500, 1500)
+    assert session.creations('p1') == session.creations('p2') == []
+    table.dynamic_lighting_enabled = False
+    await proto.broadcast_to_session(Message(MessageType.TABLE_SETTINGS_CHANGED, {'table_id': str(table.table_id)}))
+    assert session.creations('p1') == session.creations('p2') == [goblin.sprite_id]
+
+
+async def test_removed_sprites_are_forgotten(env):
+    proto, table, session, hero = env
+    goblin = await _create(proto, table, 700, 475)
+    table.remove_entity(goblin.entity_id)
+    await _move(proto, table, hero, 650, 475)
+    assert session.creations('p1') == []
+    assert not proto.sight.has_withheld(str(table.table_id))
+
+
+async def test_hidden_token_moves_and_removal_reach_only_players_who_can_see_it(env):
+    proto, table, session, _ = env
+    goblin = await _create(proto, table, 700, 475)
+    table.move_entity(goblin.entity_id, (720, 500))
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': goblin.sprite_id, 'table_id': str(table.table_id), 'to': {'x': 720, 'y': 500},
+    }), 'dm')
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_DRAG_PREVIEW, {
+        'sprite_id': goblin.sprite_id, 'table_id': str(table.table_id), 'x': 730, 'y': 500,
+    }), 'dm')
+    table.remove_entity(goblin.entity_id)
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_REMOVE, {
+        'sprite_id': goblin.sprite_id, 'table_id': str(table.table_id), 'operation': 'remove',
+    }), 'dm')
+
+    assert [m.type for m in session.received['p2'] if m.data.get('sprite_id') == goblin.sprite_id] == [
+        MessageType.SPRITE_UPDATE, MessageType.SPRITE_MOVE, MessageType.SPRITE_DRAG_PREVIEW, MessageType.SPRITE_REMOVE,
+    ]
+    assert session.received['p1'] == []
+
+
+async def test_other_layers_and_unlit_tables_are_not_filtered(env):
+    proto, table, session, _ = env
+    rubble = await _create(proto, table, 1500, 1500, layer='map')
+    assert session.creations('p1') == [rubble.sprite_id]
+    table.dynamic_lighting_enabled = False
+    goblin = await _create(proto, table, 1500, 1500)
+    assert session.creations('p1') == [rubble.sprite_id, goblin.sprite_id]
+
+
+async def test_resume_does_not_replay_what_the_player_cannot_see(env):
+    proto, table, session, hero = env
+    proto.table_deltas = TableDeltaLog(16)
+    table_id = str(table.table_id)
+
+    # p1 is disconnected while these happen
+    goblin = await _create(proto, table, 700, 475)
+    table.move_entity(goblin.entity_id, (720, 500))
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': goblin.sprite_id, 'table_id': table_id, 'to': {'x': 720, 'y': 500},
+    }), 'dm')
+    rubble = await _create(proto, table, 1500, 1500, layer='map')
+
+    resume = {'table_id': table_id, 'since_seq': 0, 'table_epoch': proto.table_deltas.epoch}
+    player = await proto.handle_table_resume(Message(MessageType.TABLE_RESUME, resume), 'p1')
+    dm = await proto.handle_table_resume(Message(MessageType.TABLE_RESUME, resume), 'dm')
+    assert [m['data']['sprite_id'] for m in player.data['messages']] == [rubble.sprite_id]
+    assert [m['data']['sprite_id'] for m in dm.data['messages']] == [goblin.sprite_id, goblin.sprite_id, rubble.sprite_id]
+
+    # The creation skipped on resume is held back like a live one
+    session.received['p1'].clear()
+    table.update_wall(next(iter(table.walls)), {'door_state': 'open'})
+    await _move(proto, table, hero, 400, 475)
+    assert session.creations('p1') == [goblin.sprite_id]
+
+
+async def test_live_and_resumed_deliveries_match(env):
+    proto, table, session, hero = env
+    proto.table_deltas = TableDeltaLog(16)
+    table_id = str(table.table_id)
+
+    goblin = await _create(proto, table, 700, 475)
+    table.move_entity(goblin.entity_id, (720, 500))
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': goblin.sprite_id, 'table_id': table_id, 'to': {'x': 720, 'y': 500},
+    }), 'dm')
+    await _create(proto, table, 1500, 1500, layer='map')
+    table.move_entity(hero.entity_id, (380, 475))
+    await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': hero.sprite_id, 'table_id': table_id, 'to': {'x': 380, 'y': 475},
+    }), 'dm')
+
+    resume = {'table_id': table_id, 'since_seq': 0, 'table_epoch': proto.table_deltas.epoch}
+    delivered = {}
+    for client_id in ('p1', 'p2'):
+        live = [m.data['table_seq'] for m in session.received[client_id] if 'table_seq' in m.data]
+        resumed = await proto.handle_table_resume(Message(MessageType.TABLE_RESUME, resume), client_id)
+        assert [m['data']['table_seq'] for m in resumed.data['messages']] == live
+        delivered[client_id] = live
+    # p1 sees only its own token and the map; p2 sees the goblin but not p1's token
+    assert delivered == {'p1': [3, 4], 'p2': [1, 2, 3]}
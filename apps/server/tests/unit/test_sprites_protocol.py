@@ -387,6 +387,28 @@ class TestSpritePreviewHandlers:
         await proto.handle_sprite_rotate_preview(msg, "c1")
         assert broadcasts[0].type == MessageType.SPRITE_ROTATE_PREVIEW
 
+    async def test_previews_go_through_coalescer_and_commit_discards_pending(self):
+        from service.preview_coalescer import PreviewCoalescer
+
+        proto = _ProtoStub(role="owner")
+        broadcasts = []
+        proto.broadcast_to_session = AsyncMock(side_effect=lambda m, c: broadcasts.append(m))
+        proto.preview_coalescer = PreviewCoalescer(proto.broadcast_to_session, interval=60)
+        for x in (1.0, 2.0, 3.0):
+            msg = Message(MessageType.SPRITE_DRAG_PREVIEW, {"id": "sp-1", "x": x, "y": 0.0})
+            await proto.handle_sprite_drag_preview(msg, "c1")
+        assert [m.data["x"] for m in broadcasts] == [1.0]
+        assert len(proto.preview_coalescer) == 1
+
+        proto.actions.move_sprite = AsyncMock(return_value=_ok_result())
+        await proto.handle_move_sprite(Message(MessageType.SPRITE_MOVE, {
+            "table_id": "t1", "sprite_id": "sp-1", "from": {"x": 0, "y": 0}, "to": {"x": 3, "y": 0},
+            "table_edit_override": True,
+        }), "c1")
+        assert len(proto.preview_coalescer) == 0
+        assert broadcasts[-1].type == MessageType.SPRITE_MOVE
+        proto.preview_coalescer.close()
+
     async def test_player_without_ownership_drag_preview_is_silent(self):
         proto = _ProtoStub(role="player")
         proto._can_control_sprite = AsyncMock(return_value=False)
@@ -0,0 +1,160 @@
+"""
+Tests for per-table sequence numbers and TABLE_RESUME: stamping, replay of
+missed deltas, snapshot fallback, layer filtering, and the bytes a
+reconnecting client receives with and without resume.
+"""
+import json
+
+import pytest
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from service.protocol.table_deltas import TableDeltaLog
+from service.server_protocol import ServerProtocol
+from sqlalchemy.orm import sessionmaker
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, text):
+        self.frames.append(text)
+
+    @property
+    def bytes_received(self):
+        return sum(len(frame.encode()) for frame in self.frames)
+
+    def last(self):
+        return json.loads(self.frames[-1])
+
+
+class _Session:
+    def __init__(self):
+        self.broadcasts = []
+
+    async def broadcast_to_session(self, message, exclude_client=None):
+        self.broadcasts.append(message)
+
+    async def broadcast_filtered(self, message, layer, exclude_client=None):
+        self.broadcasts.append(message)
+
+
+@pytest.fixture
+def env(test_db_engine, monkeypatch):
+    monkeypatch.setattr('database.database.SessionLocal', sessionmaker(bind=test_db_engine))
+    manager = TableManager()
+    table = manager.create_table('Keep', 40, 40)
+    for i in range(200):
+        table.add_entity({'name': f'goblin {i}', 'x': i % 40, 'y': i // 40, 'layer': 'tokens'})
+    sockets = {}
+
+    async def transport(message, client_id):
+        await sockets[client_id].send_text(message.to_json())
+
+    proto = ServerProtocol(manager, session_manager=_Session(), transport_send=transport, delta_ring_size=8)
+    roles = {'dm': 'owner'}
+    monkeypatch.setattr(proto, '_get_client_role', lambda cid: roles.get(cid, 'player'))
+    monkeypatch.setattr(proto, '_get_user_id', lambda msg, cid=None: 1)
+
+    async def no_hashes(table_data, session_code, user_id):
+        return table_data
+
+    monkeypatch.setattr(proto, 'add_asset_hashes_to_table', no_hashes)
+
+    async def move(msg, client_id):
+        await proto.broadcast_to_session(Message(MessageType.SPRITE_MOVE, dict(msg.data)), client_id)
+        return None
+
+    proto.register_handler(MessageType.SPRITE_MOVE, move)
+    return proto, str(table.table_id), sockets
+
+
+async def _connect(proto, sockets, client_id, msg):
+    sockets[client_id] = _FakeWebSocket()
+    await proto.handle_client(msg, client_id)
+    return sockets[client_id]
+
+
+async def _moves(proto, table_id, count):
+    for i in range(count):
+        await proto.handle_client(Message(MessageType.SPRITE_MOVE, {
+            'table_id': table_id, 'sprite_id': f's{i}', 'to': {'x': i, 'y': i},
+        }), 'other')
+
+
+async def test_resume_sends_only_missed_deltas_and_far_fewer_bytes(env):
+    proto, table_id, sockets = env
+    joined = (await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_REQUEST, {'table_id': table_id}))).last()
+    assert joined['data']['table_seq'] == 0
+    await _moves(proto, table_id, 5)
+
+    full = await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_REQUEST, {'table_id': table_id}))
+    resumed = await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_RESUME, {
+        'table_id': table_id, 'since_seq': 0, 'table_epoch': joined['data']['table_epoch'],
+    }))
+
+    reply = resumed.last()
+    assert reply['type'] == MessageType.TABLE_RESUME_RESPONSE.value
+    assert reply['data']['table_seq'] == 5
+    assert [m['data']['table_seq'] for m in reply['data']['messages']] == [1, 2, 3, 4, 5]
+    assert full.last()['data']['table_seq'] == 5
+    assert resumed.bytes_received * 10 < full.bytes_received
+
+
+async def test_up_to_date_client_gets_empty_resume(env):
+    proto, table_id, sockets = env
+    await _moves(proto, table_id, 2)
+    reply = (await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_RESUME, {
+        'table_id': table_id, 'since_seq': 2, 'table_epoch': proto.table_deltas.epoch,
+    }))).last()
+    assert reply['type'] == MessageType.TABLE_RESUME_RESPONSE.value
+    assert reply['data']['messages'] == []
+
+
+@pytest.mark.parametrize('since_seq, epoch', [(1, None), (0, 'stale-epoch'), (99, None), ('3', None)])
+async def test_overrun_or_foreign_sequence_falls_back_to_snapshot(env, since_seq, epoch):
+    proto, table_id, sockets = env
+    await _moves(proto, table_id, 12)  # ring holds 8
+    reply = (await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_RESUME, {
+        'table_id': table_id, 'since_seq': since_seq, 'table_epoch': epoch or proto.table_deltas.epoch,
+    }))).last()
+    assert reply['type'] == MessageType.TABLE_RESPONSE.value
+    assert reply['data']['table_seq'] == 12
+
+
+async def test_resume_hides_layers_the_role_cannot_see(env):
+    proto, table_id, sockets = env
+    await proto.broadcast_filtered(Message(MessageType.SPRITE_UPDATE, {
+        'table_id': table_id, 'sprite_id': 'trap', 'operation': 'create',
+    }), 'dungeon_master', 'dm')
+    await _moves(proto, table_id, 1)
+    resume = {'table_id': table_id, 'since_seq': 0, 'table_epoch': proto.table_deltas.epoch}
+
+    player = (await _connect(proto, sockets, 'c1', Message(MessageType.TABLE_RESUME, resume))).last()
+    dm = (await _connect(proto, sockets, 'dm', Message(MessageType.TABLE_RESUME, resume))).last()
+    assert [m['data']['table_seq'] for m in player['data']['messages']] == [2]
+    assert [m['data']['table_seq'] for m in dm['data']['messages']] == [1, 2]
+
+
+async def test_batched_broadcasts_are_stamped_once(env):
+    proto, table_id, _ = env
+    await proto.handle_batch(Message(MessageType.BATCH, {'messages': [
+        {'type': MessageType.SPRITE_MOVE.value, 'data': {'table_id': table_id, 'sprite_id': 'a'}},
+        {'type': MessageType.SPRITE_MOVE.value, 'data': {'table_id': table_id, 'sprite_id': 'b'}},
+    ]}), 'c1')
+    assert proto.table_deltas.seq(table_id) == 2
+    merged = proto.session_manager.broadcasts[-1]
+    assert sorted(m['data']['table_seq'] for m in merged.data['messages']) == [1, 2]
+
+
+def test_log_ignores_non_table_messages_and_counts_per_table():
+    log = TableDeltaLog(4)
+    assert log.record(Message(MessageType.CHAT, {'table_id': 't1'})) is None
+    assert log.record(Message(MessageType.SPRITE_DRAG_PREVIEW, {'table_id': 't1'})) is None
+    assert log.record(Message(MessageType.SPRITE_UPDATE, {'sprite_id': 's'})) is None
+    assert log.record(Message(MessageType.WALL_DATA, {'table_id': 't1'})) == 1
+    assert log.record(Message(MessageType.WALL_DATA, {'table_id': 't2'})) == 1
+    assert log.record(Message(MessageType.PAINT_STROKE_CLEAR, {'table_id': 't1'})) == 2
+    log.forget('t1')
+    assert log.since('t1', 1, log.epoch) is None
+    assert log.record(Message(MessageType.WALL_DATA, {'table_id': 't1'})) == 3
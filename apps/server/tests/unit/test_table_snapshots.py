@@ -0,0 +1,175 @@
+"""
+Tests for cached table join snapshots: one build per (table, version, role),
+shared in-flight builds, invalidation on table changes, and per-user asset hashes.
+"""
+import asyncio
+
+import pytest
+from core_table.protocol import Message, MessageType
+from core_table.server import TableManager
+from service.protocol.table_snapshots import TableSnapshotCache
+from service.server_protocol import ServerProtocol
+from sqlalchemy.orm import sessionmaker
+
+
+def _builder(calls, delay=0.0):
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {'n': len(calls)}
+    return build
+
+
+async def test_cache_hit_until_table_invalidated():
+    cache, calls = TableSnapshotCache(), []
+    assert await cache.get('t1', 'player', _builder(calls)) == {'n': 1}
+    assert await cache.get('t1', 'player', _builder(calls)) == {'n': 1}
+    await cache.get('t1', 'owner', _builder(calls))
+    assert len(calls) == 2
+
+    cache.invalidate('t2')  # unknown id: everything goes
+    assert len(cache) == 0
+    await cache.get('t1', 'player', _builder(calls))
+    await cache.get('t2', 'player', _builder(calls))
+    cache.invalidate('t2')
+    assert await cache.get('t1', 'player', _builder(calls)) == {'n': 3}
+    assert cache.counters == {'hit': 2, 'shared': 0, 'miss': 4}
+
+
+async def test_concurrent_requests_share_one_build():
+    cache, calls = TableSnapshotCache(), []
+    results = await asyncio.gather(*(cache.get('t1', 'player', _builder(calls, 0.01)) for _ in range(20)))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.counters['shared'] == 19
+
+
+async def test_snapshot_built_across_a_change_is_not_kept():
+    cache, calls = TableSnapshotCache(), []
+    task = asyncio.ensure_future(cache.get('t1', 'player', _builder(calls, 0.01)))
+    await asyncio.sleep(0)
+    cache.invalidate('t1')
+    await task
+    await cache.get('t1', 'player', _builder(calls))
+    assert len(calls) == 2
+
+
+async def test_failed_build_lets_waiters_build_again():
+    cache, calls = TableSnapshotCache(), []
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('db down')
+
+    first = asyncio.ensure_future(cache.get('t1', 'player', broken))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get('t1', 'player', _builder(calls)))
+    with pytest.raises(RuntimeError):
+        await first
+    assert await second == {'n': 1}
+
+
+@pytest.fixture
+def proto(test_db_engine, monkeypatch):
+    monkeypatch.setattr('database.database.SessionLocal', sessionmaker(bind=test_db_engine))
+    manager = TableManager()
+    table = manager.create_table('Crypt', 20, 20)
+    proto = ServerProtocol(manager)
+    roles = {'dm': 'owner'}
+    monkeypatch.setattr(proto, '_get_client_role', lambda cid: roles.get(cid, 'player'))
+    monkeypatch.setattr(proto, '_get_user_id', lambda msg, cid=None: 1)
+    builds = []
+    original = table.to_dict
+
+    def counting_to_dict():
+        builds.append(1)
+        return original()
+
+    monkeypatch.setattr(table, 'to_dict', counting_to_dict)
+
+    async def no_hashes(table_data, session_code, user_id):
+        return table_data
+
+    monkeypatch.setattr(proto, 'add_asset_hashes_to_table', no_hashes)
+    proto.test_table, proto.test_builds = table, builds
+    return proto
+
+
+def _join(table_id):
+    return Message(MessageType.TABLE_REQUEST, {'table_id': table_id})
+
+
+async def test_reconnect_storm_builds_each_role_once(proto):
+    table_id = str(proto.test_table.table_id)
+    responses = await asyncio.gather(*(
+        proto.handle_table_request(_join(table_id), f'c{i}') for i in range(20)
+    ), proto.handle_table_request(_join(table_id), 'dm'))
+
+    assert len(proto.test_builds) == 2
+    assert all(r.type == MessageType.TABLE_RESPONSE for r in responses)
+    assert [r.data['client_id'] for r in responses[:2]] == ['c0', 'c1']
+    assert 'dungeon_master' not in responses[0].data['table_data']['layers']
+    assert 'dungeon_master' in responses[-1].data['table_data']['layers']
+    assert responses[0].data['paint_strokes'] == [] and responses[0].data['layer_settings'] == {}
+
+
+async def test_mutating_handlers_invalidate_snapshots(proto):
+    table_id = str(proto.test_table.table_id)
+    handled = []
+
+    async def record(msg, client_id):
+        handled.append(msg.type)
+        return None
+
+    proto.register_handler(MessageType.SPRITE_MOVE, record)
+    proto.register_handler(MessageType.CHAT, record)
+    await proto.handle_table_request(_join(table_id), 'c1')
+
+    await proto.handle_client(Message(MessageType.CHAT, {'text': 'hi'}), 'c1')
+    await proto.handle_table_request(_join(table_id), 'c1')
+    assert len(proto.test_builds) == 1
+
+    await proto.handle_client(Message(MessageType.SPRITE_MOVE, {'table_id': table_id, 'sprite_id': 's'}), 'c1')
+    await proto.handle_table_request(_join(table_id), 'c1')
+    assert len(proto.test_builds) == 2
+
+    await proto.handle_batch(Message(MessageType.BATCH, {'messages': [
+        {'type': MessageType.SPRITE_MOVE.value, 'data': {'table_id': table_id, 'sprite_id': 's'}},
+    ]}), 'c1')
+    await proto.handle_table_request(_join(table_id), 'c1')
+    assert len(proto.test_builds) == 3
+
+
+async def test_asset_hashes_are_added_per_user_after_the_lookup(proto, monkeypatch):
+    table_id = str(proto.test_table.table_id)
+    proto.test_table.add_entity({'name': 'orc', 'x': 1, 'y': 1, 'layer': 'tokens'})
+    monkeypatch.setattr(proto, '_get_user_id', lambda msg, cid=None: {'c1': 1, 'c2': 2}.get(cid))
+
+    async def user_hashes(table_data, session_code, user_id):
+        for entity in table_data['layers']['tokens'].values():
+            entity['asset_xxhash'] = f'{session_code}-{user_id}'
+        return table_data
+
+    monkeypatch.setattr(proto, 'add_asset_hashes_to_table', user_hashes)
+    first = await proto.handle_table_request(Message(MessageType.TABLE_REQUEST, {'table_id': table_id, 'session_code': 's1'}), 'c1')
+    second = await proto.handle_table_request(Message(MessageType.TABLE_REQUEST, {'table_id': table_id, 'session_code': 's2'}), 'c2')
+
+    assert len(proto.test_builds) == 1
+    [orc] = first.data['table_data']['layers']['tokens'].values()
+    assert orc['asset_xxhash'] == 's1-1'
+    [orc] = second.data['table_data']['layers']['tokens'].values()
+    assert orc['asset_xxhash'] == 's2-2'
+
+
+async def test_changes_outside_protocol_handlers_invalidate_snapshots(proto):
+    table_id = str(proto.test_table.table_id)
+    await proto.handle_table_request(_join(table_id), 'c1')
+
+    # As a REST route or service would: straight on the table, no handler dispatch
+    proto.test_table.add_entity({'name': 'orc', 'x': 2, 'y': 2, 'layer': 'tokens'})
+    response = await proto.handle_table_request(_join(table_id), 'c1')
+    assert len(proto.test_builds) == 2
+    assert [e['name'] for e in response.data['table_data']['layers']['tokens'].values()] == ['orc']
+
+    await proto.handle_table_request(_join(table_id), 'c1')
+    assert len(proto.test_builds) == 2
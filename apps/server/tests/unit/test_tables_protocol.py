@@ -403,6 +403,39 @@ class TestTableUpdate:
         assert "no longer supported" in resp.data["error"]
         proto.actions.update_sprite.assert_not_awaited()
 
+    async def test_fog_edit_broadcasts_canonical_fog(self):
+        from core_table.actions_core import ActionsCore
+        from core_table.server import TableManager
+
+        manager = TableManager()
+        table = manager.create_table("Fog", 20, 20)
+        table_id = str(table.table_id)
+        proto = _ProtoStub()
+        proto.actions = ActionsCore(manager)
+        proto.broadcast_to_session = AsyncMock()
+
+        async def fog(update_type, hide, reveal):
+            return await proto.handle_table_update(Message(MessageType.TABLE_UPDATE, {
+                "category": "table",
+                "type": update_type,
+                "data": {"table_id": table_id, "hide_rectangles": hide, "reveal_rectangles": reveal},
+            }), "c1")
+
+        await fog("fog_update", [[[0, 0], [100, 100]]], [])
+        resp = await fog("fog_edit", [], [[[0, 0], [50, 100]]])
+        assert resp.type == MessageType.SUCCESS
+        assert resp.data["fog_version"] == 2
+
+        sent = proto.broadcast_to_session.await_args.kwargs["message"].data["data"]
+        assert sent["hide_rectangles"] == [((50, 0), (100, 100))]
+        assert sent["reveal_rectangles"] == []
+        assert sent["fog_version"] == 2 and "fog_diff" not in sent
+        assert not table.entities
+
+        # Revealing already clear ground changes nothing and is not broadcast
+        await fog("fog_edit", [], [[[0, 0], [10, 10]]])
+        assert proto.broadcast_to_session.await_count == 2
+
 
 # ---------------------------------------------------------------------------
 # handle_table_scale
@@ -0,0 +1,105 @@
+import io
+
+import pytest
+import xxhash
+from PIL import Image
+from service import upload_verifier
+from service.upload_verifier import ImageHeaderError, ImageHeaderSniffer, verify_image_stream
+
+
+def _encode(fmt, size=(317, 203), mode="RGB", **options):
+    buffer = io.BytesIO()
+    Image.new(mode, size, "teal").save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _chunks(data, size):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("fmt, mode, options", [
+    ("PNG", "RGBA", {}),
+    ("PNG", "P", {"icc_profile": bytes(3000)}),
+    ("JPEG", "RGB", {}),
+    ("JPEG", "L", {"progressive": True}),
+    ("GIF", "P", {}),
+    ("BMP", "RGB", {}),
+    ("WEBP", "RGB", {"quality": 80}),
+    ("WEBP", "RGBA", {"lossless": True}),
+    ("WEBP", "RGBA", {"quality": 50}),
+])
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_header_hash_and_size_match_pillow(fmt, mode, options, chunk_size):
+    data = _encode(fmt, mode=mode, **options)
+
+    result = verify_image_stream(_chunks(data, chunk_size))
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert (result.header.format, result.header.width, result.header.height) == (image.format, *image.size)
+    assert result.xxhash == xxhash.xxh64(data).hexdigest()
+    assert result.size == len(data)
+
+
+def test_jpeg_segments_before_the_frame_header_are_skipped_not_buffered():
+    data = _encode("JPEG", size=(640, 480), exif=b"Exif\x00\x00" + bytes(60000))
+
+    sniffer = ImageHeaderSniffer(budget=1024)
+    header = None
+    for chunk in _chunks(data, 512):
+        header = sniffer.feed(chunk)
+        if header:
+            break
+
+    assert header is not None and (header.width, header.height) == (640, 480)
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"not really a png", "Unrecognized image format"),
+    (b"<svg xmlns='http://www.w3.org/2000/svg'/>", "Unrecognized image format"),
+    (_encode("PNG")[:-20], "truncated before IEND"),
+    (_encode("WEBP")[:-10], "RIFF size"),
+    (_encode("PNG")[:20], "truncated before its header"),
+    (b"\xff\xd8\xff\xe0" + b"\x00\x10JFIF" + bytes(10) + b"\xff\xda\x00\x08", "no frame header"),
+])
+def test_spoofed_and_truncated_images_are_rejected(data, message):
+    with pytest.raises(ImageHeaderError, match=message):
+        verify_image_stream(_chunks(data, 7))
+
+
+@pytest.mark.parametrize("fmt, message", [
+    ("PNG", "truncated before IEND"),
+    ("JPEG", "does not end with EOI"),
+    ("GIF", "does not end with its trailer"),
+    ("BMP", "BMP file size"),
+    ("WEBP", "RIFF size"),
+])
+def test_truncated_or_padded_images_are_rejected(fmt, message):
+    data = _encode(fmt, mode="P" if fmt == "GIF" else "RGB")
+
+    for damaged in (data[:len(data) // 2], data + bytes(16)):
+        with pytest.raises(ImageHeaderError, match=message):
+            verify_image_stream(_chunks(damaged, 4096))
+
+
+def test_header_must_appear_within_the_budget():
+    data = b"\xff\xd8" + b"\xff" * 200
+
+    with pytest.raises(ImageHeaderError, match="within 64 bytes"):
+        verify_image_stream(_chunks(data, 16), header_budget=64)
+
+
+def test_images_over_the_pixel_limit_are_rejected(monkeypatch):
+    monkeypatch.setattr(upload_verifier.Image, "MAX_IMAGE_PIXELS", 1000)
+
+    with pytest.raises(ImageHeaderError, match="pixel limit"):
+        verify_image_stream([_encode("PNG", size=(40, 30))])
+
+
+def test_storage_errors_propagate():
+    def failing_chunks():
+        yield _encode("PNG")[:100]
+        raise ValueError("R2 object exceeds inspection limit")
+
+    with pytest.raises(ValueError, match="inspection limit") as error:
+        verify_image_stream(failing_chunks())
+    assert not isinstance(error.value, ImageHeaderError)
@@ -39,6 +39,50 @@ WS_MESSAGE_DURATION = Histogram(
     "WebSocket message handling duration.",
     ("message_type",),
 )
+WS_INBOUND_STAGE_DURATION = Histogram(
+    "ttrpg_websocket_inbound_stage_seconds",
+    "Time spent per inbound WebSocket pipeline stage.",
+    ("stage",),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+WS_SEND_QUEUE_DEPTH = Gauge(
+    "ttrpg_websocket_send_queue_frames",
+    "Outbound WebSocket frames queued across all connections.",
+)
+WS_SEND_LATENCY = Histogram(
+    "ttrpg_websocket_send_latency_seconds",
+    "Time from queueing an outbound WebSocket frame to finishing its send.",
+)
+WS_SEND_OVERFLOWS = Counter(
+    "ttrpg_websocket_send_queue_overflows_total",
+    "Outbound WebSocket frames that found their connection's queue full.",
+    ("policy", "outcome"),
+)
+SPRITE_PREVIEWS = Counter(
+    "ttrpg_sprite_preview_messages_total",
+    "Sprite preview messages received, broadcast and superseded before broadcast.",
+    ("kind", "direction"),
+)
+TABLE_SNAPSHOTS = Counter(
+    "ttrpg_table_snapshot_requests_total",
+    "Table join snapshots served from cache, shared with an in-flight build, or built.",
+    ("outcome",),
+)
+COMBAT_VIEWS = Counter(
+    "ttrpg_combat_view_builds_total",
+    "Per-role combat views served from cache, built, or built uncached for an unversioned state.",
+    ("outcome",),
+)
+COVER_LOOKUPS = Counter(
+    "ttrpg_cover_lookups_total",
+    "Attacker/target cover tiers served from the cover cache or computed.",
+    ("outcome",),
+)
+COMPENDIUM_RESPONSES = Counter(
+    "ttrpg_compendium_responses_total",
+    "Compendium GET responses served from the encoded response cache, built, or answered 304.",
+    ("outcome",),
+)
 ASSET_OPERATIONS = Counter(
     "ttrpg_asset_operations_total",
     "Asset operation outcomes.",
@@ -122,6 +166,20 @@ OBSERVABILITY_EXPORTER_CONFIGURED = Gauge(
     "Whether an observability exporter is configured.",
     ("exporter",),
 )
+PERSISTENCE_QUEUE_DEPTH = Gauge(
+    "ttrpg_persistence_queue_depth",
+    "Write-behind persistence intents queued or running.",
+)
+PERSISTENCE_INTENTS = Counter(
+    "ttrpg_persistence_intents_total",
+    "Write-behind persistence intent outcomes.",
+    ("operation", "outcome"),
+)
+PERSISTENCE_WRITE_DURATION = Histogram(
+    "ttrpg_persistence_write_duration_seconds",
+    "Time a write-behind persistence operation spent on its worker thread.",
+    ("operation",),
+)
 METRIC_REFRESHES = Counter(
     "ttrpg_metric_refreshes_total",
     "Durable metric refresh outcomes.",
@@ -147,6 +205,8 @@ _JOB_NAMES = {
     "rate_limit_cleanup", "audit_retention", "chat_retention", "r2_smoke",
     "r2_orphan_audit", "migration", "unknown",
 }
+_PERSISTENCE_OPERATIONS = {"session.save", "combat.upsert", "chat.insert", "unknown"}
+_PERSISTENCE_OUTCOMES = {"queued", "coalesced", "rejected", "success", "error", "replayed"}
 
 
 def _message_type(value: Any) -> str:
@@ -190,6 +250,49 @@ def record_ws_message(direction: str, message_type: Any, outcome: str, duration:
         WS_MESSAGE_DURATION.labels(type_label).observe(duration)
 
 
+def record_ws_inbound_stage(stage: str, duration: float) -> None:
+    WS_INBOUND_STAGE_DURATION.labels(
+        stage if stage in {"decode", "authorize", "dispatch"} else "dispatch"
+    ).observe(max(duration, 0.0))
+
+
+def record_ws_send(latency: float) -> None:
+    WS_SEND_LATENCY.observe(max(latency, 0.0))
+
+
+def record_ws_send_overflow(policy: str, outcome: str) -> None:
+    WS_SEND_OVERFLOWS.labels(
+        policy if policy in {"drop_oldest", "disconnect"} else "disconnect",
+        outcome if outcome in {"dropped", "disconnected"} else "disconnected",
+    ).inc()
+
+
+def record_preview(kind: str, direction: str) -> None:
+    SPRITE_PREVIEWS.labels(
+        kind if kind in {"drag", "resize", "rotate"} else "other",
+        direction if direction in {"in", "out", "dropped"} else "other",
+    ).inc()
+
+
+def record_table_snapshot(outcome: str) -> None:
+    TABLE_SNAPSHOTS.labels(outcome if outcome in {"hit", "shared", "miss"} else "other").inc()
+
+
+def record_combat_view(outcome: str) -> None:
+    COMBAT_VIEWS.labels(outcome if outcome in {"hit", "miss", "uncached"} else "other").inc()
+
+
+def record_cover_lookups(hits: int, misses: int) -> None:
+    if hits:
+        COVER_LOOKUPS.labels("hit").inc(hits)
+    if misses:
+        COVER_LOOKUPS.labels("miss").inc(misses)
+
+
+def record_compendium_response(outcome: str) -> None:
+    COMPENDIUM_RESPONSES.labels(outcome if outcome in {"hit", "miss", "not_modified"} else "other").inc()
+
+
 def track_asset_operation(operation: str) -> Callable:
     """Measure an async asset boundary without asset/user/session label cardinality."""
     def decorator(func: Callable) -> Callable:
@@ -241,6 +344,23 @@ def record_job(job: str, outcome: str, duration: float) -> None:
         BACKGROUND_JOB_LAST_SUCCESS.labels(job_label).set(time.time())
 
 
+def record_persistence(operation: str, outcome: str) -> None:
+    PERSISTENCE_INTENTS.labels(
+        operation if operation in _PERSISTENCE_OPERATIONS else "unknown",
+        outcome if outcome in _PERSISTENCE_OUTCOMES else "error",
+    ).inc()
+
+
+def observe_persistence_write(operation: str, duration: float) -> None:
+    PERSISTENCE_WRITE_DURATION.labels(
+        operation if operation in _PERSISTENCE_OPERATIONS else "unknown",
+    ).observe(max(duration, 0.0))
+
+
+def set_persistence_queue_depth(depth: int) -> None:
+    PERSISTENCE_QUEUE_DEPTH.set(depth)
+
+
 def _database_operation(statement: str) -> str:
     token = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
     if token in {"create", "alter", "drop"}:
@@ -97,6 +97,8 @@ export const MessageType = {
   STATE_SYNC_RESPONSE: "state_sync_response",
   COMBAT_STATE: "combat_state",
   COMBAT_STATE_REQUEST: "combat_state_request",
+  COMBAT_LOG_REQUEST: "combat_log_request",
+  COMBAT_LOG_RESPONSE: "combat_log_response",
   INITIATIVE_ROLL_RESULT: "initiative_roll_result",
   INITIATIVE_ORDER: "initiative_order",
   TURN_START: "turn_start",
@@ -169,6 +171,8 @@ export const MessageType = {
   BATCH: "batch",
   TABLE_SETTINGS_UPDATE: "table_settings_update",
   TABLE_SETTINGS_CHANGED: "table_settings_changed",
+  TABLE_RESUME: "table_resume",
+  TABLE_RESUME_RESPONSE: "table_resume_response",
   WALL_CREATE: "wall_create",
   WALL_UPDATE: "wall_update",
   WALL_REMOVE: "wall_remove",
@@ -286,6 +290,8 @@ export const MESSAGE_TYPE_VALUES = [
   "state_sync_response",
   "combat_state",
   "combat_state_request",
+  "combat_log_request",
+  "combat_log_response",
   "initiative_roll_result",
   "initiative_order",
   "turn_start",
@@ -358,6 +364,8 @@ export const MESSAGE_TYPE_VALUES = [
   "batch",
   "table_settings_update",
   "table_settings_changed",
+  "table_resume",
+  "table_resume_response",
   "wall_create",
   "wall_update",
   "wall_remove",
@@ -6,6 +6,7 @@ import typing
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from .async_actions_protocol import LAYERS, ActionResult, AsyncActionsProtocol, Position
+from .fog import HIDE_TEXTURE, REVEAL_TEXTURE, FogRegion
 from .table import VirtualTable
 
 if typing.TYPE_CHECKING:
@@ -102,7 +103,7 @@ class ActionsCore(AsyncActionsProtocol):
 
                 # Perform the actual save
                 logger.debug(f"Performing delayed save for table_id={table_id}, session_id={session_id}, last_operation={last_operation}")
-                self.table_manager.save_table(table_id, session_id=session_id)
+                self.table_manager.schedule_save(table_id, session_id=session_id)
                 logger.info(f"Saved table '{table_id}' to database (delayed after {last_operation})")
 
         except asyncio.CancelledError:
@@ -272,11 +273,9 @@ class ActionsCore(AsyncActionsProtocol):
     async def get_table(self, table_id: str, **kwargs) -> ActionResult:
         """Get table properties"""
         try:
-            logger.debug(f"all table_manager.tables: {self.table_manager.tables.items()}")
             table = await self._get_table(table_id)
             if not table:
                 return ActionResult(False, f"Table {table_id} not found")
-            logger.debug(f"all entities: {table.to_dict()}")
             return ActionResult(True, f"Table {table_id} retrieved successfully", {'table': table})
         except Exception as e:
             return ActionResult(False, f"Failed to get table: {str(e)}")
@@ -593,6 +592,8 @@ class ActionsCore(AsyncActionsProtocol):
                     setattr(entity, key, value)
                 else:
                     logger.warning(f"update_sprite: Entity does NOT have attribute '{key}' - skipping!")
+            if hasattr(table, 'touch_entity'):
+                table.touch_entity(entity)
 
             # Persist the update to database
             await self._persist_table_state(table, "sprite update", session_id)
@@ -895,7 +896,7 @@ class ActionsCore(AsyncActionsProtocol):
 
             for check_layer in layers_to_check:
                 if check_layer in table.grid:
-                    entity_id = table.grid[check_layer][grid_y][grid_x]
+                    entity_id = table.grid[check_layer].get(grid_x, grid_y)
                     if entity_id is not None:
                         entity = table.entities.get(entity_id)
                         if entity:
@@ -919,31 +920,14 @@ class ActionsCore(AsyncActionsProtocol):
 
             sprites_in_area = {}
 
-            # Convert positions to grid coordinates
-            start_x, start_y = int(top_left.x), int(top_left.y)
-            end_x, end_y = int(bottom_right.x), int(bottom_right.y)
-
-            # Ensure coordinates are within bounds
-            start_x = max(0, min(start_x, table.width - 1))
-            start_y = max(0, min(start_y, table.height - 1))
-            end_x = max(0, min(end_x, table.width - 1))
-            end_y = max(0, min(end_y, table.height - 1))
-
-            # Check each position in the area
-            for y in range(start_y, end_y + 1):
-                for x in range(start_x, end_x + 1):
-                    layers_to_check = [layer] if layer else table.layers
-
-                    for check_layer in layers_to_check:
-                        if check_layer in table.grid:
-                            entity_id = table.grid[check_layer][y][x]
-                            if entity_id is not None:
-                                entity = table.entities.get(entity_id)
-                                if entity and entity.sprite_id not in sprites_in_area:
-                                    sprites_in_area[entity.sprite_id] = {
-                                        'position': Position(entity.position[0], entity.position[1]),
-                                        'layer': entity.layer
-                                    }
+            # Convert positions to grid coordinates; the table clamps to its bounds
+            top_left_cell = (int(top_left.x), int(top_left.y))
+            bottom_right_cell = (int(bottom_right.x), int(bottom_right.y))
+            for entity in table.get_entities_in_area(top_left_cell, bottom_right_cell, layer):
+                sprites_in_area.setdefault(entity.sprite_id, {
+                    'position': Position(entity.position[0], entity.position[1]),
+                    'layer': entity.layer
+                })
 
             return ActionResult(True, f"Found {len(sprites_in_area)} sprites in area", {
                 'sprites': sprites_in_area
@@ -958,92 +942,60 @@ class ActionsCore(AsyncActionsProtocol):
     async def update_fog_rectangles(self, table_id: str, hide_rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
                                    reveal_rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
                                    session_id: Optional[int] = None) -> ActionResult:
-        """Update fog of war rectangles by creating entities in fog_of_war layer"""
+        """Replace the table's fog with the full hide/reveal rectangle lists sent by the DM."""
         try:
-            logger.debug(f"[FOG-SERVER] Updating fog for table {table_id}")
-            logger.debug(f"[FOG-SERVER] Hide rectangles: {hide_rectangles}")
-            logger.debug(f"[FOG-SERVER] Reveal rectangles: {reveal_rectangles}")
-
             table = await self._get_table(table_id)
             if not table:
                 return ActionResult(False, "Table not found")
+            region = FogRegion.from_hide_reveal(hide_rectangles or [], reveal_rectangles or [])
+            return await self._commit_fog(table, table_id, region, session_id)
+        except Exception as e:
+            return ActionResult(False, f"Failed to update fog: {str(e)}")
 
-            # Remove existing fog entities from fog_of_war layer
-            fog_entities_to_remove = []
-            for entity_id, entity in table.entities.items():
-                try:
-                    if hasattr(entity, 'layer') and entity.layer == 'fog_of_war':
-                        fog_entities_to_remove.append(entity_id)
-                except Exception as e:
-                    logger.error(f"[FOG-SERVER] Error checking entity {entity_id}: {e}")
-
-            for entity_id in fog_entities_to_remove:
-                try:
-                    table.remove_entity(entity_id)
-                except Exception as e:
-                    logger.error(f"[FOG-SERVER] Error removing entity {entity_id}: {e}")
-
-            # Create hide fog entities
-            for i, rect_data in enumerate(hide_rectangles):
-                try:
-                    # Handle both tuple and list formats
-                    if isinstance(rect_data, (list, tuple)) and len(rect_data) == 2:
-                        start, end = rect_data
-                    else:
-                        logger.error(f"[FOG-SERVER] Invalid rectangle format: {rect_data}")
-                        continue
-
-                    entity_data = {
-                        'name': f'fog_hide_{i}',
-                        'position': start,  # Store start position
-                        'layer': 'fog_of_war',
-                        'texture_path': '__FOG_HIDE__',
-                        'scale_x': abs(end[0] - start[0]),  # Store rectangle width as scale_x
-                        'scale_y': abs(end[1] - start[1]),  # Store rectangle height as scale_y
-                    }
-                    table.add_entity(entity_data)
-                except Exception as e:
-                    logger.error(f"[FOG-SERVER] Error processing hide rectangle {i}: {e}")
-                    continue
-
-            # Create reveal fog entities
-            for i, rect_data in enumerate(reveal_rectangles):
-                try:
-                    # Handle both tuple and list formats
-                    if isinstance(rect_data, (list, tuple)) and len(rect_data) == 2:
-                        start, end = rect_data
-                    else:
-                        logger.error(f"[FOG-SERVER] Invalid rectangle format: {rect_data}")
-                        continue
-
-                    entity_data = {
-                        'name': f'fog_reveal_{i}',
-                        'position': start,  # Store start position
-                        'layer': 'fog_of_war',
-                        'texture_path': '__FOG_REVEAL__',
-                        'scale_x': abs(end[0] - start[0]),  # Store rectangle width as scale_x
-                        'scale_y': abs(end[1] - start[1]),  # Store rectangle height as scale_y
-                    }
-                    table.add_entity(entity_data)
-                except Exception as e:
-                    logger.error(f"[FOG-SERVER] Error processing reveal rectangle {i}: {e}")
-                    continue
-
-            # Also update the old fog_rectangles structure for compatibility
-            table.fog_rectangles = {'hide': hide_rectangles, 'reveal': reveal_rectangles}
+    async def edit_fog(self, table_id: str, hide_rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+                       reveal_rectangles: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+                       session_id: Optional[int] = None) -> ActionResult:
+        """Hide, then reveal, the given rectangles on top of the current fog."""
+        try:
+            table = await self._get_table(table_id)
+            if not table:
+                return ActionResult(False, "Table not found")
+            region = table.fog.hide(hide_rectangles or []).reveal(reveal_rectangles or [])
+            return await self._commit_fog(table, table_id, region, session_id)
+        except Exception as e:
+            return ActionResult(False, f"Failed to update fog: {str(e)}")
 
+    async def _commit_fog(self, table: VirtualTable, table_id: str, region: FogRegion,
+                          session_id: Optional[int]) -> ActionResult:
+        """Store ``region`` as the table's fog; persist and record history only when it changed."""
+        # Fog used to be stored as one fog_of_war entity per rectangle
+        legacy = [eid for eid, entity in table.entities.items()
+                  if entity.layer == 'fog_of_war' and entity.texture_path in (HIDE_TEXTURE, REVEAL_TEXTURE)]
+        for entity_id in legacy:
+            table.remove_entity(entity_id)
+
+        before = table.fog
+        diff = table.set_fog(region)
+        changed = bool(diff['hide'] or diff['reveal'])
+        if changed:
             await self._add_to_history({
                 'type': 'update_fog',
                 'table_id': table_id,
-                'hide_rectangles': hide_rectangles,
-                'reveal_rectangles': reveal_rectangles
+                'before': before.encode(),
+                'after': region.encode(),
             })
-
+        if changed or legacy:
             # Use immediate persistence for fog updates to ensure they're saved right away
             await self._force_persist_table_state(table, "fog update", session_id)
-            return ActionResult(True, "Fog updated", {'fog_rectangles': table.fog_rectangles})
-        except Exception as e:
-            return ActionResult(False, f"Failed to update fog: {str(e)}")
+        logger.debug(
+            f"Fog on table {table_id}: {len(diff['hide'])} rectangles hidden, {len(diff['reveal'])} revealed, "
+            f"{len(table.fog.bands)} bands"
+        )
+        return ActionResult(True, "Fog updated" if changed else "Fog unchanged", {
+            'fog_rectangles': table.fog_rectangles,
+            'fog_diff': diff,
+            'fog_version': table.fog_version,
+        })
 
     async def get_fog_rectangles(self, table_id: str) -> ActionResult:
         """Get current fog of war rectangles"""
@@ -0,0 +1,128 @@
+"""Dirty tracking for VirtualTable persistence.
+
+A TableChangeSet records which entities and walls were created, updated or
+deleted since the table was last known to match the database, so a save can
+write only those rows. Until a baseline exists (or after anything the set
+cannot account for) callers fall back to a full resync.
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Set
+
+
+@dataclass
+class TableDelta:
+    """Snapshot of pending changes taken by ``TableChangeSet.drain``."""
+    created_entities: Set[int] = field(default_factory=set)
+    updated_entities: Set[int] = field(default_factory=set)
+    deleted_sprites: Set[str] = field(default_factory=set)
+    created_walls: Set[str] = field(default_factory=set)
+    updated_walls: Set[str] = field(default_factory=set)
+    deleted_walls: Set[str] = field(default_factory=set)
+
+    @property
+    def upsert_entities(self) -> Set[int]:
+        return self.created_entities | self.updated_entities
+
+    @property
+    def upsert_walls(self) -> Set[str]:
+        return self.created_walls | self.updated_walls
+
+    def __len__(self) -> int:
+        return (len(self.created_entities) + len(self.updated_entities) + len(self.deleted_sprites)
+                + len(self.created_walls) + len(self.updated_walls) + len(self.deleted_walls))
+
+
+class TableChangeSet:
+    """Entities (by entity_id) and walls (by wall_id) changed since the last save.
+
+    Deleted entities are remembered by sprite_id, which is the database key.
+    """
+
+    def __init__(self):
+        self._pending = TableDelta()
+        # Counts the table should have if every change went through this set
+        self._entity_count: Optional[int] = None
+        self._wall_count: Optional[int] = None
+        # Increases on every recorded change; never reset, so callers can cache on it
+        self.version = 0
+
+    # ── Recording ────────────────────────────────────────────────────────
+
+    def entity_added(self, entity_id: int) -> None:
+        self.version += 1
+        self._pending.created_entities.add(entity_id)
+        self._pending.updated_entities.discard(entity_id)
+        if self._entity_count is not None:
+            self._entity_count += 1
+
+    def entity_updated(self, entity_id: int) -> None:
+        self.version += 1
+        if entity_id not in self._pending.created_entities:
+            self._pending.updated_entities.add(entity_id)
+
+    def entity_rekeyed(self, entity_id: int, old_sprite_id: str) -> None:
+        """The row moves to a new sprite_id: drop the old one, insert the new one."""
+        self.version += 1
+        self._pending.deleted_sprites.add(old_sprite_id)
+        self._pending.created_entities.add(entity_id)
+        self._pending.updated_entities.discard(entity_id)
+
+    def entity_removed(self, entity_id: int, sprite_id: str) -> None:
+        self.version += 1
+        self._pending.created_entities.discard(entity_id)
+        self._pending.updated_entities.discard(entity_id)
+        self._pending.deleted_sprites.add(sprite_id)
+        if self._entity_count is not None:
+            self._entity_count -= 1
+
+    def wall_added(self, wall_id: str) -> None:
+        self.version += 1
+        self._pending.created_walls.add(wall_id)
+        self._pending.updated_walls.discard(wall_id)
+        self._pending.deleted_walls.discard(wall_id)
+        if self._wall_count is not None:
+            self._wall_count += 1
+
+    def wall_updated(self, wall_id: str) -> None:
+        self.version += 1
+        if wall_id not in self._pending.created_walls:
+            self._pending.updated_walls.add(wall_id)
+
+    def wall_removed(self, wall_id: str) -> None:
+        self.version += 1
+        self._pending.created_walls.discard(wall_id)
+        self._pending.updated_walls.discard(wall_id)
+        self._pending.deleted_walls.add(wall_id)
+        if self._wall_count is not None:
+            self._wall_count -= 1
+
+    # ── Baseline ─────────────────────────────────────────────────────────
+
+    @property
+    def has_baseline(self) -> bool:
+        return self._entity_count is not None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def reset(self, entity_count: int, wall_count: int) -> None:
+        """The table now matches the database exactly."""
+        self._pending = TableDelta()
+        self._entity_count = entity_count
+        self._wall_count = wall_count
+
+    def invalidate(self) -> None:
+        """Forget the baseline; the next save must resync everything."""
+        self.version += 1
+        self._pending = TableDelta()
+        self._entity_count = None
+        self._wall_count = None
+
+    def is_consistent(self, entity_count: int, wall_count: int) -> bool:
+        """False when the table was changed behind the set's back (direct dict writes)."""
+        return self._entity_count == entity_count and self._wall_count == wall_count
+
+    def drain(self) -> TableDelta:
+        """Hand over pending changes and start recording a fresh set."""
+        delta, self._pending = self._pending, TableDelta()
+        return delta
@@ -0,0 +1,129 @@
+"""Wire codecs for protocol messages.
+
+A codec turns a message envelope (the plain dict from ``Message.to_dict``)
+into a WebSocket frame and back. Two are provided:
+
+- ``json``: the default. Uses orjson when it is installed, stdlib json
+  otherwise; both produce text frames any JSON client can read.
+- ``msgpack``: compact binary frames. Only registered when msgpack is
+  installed.
+
+Text frames are always JSON, whichever codec a connection negotiated, so
+control and error messages can be sent without knowing the peer's codec.
+Binary frames carry the negotiated binary codec.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None  # type: ignore[assignment]
+
+Frame = Union[str, bytes]
+
+DEFAULT_CODEC = "json"
+
+
+class CodecError(ValueError):
+    """A frame could not be decoded (or a payload encoded) by the codec."""
+
+
+class MessageCodec:
+    """Encode/decode message envelopes for one wire format."""
+
+    name: str = ""
+    binary: bool = False
+
+    def encode(self, payload: Dict[str, Any]) -> Frame:
+        raise NotImplementedError
+
+    def decode(self, frame: Frame) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(MessageCodec):
+    """JSON text frames; orjson when available, stdlib json otherwise."""
+
+    name = "json"
+    binary = False
+
+    def __init__(self, fast: bool = True):
+        self.fast = fast and orjson is not None
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        if self.fast:
+            try:
+                return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+            except TypeError:
+                # Values orjson refuses (e.g. ints wider than 64 bits): stdlib decides
+                pass
+        return json.dumps(payload)
+
+    def decode(self, frame: Frame) -> Any:
+        try:
+            return orjson.loads(frame) if self.fast else json.loads(frame)
+        except ValueError as exc:
+            raise CodecError(f"Invalid JSON frame: {exc}") from exc
+
+
+class MsgpackCodec(MessageCodec):
+    """MessagePack binary frames."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        try:
+            return msgpack.packb(payload, use_bin_type=True)
+        except (TypeError, ValueError, OverflowError) as exc:
+            raise CodecError(f"Cannot encode payload as msgpack: {exc}") from exc
+
+    def decode(self, frame: Frame) -> Any:
+        if isinstance(frame, str):
+            frame = frame.encode("utf-8")
+        try:
+            return msgpack.unpackb(frame, raw=False)
+        except Exception as exc:
+            raise CodecError(f"Invalid msgpack frame: {exc}") from exc
+
+
+JSON_CODEC = JsonCodec()
+
+_CODECS: Dict[str, MessageCodec] = {"json": JSON_CODEC}
+if msgpack is not None:
+    _CODECS["msgpack"] = MsgpackCodec()
+
+
+def available_codecs() -> tuple[str, ...]:
+    """Names of the codecs usable in this process, default first."""
+    return tuple(_CODECS)
+
+
+def get_codec(name: Optional[str] = None) -> MessageCodec:
+    """Codec by name; the JSON codec when ``name`` is empty or unknown."""
+    return _CODECS.get(name or DEFAULT_CODEC) or _CODECS[DEFAULT_CODEC]
+
+
+def negotiate(offered: Iterable[str]) -> Optional[str]:
+    """First codec name in the client's preference order that is available here."""
+    for name in offered:
+        if name in _CODECS:
+            return name
+    return None
+
+
+def decode_frame(frame: Frame, codec: Optional[MessageCodec] = None) -> Any:
+    """Decode an inbound frame: text is JSON, bytes use the connection's binary codec."""
+    if isinstance(frame, str):
+        return _CODECS[DEFAULT_CODEC].decode(frame)
+    if codec is None or not codec.binary:
+        raise CodecError("Binary frame on a connection without a binary codec")
+    return codec.decode(frame)
@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
+from .combat_log import CombatActionLog
 from .conditions import INCAPACITATING, ActiveCondition
 
 
@@ -186,6 +187,8 @@ class CombatAction:
     state_before: dict = field(default_factory=dict)
     timestamp: float = 0
     is_dm_override: bool = False
+    # Position in the encounter's log; assigned by CombatActionLog.append
+    log_index: int = -1
 
     def to_dict(self) -> dict:
         return self.__dict__.copy()
@@ -225,12 +228,16 @@ class CombatState:
     round_number: int = 0
     current_turn_index: int = 0
     combatants: list[Combatant] = field(default_factory=list)
-    action_log: list[CombatAction] = field(default_factory=list)
+    action_log: CombatActionLog = field(default_factory=CombatActionLog)
     started_at: Optional[float] = None
     settings: CombatSettings = field(default_factory=CombatSettings)
     state_hash: str = ""
     state_version: int = 0
 
+    def __post_init__(self):
+        if not isinstance(self.action_log, CombatActionLog):
+            self.action_log = CombatActionLog(self.action_log)
+
     def active_combatants(self) -> list[Combatant]:
         if self.settings.skip_defeated:
             return [c for c in self.combatants if not c.is_defeated]
@@ -266,7 +273,9 @@ class CombatState:
             'table_id': self.table_id, 'phase': self.phase.value,
             'round_number': self.round_number, 'current_turn_index': self.current_turn_index,
             'combatants': [c.to_dict() for c in self.combatants],
-            'action_log': [a.to_dict() for a in self.action_log[-50:]],  # last 50
+            # The in-memory window only; older entries live in sealed pages
+            'action_log': [a.to_dict() for a in self.action_log],
+            'action_log_base': self.action_log.base,
             'started_at': self.started_at,
             'settings': self.settings.to_dict(),
             'state_hash': self.compute_hash(),
@@ -291,5 +300,8 @@ class CombatState:
             state_version=int(data.get('state_version', 0)),
         )
         cs.combatants = [Combatant.from_dict(x) for x in data.get('combatants', [])]
-        cs.action_log = [CombatAction.from_dict(x) for x in data.get('action_log', [])]
+        cs.action_log = CombatActionLog(
+            [CombatAction.from_dict(x) for x in data.get('action_log', [])],
+            base=int(data.get('action_log_base', 0) or 0),
+        )
         return cs
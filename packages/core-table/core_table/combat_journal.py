@@ -0,0 +1,206 @@
+"""Reversible patches between combat states.
+
+Combat commands used to take ``deepcopy(state.to_dict())`` as their undo
+snapshot, and the journal stored that whole state for every action.
+``capture`` takes a cheaper before-image. Combatants and settings are copied
+as plain data. The action log is kept by reference, because actions are only
+ever appended or popped, never edited. ``diff_state`` compares a before-image
+with the state after a command and keeps only what changed, with both the
+old and the new value, so ``apply_patch`` can replay the change or undo it.
+
+Patch format (JSON-safe; empty sections are left out)::
+
+    {
+        'v': 1,
+        'fields': {name: [old, new]},             # top-level state fields
+        'combatants': {id: {field: [old, new]}},  # per-combatant changes
+        'added': {id: combatant_dict},
+        'removed': {id: combatant_dict},
+        'order': [old_ids, new_ids],              # when the id list changed
+        'log': [dropped_actions, appended_actions],
+    }
+
+Patches operate on the ``CombatState.to_dict()`` shape. ``state_version`` and
+``state_hash`` are not part of a patch; the journal owns the version.
+"""
+from __future__ import annotations
+
+import pickle
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .combat import CombatAction, Combatant, CombatPhase, CombatSettings, CombatState
+from .combat_log import CombatActionLog, CombatLogPage
+
+PATCH_FORMAT_VERSION = 1
+
+# Top-level fields a command can change
+_STATE_FIELDS = ('table_id', 'phase', 'round_number', 'current_turn_index', 'started_at', 'settings')
+
+
+_CONTAINERS = (dict, list, tuple)
+
+
+def _clone(value: Any) -> Any:
+    """Copy JSON-shaped data (much cheaper than ``copy.deepcopy``)."""
+    if isinstance(value, dict):
+        return {k: _clone(v) if isinstance(v, _CONTAINERS) else v for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) if isinstance(v, _CONTAINERS) else v for v in value]
+    if isinstance(value, tuple):
+        return tuple(_clone(v) if isinstance(v, _CONTAINERS) else v for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class CombatSnapshot:
+    """Before-image of a ``CombatState`` taken by ``capture``."""
+
+    combat_id: str
+    session_id: str
+    state_version: int
+    fields: dict[str, Any]
+    combatants: tuple[dict[str, Any], ...]
+    action_log: tuple[CombatAction, ...]
+    log_base: int = 0
+    log_pages: tuple[CombatLogPage, ...] = ()
+
+    def to_state(self) -> CombatState:
+        """A new live ``CombatState`` equal to the captured one."""
+        state = CombatState(
+            combat_id=self.combat_id,
+            session_id=self.session_id,
+            table_id=self.fields['table_id'],
+            phase=CombatPhase(self.fields['phase']),
+            round_number=self.fields['round_number'],
+            current_turn_index=self.fields['current_turn_index'],
+            started_at=self.fields['started_at'],
+            settings=CombatSettings.from_dict(self.fields['settings']),
+            state_version=self.state_version,
+        )
+        state.combatants = [Combatant.from_dict(_clone(c)) for c in self.combatants]
+        state.action_log = CombatActionLog(self.action_log, base=self.log_base, pages=self.log_pages)
+        return state
+
+
+def capture(state: CombatState) -> CombatSnapshot:
+    """Before-image of ``state`` that later mutations of ``state`` cannot reach."""
+    return CombatSnapshot(
+        combat_id=state.combat_id,
+        session_id=state.session_id,
+        state_version=state.state_version,
+        fields={
+            'table_id': state.table_id,
+            'phase': state.phase.value,
+            'round_number': state.round_number,
+            'current_turn_index': state.current_turn_index,
+            'started_at': state.started_at,
+            'settings': state.settings.to_dict(),
+        },
+        # One pickle round trip copies every combatant's nested lists and dicts
+        # at C speed, well under a recursive copy
+        combatants=tuple(pickle.loads(pickle.dumps([c.to_dict() for c in state.combatants], pickle.HIGHEST_PROTOCOL))),
+        action_log=tuple(state.action_log),
+        log_base=state.action_log.base,
+        log_pages=state.action_log.pending_pages,
+    )
+
+
+def _log_patch(before: tuple[CombatAction, ...], after: list[dict]) -> Optional[list[list[dict]]]:
+    """Actions dropped from the end of ``before`` and appended after it.
+
+    Sealing a log page drops the oldest entries from ``after``, so entries
+    are matched by ``action_id`` rather than by position.
+    """
+    before_ids = {action.action_id: i for i, action in enumerate(before)}
+    common = 0
+    while common < len(after) and after[common].get('action_id') in before_ids:
+        common += 1
+    keep = before_ids[after[common - 1]['action_id']] + 1 if common else 0
+    dropped = [action.to_dict() for action in before[keep:]]
+    appended = [_clone(action) for action in after[common:]]
+    if not dropped and not appended:
+        return None
+    return [dropped, appended]
+
+
+def diff_state(before: CombatSnapshot, after: dict[str, Any]) -> dict[str, Any]:
+    """Patch turning ``before`` into ``after`` (a ``CombatState.to_dict()``)."""
+    patch: dict[str, Any] = {'v': PATCH_FORMAT_VERSION}
+
+    fields = {
+        name: [before.fields.get(name), _clone(after.get(name))]
+        for name in _STATE_FIELDS
+        if before.fields.get(name) != after.get(name)
+    }
+    if fields:
+        patch['fields'] = fields
+
+    old = {c['combatant_id']: c for c in before.combatants}
+    new = {c['combatant_id']: c for c in after.get('combatants', [])}
+    changed: dict[str, dict[str, list[Any]]] = {}
+    for combatant_id, data in new.items():
+        previous = old.get(combatant_id)
+        if previous is None:
+            continue
+        delta = {
+            key: [previous.get(key), _clone(value)]
+            for key, value in data.items()
+            if previous.get(key) != value
+        }
+        if delta:
+            changed[combatant_id] = delta
+    if changed:
+        patch['combatants'] = changed
+    added = {cid: _clone(data) for cid, data in new.items() if cid not in old}
+    if added:
+        patch['added'] = added
+    removed = {cid: data for cid, data in old.items() if cid not in new}
+    if removed:
+        patch['removed'] = removed
+    if list(old) != list(new):
+        patch['order'] = [list(old), list(new)]
+
+    log = _log_patch(before.action_log, after.get('action_log', []))
+    if log:
+        patch['log'] = log
+    return patch
+
+
+def apply_patch(state: dict[str, Any], patch: dict[str, Any], reverse: bool = False) -> dict[str, Any]:
+    """Apply ``patch`` (or undo it, with ``reverse``) to a ``CombatState.to_dict()``.
+
+    Returns a new dict; ``state`` is not modified. Applying a patch to a state
+    that already contains it changes nothing, so replaying the journal over a
+    checkpoint that is slightly ahead of its version is safe.
+    """
+    side = 0 if reverse else 1
+    out = dict(state)
+    for name, values in patch.get('fields', {}).items():
+        out[name] = _clone(values[side])
+
+    combatants = {c['combatant_id']: c for c in state.get('combatants', [])}
+    added, removed = patch.get('added', {}), patch.get('removed', {})
+    if reverse:
+        added, removed = removed, added
+    for combatant_id in removed:
+        combatants.pop(combatant_id, None)
+    for combatant_id, data in added.items():
+        combatants[combatant_id] = _clone(data)
+    for combatant_id, delta in patch.get('combatants', {}).items():
+        if combatant_id in combatants:
+            combatant = dict(combatants[combatant_id])
+            for key, values in delta.items():
+                combatant[key] = _clone(values[side])
+            combatants[combatant_id] = combatant
+    order = patch['order'][side] if 'order' in patch else list(combatants)
+    out['combatants'] = [combatants[cid] for cid in order if cid in combatants]
+
+    if 'log' in patch:
+        dropped, appended = patch['log'] if not reverse else reversed(patch['log'])
+        drop_ids = {action['action_id'] for action in dropped}
+        log = [action for action in state.get('action_log', []) if action.get('action_id') not in drop_ids]
+        present = {action.get('action_id') for action in log}
+        log.extend(_clone(action) for action in appended if action['action_id'] not in present)
+        out['action_log'] = log
+    return out
@@ -0,0 +1,179 @@
+"""Bounded, paged combat action log.
+
+``CombatState.action_log`` used to be a plain list that grew for the whole
+encounter; only its last 50 entries ever reached a snapshot, so older history
+was lost on restore. ``CombatActionLog`` keeps only the recent entries in
+memory. Every action gets an absolute ``log_index``. Once the in-memory window
+reaches ``2 * PAGE_SIZE`` entries, its oldest ``PAGE_SIZE`` are sealed into an
+immutable ``CombatLogPage`` and dropped from memory. The window therefore
+always holds between ``PAGE_SIZE`` and ``2 * PAGE_SIZE - 1`` entries once the
+log is long enough, so DM reverts still reach recent actions and the whole
+window fits in a state snapshot.
+
+Sealed pages wait in the log until persistence drains them with
+``drain_pages`` and writes them next to the snapshot. Page ``n`` holds
+entries ``n * PAGE_SIZE`` to ``(n + 1) * PAGE_SIZE - 1`` and never changes
+once written. ``history`` reads the log backwards through a cursor. It pulls
+what is still in memory from the window and asks a loader for older pages.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, overload
+
+if TYPE_CHECKING:
+    from .combat import CombatAction
+
+PAGE_SIZE = 25
+# Largest number of entries one history read returns
+MAX_HISTORY_LIMIT = 4 * PAGE_SIZE
+
+
+@dataclass(frozen=True)
+class CombatLogPage:
+    """``PAGE_SIZE`` consecutive actions, in ``CombatAction.to_dict()`` form."""
+
+    index: int
+    actions: tuple[dict[str, Any], ...]
+
+    @property
+    def first_index(self) -> int:
+        return self.index * PAGE_SIZE
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'index': self.index, 'actions': list(self.actions)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'CombatLogPage':
+        return cls(index=int(data['index']), actions=tuple(data.get('actions', [])))
+
+
+# Loads the stored actions of pages first..last (inclusive), oldest first
+PageLoader = Callable[[int, int], Iterable[dict[str, Any]]]
+
+
+class CombatActionLog:
+    """Recent combat actions in memory, older ones in sealed pages.
+
+    Sequence operations (``len``, iteration, indexing, ``pop``) see only the
+    in-memory window. ``base`` is the ``log_index`` of its first entry and
+    ``total`` the number of actions ever kept.
+    """
+
+    def __init__(
+        self,
+        actions: Iterable[CombatAction] = (),
+        base: int = 0,
+        pages: Iterable[CombatLogPage] = (),
+    ):
+        self._recent: list[CombatAction] = list(actions)
+        if self._recent and self._recent[0].log_index >= 0:
+            base = self._recent[0].log_index
+        self.base = base
+        for offset, action in enumerate(self._recent):
+            action.log_index = base + offset
+        self._pages: list[CombatLogPage] = list(pages)
+        self._seal()
+
+    # ── Sequence behaviour (window only) ───────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __iter__(self) -> Iterator[CombatAction]:
+        return iter(self._recent)
+
+    @overload
+    def __getitem__(self, item: int) -> CombatAction: ...
+
+    @overload
+    def __getitem__(self, item: slice) -> list[CombatAction]: ...
+
+    def __getitem__(self, item):
+        return self._recent[item]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CombatActionLog):
+            return self.base == other.base and self._recent == other._recent
+        if isinstance(other, list):
+            return self._recent == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'CombatActionLog(base={self.base}, recent={len(self._recent)}, pages={len(self._pages)})'
+
+    @property
+    def total(self) -> int:
+        return self.base + len(self._recent)
+
+    def append(self, action: CombatAction) -> None:
+        action.log_index = self.total
+        self._recent.append(action)
+        self._seal()
+
+    def extend(self, actions: Iterable[CombatAction]) -> None:
+        for action in actions:
+            self.append(action)
+
+    def pop(self) -> CombatAction:
+        """Remove the newest action; sealed pages are never reopened."""
+        return self._recent.pop()
+
+    # ── Pages ──────────────────────────────────────────────────────────
+
+    def _seal(self) -> None:
+        while len(self._recent) >= 2 * PAGE_SIZE:
+            # Up to the next page boundary; a whole page unless base came unaligned
+            head = PAGE_SIZE - self.base % PAGE_SIZE
+            sealed, self._recent = self._recent[:head], self._recent[head:]
+            self._pages.append(CombatLogPage(
+                index=self.base // PAGE_SIZE,
+                actions=tuple(action.to_dict() for action in sealed),
+            ))
+            self.base += head
+
+    @property
+    def pending_pages(self) -> tuple[CombatLogPage, ...]:
+        return tuple(self._pages)
+
+    def drain_pages(self) -> list[CombatLogPage]:
+        """Sealed pages not yet handed to persistence; the caller must store them."""
+        pages, self._pages = self._pages, []
+        return pages
+
+    def requeue_pages(self, pages: Iterable[CombatLogPage]) -> None:
+        """Return drained pages whose write failed, so the next save retries them."""
+        self._pages[:0] = list(pages)
+
+    # ── History ────────────────────────────────────────────────────────
+
+    def history(
+        self,
+        before: Optional[int],
+        limit: int,
+        load_pages: PageLoader,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        """Up to ``limit`` actions with ``log_index < before``, oldest first.
+
+        ``before=None`` starts at the newest action. Returns the actions and
+        the cursor for the next older read, or ``None`` at the start of the log.
+        """
+        end = self.total if before is None else max(0, min(int(before), self.total))
+        start = max(0, end - max(1, min(int(limit), MAX_HISTORY_LIMIT)))
+        if start >= end:
+            return [], None
+
+        entries: dict[int, dict[str, Any]] = {}
+        if start < self.base:
+            first, last = start // PAGE_SIZE, (min(end, self.base) - 1) // PAGE_SIZE
+            for action in load_pages(first, last):
+                entries[int(action.get('log_index', -1))] = action
+            for page in self._pages:
+                if first <= page.index <= last:
+                    for action in page.actions:
+                        entries[int(action['log_index'])] = action
+        for action in self._recent[max(0, start - self.base):max(0, end - self.base)]:
+            entries[action.log_index] = action.to_dict()
+
+        actions = [entries[index] for index in range(start, end) if index in entries]
+        return actions, (start or None)
@@ -0,0 +1,225 @@
+"""Packed compendium artifact: one binary file, records decoded on demand.
+
+A compendium generation is a handful of JSON documents (the bestiary alone
+is over 600 KB). Parsing them builds the whole object graph in every server
+worker before the first request. ``write_pack`` stores the same documents in
+a single file instead:
+
+    header   | MAGIC, index offset, index length ("<8sQQ")
+    records  | each collection record as compact UTF-8 JSON, back to back
+    index    | JSON: per document, its small top-level values ("skeleton")
+             | and, per collection, record names with offset and length
+
+``CompendiumPack`` memory-maps the file and parses only the index. A
+collection is a read-only ``PackedRecords`` mapping (name-keyed dicts,
+``{"Goblin": {...}}``) or ``PackedList`` sequence (lists, and lists grouped
+by category), and each record is decoded from its slice only when it is
+read. The pages are file-backed, so workers mapping the same pack share
+them, and a decoded record is a fresh object the caller may keep or drop.
+
+Collections are the top-level values that hold records: a dict of dicts, a
+list of dicts, or a dict of such lists. Everything else (``metadata``) stays
+in the skeleton. ``documents()`` returns the same shape ``json.loads`` would.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Union, overload
+
+PACK_NAME = "compendium.pack"
+MAGIC = b"TTCPACK1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sQQ")
+
+# (name, offset, length) of one packed record
+Entry = tuple[str, int, int]
+
+
+class CompendiumPackError(ValueError):
+    """Raised when a pack file is truncated, corrupt or of an unknown format."""
+
+
+def write_pack(
+    path: Path,
+    documents: Mapping[str, Mapping[str, Any]],
+    metadata: Optional[Mapping[str, Any]] = None,
+) -> Path:
+    """Pack ``documents`` (name -> parsed JSON object) into ``path`` atomically.
+
+    ``metadata`` is stored in the index as is; ``CompendiumPack.metadata``
+    returns it.
+    """
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    records_hash = hashlib.sha256()
+    index: dict[str, Any] = {"format": FORMAT_VERSION, "metadata": dict(metadata or {}), "documents": {}}
+    with open(temporary, "wb") as out:
+        out.write(HEADER.pack(MAGIC, 0, 0))
+        for name, document in documents.items():
+            skeleton: dict[str, Any] = {}
+            collections: dict[str, Any] = {}
+            for key, value in document.items():
+                shape = _collection_shape(value)
+                if shape == "records":
+                    collections[key] = {"shape": shape, "entries": [
+                        _write_record(out, records_hash, str(record_name), record)
+                        for record_name, record in value.items()
+                    ]}
+                elif shape == "list":
+                    collections[key] = {"shape": shape, "entries": [
+                        _write_record(out, records_hash, str(record.get("name", "")), record) for record in value
+                    ]}
+                elif shape == "groups":
+                    collections[key] = {"shape": shape, "groups": {
+                        str(group): [
+                            _write_record(out, records_hash, str(record.get("name", "")), record) for record in items
+                        ]
+                        for group, items in value.items()
+                    }}
+                else:
+                    skeleton[key] = value
+            index["documents"][name] = {"skeleton": skeleton, "collections": collections}
+        index["records_sha256"] = records_hash.hexdigest()
+        encoded = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        index_offset = out.tell()
+        out.write(encoded)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, index_offset, len(encoded)))
+        out.flush()
+        os.fsync(out.fileno())
+    temporary.replace(path)
+    return path
+
+
+def _collection_shape(value: Any) -> Optional[str]:
+    if isinstance(value, dict) and value:
+        if all(isinstance(item, dict) for item in value.values()):
+            return "records"
+        if all(isinstance(items, list) and all(isinstance(item, dict) for item in items) for items in value.values()):
+            return "groups"
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return "list"
+    return None
+
+
+def _write_record(out: BinaryIO, records_hash: Any, name: str, record: Any) -> list:
+    raw = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    offset = out.tell()
+    out.write(raw)
+    records_hash.update(raw)
+    return [name, offset, len(raw)]
+
+
+class CompendiumPack:
+    """A memory-mapped pack; only its index is parsed up front."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            try:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise CompendiumPackError(f"{self.path.name} is empty") from exc
+        if len(self._map) < HEADER.size:
+            raise CompendiumPackError(f"{self.path.name} is truncated")
+        magic, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise CompendiumPackError(f"{self.path.name} is not a compendium pack")
+        if index_offset < HEADER.size or index_offset + index_length != len(self._map):
+            raise CompendiumPackError(f"{self.path.name} is truncated")
+        self._records_end = index_offset
+        try:
+            index = json.loads(self._map[index_offset:index_offset + index_length])
+        except ValueError as exc:
+            raise CompendiumPackError(f"{self.path.name} has a corrupt index") from exc
+        if not isinstance(index, dict) or index.get("format") != FORMAT_VERSION:
+            raise CompendiumPackError(f"{self.path.name} has an unsupported pack format")
+        self._index = index
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        return self._index.get("metadata", {})
+
+    def verify(self) -> None:
+        """Hash every record slice against the digest written with the pack."""
+        digest = hashlib.sha256(memoryview(self._map)[HEADER.size:self._records_end]).hexdigest()
+        if digest != self._index.get("records_sha256"):
+            raise CompendiumPackError(f"{self.path.name} failed its integrity check")
+
+    def documents(self) -> dict[str, dict[str, Any]]:
+        """Every document, with collections left packed until their records are read."""
+        documents: dict[str, dict[str, Any]] = {}
+        for name, packed in self._index["documents"].items():
+            document = dict(packed["skeleton"])
+            for key, collection in packed["collections"].items():
+                if collection["shape"] == "records":
+                    document[key] = PackedRecords(self, collection["entries"])
+                elif collection["shape"] == "list":
+                    document[key] = PackedList(self, collection["entries"])
+                else:
+                    document[key] = {
+                        group: PackedList(self, entries) for group, entries in collection["groups"].items()
+                    }
+            documents[name] = document
+        return documents
+
+    def decode(self, offset: int, length: int) -> Any:
+        if offset < HEADER.size or offset + length > self._records_end:
+            raise CompendiumPackError(f"record outside the record area of {self.path.name}")
+        return json.loads(self._map[offset:offset + length])
+
+
+class PackedRecords(Mapping):
+    """Name-keyed records of a pack; every read decodes a fresh copy."""
+
+    def __init__(self, pack: CompendiumPack, entries: list[Entry]):
+        self._pack = pack
+        self._entries = {name: (offset, length) for name, offset, length in entries}
+
+    def __getitem__(self, name: str) -> dict:
+        offset, length = self._entries[name]
+        return self._pack.decode(offset, length)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+
+class PackedList(Sequence):
+    """An ordered list of pack records; slicing decodes only the slice."""
+
+    def __init__(self, pack: CompendiumPack, entries: list[Entry]):
+        self._pack = pack
+        self._entries = [(offset, length) for _, offset, length in entries]
+
+    @overload
+    def __getitem__(self, index: int) -> dict: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[dict]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[dict, list[dict]]:
+        if isinstance(index, slice):
+            return [self._pack.decode(offset, length) for offset, length in self._entries[index]]
+        offset, length = self._entries[index]
+        return self._pack.decode(offset, length)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, PackedList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
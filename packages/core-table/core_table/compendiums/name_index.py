@@ -0,0 +1,132 @@
+"""
+Fuzzy Name Index
+Approximate name lookup with the same scores as difflib.SequenceMatcher,
+without comparing the query against every known name
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# A character and its occurrence number in a name: "aa" has ('a', 1) and ('a', 2)
+Token = Tuple[str, int]
+
+
+class FuzzyNameIndex:
+    """
+    Finds the names whose SequenceMatcher ratio against a query exceeds a
+    threshold, ranked by that ratio.
+
+    A name can only score ``ratio = 2*M / (len(query) + len(name))`` if it
+    shares at least M characters with the query (counted with multiplicity),
+    which is ``SequenceMatcher.quick_ratio``'s upper bound. For a threshold
+    this fixes:
+
+    - the lengths a match can have (names outside are never looked at);
+    - a minimum character overlap, so a match must contain one of the query's
+      few rarest characters (prefix filtering): only their posting lists are
+      read;
+    - an upper bound per candidate; candidates are verified with
+      SequenceMatcher from the highest bound down, stopping as soon as no
+      remaining bound can beat the best score found.
+
+    Results are therefore identical to scanning every name, including the
+    tie-break: among equal scores, the name added first wins.
+    """
+
+    def __init__(self, names: Mapping[str, str]):
+        """
+        Args:
+            names: name to match -> value returned for it (e.g. normalized -> original name)
+        """
+        self._texts: List[str] = []
+        self._values: List[str] = []
+        self._counts: List[Counter] = []
+        self._postings: Dict[Token, List[int]] = {}
+        for position, (name, value) in enumerate(names.items()):
+            text = name.lower()
+            counts = Counter(text)
+            self._texts.append(text)
+            self._values.append(value)
+            self._counts.append(counts)
+            for char, count in counts.items():
+                for occurrence in range(1, count + 1):
+                    self._postings.setdefault((char, occurrence), []).append(position)
+        # Positions sorted by name length, for the length window
+        self._by_length = sorted(range(len(self._texts)), key=lambda position: len(self._texts[position]))
+        self._lengths = [len(self._texts[position]) for position in self._by_length]
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def best(self, query: str, threshold: float) -> Optional[str]:
+        """Value of the highest-scoring name with a ratio above ``threshold``, or None"""
+        ranked = self.ranked(query, threshold, limit=1)
+        return ranked[0][0] if ranked else None
+
+    def ranked(self, query: str, threshold: float, limit: int = 10) -> List[Tuple[str, float]]:
+        """Up to ``limit`` (value, ratio) pairs with a ratio above ``threshold``, best first"""
+        text = query.lower()
+        top: List[Tuple[float, int]] = []  # min-heap of (score, -position)
+        for bound, position in self._bounded_candidates(text, threshold):
+            if len(top) == limit and (bound < top[0][0] or (bound == top[0][0] and -position < top[0][1])):
+                break
+            score = SequenceMatcher(None, text, self._texts[position]).ratio()
+            if score <= threshold:
+                continue
+            entry = (score, -position)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+        return [(self._values[-negative], score) for score, negative in sorted(top, reverse=True)]
+
+    def _bounded_candidates(self, text: str, threshold: float) -> List[Tuple[float, int]]:
+        """(upper bound, position) of every name that could score above ``threshold``, best bound first"""
+        query_length = len(text)
+        if threshold <= 0:
+            # No length window or overlap to filter on; every name is a candidate
+            positions = range(len(self._texts))
+        elif threshold >= 1:
+            return []
+        elif query_length == 0:
+            # SequenceMatcher scores two empty strings 1.0 and anything else 0.0
+            positions = [position for position, other in enumerate(self._texts) if not other]
+        else:
+            positions = self._filtered_positions(text, threshold)
+
+        query_counts = Counter(text)
+        candidates = []
+        for position in positions:
+            total = query_length + len(self._texts[position])
+            if not total:
+                candidates.append((1.0, position))
+                continue
+            shared = sum(min(count, self._counts[position][char]) for char, count in query_counts.items())
+            bound = 2.0 * shared / total
+            if bound > threshold:
+                candidates.append((bound, position))
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return candidates
+
+    def _filtered_positions(self, text: str, threshold: float) -> List[int]:
+        query_length = len(text)
+        # 2*min(la, lb) / (la + lb) > t bounds the other name's length. Both
+        # limits are rounded outwards, so no possible match is dropped.
+        shortest = int(threshold * query_length / (2 - threshold))
+        longest = int(query_length * (2 - threshold) / threshold) + 1
+        in_window = set(self._by_length[bisect_left(self._lengths, shortest):bisect_right(self._lengths, longest)])
+        if not in_window:
+            return []
+
+        # A match shares more than t*(la+lb)/2 >= t*(la+shortest)/2 characters,
+        # so it holds one of the query's la - overlap + 1 rarest characters.
+        overlap = max(int(threshold * (query_length + shortest) / 2), 1)
+        tokens = [(char, occurrence) for char, count in Counter(text).items() for occurrence in range(1, count + 1)]
+        tokens.sort(key=lambda token: (len(self._postings.get(token, ())), token))
+        positions = set()
+        for token in tokens[:max(query_length - overlap + 1, 1)]:
+            positions.update(self._postings.get(token, ()))
+        return [position for position in positions if position in in_window]
@@ -15,6 +15,8 @@ from typing import Dict, List, Optional
 from database.database import SessionLocal  # type: ignore[import-not-found]
 from database.models import Asset  # type: ignore[import-not-found]
 
+from .name_index import FuzzyNameIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +56,7 @@ class TokenResolutionService:
 
         # Build lookup indices
         self.normalized_index = self._build_normalized_index()
+        self.fuzzy_index = FuzzyNameIndex(self.normalized_index)
 
         logger.info(f"TokenResolutionService initialized with {len(self.token_mapping)} tokens")
 
@@ -218,17 +221,9 @@ class TokenResolutionService:
         Returns:
             Best matching monster name or None
         """
-        normalized_search = self.normalize_name(monster_name)
-        best_match = None
-        best_score = threshold
-
-        for normalized_name, original_name in self.normalized_index.items():
-            score = self.similarity_score(normalized_search, normalized_name)
-            if score > best_score:
-                best_score = score
-                best_match = original_name
-
-        return best_match
+        # Same result as scoring every normalized name with similarity_score
+        # and keeping the first best above threshold, without the full scan
+        return self.fuzzy_index.best(self.normalize_name(monster_name), threshold)
 
     def _get_type_fallback(self, creature_type: str, use_r2: bool, expiry: int) -> Optional[str]:
         """
@@ -457,13 +452,19 @@ class TokenResolutionService:
             logger.error(f"Database error fetching asset for '{monster_name}': {e}")
             return None
 
-    def batch_resolve(self, monster_names: List[str], monster_types: Optional[List[str]] = None) -> Dict[str, str]:
+    def batch_resolve(
+        self,
+        monster_names: List[str],
+        monster_types: Optional[List[str]] = None,
+        use_r2: bool = True
+    ) -> Dict[str, str]:
         """
         Batch resolve token URLs for multiple monsters
 
         Args:
             monster_names: List of monster names
             monster_types: Optional list of monster types (same order)
+            use_r2: Return R2 URLs instead of local paths
 
         Returns:
             Dictionary mapping monster names to token URLs
@@ -472,7 +473,7 @@ class TokenResolutionService:
 
         for idx, monster_name in enumerate(monster_names):
             monster_type = monster_types[idx] if monster_types and idx < len(monster_types) else None
-            results[monster_name] = self.resolve_token_url(monster_name, monster_type)
+            results[monster_name] = self.resolve_token_url(monster_name, monster_type, use_r2)
 
         return results
 
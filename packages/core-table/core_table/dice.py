@@ -1,7 +1,32 @@
+"""Dice formulas: scalar rolls, batch sampling and exact distributions.
+
+``DiceEngine.roll`` used to parse its formula with regular expressions on
+every roll. ``DiceEngine.compile`` parses a formula once into a ``RollPlan``
+(cached per formula) that rolls it any number of times. A plan can also
+sample many totals at once with numpy, or compute the exact distribution of
+its totals by convolving the per-die distributions, so attack previews and
+NPC AI can ask for hit chances and expected damage without rolling.
+
+Formula semantics are unchanged: every ``NdM`` group adds ``N`` dice of
+``M`` sides (a ``-`` before a group is ignored), only a trailing ``+K`` or
+``-K`` is the modifier, and a critical or fumble is read from the first die
+when the formula has a d20 group.
+"""
+import functools
 import random
 import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+# Largest number of distinct totals an exact distribution is computed over
+MAX_DISTRIBUTION_SUPPORT = 100_000
+# Dice drawn per numpy call when sampling, so a large batch stays in bounded memory
+_SAMPLE_CHUNK_DICE = 1 << 22
 
 
 @dataclass
@@ -28,31 +53,155 @@ _DICE_RE = re.compile(r'(\d+)d(\d+)')
 _MOD_RE = re.compile(r'([+-]\d+)$')
 
 
-def _parse_rolls(formula: str) -> tuple[list[int], int]:
-    """Return (all rolls combined, total modifier) for a formula like '2d6+1d8+3'."""
-    rolls: list[int] = []
-    mod = 0
-    for m in _MOD_RE.finditer(formula):
-        mod += int(m.group(1))
-    for m in _DICE_RE.finditer(formula):
-        count, sides = int(m.group(1)), int(m.group(2))
-        rolls.extend(random.randint(1, sides) for _ in range(count))
-    return rolls, mod
+@dataclass(frozen=True)
+class RollPlan:
+    """A parsed dice formula, reusable for any number of rolls."""
 
+    formula: str
+    dice: Tuple[Tuple[int, int], ...]  # (count, sides) per group, in formula order
+    modifier: int
+    checks_d20: bool  # critical/fumble read from the first die
 
-class DiceEngine:
-    @staticmethod
-    def roll(formula: str) -> DiceRollResult:
-        rolls, mod = _parse_rolls(formula)
-        total = sum(rolls) + mod
-        # Check critical/fumble on first d20 group
+    @classmethod
+    def parse(cls, formula: str) -> 'RollPlan':
+        return cls(
+            formula=formula,
+            dice=tuple((int(m.group(1)), int(m.group(2))) for m in _DICE_RE.finditer(formula)),
+            modifier=sum(int(m.group(1)) for m in _MOD_RE.finditer(formula)),
+            checks_d20=re.search(r'(\d+)d20', formula) is not None,
+        )
+
+    @property
+    def min_total(self) -> int:
+        return sum(count for count, _ in self.dice) + self.modifier
+
+    @property
+    def max_total(self) -> int:
+        return sum(count * sides for count, sides in self.dice) + self.modifier
+
+    @property
+    def mean(self) -> float:
+        return sum(count * (sides + 1) / 2 for count, sides in self.dice) + self.modifier
+
+    def roll(self) -> DiceRollResult:
+        rolls = [random.randint(1, sides) for count, sides in self.dice for _ in range(count)]
         is_crit = is_fum = False
-        d20_match = re.search(r'(\d+)d20', formula)
-        if d20_match and rolls:
+        if self.checks_d20 and rolls:
             is_crit = rolls[0] == 20
             is_fum = rolls[0] == 1
-        return DiceRollResult(total=total, rolls=rolls, modifier=mod,
-                              formula=formula, is_critical=is_crit, is_fumble=is_fum)
+        return DiceRollResult(total=sum(rolls) + self.modifier, rolls=rolls, modifier=self.modifier,
+                              formula=self.formula, is_critical=is_crit, is_fumble=is_fum)
+
+    # ── Batch sampling ─────────────────────────────────────────────────
+
+    def sample(self, n: int, rng=None, advantage: Optional[str] = None):
+        """``n`` totals as an int64 array (a list without numpy).
+
+        ``advantage`` is ``'advantage'`` or ``'disadvantage'``: the formula is
+        rolled twice and the higher or lower total kept, as in
+        ``DiceEngine.roll_with_advantage``. ``rng`` is a
+        ``numpy.random.Generator``; a fresh one is used when omitted.
+        """
+        if advantage in ('advantage', 'disadvantage'):
+            first, second = self.sample(n, rng), self.sample(n, rng)
+            if np is None:
+                pick = max if advantage == 'advantage' else min
+                return [pick(a, b) for a, b in zip(first, second)]
+            return np.maximum(first, second) if advantage == 'advantage' else np.minimum(first, second)
+        if np is None:
+            return [sum(random.randint(1, sides) for count, sides in self.dice for _ in range(count)) + self.modifier
+                    for _ in range(n)]
+        rng = rng if rng is not None else np.random.default_rng()
+        totals = np.full(n, self.modifier, dtype=np.int64)
+        for count, sides in self.dice:
+            if count <= 0:
+                continue
+            rows = max(1, _SAMPLE_CHUNK_DICE // count)
+            for start in range(0, n, rows):
+                stop = min(n, start + rows)
+                totals[start:stop] += rng.integers(1, sides + 1, size=(stop - start, count)).sum(axis=1)
+        return totals
+
+    # ── Exact distribution ─────────────────────────────────────────────
+
+    def distribution(self, advantage: Optional[str] = None) -> Dict[int, float]:
+        """Probability of every possible total, computed exactly by convolution."""
+        probabilities = self._total_probabilities()
+        if advantage in ('advantage', 'disadvantage'):
+            probabilities = _best_of_two(probabilities, advantage == 'advantage')
+        low = self.min_total
+        return {low + offset: float(p) for offset, p in enumerate(probabilities) if p > 0}
+
+    def probability_at_least(self, target: int, advantage: Optional[str] = None) -> float:
+        return sum(p for total, p in self.distribution(advantage).items() if total >= target)
+
+    def _total_probabilities(self) -> List[float]:
+        """P(total = min_total + i) for each i."""
+        if any(sides < 1 for count, sides in self.dice if count > 0):
+            raise ValueError(f'Invalid die in {self.formula!r}')
+        if self.max_total - self.min_total + 1 > MAX_DISTRIBUTION_SUPPORT:
+            raise ValueError(f'Too many possible totals for an exact distribution of {self.formula!r}')
+        return list(_dice_probabilities(tuple((count, sides) for count, sides in self.dice if count > 0)))
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(formula: str) -> RollPlan:
+    return RollPlan.parse(formula)
+
+
+@functools.lru_cache(maxsize=256)
+def _dice_probabilities(dice: Tuple[Tuple[int, int], ...]) -> Tuple[float, ...]:
+    if np is not None:
+        probabilities = np.ones(1)
+        for count, sides in dice:
+            face = np.full(sides, 1.0 / sides)
+            group = np.ones(1)
+            # Square-and-multiply: about log2(count) convolutions per group
+            while count:
+                if count & 1:
+                    group = np.convolve(group, face)
+                count >>= 1
+                if count:
+                    face = np.convolve(face, face)
+            probabilities = np.convolve(probabilities, group)
+        return tuple(probabilities.tolist())
+    probabilities = [1.0]
+    for count, sides in dice:
+        for _ in range(count):
+            out = [0.0] * (len(probabilities) + sides - 1)
+            for i, p in enumerate(probabilities):
+                for face in range(sides):
+                    out[i + face] += p / sides
+            probabilities = out
+    return tuple(probabilities)
+
+
+def _best_of_two(probabilities: List[float], higher: bool) -> List[float]:
+    """Distribution of the higher (or lower) of two independent draws."""
+    out, below = [], 0.0
+    if higher:
+        # P(max = t) = F(t)^2 - F(t-1)^2
+        for p in probabilities:
+            out.append((below + p) ** 2 - below ** 2)
+            below += p
+        return out
+    # P(min = t) = S(t)^2 - S(t+1)^2
+    above = 1.0
+    for p in probabilities:
+        out.append(above ** 2 - (above - p) ** 2)
+        above -= p
+    return out
+
+
+class DiceEngine:
+    @staticmethod
+    def compile(formula: str) -> RollPlan:
+        """The formula's ``RollPlan``, parsed once and cached."""
+        return _compile(formula)
+
+    @staticmethod
+    def roll(formula: str) -> DiceRollResult:
+        return _compile(formula).roll()
 
     @staticmethod
     def roll_with_advantage(formula: str) -> DiceRollResult:
@@ -0,0 +1,276 @@
+"""Fog of war as a rectilinear region.
+
+The fogged area of a table is ``FogRegion``. It is stored as horizontal
+bands, the representation X11 and pixman use for window regions. Each band
+covers the y range ``[y1, y2)`` and holds sorted, disjoint x intervals.
+Vertically touching bands with the same intervals are merged, so every area
+has exactly one representation.
+
+Hiding is a union and revealing is a subtraction. Both return a new region,
+so ``fog_diff`` can describe what an edit changed as two short rectangle
+lists instead of the whole fog. ``encode`` gives the compact persisted form:
+one ``[y1, y2, x1, x2, ...]`` list per band.
+
+Coordinates are table pixels, like the browser's fog rectangles. The browser
+treats fog as "inside some hide rectangle and not inside any reveal
+rectangle". ``FogRegion.from_hide_reveal`` builds exactly that area.
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Rect = Tuple[Tuple[float, float], Tuple[float, float]]
+Intervals = Tuple[float, ...]  # flat x1, x2, x3, x4, ... with x1 < x2 < x3 < ...
+Band = Tuple[float, float, Intervals]
+
+FOG_FORMAT_VERSION = 1
+HIDE_TEXTURE = '__FOG_HIDE__'
+REVEAL_TEXTURE = '__FOG_REVEAL__'
+
+
+def _normalize(rect: Any) -> Optional[Tuple[float, float, float, float]]:
+    """``(x1, y1, x2, y2)`` with x1 < x2 and y1 < y2, or None for malformed or empty rectangles."""
+    try:
+        (sx, sy), (ex, ey) = rect
+        x1, x2 = sorted((float(sx), float(ex)))
+        y1, y2 = sorted((float(sy), float(ey)))
+    except (TypeError, ValueError):
+        return None
+    if x1 == x2 or y1 == y2:
+        return None
+    return x1, y1, x2, y2
+
+
+def _merge_intervals(spans: List[Tuple[float, float]]) -> Intervals:
+    spans.sort()
+    out: List[float] = []
+    for x1, x2 in spans:
+        if out and x1 <= out[-1]:
+            if x2 > out[-1]:
+                out[-1] = x2
+        else:
+            out.extend((x1, x2))
+    return tuple(out)
+
+
+def _combine_intervals(a: Intervals, b: Intervals, subtract: bool) -> Intervals:
+    """``a | b`` or ``a - b`` by a linear walk over both sorted endpoint lists."""
+    if not b or a == b:
+        return () if subtract and a == b else a
+    if not a:
+        return () if subtract else b
+    out: List[float] = []
+    ia = ib = 0
+    in_a = in_b = False
+    while ia < len(a) or ib < len(b):
+        if ib >= len(b) or (ia < len(a) and a[ia] <= b[ib]):
+            x = a[ia]
+        else:
+            x = b[ib]
+        while ia < len(a) and a[ia] == x:
+            in_a = not in_a
+            ia += 1
+        while ib < len(b) and b[ib] == x:
+            in_b = not in_b
+            ib += 1
+        inside = in_a and not in_b if subtract else in_a or in_b
+        if inside != (len(out) % 2 == 1):
+            # Drop a zero-width gap instead of closing and reopening at x
+            if out and out[-1] == x and inside:
+                out.pop()
+            else:
+                out.append(x)
+    return tuple(out)
+
+
+class _BandBuilder:
+    """Appends y slabs in order, merging a slab into the previous band when it continues it."""
+
+    def __init__(self):
+        self.bands: List[Band] = []
+
+    def add(self, y1: float, y2: float, xs: Intervals) -> None:
+        if not xs:
+            return
+        if self.bands:
+            py1, py2, pxs = self.bands[-1]
+            if py2 == y1 and pxs == xs:
+                self.bands[-1] = (py1, y2, xs)
+                return
+        self.bands.append((y1, y2, xs))
+
+
+class FogRegion:
+    """An immutable union of axis-aligned rectangles in canonical banded form."""
+
+    __slots__ = ('_bands', '_encoded', '_starts')
+
+    def __init__(self, bands: Sequence[Band] = ()):
+        self._bands: Tuple[Band, ...] = tuple(bands)
+        self._encoded: Optional[Dict[str, Any]] = None
+        self._starts: Optional[List[float]] = None
+
+    # ── construction ──────────────────────────────────────────────────
+
+    @classmethod
+    def from_rectangles(cls, rects: Iterable[Any]) -> 'FogRegion':
+        """The union of ``rects`` (``((x1, y1), (x2, y2))`` in any corner order)."""
+        boxes = [box for box in map(_normalize, rects) if box is not None]
+        if not boxes:
+            return cls()
+        ys = sorted({y for box in boxes for y in (box[1], box[3])})
+        starts = sorted(boxes, key=lambda box: box[1])
+        active: List[Tuple[float, float, float, float]] = []
+        builder = _BandBuilder()
+        i = 0
+        for y1, y2 in zip(ys, ys[1:]):
+            while i < len(starts) and starts[i][1] <= y1:
+                active.append(starts[i])
+                i += 1
+            active = [box for box in active if box[3] > y1]
+            builder.add(y1, y2, _merge_intervals([(box[0], box[2]) for box in active]))
+        return cls(builder.bands)
+
+    @classmethod
+    def from_hide_reveal(cls, hide: Iterable[Any], reveal: Iterable[Any] = ()) -> 'FogRegion':
+        """What the browser fogs: inside some hide rectangle and outside every reveal rectangle."""
+        return cls.from_rectangles(hide).subtract(cls.from_rectangles(reveal))
+
+    @classmethod
+    def decode(cls, data: Any) -> 'FogRegion':
+        """Inverse of ``encode``. Malformed bands are skipped."""
+        if not isinstance(data, dict) or data.get('v') != FOG_FORMAT_VERSION:
+            return cls()
+        bands = []
+        for row in data.get('bands') or ():
+            if isinstance(row, list) and len(row) >= 4 and len(row) % 2 == 0:
+                bands.append((float(row[0]), float(row[1]), tuple(float(x) for x in row[2:])))
+        return cls(bands)
+
+    # ── set operations ────────────────────────────────────────────────
+
+    def _combine(self, other: 'FogRegion', subtract: bool) -> 'FogRegion':
+        a, b = self._bands, other._bands
+        lo, hi = b[0][0], b[-1][1]
+        # Bands of ``a`` wholly above or below ``other`` are unchanged
+        start = bisect.bisect_right([band[1] for band in a], lo)
+        end = bisect.bisect_left([band[0] for band in a], hi)
+        builder = _BandBuilder()
+        for band in a[:start]:
+            builder.add(*band)
+        mid = a[start:end]
+        ys = sorted({y for band in mid + b for y in band[:2]})
+        ia = ib = 0
+        for y1, y2 in zip(ys, ys[1:]):
+            while ia < len(mid) and mid[ia][1] <= y1:
+                ia += 1
+            while ib < len(b) and b[ib][1] <= y1:
+                ib += 1
+            xa = mid[ia][2] if ia < len(mid) and mid[ia][0] <= y1 else ()
+            xb = b[ib][2] if ib < len(b) and b[ib][0] <= y1 else ()
+            builder.add(y1, y2, _combine_intervals(xa, xb, subtract))
+        for band in a[end:]:
+            builder.add(*band)
+        return FogRegion(builder.bands)
+
+    def union(self, other: 'FogRegion') -> 'FogRegion':
+        if not other:
+            return self
+        if not self:
+            return other
+        return self._combine(other, subtract=False)
+
+    def subtract(self, other: 'FogRegion') -> 'FogRegion':
+        if not self or not other:
+            return self
+        return self._combine(other, subtract=True)
+
+    def hide(self, rects: Iterable[Any]) -> 'FogRegion':
+        return self.union(FogRegion.from_rectangles(rects))
+
+    def reveal(self, rects: Iterable[Any]) -> 'FogRegion':
+        return self.subtract(FogRegion.from_rectangles(rects))
+
+    # ── queries ───────────────────────────────────────────────────────
+
+    @property
+    def bands(self) -> Tuple[Band, ...]:
+        return self._bands
+
+    def __bool__(self) -> bool:
+        return bool(self._bands)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FogRegion) and self._bands == other._bands
+
+    def __hash__(self) -> int:
+        return hash(self._bands)
+
+    def __repr__(self) -> str:
+        return f"FogRegion(bands={len(self._bands)}, rects={len(self.rectangles())})"
+
+    def contains(self, x: float, y: float) -> bool:
+        if self._starts is None:
+            self._starts = [band[0] for band in self._bands]
+        i = bisect.bisect_right(self._starts, y) - 1
+        if i < 0 or y >= self._bands[i][1]:
+            return False
+        return bisect.bisect(self._bands[i][2], x) % 2 == 1
+
+    def area(self) -> float:
+        return sum(
+            (y2 - y1) * sum(xs[k + 1] - xs[k] for k in range(0, len(xs), 2))
+            for y1, y2, xs in self._bands
+        )
+
+    def rectangles(self) -> List[Rect]:
+        """Disjoint rectangles covering the region, in the browser's ``[[x1, y1], [x2, y2]]`` shape."""
+        return [
+            ((xs[k], y1), (xs[k + 1], y2))
+            for y1, y2, xs in self._bands
+            for k in range(0, len(xs), 2)
+        ]
+
+    def encode(self) -> Dict[str, Any]:
+        """Compact JSON-safe form: one ``[y1, y2, x1, x2, ...]`` row per band."""
+        if self._encoded is None:
+            self._encoded = {
+                'v': FOG_FORMAT_VERSION,
+                'bands': [[y1, y2, *xs] for y1, y2, xs in self._bands],
+            }
+        return self._encoded
+
+
+def fog_diff(old: FogRegion, new: FogRegion) -> Dict[str, List[Rect]]:
+    """Rectangles that became fogged (``hide``) and that were cleared (``reveal``)."""
+    # An edit leaves most bands untouched (often the same tuples), so only
+    # the run of bands between the first and last difference is compared.
+    a, b = old.bands, new.bands
+    head = 0
+    while head < len(a) and head < len(b) and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < len(a) - head and tail < len(b) - head and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+    old_mid = FogRegion(a[head:len(a) - tail])
+    new_mid = FogRegion(b[head:len(b) - tail])
+    return {
+        'hide': new_mid.subtract(old_mid).rectangles(),
+        'reveal': old_mid.subtract(new_mid).rectangles(),
+    }
+
+
+def legacy_fog_region(entities: Iterable[Any]) -> FogRegion:
+    """Rebuild fog from the old model's ``fog_of_war`` entities (one per rectangle)."""
+    hide, reveal = [], []
+    for entity in entities:
+        if getattr(entity, 'layer', None) != 'fog_of_war':
+            continue
+        x, y = entity.position[0], entity.position[1]
+        rect = ((x, y), (x + entity.scale_x, y + entity.scale_y))
+        if entity.texture_path == HIDE_TEXTURE:
+            hide.append(rect)
+        elif entity.texture_path == REVEAL_TEXTURE:
+            reveal.append(rect)
+    return FogRegion.from_hide_reveal(hide, reveal)
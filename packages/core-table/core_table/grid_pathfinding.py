@@ -0,0 +1,468 @@
+"""Vectorized grid pathfinding engine (numpy).
+
+Alternative backend for ``PathfindingSystem.find_path_astar`` and
+``get_reachable_cells``. Walls, obstacles and difficult terrain are rasterized
+once into a sparse list of blocked cell-to-cell steps; each query then
+materializes a dense window around the start/end cells and answers it by
+array propagation (8-connected Bellman-Ford relaxation) instead of a per-node
+heap search.
+
+Step blocking uses the same exact segment tests as the Python engine (the
+segment between two cell centres against every wall / obstacle outline), so
+both engines agree on which moves are legal and on optimal path cost.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover - exercised only without numpy
+    raise ImportError("The grid pathfinding engine requires numpy. Install with: pip install numpy") from exc
+
+# Step order shared by the rasterizer and the propagation loop.
+DIRECTIONS: tuple[tuple[int, int], ...] = (
+    (1, 0), (-1, 0), (0, 1), (0, -1),
+    (1, 1), (-1, -1), (1, -1), (-1, 1),
+)
+_DIAGONAL = np.array([dx != 0 and dy != 0 for dx, dy in DIRECTIONS])
+
+# Cells around a sampled wall cell that can own a step crossing the wall.
+_WALL_DILATION = 2
+_EPS = 1e-9
+# Give up on tables without an upper bound once the window is this wide.
+_MAX_UNBOUNDED_MARGIN = 1024
+
+
+def _cross(ox, oy, ax, ay, bx, by):
+    return (ax - ox) * (by - oy) - (ay - oy) * (bx - ox)
+
+
+def _segments_intersect(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    """Vectorized ``PathfindingSystem.line_segments_intersect`` (same arithmetic)."""
+    d1 = _cross(bx1, by1, bx2, by2, ax1, ay1)
+    d2 = _cross(bx1, by1, bx2, by2, ax2, ay2)
+    d3 = _cross(ax1, ay1, ax2, ay2, bx1, by1)
+    d4 = _cross(ax1, ay1, ax2, ay2, bx2, by2)
+
+    proper = (((d1 > 0) & (d2 < 0)) | ((d1 < 0) & (d2 > 0))) & \
+             (((d3 > 0) & (d4 < 0)) | ((d3 < 0) & (d4 > 0)))
+
+    def on_segment(px, py, x1, y1, x2, y2):
+        return (np.minimum(x1, x2) <= px) & (px <= np.maximum(x1, x2)) & \
+               (np.minimum(y1, y2) <= py) & (py <= np.maximum(y1, y2))
+
+    return (proper
+            | ((d1 == 0) & on_segment(ax1, ay1, bx1, by1, bx2, by2))
+            | ((d2 == 0) & on_segment(ax2, ay2, bx1, by1, bx2, by2))
+            | ((d3 == 0) & on_segment(bx1, by1, ax1, ay1, ax2, ay2))
+            | ((d4 == 0) & on_segment(bx2, by2, ax1, ay1, ax2, ay2)))
+
+
+def _segments_hit_aabb(x1, y1, x2, y2, rx, ry, rw, rh):
+    """Vectorized ``PathfindingSystem.line_intersects_aabb``."""
+    def inside(px, py):
+        return (rx <= px) & (px <= rx + rw) & (ry <= py) & (py <= ry + rh)
+
+    hit = inside(x1, y1) | inside(x2, y2)
+    edges = (
+        (rx, ry, rx + rw, ry),
+        (rx + rw, ry, rx + rw, ry + rh),
+        (rx + rw, ry + rh, rx, ry + rh),
+        (rx, ry + rh, rx, ry),
+    )
+    for ex1, ey1, ex2, ey2 in edges:
+        hit |= _segments_intersect(x1, y1, x2, y2, ex1, ey1, ex2, ey2)
+    return hit
+
+
+def _segments_hit_circle(x1, y1, x2, y2, cx, cy, radius):
+    """Vectorized ``PathfindingSystem.line_intersects_circle`` (non-degenerate steps)."""
+    dx, dy = x2 - x1, y2 - y1
+    fx, fy = x1 - cx, y1 - cy
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - radius * radius
+    disc = b * b - 4 * a * c
+    sq = np.sqrt(np.maximum(disc, 0.0))
+    t1 = (-b - sq) / (2 * a)
+    t2 = (-b + sq) / (2 * a)
+    return (disc >= 0) & (((0 <= t1) & (t1 <= 1)) | ((0 <= t2) & (t2 <= 1)))
+
+
+def _unique_triples(a, b, c):
+    """``np.unique`` over (a, b, c) rows via a single packed int64 key."""
+    b_min, c_min = b.min(), c.min()
+    b_span = int(b.max() - b_min) + 1
+    c_span = int(c.max() - c_min) + 1
+    key = (a * b_span + (b - b_min)) * c_span + (c - c_min)
+    key = np.unique(key)
+    c_out = key % c_span + c_min
+    rest = key // c_span
+    return rest // b_span, rest % b_span + b_min, c_out
+
+
+class GridPathfinder:
+    """Rasterized blocking/cost model of one table geometry version.
+
+    Build once per (walls, obstacles, difficult terrain) state — see
+    ``TableSpatialIndex.grid_pathfinder`` — and reuse for any number of
+    path, reachable-set and distance-field queries.
+    """
+
+    def __init__(
+        self,
+        walls: Iterable,
+        obstacles: Iterable,
+        grid_size: float,
+        difficult_cells: Iterable[tuple[int, int]] = (),
+    ):
+        self.grid_size = float(grid_size)
+        self.difficult_cells = frozenset((int(c[0]), int(c[1])) for c in difficult_cells)
+        self._wall_edges = self._rasterize_walls([w for w in walls if w is not None])
+        self._obstacle_ids: list[str] = []
+        self._obstacle_edges = self._rasterize_obstacles([o for o in obstacles if o is not None])
+        if self.difficult_cells:
+            self._difficult = np.array(sorted(self.difficult_cells), dtype=np.int64).reshape(-1, 2)
+        else:
+            self._difficult = np.zeros((0, 2), dtype=np.int64)
+
+    @property
+    def blocked_step_count(self) -> int:
+        return int(self._wall_edges[0].size + self._obstacle_edges[0].size)
+
+    # ── Rasterization ────────────────────────────────────────────────────
+
+    def _step_segments(self, cx, cy):
+        """Centre-to-centre step segments for every direction from cells (cx, cy)."""
+        g = self.grid_size
+        sx = cx * g + g / 2
+        sy = cy * g + g / 2
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            yield d, sx, sy, (cx + dx) * g + g / 2, (cy + dy) * g + g / 2
+
+    def _rasterize_walls(self, walls: list):
+        blocking = [
+            w for w in walls
+            if w.blocks_movement and not (w.is_door and w.door_state == 'open')
+        ]
+        if not blocking:
+            return self._empty_edges()
+        g = self.grid_size
+        coords = np.array([(w.x1, w.y1, w.x2, w.y2) for w in blocking], dtype=np.float64)
+        # Sample each wall every half cell so consecutive samples never skip a cell
+        # by more than one; the dilation below then covers every step that can cross it.
+        lengths = np.hypot(coords[:, 2] - coords[:, 0], coords[:, 3] - coords[:, 1])
+        samples = np.ceil(lengths / (g / 2)).astype(np.int64) + 1
+        owner = np.repeat(np.arange(len(blocking)), samples)
+        first = np.repeat(np.cumsum(samples) - samples, samples)
+        t = (np.arange(owner.size) - first) / np.maximum(samples[owner] - 1, 1)
+        px = coords[owner, 0] + (coords[owner, 2] - coords[owner, 0]) * t
+        py = coords[owner, 1] + (coords[owner, 3] - coords[owner, 1]) * t
+        cells_x = np.floor(px / g).astype(np.int64)
+        cells_y = np.floor(py / g).astype(np.int64)
+
+        span = np.arange(-_WALL_DILATION, _WALL_DILATION + 1)
+        ox, oy = np.meshgrid(span, span)
+        cand_owner = np.repeat(owner, ox.size)
+        cand_x = (cells_x[:, None] + ox.ravel()[None, :]).ravel()
+        cand_y = (cells_y[:, None] + oy.ravel()[None, :]).ravel()
+        cand_owner, cand_x, cand_y = _unique_triples(cand_owner, cand_x, cand_y)
+        bx1, by1, bx2, by2 = (coords[cand_owner, i] for i in range(4))
+
+        hits_d, hits_x, hits_y = [], [], []
+        for d, sx, sy, ex, ey in self._step_segments(cand_x, cand_y):
+            hit = _segments_intersect(sx, sy, ex, ey, bx1, by1, bx2, by2)
+            hits_d.append(np.full(int(hit.sum()), d, dtype=np.int8))
+            hits_x.append(cand_x[hit])
+            hits_y.append(cand_y[hit])
+        return self._dedupe(np.concatenate(hits_d), np.concatenate(hits_x), np.concatenate(hits_y))
+
+    def _rasterize_obstacles(self, obstacles: list):
+        g = self.grid_size
+        shapes = []  # (is_circle, a, b, c, d): circle -> cx, cy, r, _; box -> x, y, w, h
+        cand_x_parts, cand_y_parts, cand_owner_parts = [], [], []
+        for entity in obstacles:
+            ot = getattr(entity, 'obstacle_type', None)
+            if ot not in ('circle', 'rectangle', 'polygon', None):
+                continue
+            px, py = float(entity.position[0]), float(entity.position[1])
+            w = getattr(entity, 'width', 1.0) or 1.0
+            h = getattr(entity, 'height', 1.0) or 1.0
+            if ot == 'circle':
+                r = max(w, h) / 2
+                ccx, ccy = px + w / 2, py + h / 2
+                shapes.append((True, ccx, ccy, r, 0.0))
+                lo_x, lo_y, hi_x, hi_y = ccx - r, ccy - r, ccx + r, ccy + r
+            else:
+                shapes.append((False, px, py, w, h))
+                lo_x, lo_y, hi_x, hi_y = px, py, px + w, py + h
+            # A step crossing the shape starts in, or next to, a cell the shape overlaps
+            xs = np.arange(math.floor(lo_x / g) - 1, math.floor(hi_x / g) + 2)
+            ys = np.arange(math.floor(lo_y / g) - 1, math.floor(hi_y / g) + 2)
+            gx, gy = np.meshgrid(xs, ys)
+            cand_x_parts.append(gx.ravel())
+            cand_y_parts.append(gy.ravel())
+            cand_owner_parts.append(np.full(gx.size, len(self._obstacle_ids), dtype=np.int64))
+            self._obstacle_ids.append(str(entity.entity_id))
+        if not shapes:
+            return self._empty_edges(with_owner=True)
+
+        params = np.array([s[1:] for s in shapes], dtype=np.float64)
+        is_circle = np.array([s[0] for s in shapes], dtype=bool)
+        cand_x = np.concatenate(cand_x_parts)
+        cand_y = np.concatenate(cand_y_parts)
+        cand_owner = np.concatenate(cand_owner_parts)
+        circ = is_circle[cand_owner]
+        a, b, c, d = (params[cand_owner, i] for i in range(4))
+
+        parts_d, parts_x, parts_y, parts_owner = [], [], [], []
+        for direction, sx, sy, ex, ey in self._step_segments(cand_x, cand_y):
+            hit = np.where(
+                circ,
+                _segments_hit_circle(sx, sy, ex, ey, a, b, c),
+                _segments_hit_aabb(sx, sy, ex, ey, a, b, c, d),
+            )
+            parts_d.append(np.full(int(hit.sum()), direction, dtype=np.int8))
+            parts_x.append(cand_x[hit])
+            parts_y.append(cand_y[hit])
+            parts_owner.append(cand_owner[hit])
+        return (np.concatenate(parts_d), np.concatenate(parts_x),
+                np.concatenate(parts_y), np.concatenate(parts_owner))
+
+    @staticmethod
+    def _empty_edges(with_owner: bool = False):
+        empty = (np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        return empty + (np.zeros(0, dtype=np.int64),) if with_owner else empty
+
+    @staticmethod
+    def _dedupe(d, x, y):
+        if d.size == 0:
+            return d, x, y
+        d, x, y = _unique_triples(d.astype(np.int64), x, y)
+        return d.astype(np.int8), x, y
+
+    # ── Window materialization ───────────────────────────────────────────
+
+    def _window_arrays(self, x0: int, y0: int, w: int, h: int, exclude_entity_id: Optional[str]):
+        blocked = np.zeros((len(DIRECTIONS), h, w), dtype=bool)
+        d, x, y = self._wall_edges
+        sel = (x >= x0) & (x < x0 + w) & (y >= y0) & (y < y0 + h)
+        blocked[d[sel], y[sel] - y0, x[sel] - x0] = True
+
+        d, x, y, owner = self._obstacle_edges
+        sel = (x >= x0) & (x < x0 + w) & (y >= y0) & (y < y0 + h)
+        if exclude_entity_id is not None and self._obstacle_ids:
+            excluded = [i for i, oid in enumerate(self._obstacle_ids) if oid == str(exclude_entity_id)]
+            if excluded:
+                sel &= ~np.isin(owner, excluded)
+        blocked[d[sel], y[sel] - y0, x[sel] - x0] = True
+
+        mult = np.ones((h, w), dtype=np.float64)
+        if self._difficult.size:
+            dx, dy = self._difficult[:, 0], self._difficult[:, 1]
+            sel = (dx >= x0) & (dx < x0 + w) & (dy >= y0) & (dy < y0 + h)
+            mult[dy[sel] - y0, dx[sel] - x0] = 2.0
+        return blocked, mult
+
+    @staticmethod
+    def _step_costs(diagonal_rule: str) -> np.ndarray:
+        diag = 5 * math.sqrt(2) if diagonal_rule == 'realistic' else 5.0
+        return np.where(_DIAGONAL, diag, 5.0)
+
+    def _propagate(self, blocked, mult, step_costs, seed: tuple[int, int]):
+        """Relax 8-connected step costs to a fixpoint from ``seed`` (window coords).
+
+        Costs are strictly positive, so callers can apply any cost limit to
+        the result afterwards instead of pruning during relaxation.
+        """
+        h, w = mult.shape
+        dist = np.full((h, w), np.inf)
+        dist[seed[1], seed[0]] = 0.0
+        # Pre-slice per direction: source/destination views and their step cost.
+        plans = []
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            src = (slice(max(0, -dy), h - max(0, dy)), slice(max(0, -dx), w - max(0, dx)))
+            dst = (slice(max(0, dy), h - max(0, -dy)), slice(max(0, dx), w - max(0, -dx)))
+            cost = np.where(blocked[d][src], np.inf, step_costs[d] * mult[dst])
+            plans.append((dist[src], dist[dst], cost))
+        scratch = [np.empty_like(cost) for _, _, cost in plans]
+        previous = np.empty_like(dist)
+        while True:
+            np.copyto(previous, dist)
+            for (src_view, dst_view, cost), buf in zip(plans, scratch):
+                np.add(src_view, cost, out=buf)
+                np.minimum(dst_view, buf, out=dst_view)
+            if np.array_equal(previous, dist):
+                return dist
+
+    # ── Bounds / windows ─────────────────────────────────────────────────
+
+    @staticmethod
+    def _clip_window(lo, hi, x0, y0, x1, y1):
+        """Clip an inclusive cell window to bounds; ``None`` means unbounded."""
+        if lo is not None:
+            x0, y0 = max(x0, lo[0]), max(y0, lo[1])
+        if hi is not None:
+            x1, y1 = min(x1, hi[0]), min(y1, hi[1])
+        return x0, y0, x1, y1
+
+    @staticmethod
+    def _exit_margin(cell, window, lo, hi) -> float:
+        """Chebyshev steps from ``cell`` to the nearest cell outside an open window side."""
+        x0, y0, x1, y1 = window
+        margins = []
+        if lo is None or x0 > lo[0]:
+            margins.append(cell[0] - x0 + 1)
+        if lo is None or y0 > lo[1]:
+            margins.append(cell[1] - y0 + 1)
+        if hi is None or x1 < hi[0]:
+            margins.append(x1 - cell[0] + 1)
+        if hi is None or y1 < hi[1]:
+            margins.append(y1 - cell[1] + 1)
+        return min(margins) if margins else math.inf
+
+    # ── Queries ──────────────────────────────────────────────────────────
+
+    def to_cell(self, pt: tuple) -> tuple[int, int]:
+        return (int(pt[0] / self.grid_size), int(pt[1] / self.grid_size))
+
+    def to_px(self, cell: tuple[int, int]) -> tuple[float, float]:
+        g = self.grid_size
+        return (cell[0] * g + g / 2, cell[1] * g + g / 2)
+
+    def distance_field(
+        self,
+        start: tuple,
+        max_cost: Optional[float] = None,
+        grid_bounds: Optional[tuple] = None,
+        diagonal_rule: str = "standard",
+        exclude_entity_id: Optional[str] = None,
+        bounded_below: bool = True,
+    ) -> tuple[tuple[int, int], np.ndarray]:
+        """Cost (feet) from ``start`` to every cell of a window.
+
+        Returns ``((x0, y0), dist)`` where ``dist[row, col]`` is the cost to
+        cell ``(x0 + col, y0 + row)`` and ``inf`` marks unreachable cells.
+        Needs either ``max_cost`` or ``grid_bounds`` to size the window.
+        """
+        lo = (0, 0) if bounded_below else None
+        hi = (grid_bounds[0], grid_bounds[1]) if grid_bounds else None
+        sx, sy = self.to_cell(start)
+        if max_cost:
+            r = int(max_cost // 5) + 1
+            window = self._clip_window(lo, hi, sx - r, sy - r, sx + r, sy + r)
+        elif lo is not None and hi is not None:
+            window = (lo[0], lo[1], hi[0], hi[1])
+        else:
+            raise ValueError("distance_field needs max_cost or grid_bounds")
+        x0, y0, x1, y1 = window
+        if not (x0 <= sx <= x1 and y0 <= sy <= y1):
+            return (x0, y0), np.full((max(0, y1 - y0 + 1), max(0, x1 - x0 + 1)), np.inf)
+        blocked, mult = self._window_arrays(x0, y0, x1 - x0 + 1, y1 - y0 + 1, exclude_entity_id)
+        dist = self._propagate(blocked, mult, self._step_costs(diagonal_rule), (sx - x0, sy - y0))
+        if max_cost:
+            dist[dist > max_cost] = np.inf
+        return (x0, y0), dist
+
+    def reachable_cells(
+        self,
+        start: tuple,
+        speed: float,
+        diagonal_rule: str = "standard",
+        grid_bounds: Optional[tuple] = None,
+        exclude_entity_id: Optional[str] = None,
+    ) -> list[dict]:
+        """Same contract as ``PathfindingSystem.get_reachable_cells``."""
+        (x0, y0), dist = self.distance_field(
+            start, max_cost=speed, grid_bounds=grid_bounds, diagonal_rule=diagonal_rule,
+            exclude_entity_id=exclude_entity_id, bounded_below=grid_bounds is not None,
+        )
+        sx, sy = self.to_cell(start)
+        rows, cols = np.nonzero(np.isfinite(dist) & (dist <= speed))
+        g = self.grid_size
+        result = []
+        for row, col, cost in zip(rows.tolist(), cols.tolist(), dist[rows, cols].tolist()):
+            cx, cy = x0 + col, y0 + row
+            if (cx, cy) == (sx, sy):
+                continue
+            result.append({'x': cx * g + g / 2, 'y': cy * g + g / 2, 'cost': cost})
+        return result
+
+    def find_path(
+        self,
+        start: tuple,
+        end: tuple,
+        max_distance: Optional[float] = None,
+        exclude_entity_id: Optional[str] = None,
+        grid_bounds: Optional[tuple] = None,
+        diagonal_rule: str = "standard",
+    ) -> Optional[list[tuple]]:
+        """Cell path from a distance field; waypoints match ``find_path_astar``.
+
+        The caller is expected to have handled the trivial cases (same cell,
+        clear line of sight). The search window starts around the start/end
+        box and doubles until the best path found is provably optimal.
+        """
+        lo = (0, 0)
+        hi = (grid_bounds[0], grid_bounds[1]) if grid_bounds else None
+        start_c, end_c = self.to_cell(start), self.to_cell(end)
+        step_costs = self._step_costs(diagonal_rule)
+
+        margin = max(4, max(abs(end_c[0] - start_c[0]), abs(end_c[1] - start_c[1])) // 2)
+        if max_distance:
+            margin = int(max_distance // 5) + 1
+        while True:
+            if max_distance:
+                window = self._clip_window(lo, hi, start_c[0] - margin, start_c[1] - margin,
+                                           start_c[0] + margin, start_c[1] + margin)
+            else:
+                window = self._clip_window(
+                    lo, hi,
+                    min(start_c[0], end_c[0]) - margin, min(start_c[1], end_c[1]) - margin,
+                    max(start_c[0], end_c[0]) + margin, max(start_c[1], end_c[1]) + margin,
+                )
+            x0, y0, x1, y1 = window
+            if not (x0 <= end_c[0] <= x1 and y0 <= end_c[1] <= y1):
+                return None  # only possible when max_distance cannot reach it
+            blocked, mult = self._window_arrays(x0, y0, x1 - x0 + 1, y1 - y0 + 1, exclude_entity_id)
+            dist = self._propagate(blocked, mult, step_costs, (start_c[0] - x0, start_c[1] - y0))
+            cost = dist[end_c[1] - y0, end_c[0] - x0]
+            if max_distance and cost > max_distance:
+                return None
+            exit_bound = 5 * (self._exit_margin(start_c, window, lo, hi)
+                              + self._exit_margin(end_c, window, lo, hi))
+            if max_distance or cost <= exit_bound or math.isinf(exit_bound):
+                if math.isinf(cost):
+                    return None
+                cells = self._backtrack(dist, blocked, mult, step_costs, (x0, y0), start_c, end_c)
+                path: list[tuple] = [start] + [self.to_px(c) for c in cells[1:]]
+                path[-1] = end
+                return path
+            if hi is None and margin >= _MAX_UNBOUNDED_MARGIN:
+                return None
+            margin *= 2
+
+    @staticmethod
+    def _backtrack(dist, blocked, mult, step_costs, origin, start_c, end_c) -> list[tuple[int, int]]:
+        x0, y0 = origin
+        h, w = dist.shape
+        cur = (end_c[0] - x0, end_c[1] - y0)
+        seed = (start_c[0] - x0, start_c[1] - y0)
+        cells = [cur]
+        while cur != seed:
+            here = dist[cur[1], cur[0]]
+            for d, (dx, dy) in enumerate(DIRECTIONS):
+                px, py = cur[0] - dx, cur[1] - dy
+                if not (0 <= px < w and 0 <= py < h) or blocked[d, py, px]:
+                    continue
+                prev = dist[py, px]
+                if abs(prev + step_costs[d] * mult[cur[1], cur[0]] - here) <= _EPS * max(1.0, here):
+                    cur = (px, py)
+                    break
+            else:  # pragma: no cover - a finite dist always has a predecessor
+                raise RuntimeError("distance field backtrack failed")
+            cells.append(cur)
+        cells.reverse()
+        return [(x + x0, y + y0) for x, y in cells]
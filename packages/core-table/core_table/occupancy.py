@@ -0,0 +1,140 @@
+"""Sparse, chunked cell occupancy for VirtualTable layers.
+
+Each layer maps an integer cell (x, y) to at most one entity id. Only
+occupied cells are stored, bucketed into square chunks so rectangle
+queries touch the chunks overlapping the rectangle instead of every cell.
+
+``layer[y][x]`` reads and writes keep working for code written against the
+old dense list-of-lists grid; ``len(layer)`` is the height and
+``len(layer[y])`` the width.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CHUNK_SHIFT = 5  # 32x32 cells per chunk
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+
+Cell = Tuple[int, int]
+
+
+class OccupancyRow:
+    """View of one row of an OccupancyLayer, indexable by x."""
+
+    __slots__ = ('_layer', '_y')
+
+    def __init__(self, layer: 'OccupancyLayer', y: int):
+        self._layer = layer
+        self._y = y
+
+    def __len__(self) -> int:
+        return self._layer.width
+
+    def __getitem__(self, x: int) -> Optional[int]:
+        return self._layer.get(self._layer._index(x, self._layer.width), self._y)
+
+    def __setitem__(self, x: int, entity_id: Optional[int]) -> None:
+        self._layer.set(self._layer._index(x, self._layer.width), self._y, entity_id)
+
+    def __iter__(self) -> Iterator[Optional[int]]:
+        get = self._layer.get
+        return (get(x, self._y) for x in range(self._layer.width))
+
+
+class OccupancyLayer:
+    """Cell -> entity id map for one layer, stored as {chunk: {cell: id}}."""
+
+    __slots__ = ('width', 'height', '_chunks', '_count')
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._chunks: Dict[Cell, Dict[Cell, int]] = {}
+        self._count = 0
+
+    # ── Dense-grid compatibility ─────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> OccupancyRow:
+        return OccupancyRow(self, self._index(y, self.height))
+
+    def __iter__(self) -> Iterator[OccupancyRow]:
+        return (OccupancyRow(self, y) for y in range(self.height))
+
+    @staticmethod
+    def _index(i: int, size: int) -> int:
+        """Normalize a list-style index (negatives count from the end)."""
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError("occupancy index out of range")
+        return i
+
+    # ── Cell access ──────────────────────────────────────────────────────
+
+    def get(self, x: int, y: int) -> Optional[int]:
+        chunk = self._chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return None
+        return chunk.get((x, y))
+
+    def set(self, x: int, y: int, entity_id: Optional[int]) -> None:
+        """Occupy (x, y) with ``entity_id``; None clears the cell."""
+        if entity_id is None:
+            self.clear(x, y)
+            return
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = {}
+        if (x, y) not in chunk:
+            self._count += 1
+        chunk[(x, y)] = entity_id
+
+    def clear(self, x: int, y: int) -> None:
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        chunk = self._chunks.get(key)
+        if chunk is None or chunk.pop((x, y), None) is None:
+            return
+        self._count -= 1
+        if not chunk:
+            del self._chunks[key]
+
+    @property
+    def occupied_count(self) -> int:
+        return self._count
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._chunks)
+
+    def cells(self) -> Iterator[Tuple[Cell, int]]:
+        """Yield ((x, y), entity_id) for every occupied cell, unordered."""
+        for chunk in self._chunks.values():
+            yield from chunk.items()
+
+    def query(self, x1: int, y1: int, x2: int, y2: int) -> List[Tuple[Cell, int]]:
+        """Occupied cells inside the inclusive rectangle, in row-major order."""
+        if x1 > x2 or y1 > y2:
+            return []
+        cx1, cy1 = x1 >> CHUNK_SHIFT, y1 >> CHUNK_SHIFT
+        cx2, cy2 = x2 >> CHUNK_SHIFT, y2 >> CHUNK_SHIFT
+        span = (cx2 - cx1 + 1) * (cy2 - cy1 + 1)
+        if span <= len(self._chunks):
+            chunks = (self._chunks.get((cx, cy)) for cy in range(cy1, cy2 + 1) for cx in range(cx1, cx2 + 1))
+        else:
+            # Fewer occupied chunks than chunks under the rectangle: walk those instead
+            chunks = (c for (cx, cy), c in self._chunks.items() if cx1 <= cx <= cx2 and cy1 <= cy <= cy2)
+        hits = [
+            (cell, entity_id)
+            for chunk in chunks if chunk
+            for cell, entity_id in chunk.items()
+            if x1 <= cell[0] <= x2 and y1 <= cell[1] <= y2
+        ]
+        hits.sort(key=lambda hit: (hit[0][1], hit[0][0]))
+        return hits
+
+
+def make_occupancy(layers: List[str], width: int, height: int) -> Dict[str, OccupancyLayer]:
+    """One empty OccupancyLayer per layer name."""
+    return {layer: OccupancyLayer(width, height) for layer in layers}
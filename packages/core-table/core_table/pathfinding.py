@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import heapq
 import math
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 if TYPE_CHECKING:
-    pass
+    from .grid_pathfinding import GridPathfinder
+
+# Engines accepted by PathfindingSystem's ``engine`` argument.
+PATHFINDING_ENGINES = ('python', 'grid')
 
 
 class SpatialHashGrid:
@@ -19,14 +22,20 @@ class SpatialHashGrid:
         self.cell_size = cell_size
         self._walls: dict[tuple[int, int], list[int]] = {}
         self._obstacles: dict[tuple[int, int], list[int]] = {}
+        # Buckets each item was filed under, so removal never re-derives
+        # geometry from an object that may already have been mutated.
+        self._wall_cells: dict[int, list[tuple[int, int]]] = {}
+        self._obstacle_cells: dict[int, list[tuple[int, int]]] = {}
 
     def _bucket(self, x: float, y: float) -> tuple[int, int]:
         c = self.cell_size
         return (int(x // c), int(y // c))
 
     def insert_wall(self, idx: int, wall) -> None:
-        for cell in self._cells_along(wall.x1, wall.y1, wall.x2, wall.y2):
+        cells = self._cells_along(wall.x1, wall.y1, wall.x2, wall.y2)
+        for cell in cells:
             self._walls.setdefault(cell, []).append(idx)
+        self._wall_cells[idx] = cells
 
     def insert_obstacle(self, idx: int, entity) -> None:
         px, py = entity.position[0], entity.position[1]
@@ -34,9 +43,31 @@ class SpatialHashGrid:
         h = getattr(entity, 'height', 1.0) or 1.0
         min_c = self._bucket(px, py)
         max_c = self._bucket(px + w, py + h)
+        cells = []
         for cx in range(min_c[0], max_c[0] + 1):
             for cy in range(min_c[1], max_c[1] + 1):
                 self._obstacles.setdefault((cx, cy), []).append(idx)
+                cells.append((cx, cy))
+        self._obstacle_cells[idx] = cells
+
+    def remove_wall(self, idx: int) -> None:
+        self._unfile(self._walls, idx, self._wall_cells.pop(idx, ()))
+
+    def remove_obstacle(self, idx: int) -> None:
+        self._unfile(self._obstacles, idx, self._obstacle_cells.pop(idx, ()))
+
+    @staticmethod
+    def _unfile(buckets: dict[tuple[int, int], list[int]], idx: int, cells) -> None:
+        for cell in cells:
+            bucket = buckets.get(cell)
+            if bucket is None:
+                continue
+            try:
+                bucket.remove(idx)
+            except ValueError:
+                continue
+            if not bucket:
+                del buckets[cell]
 
     def query_walls(self, x1: float, y1: float, x2: float, y2: float) -> set[int]:
         result: set[int] = set()
@@ -93,6 +124,184 @@ class SpatialHashGrid:
         return h
 
 
+class TableSpatialIndex:
+    """Long-lived wall/obstacle index owned by a VirtualTable.
+
+    Where ``SpatialHashGrid.build`` makes a throwaway hash per query, this
+    index is updated in place as walls and obstacle entities are added, moved
+    or removed, so movement validation can reuse it across calls.
+
+    ``walls`` and ``obstacles`` are slot lists addressed by the bucket ids in
+    ``grid``; freed slots hold ``None`` and are never returned by a query.
+    ``version`` increases on every geometry change (``wall_version`` and
+    ``obstacle_version`` track each half) so callers can key derived caches
+    on it.
+    """
+
+    OBSTACLE_LAYER = 'obstacles'
+
+    def __init__(self, cell_size: float):
+        self.cell_size = float(cell_size)
+        self.grid = SpatialHashGrid(self.cell_size)
+        self.walls: list = []
+        self.obstacles: list = []
+        self._wall_slots: dict[Any, int] = {}
+        self._obstacle_slots: dict[Any, int] = {}
+        self._free_wall_slots: list[int] = []
+        self._free_obstacle_slots: list[int] = []
+        self.entity_count = 0
+        self.wall_version = 0
+        self.obstacle_version = 0
+        self.rebuild_count = 0
+        self._grid_cache: Optional[tuple[tuple, 'GridPathfinder']] = None
+
+    @property
+    def version(self) -> int:
+        return self.wall_version + self.obstacle_version
+
+    @property
+    def wall_count(self) -> int:
+        return len(self._wall_slots)
+
+    @property
+    def obstacle_count(self) -> int:
+        return len(self._obstacle_slots)
+
+    # ── Walls ────────────────────────────────────────────────────────────
+
+    def add_wall(self, wall) -> None:
+        key = wall.wall_id
+        if key in self._wall_slots:
+            self.update_wall(wall)
+            return
+        slot = self._take_slot(self.walls, self._free_wall_slots, wall)
+        self._wall_slots[key] = slot
+        self.grid.insert_wall(slot, wall)
+        self.wall_version += 1
+
+    def update_wall(self, wall) -> None:
+        """Re-file a wall after its endpoints or flags changed."""
+        slot = self._wall_slots.get(wall.wall_id)
+        if slot is None:
+            self.add_wall(wall)
+            return
+        self.grid.remove_wall(slot)
+        self.walls[slot] = wall
+        self.grid.insert_wall(slot, wall)
+        self.wall_version += 1
+
+    def remove_wall(self, wall_id) -> None:
+        slot = self._wall_slots.pop(wall_id, None)
+        if slot is None:
+            return
+        self.grid.remove_wall(slot)
+        self.walls[slot] = None
+        self._free_wall_slots.append(slot)
+        self.wall_version += 1
+
+    # ── Entities ─────────────────────────────────────────────────────────
+
+    def add_entity(self, entity) -> None:
+        self.entity_count += 1
+        self._file_entity(entity)
+
+    def update_entity(self, entity) -> None:
+        """Re-file an entity after a move, resize or layer change.
+
+        Entities off the obstacle layer are dropped from the obstacle buckets;
+        non-obstacle changes leave the index (and its version) untouched.
+        """
+        key = entity.entity_id
+        slot = self._obstacle_slots.get(key)
+        if slot is not None:
+            self.grid.remove_obstacle(slot)
+            if getattr(entity, 'layer', None) != self.OBSTACLE_LAYER:
+                del self._obstacle_slots[key]
+                self.obstacles[slot] = None
+                self._free_obstacle_slots.append(slot)
+            else:
+                self.obstacles[slot] = entity
+                self.grid.insert_obstacle(slot, entity)
+            self.obstacle_version += 1
+            return
+        self._file_entity(entity)
+
+    def remove_entity(self, entity_id) -> None:
+        self.entity_count = max(0, self.entity_count - 1)
+        slot = self._obstacle_slots.pop(entity_id, None)
+        if slot is None:
+            return
+        self.grid.remove_obstacle(slot)
+        self.obstacles[slot] = None
+        self._free_obstacle_slots.append(slot)
+        self.obstacle_version += 1
+
+    def _file_entity(self, entity) -> None:
+        if getattr(entity, 'layer', None) != self.OBSTACLE_LAYER:
+            return
+        slot = self._take_slot(self.obstacles, self._free_obstacle_slots, entity)
+        self._obstacle_slots[entity.entity_id] = slot
+        self.grid.insert_obstacle(slot, entity)
+        self.obstacle_version += 1
+
+    def grid_pathfinder(self, difficult_cells=(), walls: bool = True, obstacles: bool = True) -> 'GridPathfinder':
+        """Rasterized numpy engine for the current geometry, cached per version.
+
+        Requires numpy; the raster is rebuilt only when walls, obstacles, the
+        difficult-terrain set or the included layers change.
+        """
+        from .grid_pathfinding import GridPathfinder
+
+        difficult = frozenset(difficult_cells)
+        key = (self.version, self.cell_size, difficult, walls, obstacles)
+        if self._grid_cache is not None and self._grid_cache[0] == key:
+            return self._grid_cache[1]
+        engine = GridPathfinder(
+            self.walls if walls else (), self.obstacles if obstacles else (), self.cell_size, difficult,
+        )
+        self._grid_cache = (key, engine)
+        return engine
+
+    # ── Maintenance ──────────────────────────────────────────────────────
+
+    def rebuild(self, walls, entities, cell_size: Optional[float] = None) -> None:
+        """Drop all buckets and re-index from scratch.
+
+        Used on table load, grid-size changes, or when the owner detects its
+        collections were mutated without going through the index.
+        """
+        if cell_size is not None:
+            self.cell_size = float(cell_size)
+        self.grid = SpatialHashGrid(self.cell_size)
+        self.walls = []
+        self.obstacles = []
+        self._wall_slots = {}
+        self._obstacle_slots = {}
+        self._free_wall_slots = []
+        self._free_obstacle_slots = []
+        self.entity_count = 0
+        for wall in walls:
+            slot = len(self.walls)
+            self.walls.append(wall)
+            self._wall_slots[wall.wall_id] = slot
+            self.grid.insert_wall(slot, wall)
+        for entity in entities:
+            self.entity_count += 1
+            self._file_entity(entity)
+        self.wall_version += 1
+        self.obstacle_version += 1
+        self.rebuild_count += 1
+
+    @staticmethod
+    def _take_slot(items: list, free: list[int], item) -> int:
+        if free:
+            slot = free.pop()
+            items[slot] = item
+            return slot
+        items.append(item)
+        return len(items) - 1
+
+
 class PathfindingSystem:
 
     # ── Geometric primitives ─────────────────────────────────────────────────
@@ -181,7 +390,7 @@ class PathfindingSystem:
         spatial_hash: Optional['SpatialHashGrid'] = None,
     ) -> bool:
         candidates = (
-            [walls[i] for i in spatial_hash.query_walls(start[0], start[1], end[0], end[1])]
+            [walls[i] for i in spatial_hash.query_walls(start[0], start[1], end[0], end[1]) if i < len(walls)]
             if spatial_hash else walls
         )
         for wall in candidates:
@@ -257,8 +466,17 @@ class PathfindingSystem:
         grid_bounds: Optional[tuple] = None,  # (max_cols, max_rows) in cells, inclusive
         diagonal_rule: str = "standard",
         spatial_hash: Optional['SpatialHashGrid'] = None,
+        difficult_terrain: Optional[set] = None,
+        engine: str = "python",
+        grid_engine: Optional['GridPathfinder'] = None,
     ) -> Optional[list[tuple]]:
-        """A* on grid. Returns waypoints in pixel space or None if unreachable."""
+        """A* on grid. Returns waypoints in pixel space or None if unreachable.
+
+        ``engine='grid'`` answers the search with the numpy distance-field
+        engine; pass a cached ``grid_engine`` (``TableSpatialIndex.grid_pathfinder``)
+        to skip rasterizing the scene on every call.
+        """
+        PathfindingSystem._check_engine(engine)
         def to_cell(pt):
             return (int(pt[0] / grid_size), int(pt[1] / grid_size))
 
@@ -287,6 +505,14 @@ class PathfindingSystem:
                 not PathfindingSystem.is_path_blocked_by_obstacles(start, end, obstacles, exclude_entity_id, spatial_hash):
             return [start, end]
 
+        if engine == 'grid':
+            if grid_engine is None:
+                grid_engine = PathfindingSystem._build_grid_engine(walls, obstacles, grid_size, difficult_terrain)
+            return grid_engine.find_path(
+                start, end, max_distance=max_distance, exclude_entity_id=exclude_entity_id,
+                grid_bounds=grid_bounds, diagonal_rule=diagonal_rule,
+            )
+
         open_set = [(0.0, start_c)]
         came_from: dict = {}
         g: dict = {start_c: 0.0}
@@ -335,6 +561,8 @@ class PathfindingSystem:
                     # realistic=sqrt(2)*5, standard/alternate=Chebyshev 5ft
                     is_diag = dx != 0 and dy != 0
                     step = 5 * (math.sqrt(2) if (is_diag and diagonal_rule == 'realistic') else 1)
+                    if difficult_terrain and nb in difficult_terrain:
+                        step *= 2
                     new_g = g[current] + step
                     if max_distance and new_g > max_distance:
                         continue
@@ -354,8 +582,22 @@ class PathfindingSystem:
         grid_size: float,
         diagonal_rule: str = "standard",
         spatial_hash: Optional['SpatialHashGrid'] = None,
+        difficult_terrain: Optional[set] = None,
+        grid_bounds: Optional[tuple] = None,  # (max_cols, max_rows) in cells, inclusive
+        engine: str = "python",
+        grid_engine: Optional['GridPathfinder'] = None,
     ) -> list[dict]:
-        """BFS expansion. Returns [{x, y, cost}] for cells reachable within speed."""
+        """BFS expansion. Returns [{x, y, cost}] for cells reachable within speed.
+
+        Without ``grid_bounds`` the expansion is unbounded (legacy behaviour).
+        ``engine='grid'`` computes the same set from a numpy distance field.
+        """
+        PathfindingSystem._check_engine(engine)
+        if engine == 'grid':
+            if grid_engine is None:
+                grid_engine = PathfindingSystem._build_grid_engine(walls, obstacles, grid_size, difficult_terrain)
+            return grid_engine.reachable_cells(start, speed, diagonal_rule=diagonal_rule, grid_bounds=grid_bounds)
+
         def to_cell(pt):
             return (int(pt[0] / grid_size), int(pt[1] / grid_size))
 
@@ -378,6 +620,10 @@ class PathfindingSystem:
                     if dx == 0 and dy == 0:
                         continue
                     nb = (cx + dx, cy + dy)
+                    if grid_bounds and not (
+                        0 <= nb[0] <= grid_bounds[0] and 0 <= nb[1] <= grid_bounds[1]
+                    ):
+                        continue
                     nb_px = to_px(nb)
                     cur_px = to_px(current)
                     if walls and PathfindingSystem.is_path_blocked_by_walls(cur_px, nb_px, walls, spatial_hash):
@@ -387,6 +633,8 @@ class PathfindingSystem:
                     # Consistent with A* step costs: realistic=sqrt(2)*5, standard/alternate=5
                     is_diag = dx != 0 and dy != 0
                     step = 5 * (math.sqrt(2) if (is_diag and diagonal_rule == 'realistic') else 1)
+                    if difficult_terrain and nb in difficult_terrain:
+                        step *= 2
                     new_cost = cost + step
                     if new_cost <= speed and new_cost < best.get(nb, float('inf')):
                         best[nb] = new_cost
@@ -399,3 +647,16 @@ class PathfindingSystem:
             result.append({'x': px[0], 'y': px[1], 'cost': cost})
 
         return result
+
+    # ── Engine selection ─────────────────────────────────────────────────
+
+    @staticmethod
+    def _check_engine(engine: str) -> None:
+        if engine not in PATHFINDING_ENGINES:
+            raise ValueError(f"Unknown pathfinding engine {engine!r}; expected one of {PATHFINDING_ENGINES}")
+
+    @staticmethod
+    def _build_grid_engine(walls: list, obstacles: list, grid_size: float,
+                           difficult_terrain: Optional[set]) -> 'GridPathfinder':
+        from .grid_pathfinding import GridPathfinder
+        return GridPathfinder(walls, obstacles, grid_size, difficult_terrain or ())
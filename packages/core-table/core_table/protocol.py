@@ -1,10 +1,13 @@
 import enum
-import json
+import itertools
+import os
 import time
 import uuid
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from .codec import JSON_CODEC, Frame, MessageCodec, decode_frame, get_codec
+
 
 # BEGIN GENERATED MESSAGE TYPES - run packages/core-table/scripts/generate_protocol_types.py
 class MessageType(enum.Enum):
@@ -96,6 +99,8 @@ class MessageType(enum.Enum):
     STATE_SYNC_RESPONSE = "state_sync_response"
     COMBAT_STATE = "combat_state"
     COMBAT_STATE_REQUEST = "combat_state_request"
+    COMBAT_LOG_REQUEST = "combat_log_request"
+    COMBAT_LOG_RESPONSE = "combat_log_response"
     INITIATIVE_ROLL_RESULT = "initiative_roll_result"
     INITIATIVE_ORDER = "initiative_order"
     TURN_START = "turn_start"
@@ -168,6 +173,8 @@ class MessageType(enum.Enum):
     BATCH = "batch"
     TABLE_SETTINGS_UPDATE = "table_settings_update"
     TABLE_SETTINGS_CHANGED = "table_settings_changed"
+    TABLE_RESUME = "table_resume"
+    TABLE_RESUME_RESPONSE = "table_resume_response"
     WALL_CREATE = "wall_create"
     WALL_UPDATE = "wall_update"
     WALL_REMOVE = "wall_remove"
@@ -194,6 +201,15 @@ class MessageType(enum.Enum):
     CUSTOM = "custom"
 # END GENERATED MESSAGE TYPES
 
+_ID_PREFIX = uuid.uuid4().hex[:16]
+_id_counter = itertools.count(int.from_bytes(os.urandom(4), "big"))
+
+
+def _new_message_id() -> str:
+    """32 hex chars like ``uuid4().hex``: a random per-process prefix plus a counter."""
+    return f"{_ID_PREFIX}{next(_id_counter) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
 @dataclass
 class BatchMessage:
     """Container for batch message processing"""
@@ -201,24 +217,29 @@ class BatchMessage:
     sequence_id: int
     timestamp: float = field(default_factory=time.time)
 
-    def to_json(self) -> str:
-        return json.dumps({
+    def to_dict(self) -> Dict[str, Any]:
+        return {
             'type': 'batch',
-            'messages': [json.loads(msg.to_json()) for msg in self.messages],
+            'messages': [msg.to_dict() for msg in self.messages],
             'seq': self.sequence_id,
             'timestamp': self.timestamp
-        })
+        }
+
+    def to_json(self) -> str:
+        return JSON_CODEC.encode(self.to_dict())
 
     @classmethod
-    def from_json(cls, json_str: str) -> 'BatchMessage':
-        data = json.loads(json_str)
-        messages = [Message.from_json(json.dumps(msg_data)) for msg_data in data.get('messages', [])]
+    def from_dict(cls, data: Dict[str, Any]) -> 'BatchMessage':
         return cls(
-            messages=messages,
+            messages=[Message.from_dict(msg_data) for msg_data in data.get('messages', [])],
             sequence_id=data.get('seq', 0),
             timestamp=data.get('timestamp', time.time())
         )
 
+    @classmethod
+    def from_json(cls, json_str: str) -> 'BatchMessage':
+        return cls.from_dict(JSON_CODEC.decode(json_str))
+
 @dataclass
 class Message:
     type: MessageType
@@ -228,7 +249,7 @@ class Message:
     version: str = "0.1"
     priority: int = 5     # Message priority (5=normal, 2=high, 0=critical)
     sequence_id: Optional[int] = None  # For message ordering and deduplication
-    message_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    message_id: str = field(default_factory=_new_message_id)
     correlation_id: Optional[str] = None
     causation_id: Optional[str] = None
 
@@ -236,8 +257,9 @@ class Message:
         if self.timestamp is None:
             self.timestamp = time.time()
 
-    def to_json(self) -> str:
-        return json.dumps({
+    def to_dict(self) -> Dict[str, Any]:
+        """Wire envelope as a plain dict, ready for any codec."""
+        return {
             'type': self.type.value,
             'data': self.data or {},
             'client_id': self.client_id,
@@ -248,11 +270,17 @@ class Message:
             'message_id': self.message_id,
             'correlation_id': self.correlation_id,
             'causation_id': self.causation_id,
-        })
+        }
+
+    def encode(self, codec: Optional[MessageCodec] = None) -> Frame:
+        """Encode for the wire; JSON text unless a codec is given."""
+        return (codec or get_codec()).encode(self.to_dict())
+
+    def to_json(self) -> str:
+        return JSON_CODEC.encode(self.to_dict())
 
     @classmethod
-    def from_json(cls, json_str: str) -> 'Message':
-        data = json.loads(json_str)
+    def from_dict(cls, data: Dict[str, Any]) -> 'Message':
         return cls(
             type=MessageType(data['type']),
             data=data.get('data', {}),
@@ -261,11 +289,20 @@ class Message:
             version=data.get('version', '1.0'),
             priority=data.get('priority', 5),
             sequence_id=data.get('sequence_id'),
-            message_id=data.get('message_id') or uuid.uuid4().hex,
+            message_id=data.get('message_id') or _new_message_id(),
             correlation_id=data.get('correlation_id'),
             causation_id=data.get('causation_id'),
         )
 
+    @classmethod
+    def decode(cls, frame: Frame, codec: Optional[MessageCodec] = None) -> 'Message':
+        """Inverse of ``encode``: text frames are JSON, bytes use ``codec``."""
+        return cls.from_dict(decode_frame(frame, codec))
+
+    @classmethod
+    def from_json(cls, json_str: str) -> 'Message':
+        return cls.from_dict(JSON_CODEC.decode(json_str))
+
 # Protocol handlers interface for extension
 class ProtocolHandler:
     async def handle_message(self, message: Message, sender=None) -> Optional[Message]:
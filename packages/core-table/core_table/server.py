@@ -3,7 +3,7 @@ import asyncio
 import json
 import logging
 import uuid
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 from .protocol import Message, MessageType
 from .table import VirtualTable
@@ -19,6 +19,8 @@ class TableManager:
         self.tables: Dict[str, VirtualTable] = {}
         self.tables_id: dict[str, VirtualTable] = {}
         self.db_session = db_session  # SQLAlchemy session for database operations
+        # Set by the server to move debounced saves off the event loop: (table_id, session_id) -> queued
+        self.write_behind: Optional[Callable[[str, int], bool]] = None
 
     def set_db_session(self, db_session):
         """Set database session for persistence operations"""
@@ -154,6 +156,12 @@ class TableManager:
         finally:
             self.release_db_session()
 
+    def schedule_save(self, table_id: str, session_id: int) -> bool:
+        """Save a table when timing does not matter; queued when write_behind is set"""
+        if self.write_behind is not None:
+            return self.write_behind(table_id, session_id)
+        return self.save_table(table_id, session_id)
+
     def load_table(self, table_id: str) -> bool:
         """Load a specific table from database"""
         if not self.db_session:
@@ -5,6 +5,11 @@ import uuid
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+from .changes import TableChangeSet
+from .fog import FogRegion, Rect, fog_diff
+from .occupancy import OccupancyLayer, make_occupancy
+from .pathfinding import TableSpatialIndex
+
 logger = logging.getLogger(__name__)
 
 # logging.basicConfig removed - using central logger setup
@@ -94,6 +99,15 @@ class Entity:
 
         self.sprite_id = str(uuid.uuid4())
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        changes = self.__dict__.get('_changes')
+        if changes is not None:
+            if name == 'sprite_id' and value != self.__dict__.get('sprite_id'):
+                changes.entity_rekeyed(self.entity_id, self.sprite_id)
+            else:
+                changes.entity_updated(self.entity_id)
+        object.__setattr__(self, name, value)
+
     def to_dict(self):
         return {
             'entity_id': self.entity_id,
@@ -203,10 +217,9 @@ class VirtualTable:
         self.entities: Dict[int, Entity] = {}
         self.next_entity_id = 1
         self.sprite_to_entity: Dict[str, int] = {}
-        self.fog_rectangles: Dict[str, List[Tuple[Tuple[float, float], Tuple[float, float]]]] = {
-            'hide': [],
-            'reveal': []
-        }
+        # Fogged area; fog_version increases on every change
+        self.fog = FogRegion()
+        self.fog_version = 0
         self.position = (0.0, 0.0)
         self.scale = (1.0, 1.0)
         self.layer_visibility = {layer: True for layer in self.layers}
@@ -230,13 +243,51 @@ class VirtualTable:
         # Difficult terrain cells: set of (col, row) grid coords
         self.difficult_terrain_cells: set = set()
 
-        # Cover zones (shape-based, DM-placed)
-        self.cover_zones: List[CoverZone] = []
+        # Cover zones (shape-based, DM-placed); cover_version increases on every change
+        self.cover_version = 0
+        self._cover_zones: List[CoverZone] = []
 
-        # Initialize grid
-        self.grid = {}
-        for layer in self.layers:
-            self.grid[layer] = [[None for _ in range(width)] for _ in range(height)]
+        # Incremental wall/obstacle index reused by movement validation
+        self.spatial_index = TableSpatialIndex(grid_cell_px)
+
+        # Rows changed since the last database sync (see mark_persisted)
+        self.changes = TableChangeSet()
+
+        # Sparse per-layer cell occupancy (entity id per (x, y))
+        self.grid: Dict[str, OccupancyLayer] = make_occupancy(self.layers, width, height)
+
+    @property
+    def cover_zones(self) -> List[CoverZone]:
+        """DM-placed cover zones. Assign a new list to change them, so ``cover_version`` moves."""
+        return self._cover_zones
+
+    @cover_zones.setter
+    def cover_zones(self, zones: List[CoverZone]) -> None:
+        self._cover_zones = list(zones)
+        self.cover_version += 1
+
+    @property
+    def fog_rectangles(self) -> Dict[str, List[Rect]]:
+        """Fog in the browser's hide/reveal shape: the region's disjoint rectangles, nothing to reveal."""
+        return {'hide': self.fog.rectangles(), 'reveal': []}
+
+    @fog_rectangles.setter
+    def fog_rectangles(self, value: Dict[str, Any]) -> None:
+        value = value or {}
+        self.set_fog(FogRegion.from_hide_reveal(value.get('hide') or [], value.get('reveal') or []))
+
+    def set_fog(self, region: FogRegion) -> Dict[str, List[Rect]]:
+        """Replace the fogged area and return what changed (see ``fog_diff``)."""
+        diff = fog_diff(self.fog, region)
+        if diff['hide'] or diff['reveal']:
+            self.fog = region
+            self.fog_version += 1
+        return diff
+
+    @property
+    def version(self) -> int:
+        """Increases whenever an entity, wall, fog or cover zone changes, by any caller."""
+        return self.changes.version + self.fog_version + self.cover_version
 
     @property
     def pixels_per_unit(self) -> float:
@@ -326,7 +377,10 @@ class VirtualTable:
 
         self.entities[self.next_entity_id] = entity
         self.sprite_to_entity[entity.sprite_id] = self.next_entity_id
-        self.grid[layer][position[1]][position[0]] = self.next_entity_id
+        self.grid[layer].set(position[0], position[1], self.next_entity_id)
+        self.spatial_index.add_entity(entity)
+        self.changes.entity_added(entity.entity_id)
+        object.__setattr__(entity, '_changes', self.changes)
 
         logger.info(f"Added entity {name} (ID: {self.next_entity_id}, Sprite: {entity.sprite_id}) at {position}")
         self.next_entity_id += 1
@@ -354,7 +408,7 @@ class VirtualTable:
         old_layer = entity.layer
 
         # Clear old position
-        self.grid[old_layer][old_y][old_x] = None
+        self.grid[old_layer].clear(old_x, old_y)
 
         # Update entity
         entity.position = new_position
@@ -363,15 +417,16 @@ class VirtualTable:
 
         # Check if new position is free
         logger.info(f"Moving entity {entity_id} (sprite: {entity.sprite_id}) from {entity.position} to {new_position} on layer {entity.layer}")
-        if self.grid[entity.layer][new_position[1]][new_position[0]] is not None:
+        if self.grid[entity.layer].get(new_position[0], new_position[1]) is not None:
             # Rollback
-            self.grid[old_layer][old_y][old_x] = entity_id
+            self.grid[old_layer].set(old_x, old_y, entity_id)
             entity.position = (old_x, old_y)
             entity.layer = old_layer
             raise ValueError("Target position occupied")
 
         # Place in new position
-        self.grid[entity.layer][new_position[1]][new_position[0]] = entity_id
+        self.grid[entity.layer].set(new_position[0], new_position[1], entity_id)
+        self.spatial_index.update_entity(entity)
         logger.info(f"Moved entity {entity_id} (sprite: {entity.sprite_id}) to {new_position} on layer {entity.layer}")
 
     def remove_entity(self, entity_id: int):
@@ -384,7 +439,7 @@ class VirtualTable:
         layer = entity.layer
 
         # Clear from grid
-        self.grid[layer][y][x] = None
+        self.grid[layer].clear(x, y)
 
         # Remove from sprite mapping
         if entity.sprite_id in self.sprite_to_entity:
@@ -392,8 +447,45 @@ class VirtualTable:
 
         # Remove entity
         del self.entities[entity_id]
+        self.spatial_index.remove_entity(entity_id)
+        self.changes.entity_removed(entity_id, entity.sprite_id)
+        entity.__dict__.pop('_changes', None)
         logger.info(f"Removed entity {entity_id} (sprite: {entity.sprite_id})")
 
+    def touch_entity(self, entity: Entity) -> None:
+        """Re-index an entity whose geometry or layer was changed in place."""
+        self.spatial_index.update_entity(entity)
+        self.changes.entity_updated(entity.entity_id)
+
+    def mark_persisted(self) -> None:
+        """Record that the database now holds exactly this table's entities and walls.
+
+        From here on entity attribute writes and table mutations are tracked in
+        ``self.changes`` so the next save can flush only what changed.
+        """
+        for entity in self.entities.values():
+            object.__setattr__(entity, '_changes', self.changes)
+        self.changes.reset(len(self.entities), len(self.walls))
+
+    def pending_changes(self):
+        """Drain tracked changes for a delta save, or None if a full resync is needed."""
+        if not self.changes.is_consistent(len(self.entities), len(self.walls)):
+            return None
+        return self.changes.drain()
+
+    def get_spatial_index(self) -> TableSpatialIndex:
+        """Return the movement index, rebuilding it only if it has gone stale.
+
+        A rebuild happens when the grid size changed or when walls/entities
+        were written straight into the dicts instead of via the table methods.
+        """
+        index = self.spatial_index
+        if (index.cell_size != float(self.grid_cell_px)
+                or index.wall_count != len(self.walls)
+                or index.entity_count != len(self.entities)):
+            index.rebuild(self.walls.values(), self.entities.values(), cell_size=self.grid_cell_px)
+        return index
+
     def is_valid_position(self, position: Tuple[int, int]) -> bool:
         """Check if position is within table bounds"""
         x, y = position
@@ -460,11 +552,10 @@ class VirtualTable:
         # Clear existing entities
         self.entities.clear()
         self.sprite_to_entity.clear()
+        self.changes.invalidate()
 
         # Reinitialize grid
-        self.grid = {}
-        for layer in self.layers:
-            self.grid[layer] = [[None for _ in range(self.width)] for _ in range(self.height)]
+        self.grid = make_occupancy(self.layers, self.width, self.height)
 
         # Load entities from layers
         layers_data = data.get('layers', {})
@@ -494,14 +585,15 @@ class VirtualTable:
                     entity.scale_y = entity_data.get('scale_y', 1.0)
                     entity.sprite_id = entity_data.get('sprite_id', str(uuid.uuid4()))
 
-                    # Add to collections
+                    # Add to collections; later writes move the table's version
                     self.entities[entity_id] = entity
                     self.sprite_to_entity[entity.sprite_id] = entity_id
+                    object.__setattr__(entity, '_changes', self.changes)
 
                     # Place on grid
                     x, y = entity.position
                     if self.is_valid_position((x, y)):
-                        self.grid[layer][y][x] = entity_id
+                        self.grid[layer].set(x, y, entity_id)
                     else:
                         logger.warning(f"Entity {entity_id} has invalid position: {entity.position}")
 
@@ -511,15 +603,15 @@ class VirtualTable:
 
         # Set next entity ID
         self.next_entity_id = max_entity_id + 1
+        self.spatial_index.rebuild(self.walls.values(), self.entities.values(), cell_size=self.grid_cell_px)
 
-        # Load fog rectangles
-        fog_data = data.get('fog_rectangles', {'hide': [], 'reveal': []})
-        self.fog_rectangles = {
-            'hide': fog_data.get('hide', []),
-            'reveal': fog_data.get('reveal', [])
-        }
+        # Load fog: compact bands when present, else hide/reveal rectangles
+        if 'fog' in data:
+            self.set_fog(FogRegion.decode(data['fog']))
+        else:
+            self.fog_rectangles = data.get('fog_rectangles', {'hide': [], 'reveal': []})
 
-        logger.info(f"Loaded table '{self.display_name}' with {len(self.entities)} entities and {len(self.fog_rectangles['hide'])} fog rectangles")
+        logger.info(f"Loaded table '{self.display_name}' with {len(self.entities)} entities and {len(self.fog.bands)} fog bands")
 
     def save_to_disk(self, file_path: str):
         """Save table to disk with 'layers' format"""
@@ -535,7 +627,7 @@ class VirtualTable:
                 'width': self.width,
                 'height': self.height,
                 'layers': self.table_to_layered_dict(),
-                'fog_rectangles': self.fog_rectangles,
+                'fog': self.fog.encode(),
                 'metadata': {
                     'version': '1.0',
                     'entity_count': len(self.entities),
@@ -559,7 +651,13 @@ class VirtualTable:
 
     def add_wall(self, wall) -> None:
         """Add a Wall entity to this table's in-memory wall registry."""
+        replaced = wall.wall_id in self.walls
         self.walls[wall.wall_id] = wall
+        self.spatial_index.add_wall(wall)
+        if replaced:
+            self.changes.wall_updated(wall.wall_id)
+        else:
+            self.changes.wall_added(wall.wall_id)
 
     def get_wall(self, wall_id: str):
         """Return the Wall with the given id, or None."""
@@ -578,63 +676,67 @@ class VirtualTable:
         for key, value in updates.items():
             if key in _allowed:
                 setattr(wall, key, value)
+        self.spatial_index.update_wall(wall)
+        self.changes.wall_updated(wall_id)
         return wall
 
     def remove_wall(self, wall_id: str) -> None:
         """Remove a wall from the in-memory registry."""
-        self.walls.pop(wall_id, None)
+        if self.walls.pop(wall_id, None) is not None:
+            self.changes.wall_removed(wall_id)
+        self.spatial_index.remove_wall(wall_id)
 
     def get_all_walls(self) -> list:
         """Return all walls as a list of dicts (for serialisation)."""
         return [w.to_dict() for w in self.walls.values()]
 
+    # ------------------------------------------------------------------
+    # Cell lookups
+    # ------------------------------------------------------------------
 
-def get_entity_at_position(self, position: Tuple[int, int], layer: Optional[str] = None) -> Optional[Entity]:
-    """Get entity at specific position"""
-    x, y = position
-    if not self.is_valid_position(position):
-        return None
+    def get_entity_at_position(self, position: Tuple[int, int], layer: Optional[str] = None) -> Optional[Entity]:
+        """Get entity at specific position"""
+        x, y = position
+        if not self.is_valid_position(position):
+            return None
 
-    if layer:
-        entity_id = self.grid[layer][y][x]
-        if entity_id:
-            return self.entities.get(entity_id)
-    else:
-        # Check all layers
-        for layer_name in self.layers:
-            entity_id = self.grid[layer_name][y][x]
+        for layer_name in ([layer] if layer else self.layers):
+            layer_grid = self.grid.get(layer_name)
+            entity_id = layer_grid.get(x, y) if layer_grid is not None else None
             if entity_id:
                 return self.entities.get(entity_id)
+        return None
 
-    return None
-
-def get_entities_in_area(self, top_left: Tuple[int, int], bottom_right: Tuple[int, int],
-                        layer: Optional[str] = None) -> List[Entity]:
-    """Get all entities in a rectangular area"""
-    entities = []
-    x1, y1 = top_left
-    x2, y2 = bottom_right
-
-    # Ensure bounds are within table
-    x1 = max(0, min(x1, self.width - 1))
-    y1 = max(0, min(y1, self.height - 1))
-    x2 = max(0, min(x2, self.width - 1))
-    y2 = max(0, min(y2, self.height - 1))
-
-    layers_to_check = [layer] if layer else self.layers
-
-    for layer_name in layers_to_check:
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                entity_id = self.grid[layer_name][y][x]
-                if entity_id:
-                    entity = self.entities.get(entity_id)
-                    if entity and entity not in entities:
-                        entities.append(entity)
+    def get_entities_in_area(self, top_left: Tuple[int, int], bottom_right: Tuple[int, int],
+                             layer: Optional[str] = None) -> List[Entity]:
+        """Get all entities in a rectangular area (inclusive), by layer then row-major cell order"""
+        x1, y1 = top_left
+        x2, y2 = bottom_right
+
+        # Ensure bounds are within table
+        x1 = max(0, min(x1, self.width - 1))
+        y1 = max(0, min(y1, self.height - 1))
+        x2 = max(0, min(x2, self.width - 1))
+        y2 = max(0, min(y2, self.height - 1))
+
+        entities: List[Entity] = []
+        seen = set()
+        for layer_name in ([layer] if layer else self.layers):
+            layer_grid = self.grid.get(layer_name)
+            if layer_grid is None:
+                continue
+            for _cell, entity_id in layer_grid.query(x1, y1, x2, y2):
+                entity = self.entities.get(entity_id) if entity_id else None
+                if entity is not None and entity_id not in seen:
+                    seen.add(entity_id)
+                    entities.append(entity)
+        return entities
 
-    return entities
 
 
+# Kept for callers of the old module-level helpers (they always took the table first)
+get_entity_at_position = VirtualTable.get_entity_at_position
+get_entities_in_area = VirtualTable.get_entities_in_area
 
 
 def create_table_from_json(json_data: str) -> VirtualTable:
@@ -644,7 +746,7 @@ def create_table_from_json(json_data: str) -> VirtualTable:
         entity = Entity.from_dict(e_data)
         if entity.entity_id is not None:
             table.entities[entity.entity_id] = entity
-            table.grid[entity.layer][entity.position[1]][entity.position[0]] = entity.entity_id
+            table.grid[entity.layer].set(entity.position[0], entity.position[1], entity.entity_id)
             table.next_entity_id = max(table.next_entity_id, entity.entity_id + 1)
     logger.info("Created table from JSON data")
     return table
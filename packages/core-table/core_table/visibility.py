@@ -0,0 +1,372 @@
+"""Server-side line of sight.
+
+Port of the desktop client's visibility polygon
+(``GeometricManager.generate_visibility_polygon`` and
+``_vectorized_intersections``). Rays are cast from a viewer towards every
+wall endpoint, with a small angular offset on each side so that a ray can
+slip past a corner. More rays go around the view circle, and towards the
+points where walls cross it. Each ray stops at the nearest sight-blocking
+wall. Sorted by angle, the hit points form the region the viewer can see.
+
+All rays of one viewer are intersected with all nearby walls in one numpy
+operation when numpy is installed. Without numpy, a pure-Python loop produces
+the same points.
+
+``VisibilityCache`` keeps each player's regions, keyed by the position and
+radius of every vision source they have and by the table's wall version. A
+move therefore recomputes only the regions of the player who owns the moved
+token. The source lists themselves are kept until ``VirtualTable.version``
+or the grid changes, so repeated checks do not rescan every entity.
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+Point = Tuple[float, float]
+Segment = Tuple[float, float, float, float]
+
+# Rays spread evenly around the view circle between wall-directed rays.
+CIRCLE_RAYS = 32
+# Offset either side of a ray aimed at a wall endpoint (legacy epsilon).
+CORNER_EPSILON = 1e-3
+# Radius of a light without an explicit one, in game units (a torch).
+DEFAULT_LIGHT_RADIUS_UNITS = 20.0
+_PARALLEL = 1e-10
+_TWO_PI = 2.0 * math.pi
+
+
+def sight_segments(walls: Iterable[Any]) -> List[Segment]:
+    """Segments of the walls that block sight. Open doors and empty slots are skipped."""
+    segments = []
+    for wall in walls:
+        if wall is None or not getattr(wall, 'blocks_sight', True):
+            continue
+        if getattr(wall, 'is_door', False) and getattr(wall, 'door_state', 'closed') == 'open':
+            continue
+        segments.append((float(wall.x1), float(wall.y1), float(wall.x2), float(wall.y2)))
+    return segments
+
+
+def _segments_near(origin: Point, segments: Sequence[Segment], reach: float) -> List[Segment]:
+    ox, oy = origin
+    return [
+        s for s in segments
+        if min(s[0], s[2]) <= ox + reach and max(s[0], s[2]) >= ox - reach
+        and min(s[1], s[3]) <= oy + reach and max(s[1], s[3]) >= oy - reach
+    ]
+
+
+def _ray_angles(origin: Point, segments: Sequence[Segment], reach: float, rays: int) -> List[float]:
+    """Angles to cast: around the circle, at each wall endpoint and where walls cross the circle."""
+    ox, oy = origin
+    targets: List[Point] = []
+    for x1, y1, x2, y2 in segments:
+        for x, y in ((x1, y1), (x2, y2)):
+            if (x - ox) ** 2 + (y - oy) ** 2 <= reach * reach:
+                targets.append((x, y))
+        # Crossings of the reach circle, so a wall leaving view ends on its own line
+        dx, dy = x2 - x1, y2 - y1
+        fx, fy = x1 - ox, y1 - oy
+        a = dx * dx + dy * dy
+        if a == 0.0:
+            continue
+        b = 2.0 * (fx * dx + fy * dy)
+        disc = b * b - 4.0 * a * (fx * fx + fy * fy - reach * reach)
+        if disc < 0.0:
+            continue
+        root = math.sqrt(disc)
+        for u in ((-b - root) / (2.0 * a), (-b + root) / (2.0 * a)):
+            if 0.0 <= u <= 1.0:
+                targets.append((x1 + u * dx, y1 + u * dy))
+
+    angles = [i * _TWO_PI / rays for i in range(rays)]
+    for x, y in targets:
+        if x == ox and y == oy:
+            continue
+        angle = math.atan2(y - oy, x - ox)
+        angles.extend((angle - CORNER_EPSILON, angle, angle + CORNER_EPSILON))
+    return sorted({angle % _TWO_PI for angle in angles})
+
+
+def _cast_python(origin: Point, angles: Sequence[float], segments: Sequence[Segment], reach: float) -> List[Point]:
+    ox, oy = origin
+    points = []
+    for angle in angles:
+        dx, dy = math.cos(angle), math.sin(angle)
+        nearest = reach
+        for x3, y3, x4, y4 in segments:
+            ex, ey = x4 - x3, y4 - y3
+            denom = dx * ey - dy * ex
+            if abs(denom) <= _PARALLEL:
+                continue
+            wx, wy = x3 - ox, y3 - oy
+            t = (wx * ey - wy * ex) / denom
+            u = (wx * dy - wy * dx) / denom
+            if 0.0 < t < nearest and 0.0 <= u <= 1.0:
+                nearest = t
+        points.append((ox + dx * nearest, oy + dy * nearest))
+    return points
+
+
+def _cast_numpy(origin: Point, angles: Sequence[float], segments: Sequence[Segment], reach: float) -> List[Point]:
+    """Every ray against every segment at once (``_vectorized_intersections`` for many rays)."""
+    ox, oy = origin
+    theta = np.asarray(angles, dtype=np.float64)
+    dx, dy = np.cos(theta)[:, None], np.sin(theta)[:, None]
+    nearest = np.full(len(angles), reach)
+    if segments:
+        seg = np.asarray(segments, dtype=np.float64)
+        x3, y3 = seg[:, 0], seg[:, 1]
+        ex, ey = seg[:, 2] - x3, seg[:, 3] - y3
+        wx, wy = x3 - ox, y3 - oy
+        denom = dx * ey - dy * ex
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (wx * ey - wy * ex) / denom
+            u = (wx * dy - wy * dx) / denom
+        hit = (np.abs(denom) > _PARALLEL) & (t > 0.0) & (u >= 0.0) & (u <= 1.0)
+        nearest = np.minimum(nearest, np.where(hit, t, reach).min(axis=1))
+    xs = ox + dx[:, 0] * nearest
+    ys = oy + dy[:, 0] * nearest
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def visibility_polygon(
+    origin: Point,
+    segments: Sequence[Segment],
+    radius: float,
+    rays: int = CIRCLE_RAYS,
+    use_numpy: Optional[bool] = None,
+) -> List[Point]:
+    """Vertices of the region visible from ``origin``, ordered by angle.
+
+    Without walls the polygon surrounds the circle of ``radius``, so it
+    contains every point within ``radius``. ``use_numpy`` forces a backend.
+    The default is numpy when it is installed.
+    """
+    if radius <= 0:
+        return []
+    reach = radius / math.cos(math.pi / rays)
+    nearby = _segments_near(origin, segments, reach)
+    angles = _ray_angles(origin, nearby, reach, rays)
+    if use_numpy is None:
+        use_numpy = np is not None
+    cast = _cast_numpy if use_numpy else _cast_python
+    return cast(origin, angles, nearby, reach)
+
+
+def point_in_polygon(x: float, y: float, polygon: Sequence[Point]) -> bool:
+    """Even-odd test of ``(x, y)`` against ``polygon``."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+@dataclass(frozen=True)
+class VisionSource:
+    """A point that reveals everything in line of sight within ``radius`` pixels."""
+    x: float
+    y: float
+    radius: float
+
+
+@dataclass(frozen=True)
+class VisibleRegion:
+    source: VisionSource
+    polygon: Tuple[Point, ...]
+    bounds: Tuple[float, float, float, float] = field(compare=False)
+
+    @classmethod
+    def compute(cls, source: VisionSource, segments: Sequence[Segment], use_numpy: Optional[bool] = None) -> 'VisibleRegion':
+        polygon = tuple(visibility_polygon((source.x, source.y), segments, source.radius, use_numpy=use_numpy))
+        if polygon:
+            xs = [p[0] for p in polygon]
+            ys = [p[1] for p in polygon]
+            bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            bounds = (source.x, source.y, source.x, source.y)
+        return cls(source, polygon, bounds)
+
+    def contains(self, x: float, y: float) -> bool:
+        source = self.source
+        if (x - source.x) ** 2 + (y - source.y) ** 2 > source.radius ** 2:
+            return False
+        if x == source.x and y == source.y:
+            return True
+        min_x, min_y, max_x, max_y = self.bounds
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        return point_in_polygon(x, y, self.polygon)
+
+
+def _entity_size(entity, cell_px: float) -> Tuple[float, float]:
+    width = getattr(entity, 'width', 0.0) or getattr(entity, 'scale_x', 1.0) * cell_px
+    height = getattr(entity, 'height', 0.0) or getattr(entity, 'scale_y', 1.0) * cell_px
+    return float(width), float(height)
+
+
+def _light_radius(entity, pixels_per_unit: float) -> float:
+    """Pixel radius of a light sprite, or 0 when it is switched off."""
+    meta = entity.metadata
+    if isinstance(meta, str):
+        try:
+            meta = json.loads(meta)
+        except ValueError:
+            meta = None
+    if not isinstance(meta, dict):
+        meta = {}
+    if meta.get('isOn') is False:
+        return 0.0
+    radius = meta.get('radius')
+    if isinstance(radius, (int, float)) and not isinstance(radius, bool):
+        return float(radius)
+    return DEFAULT_LIGHT_RADIUS_UNITS * pixels_per_unit
+
+
+def _sight_radius(entity, pixels_per_unit: float) -> float:
+    """Pixel radius a token sees, preferring game-unit fields as the browser does."""
+    if entity.vision_radius_units is not None:
+        radius = entity.vision_radius_units * pixels_per_unit
+    else:
+        radius = entity.vision_radius or 0.0
+    if entity.has_darkvision:
+        if entity.darkvision_radius_units is not None:
+            radius = max(radius, entity.darkvision_radius_units * pixels_per_unit)
+        elif entity.darkvision_radius is not None:
+            radius = max(radius, entity.darkvision_radius)
+    return float(radius)
+
+
+def vision_sources(table, user_id: Optional[int]) -> List[VisionSource]:
+    """What reveals the table to ``user_id``: their tokens' sight and every lit light.
+
+    Mirrors the browser's vision service. A token counts when ``user_id``
+    controls it and it has a positive sight radius. Tokens see from their
+    centre, and lights shine from their position.
+    """
+    cell_px = table.grid_cell_px
+    ppu = table.pixels_per_unit
+    sources = []
+    for entity in table.entities.values():
+        if entity.layer == 'light':
+            radius = _light_radius(entity, ppu)
+            if radius > 0:
+                sources.append(VisionSource(float(entity.position[0]), float(entity.position[1]), radius))
+        elif user_id is not None and user_id in entity.controlled_by:
+            radius = _sight_radius(entity, ppu)
+            if radius > 0:
+                width, height = _entity_size(entity, cell_px)
+                sources.append(VisionSource(
+                    entity.position[0] + width / 2, entity.position[1] + height / 2, radius,
+                ))
+    sources.sort(key=lambda s: (s.x, s.y, s.radius))
+    return sources
+
+
+def entity_points(entity, cell_px: float) -> List[Point]:
+    """Centre and corners of a sprite. It is seen when any of them is."""
+    x, y = float(entity.position[0]), float(entity.position[1])
+    width, height = _entity_size(entity, cell_px)
+    return [
+        (x + width / 2, y + height / 2),
+        (x, y), (x + width, y), (x, y + height), (x + width, y + height),
+    ]
+
+
+class VisibilityCache:
+    """Visible regions per (table, player), reused until a source moves or a wall changes."""
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self.use_numpy = use_numpy
+        self._entries: Dict[Tuple[str, Optional[int]], Tuple[Any, Tuple, Tuple[VisibleRegion, ...]]] = {}
+        self._sources: Dict[Tuple[str, Optional[int]], Tuple[Tuple, Tuple[VisionSource, ...]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sources(self, table, user_id: Optional[int]) -> Tuple[VisionSource, ...]:
+        """``vision_sources`` of ``user_id``, rebuilt only when an entity or the grid changed."""
+        slot = (str(table.table_id), user_id)
+        # The entity count catches entities written straight into the dict
+        key = (table.version, len(table.entities), table.grid_cell_px, table.pixels_per_unit)
+        entry = self._sources.get(slot)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        sources = tuple(vision_sources(table, user_id))
+        self._sources[slot] = (key, sources)
+        return sources
+
+    def regions(self, table, user_id: Optional[int]) -> Tuple[VisibleRegion, ...]:
+        index = table.get_spatial_index()
+        sources = self.sources(table, user_id)
+        key = (index.wall_version, sources)
+        slot = (str(table.table_id), user_id)
+        entry = self._entries.get(slot)
+        if entry is not None and entry[0] is index and entry[1] == key:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        # Regions reuse unchanged sources from the previous entry
+        previous: Dict[VisionSource, VisibleRegion] = {}
+        if entry is not None and entry[0] is index and entry[1][0] == index.wall_version:
+            previous = {region.source: region for region in entry[2]}
+        segments: Optional[List[Segment]] = None
+        regions = []
+        for source in sources:
+            region = previous.get(source)
+            if region is None:
+                if segments is None:
+                    segments = sight_segments(index.walls)
+                region = VisibleRegion.compute(source, segments, self.use_numpy)
+            regions.append(region)
+        result = tuple(regions)
+        self._entries[slot] = (index, key, result)
+        return result
+
+    def can_see(self, table, user_id: Optional[int], entity) -> bool:
+        """Whether ``user_id`` sees any part of ``entity``. Players always see what they control."""
+        if user_id is not None and user_id in entity.controlled_by:
+            return True
+        return self._sees(self.regions(table, user_id), entity, table.grid_cell_px)
+
+    def visible(self, table, user_id: Optional[int], entities: Iterable[Any]) -> List[Any]:
+        """The ``entities`` that ``user_id`` can see, looking the regions up once."""
+        regions = self.regions(table, user_id)
+        cell_px = table.grid_cell_px
+        return [
+            entity for entity in entities
+            if (user_id is not None and user_id in entity.controlled_by) or self._sees(regions, entity, cell_px)
+        ]
+
+    @staticmethod
+    def _sees(regions: Sequence[VisibleRegion], entity, cell_px: float) -> bool:
+        if not regions:
+            return False
+        points = entity_points(entity, cell_px)
+        return any(region.contains(x, y) for region in regions for x, y in points)
+
+    def forget(self, table_id: Optional[str] = None) -> None:
+        """Drop the regions of one table, or of every table."""
+        if table_id is None:
+            self._entries.clear()
+            self._sources.clear()
+            return
+        for slot in [slot for slot in self._entries if slot[0] == table_id]:
+            del self._entries[slot]
+        for slot in [slot for slot in self._sources if slot[0] == table_id]:
+            del self._sources[slot]
@@ -0,0 +1,63 @@
+"""Benchmarks for protocol wire codecs: encode/decode throughput per message type.
+
+``json-stdlib`` is the previous ``json.dumps``/``json.loads`` path; ``json``
+is the fast JSON backend (orjson when installed) and ``msgpack`` the binary
+one. Encoded size is attached as ``extra_info['frame_bytes']``.
+
+Run:
+    cd packages/core-table
+    pytest tests/bench_codec.py --benchmark-only
+"""
+import pytest
+from core_table.codec import JsonCodec, available_codecs, get_codec
+from core_table.protocol import BatchMessage, Message, MessageType
+
+CODECS = {"json-stdlib": JsonCodec(fast=False)}
+CODECS.update({name: get_codec(name) for name in available_codecs()})
+
+
+def _table_data(n_sprites=200):
+    return {
+        'table_id': 't1', 'name': 'Dungeon', 'width': 100, 'height': 100,
+        'layers': {'tokens': {
+            f'sp-{i}': {
+                'sprite_id': f'sp-{i}', 'name': f'Goblin {i}', 'position': [i % 100, i // 100],
+                'width': 1.0, 'height': 1.0, 'rotation': 0.0, 'texture_path': f'assets/{i}.png',
+                'controlled_by': [1, 2], 'hp': 7, 'max_hp': 7, 'ac': 15,
+            }
+            for i in range(n_sprites)
+        }},
+    }
+
+
+MESSAGES = {
+    'ping': Message(MessageType.PING, {}),
+    'drag_preview': Message(MessageType.SPRITE_DRAG_PREVIEW, {'id': 'sp-17', 'x': 412.5, 'y': 96.25}),
+    'sprite_move': Message(MessageType.SPRITE_MOVE, {
+        'sprite_id': 'sp-17', 'x': 412.5, 'y': 96.25, 'table_id': 't1',
+    }),
+    'table_data': Message(MessageType.TABLE_DATA, _table_data()),
+}
+
+
+@pytest.mark.parametrize('kind', list(MESSAGES))
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_bench_encode(benchmark, codec, kind):
+    encoder, payload = CODECS[codec], MESSAGES[kind].to_dict()
+    frame = benchmark(encoder.encode, payload)
+    benchmark.extra_info['frame_bytes'] = len(frame)
+
+
+@pytest.mark.parametrize('kind', list(MESSAGES))
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_bench_decode(benchmark, codec, kind):
+    decoder = CODECS[codec]
+    frame = decoder.encode(MESSAGES[kind].to_dict())
+    benchmark(decoder.decode, frame)
+    benchmark.extra_info['frame_bytes'] = len(frame)
+
+
+def test_bench_batch_to_json(benchmark):
+    """BatchMessage.to_json builds child dicts directly instead of dumps+loads per child."""
+    batch = BatchMessage([MESSAGES['sprite_move']] * 20, sequence_id=1)
+    benchmark(batch.to_json)
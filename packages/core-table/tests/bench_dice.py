@@ -0,0 +1,44 @@
+"""Benchmarks for dice statistics (core_table.dice).
+
+Ten thousand rolls of a fireball (``8d6``) and an attack (``1d20+7``), and the
+questions an attack preview asks about them.
+
+- ``rolls_scalar[F]``: ``DiceEngine.roll`` in a loop, one ``random.randint``
+  per die
+- ``rolls_batch[F]``: ``RollPlan.sample`` drawing all rolls with numpy
+- ``distribution[F]``: the exact distribution of ``F`` by convolution (the
+  per-formula cache is cleared each round)
+
+Run:
+    cd packages/core-table
+    pytest tests/bench_dice.py --benchmark-only
+"""
+import pytest
+from core_table import dice
+from core_table.dice import DiceEngine
+
+FORMULAS = ['8d6', '1d20+7']
+ROLLS = 10_000
+
+
+@pytest.mark.parametrize('formula', FORMULAS)
+def test_bench_rolls_scalar(benchmark, formula):
+    benchmark(lambda: [DiceEngine.roll(formula).total for _ in range(ROLLS)])
+
+
+@pytest.mark.parametrize('formula', FORMULAS)
+def test_bench_rolls_batch(benchmark, formula):
+    np = pytest.importorskip('numpy')
+    plan, rng = DiceEngine.compile(formula), np.random.default_rng(0)
+    benchmark(plan.sample, ROLLS, rng)
+
+
+@pytest.mark.parametrize('formula', FORMULAS + ['20d10+5'])
+def test_bench_distribution(benchmark, formula):
+    plan = DiceEngine.compile(formula)
+
+    def exact():
+        dice._dice_probabilities.cache_clear()
+        return plan.distribution()
+
+    benchmark(exact)
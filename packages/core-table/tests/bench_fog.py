@@ -0,0 +1,77 @@
+"""Benchmarks for fog of war storage (core_table.fog).
+
+A DM reveals one room on a map that already has N fog rectangles. The old
+model removed every fog_of_war entity and added one entity per rectangle on
+each edit. FogRegion applies the edit to the banded region and produces a
+diff. Persisted sizes are reported in ``extra_info``.
+
+Run:
+    cd packages/core-table
+    pytest tests/bench_fog.py --benchmark-only
+"""
+import json
+import random
+
+import pytest
+from core_table.fog import HIDE_TEXTURE, FogRegion, fog_diff
+from core_table.table import VirtualTable
+
+SIZES = [50, 500]
+
+
+def _rects(n, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        x, y = rng.uniform(0, 4000), rng.uniform(0, 4000)
+        out.append(((x, y), (x + rng.uniform(50, 400), y + rng.uniform(50, 400))))
+    return out
+
+
+@pytest.fixture(params=SIZES, ids=[f"rects={n}" for n in SIZES])
+def hide(request):
+    return _rects(request.param)
+
+
+ROOM = [((1000, 1000), (1300, 1200))]
+
+
+def _entity_edit(table, hide, reveal):
+    for entity_id in [eid for eid, e in table.entities.items() if e.layer == 'fog_of_war']:
+        table.remove_entity(entity_id)
+    for i, (start, end) in enumerate(hide):
+        table.add_entity({'name': f'fog_hide_{i}', 'position': start, 'layer': 'fog_of_war',
+                          'texture_path': HIDE_TEXTURE, 'scale_x': end[0] - start[0],
+                          'scale_y': end[1] - start[1]})
+    for i, (start, end) in enumerate(reveal):
+        table.add_entity({'name': f'fog_reveal_{i}', 'position': start, 'layer': 'fog_of_war',
+                          'texture_path': '__FOG_REVEAL__', 'scale_x': end[0] - start[0],
+                          'scale_y': end[1] - start[1]})
+
+
+def test_bench_fog_edit_entities(benchmark, hide):
+    """Old model: rebuild every fog entity for a one-room reveal."""
+    table = VirtualTable('bench', 4000, 4000)
+    _entity_edit(table, hide, [])
+    benchmark(_entity_edit, table, hide, ROOM)
+    benchmark.extra_info['persisted_bytes'] = len(json.dumps(table.table_to_layered_dict()['fog_of_war']))
+
+
+def test_bench_fog_edit_region(benchmark, hide):
+    """Banded region: reveal one room and compute the broadcast diff."""
+    region = FogRegion.from_rectangles(hide)
+
+    def edit():
+        new = region.reveal(ROOM)
+        return new, fog_diff(region, new)
+
+    new, diff = benchmark(edit)
+    benchmark.extra_info['persisted_bytes'] = len(json.dumps(new.encode()))
+    benchmark.extra_info['diff_rects'] = len(diff['hide']) + len(diff['reveal'])
+
+
+def test_bench_fog_contains(benchmark, hide):
+    region = FogRegion.from_rectangles(hide)
+    rng = random.Random(3)
+    points = [(rng.uniform(0, 4400), rng.uniform(0, 4400)) for _ in range(1000)]
+    benchmark(lambda: sum(region.contains(x, y) for x, y in points))
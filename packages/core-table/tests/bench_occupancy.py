@@ -0,0 +1,87 @@
+"""Benchmarks for VirtualTable cell occupancy: construction, load, area queries.
+
+Peak allocation per table size is attached as ``extra_info['peak_kib']`` so
+``--benchmark-json`` output carries the memory numbers alongside timings.
+
+Run:
+    cd packages/core-table
+    pytest tests/bench_occupancy.py --benchmark-only
+"""
+import random
+import tracemalloc
+
+import pytest
+from core_table.table import LAYER_NAMES, VirtualTable
+
+# name -> (width, height, entities)
+SIZES = {
+    "small": (40, 40, 20),
+    "medium": (500, 500, 100),
+    "large": (3000, 3000, 500),
+    "huge": (20000, 20000, 2000),
+}
+
+
+def _table_dict(width, height, n, seed=0):
+    rng = random.Random(seed)
+    cells = rng.sample(range(width * height), n)
+    return {
+        'name': 'bench', 'width': width, 'height': height,
+        'layers': {'tokens': {
+            str(i + 1): {'name': f'e{i}', 'position': [c % width, c // width]}
+            for i, c in enumerate(cells)
+        }},
+    }
+
+
+def _peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _dense_grid(width, height):
+    """The pre-sparse layout, for comparison on sizes where it is affordable."""
+    return {layer: [[None for _ in range(width)] for _ in range(height)] for layer in LAYER_NAMES}
+
+
+@pytest.mark.parametrize("size", list(SIZES), ids=lambda s: f"table={s}")
+def test_bench_table_construct(benchmark, size):
+    width, height, _ = SIZES[size]
+    benchmark.extra_info['peak_kib'] = _peak_kib(lambda: VirtualTable("bench", width, height))
+    benchmark(VirtualTable, "bench", width, height)
+
+
+@pytest.mark.parametrize("size", list(SIZES), ids=lambda s: f"table={s}")
+def test_bench_table_load(benchmark, size):
+    width, height, n = SIZES[size]
+    data = _table_dict(width, height, n)
+
+    def load():
+        table = VirtualTable("bench", 10, 10)
+        table.from_dict(data)
+        return table
+
+    benchmark.extra_info['peak_kib'] = _peak_kib(load)
+    benchmark(load)
+
+
+# "large" dense is ~500 MiB / ~2 s per table, so the comparison stops at medium
+@pytest.mark.parametrize("size", ["small", "medium"], ids=lambda s: f"table={s}")
+def test_bench_dense_grid_construct(benchmark, size):
+    width, height, _ = SIZES[size]
+    benchmark.extra_info['peak_kib'] = _peak_kib(lambda: _dense_grid(width, height))
+    benchmark.pedantic(_dense_grid, args=(width, height), rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize("size", list(SIZES), ids=lambda s: f"table={s}")
+@pytest.mark.parametrize("span", [20, 400], ids=lambda s: f"span={s}")
+def test_bench_entities_in_area(benchmark, size, span):
+    width, height, n = SIZES[size]
+    table = VirtualTable("bench", 10, 10)
+    table.from_dict(_table_dict(width, height, n))
+    x0, y0 = width // 3, height // 3
+    benchmark(table.get_entities_in_area, (x0, y0), (x0 + span, y0 + span))
@@ -68,3 +68,59 @@ def test_bench_reachable_cells(benchmark, scene):
         (256, 256), 30.0, walls, obstacles, 64.0,
         spatial_hash=sh,
     )
+
+
+# --- numpy grid engine (distance fields) ---
+
+def _grid_engine(walls, obstacles):
+    pytest.importorskip("numpy")
+    from core_table.grid_pathfinding import GridPathfinder
+    return GridPathfinder(walls, obstacles, 64.0)
+
+
+def test_bench_grid_raster_build(benchmark, scene):
+    """Once per table geometry version (cached by TableSpatialIndex)."""
+    walls, obstacles, _ = scene
+    pytest.importorskip("numpy")
+    from core_table.grid_pathfinding import GridPathfinder
+    benchmark(GridPathfinder, walls, obstacles, 64.0)
+
+
+def test_bench_find_path_grid(benchmark, scene):
+    walls, obstacles, sh = scene
+    engine = _grid_engine(walls, obstacles)
+    benchmark(
+        PathfindingSystem.find_path_astar,
+        (0, 0), (512, 512), walls, obstacles, 64.0,
+        spatial_hash=sh, engine='grid', grid_engine=engine,
+    )
+
+
+SPEEDS = [30.0, 120.0]
+
+
+@pytest.mark.parametrize("speed", SPEEDS, ids=[f"speed={int(s)}" for s in SPEEDS])
+def test_bench_reachable_cells_by_speed(benchmark, scene, speed):
+    walls, obstacles, sh = scene
+    benchmark(
+        PathfindingSystem.get_reachable_cells,
+        (256, 256), speed, walls, obstacles, 64.0,
+        spatial_hash=sh,
+    )
+
+
+@pytest.mark.parametrize("speed", SPEEDS, ids=[f"speed={int(s)}" for s in SPEEDS])
+def test_bench_reachable_cells_grid(benchmark, scene, speed):
+    walls, obstacles, sh = scene
+    engine = _grid_engine(walls, obstacles)
+    benchmark(
+        PathfindingSystem.get_reachable_cells,
+        (256, 256), speed, walls, obstacles, 64.0,
+        engine='grid', grid_engine=engine,
+    )
+
+
+def test_bench_distance_field_grid(benchmark, scene):
+    walls, obstacles, _ = scene
+    engine = _grid_engine(walls, obstacles)
+    benchmark(engine.distance_field, (256, 256), grid_bounds=(39, 29))
@@ -0,0 +1,83 @@
+"""Benchmarks for server-side line of sight (core_table.visibility).
+
+One move on a dungeon of N wall segments, with four players that each have
+one token. Only the mover's regions are recomputed. The other players'
+regions come from the cache.
+
+Run:
+    cd packages/core-table
+    pytest tests/bench_visibility.py --benchmark-only
+"""
+import random
+
+import pytest
+from core_table.entities import Wall
+from core_table.table import VirtualTable
+from core_table.visibility import VisibilityCache, sight_segments, visibility_polygon
+
+SIZES = [50, 200, 1000]
+PLAYERS = 4
+
+
+def _dungeon(n_walls, seed=0):
+    rng = random.Random(seed)
+    table = VirtualTable('bench', 4000, 4000)
+    tid = str(table.table_id)
+    for _ in range(n_walls):
+        x, y = rng.uniform(0, 4000), rng.uniform(0, 4000)
+        if rng.random() < 0.5:
+            table.add_wall(Wall(tid, x, y, x + rng.uniform(50, 300), y))
+        else:
+            table.add_wall(Wall(tid, x, y, x, y + rng.uniform(50, 300)))
+    heroes = [
+        table.add_entity({'name': f'hero {p}', 'x': 500 + 900 * p, 'y': 2000, 'layer': 'tokens',
+                          'controlled_by': [p + 1], 'vision_radius': 600})
+        for p in range(PLAYERS)
+    ]
+    goblins = [
+        table.add_entity({'name': f'goblin {i}', 'x': rng.uniform(0, 4000), 'y': rng.uniform(0, 4000),
+                          'layer': 'tokens'})
+        for i in range(100)
+    ]
+    return table, heroes, goblins
+
+
+@pytest.fixture(params=SIZES, ids=[f"walls={n}" for n in SIZES])
+def dungeon(request):
+    return _dungeon(request.param)
+
+
+def _backends():
+    params = ['python']
+    try:
+        import numpy  # noqa: F401
+        params.append('numpy')
+    except ImportError:  # pragma: no cover - exercised only without numpy
+        pass
+    return params
+
+
+@pytest.mark.parametrize('backend', _backends())
+def test_bench_visibility_polygon(benchmark, dungeon, backend):
+    table, heroes, _ = dungeon
+    segments = sight_segments(table.walls.values())
+    x, y = heroes[0].position
+    benchmark(visibility_polygon, (x + 25, y + 25), segments, 600, use_numpy=backend == 'numpy')
+
+
+@pytest.mark.parametrize('backend', _backends())
+def test_bench_visibility_move(benchmark, dungeon, backend):
+    """Move one token, then filter the goblins each player can see."""
+    table, heroes, goblins = dungeon
+    cache = VisibilityCache(use_numpy=backend == 'numpy')
+    hero = heroes[0]
+    step = iter(range(10**9))
+
+    def move_and_filter():
+        offset = next(step) % 20
+        table.move_entity(hero.entity_id, (500 + offset, 2000))
+        return [cache.visible(table, p + 1, goblins) for p in range(PLAYERS)]
+
+    benchmark(move_and_filter)
+    benchmark.extra_info['cache_hits'] = cache.hits
+    benchmark.extra_info['cache_misses'] = cache.misses
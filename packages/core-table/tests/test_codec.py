@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from core_table.codec import CodecError, JsonCodec, available_codecs, decode_frame, get_codec, negotiate
+from core_table.protocol import BatchMessage, Message, MessageType
+
+CODECS = [name for name in ("json", "msgpack") if name in available_codecs()]
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return rng.randint(-2**53, 2**53)
+    if kind == 1:
+        return rng.uniform(-1e6, 1e6)
+    if kind == 2:
+        return "".join(rng.choice("abcxyz ÄΩ✓'\"\\\n") for _ in range(rng.randrange(12)))
+    if kind == 3:
+        return rng.choice([True, False, None])
+    if kind == 4:
+        return rng.randrange(256)
+    if kind == 5:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+    return {f"k{i}": _random_value(rng, depth + 1) for i in range(rng.randrange(5))}
+
+
+def _random_message(rng):
+    return Message(
+        rng.choice(list(MessageType)),
+        {f"f{i}": _random_value(rng) for i in range(rng.randrange(6))},
+        client_id=rng.choice([None, "c1"]),
+        priority=rng.randrange(10),
+        sequence_id=rng.choice([None, rng.randrange(10**6)]),
+        correlation_id=rng.choice([None, "corr"]),
+    )
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_message_round_trips_through_every_codec(name):
+    codec = get_codec(name)
+    rng = random.Random(1234)
+    for _ in range(300):
+        message = _random_message(rng)
+        decoded = Message.decode(message.encode(codec), codec)
+        assert decoded == message
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_frame_type_matches_codec(name):
+    codec = get_codec(name)
+    frame = Message(MessageType.PING).encode(codec)
+    assert isinstance(frame, bytes) is codec.binary
+
+
+def test_stdlib_and_fast_json_agree():
+    rng = random.Random(99)
+    stdlib, fast = JsonCodec(fast=False), get_codec("json")
+    for _ in range(100):
+        payload = _random_message(rng).to_dict()
+        assert stdlib.decode(fast.encode(payload)) == payload
+        assert fast.decode(stdlib.encode(payload)) == payload
+
+
+def test_json_falls_back_for_values_orjson_rejects():
+    payload = {"big": 2**70}
+    assert get_codec("json").decode(get_codec("json").encode(payload)) == payload
+
+
+def test_batch_round_trip():
+    rng = random.Random(7)
+    batch = BatchMessage([_random_message(rng) for _ in range(20)], sequence_id=3)
+    assert BatchMessage.from_json(batch.to_json()) == batch
+
+
+def test_message_ids_are_unique_uuid_shaped():
+    ids = {Message(MessageType.PING).message_id for _ in range(1000)}
+    assert len(ids) == 1000
+    assert all(len(i) == 32 and int(i, 16) >= 0 for i in ids)
+
+
+def test_text_frames_are_json_on_any_connection():
+    frame = Message(MessageType.PING, {"a": 1}).to_json()
+    for name in CODECS:
+        assert Message.decode(frame, get_codec(name)).data == {"a": 1}
+
+
+def test_binary_frame_needs_binary_codec():
+    with pytest.raises(CodecError):
+        decode_frame(b'{"type": "ping"}', get_codec("json"))
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_garbage_raises_codec_error(name):
+    codec = get_codec(name)
+    garbage = b"\xc1\xff{" if codec.binary else "{not json"
+    with pytest.raises(ValueError):
+        codec.decode(garbage)
+
+
+def test_negotiate_prefers_client_order_and_skips_unknown():
+    assert negotiate(["cbor", "json"]) == "json"
+    assert negotiate(["nope"]) is None
+    assert get_codec("nope").name == "json"
+    if "msgpack" in CODECS:
+        assert negotiate(["msgpack", "json"]) == "msgpack"
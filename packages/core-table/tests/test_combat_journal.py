@@ -0,0 +1,137 @@
+"""Tests for reversible combat patches (core_table.combat_journal)."""
+import json
+from typing import Any
+
+from core_table.combat import CombatAction, Combatant, CombatPhase, CombatState
+from core_table.combat_journal import apply_patch, capture, diff_state
+
+
+def make_combatant(**kwargs: Any) -> Combatant:
+    defaults: dict[str, Any] = dict(combatant_id='c1', entity_id='e1', name='Hero', initiative=15.0,
+                                    hp=30, max_hp=30, armor_class=14, spell_slots={'1': 2})
+    defaults.update(kwargs)
+    return Combatant(**defaults)
+
+
+def make_state(n: int = 3) -> CombatState:
+    return CombatState(
+        combat_id='combat', session_id='sess', table_id='t1',
+        phase=CombatPhase.ACTIVE, round_number=1,
+        combatants=[make_combatant(combatant_id=f'c{i}', entity_id=f'e{i}') for i in range(n)],
+    )
+
+
+def make_action(action_id: str, actor_id: str = 'c0') -> CombatAction:
+    return CombatAction(
+        action_id=action_id, combat_id='combat', round_number=1, turn_index=0,
+        actor_id=actor_id, action_type='attack', action_cost='action',
+        state_before={'combatant_id': actor_id, 'hp': 30},
+    )
+
+
+def comparable(state: dict) -> dict:
+    return {k: v for k, v in state.items() if k not in ('state_hash', 'state_version')}
+
+
+def test_patch_holds_only_changed_fields():
+    state = make_state()
+    before = capture(state)
+    state.combatants[1].hp = 22
+    state.combatants[1].spell_slots['1'] -= 1
+    state.combatants[0].has_action = False
+
+    patch = diff_state(before, state.to_dict())
+
+    assert patch['combatants'] == {
+        'c1': {'hp': [30, 22], 'spell_slots': [{'1': 2}, {'1': 1}]},
+        'c0': {'has_action': [True, False]},
+    }
+    assert set(patch) == {'v', 'combatants'}
+    json.dumps(patch)
+
+
+def test_capture_is_not_affected_by_later_mutation():
+    state = make_state()
+    before = capture(state)
+    state.combatants[0].spell_slots['1'] = 0
+    state.combatants[0].controlled_by.append('7')
+    state.round_number = 2
+
+    restored = before.to_state()
+
+    assert restored.combatants[0].spell_slots == {'1': 2}
+    assert restored.combatants[0].controlled_by == []
+    assert restored.round_number == 1
+
+
+def test_apply_and_reverse_round_trip():
+    state = make_state(4)
+    state.action_log.append(make_action('a0'))
+    start = state.to_dict()
+    before = capture(state)
+
+    state.current_turn_index = 2
+    state.round_number = 3
+    state.combatants[2].hp = 0
+    state.combatants[2].is_defeated = True
+    removed = state.combatants.pop(1)
+    state.combatants.append(make_combatant(combatant_id='c9', entity_id='e9'))
+    state.combatants.reverse()
+    state.action_log.append(make_action('a1', 'c2'))
+    end = state.to_dict()
+
+    patch = diff_state(before, end)
+
+    assert patch['removed'] == {'c1': removed.to_dict()}
+    assert set(patch['added']) == {'c9'}
+    assert comparable(apply_patch(start, patch)) == comparable(end)
+    assert comparable(apply_patch(end, patch, reverse=True)) == comparable(start)
+
+
+def test_popped_actions_are_recorded_and_restored():
+    state = make_state()
+    state.action_log.extend([make_action('a0'), make_action('a1')])
+    start = state.to_dict()
+    before = capture(state)
+    state.action_log.pop()
+    state.action_log.append(make_action('a2'))
+
+    patch = diff_state(before, state.to_dict())
+
+    assert [a['action_id'] for a in patch['log'][0]] == ['a1']
+    assert [a['action_id'] for a in patch['log'][1]] == ['a2']
+    undone = apply_patch(state.to_dict(), patch, reverse=True)
+    assert [a['action_id'] for a in undone['action_log']] == ['a0', 'a1']
+    assert comparable(undone) == comparable(start)
+
+
+def test_log_diff_survives_trimmed_to_dict():
+    state = make_state()
+    state.action_log.extend(make_action(f'old{i}') for i in range(60))
+    before = capture(state)
+    state.action_log.append(make_action('new'))
+
+    patch = diff_state(before, state.to_dict())
+
+    assert patch['log'][0] == []
+    assert [a['action_id'] for a in patch['log'][1]] == ['new']
+
+
+def test_replaying_an_applied_patch_changes_nothing():
+    state = make_state()
+    before = capture(state)
+    state.combatants[0].hp = 5
+    state.action_log.append(make_action('a0'))
+    state.combatants.append(make_combatant(combatant_id='c7', entity_id='e7'))
+    after = state.to_dict()
+    patch = diff_state(before, after)
+
+    once = apply_patch(after, patch)
+
+    assert comparable(once) == comparable(after)
+
+
+def test_unchanged_state_gives_empty_patch():
+    state = make_state()
+    state.action_log.append(make_action('a0'))
+    assert diff_state(capture(state), state.to_dict()) == {'v': 1}
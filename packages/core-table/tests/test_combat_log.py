@@ -0,0 +1,125 @@
+"""Tests for the bounded, paged combat action log (core_table.combat_log)."""
+from core_table.combat import CombatAction, CombatPhase, CombatState
+from core_table.combat_journal import capture
+from core_table.combat_log import PAGE_SIZE, CombatActionLog, CombatLogPage
+
+
+def make_action(n: int) -> CombatAction:
+    return CombatAction(
+        action_id=f'a{n}', combat_id='combat', round_number=1, turn_index=0,
+        actor_id='c0', action_type='attack', action_cost='action',
+    )
+
+
+def no_pages(first: int, last: int) -> list:
+    raise AssertionError(f'unexpected page load {first}..{last}')
+
+
+def test_window_stays_bounded_and_seals_whole_pages():
+    log = CombatActionLog()
+    for n in range(10 * PAGE_SIZE):
+        log.append(make_action(n))
+        assert len(log) < 2 * PAGE_SIZE
+
+    pages = log.drain_pages()
+    assert [page.index for page in pages] == list(range(len(pages)))
+    assert all(len(page.actions) == PAGE_SIZE for page in pages)
+    assert [a['log_index'] for page in pages for a in page.actions] == list(range(log.base))
+    assert [a.log_index for a in log] == list(range(log.base, 10 * PAGE_SIZE))
+    assert log.total == 10 * PAGE_SIZE
+    assert log.drain_pages() == []
+
+
+def test_pop_reuses_the_index_and_never_reopens_a_page():
+    log = CombatActionLog([make_action(n) for n in range(2 * PAGE_SIZE)])
+    assert log.base == PAGE_SIZE
+
+    popped = log.pop()
+    log.append(make_action(99))
+
+    assert popped.log_index == log[-1].log_index == 2 * PAGE_SIZE - 1
+    assert [page.index for page in log.pending_pages] == [0]
+
+
+def test_history_pages_backwards_through_memory_and_stored_pages():
+    log = CombatActionLog()
+    for n in range(7 * PAGE_SIZE + 3):
+        log.append(make_action(n))
+    stored = {page.index: page for page in log.drain_pages()}
+    loads = []
+
+    def load_pages(first, last):
+        loads.append((first, last))
+        return [a for index in range(first, last + 1) for a in stored[index].actions]
+
+    seen, before = [], None
+    while True:
+        actions, before = log.history(before, 20, load_pages)
+        seen[:0] = [a['action_id'] for a in actions]
+        if before is None:
+            break
+
+    assert seen == [f'a{n}' for n in range(7 * PAGE_SIZE + 3)]
+    assert loads and all(last < log.base // PAGE_SIZE for _, last in loads)
+
+
+def test_history_of_recent_entries_needs_no_page_load():
+    log = CombatActionLog([make_action(n) for n in range(3 * PAGE_SIZE)])
+
+    actions, before = log.history(None, 5, no_pages)
+
+    assert [a['log_index'] for a in actions] == list(range(3 * PAGE_SIZE - 5, 3 * PAGE_SIZE))
+    assert before == 3 * PAGE_SIZE - 5
+
+
+def test_requeued_pages_are_drained_again_in_order():
+    log = CombatActionLog([make_action(n) for n in range(4 * PAGE_SIZE)])
+    first = log.drain_pages()
+    log.extend(make_action(n) for n in range(4 * PAGE_SIZE, 5 * PAGE_SIZE))
+
+    log.requeue_pages(first)
+
+    assert [page.index for page in log.drain_pages()] == [0, 1, 2, 3]
+
+
+def test_state_round_trip_keeps_window_position():
+    state = CombatState(combat_id='combat', session_id='sess', table_id='t1', phase=CombatPhase.ACTIVE)
+    state.action_log.extend(make_action(n) for n in range(3 * PAGE_SIZE + 4))
+    data = state.to_dict()
+
+    restored = CombatState.from_dict(data)
+
+    assert data['action_log_base'] == state.action_log.base
+    assert len(data['action_log']) == len(state.action_log)
+    assert restored.action_log.base == state.action_log.base
+    assert restored.action_log.pending_pages == ()
+    restored.action_log.append(make_action(500))
+    assert restored.action_log[-1].log_index == 3 * PAGE_SIZE + 4
+
+
+def test_plain_list_is_numbered_from_zero():
+    state = CombatState(combat_id='combat', session_id='sess', table_id='t1',
+                        action_log=[make_action(0), make_action(1)])
+
+    assert isinstance(state.action_log, CombatActionLog)
+    assert [a.log_index for a in state.action_log] == [0, 1]
+
+
+def test_snapshot_restores_pages_sealed_after_capture():
+    state = CombatState(combat_id='combat', session_id='sess', table_id='t1', phase=CombatPhase.ACTIVE)
+    state.action_log.extend(make_action(n) for n in range(2 * PAGE_SIZE - 1))
+    before = capture(state)
+    state.action_log.append(make_action(100))
+    assert state.action_log.drain_pages()
+
+    restored = before.to_state().action_log
+
+    assert restored.base == 0
+    assert len(restored) == 2 * PAGE_SIZE - 1
+    assert restored.pending_pages == ()
+
+
+def test_page_round_trips_through_dict():
+    page = CombatLogPage(index=3, actions=({'action_id': 'x', 'log_index': 3 * PAGE_SIZE},))
+    assert CombatLogPage.from_dict(page.to_dict()) == page
+    assert page.first_index == 3 * PAGE_SIZE
@@ -0,0 +1,94 @@
+"""Tests for the packed, memory-mapped compendium format (core_table.compendium_pack)."""
+import pytest
+from core_table.compendium_pack import (
+    HEADER,
+    CompendiumPack,
+    CompendiumPackError,
+    PackedList,
+    PackedRecords,
+    write_pack,
+)
+
+DOCUMENTS = {
+    'bestiary.json': {
+        'metadata': {'source': 'test', 'count': 2},
+        'monsters': {'Goblin': {'name': 'Goblin', 'cr': '1/4'}, 'Orc': {'name': 'Orc', 'cr': '1/2', 'text': 'Ünïcode’s'}},
+    },
+    'character.json': {'races': [{'name': 'Elf'}, {'name': 'Dwarf'}], 'backgrounds': []},
+    'equipment.json': {'equipment': {'weapons': [{'name': 'Club'}], 'armor': [{'name': 'Hide'}, {'name': 'Leather'}]}},
+}
+
+
+def plain(value):
+    if isinstance(value, (dict, PackedRecords)):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, PackedList)):
+        return [plain(item) for item in value]
+    return value
+
+
+def make_pack(tmp_path, documents=DOCUMENTS):
+    return CompendiumPack(write_pack(tmp_path / 'test.pack', documents, metadata={'version': 'v1'}))
+
+
+def test_documents_round_trip_with_collections_left_packed(tmp_path):
+    pack = make_pack(tmp_path)
+
+    documents = pack.documents()
+
+    assert plain(documents) == DOCUMENTS
+    assert isinstance(documents['bestiary.json']['monsters'], PackedRecords)
+    assert isinstance(documents['character.json']['races'], PackedList)
+    assert isinstance(documents['equipment.json']['equipment']['armor'], PackedList)
+    assert documents['bestiary.json']['metadata'] == {'source': 'test', 'count': 2}
+    assert documents['character.json']['backgrounds'] == []
+    assert pack.metadata == {'version': 'v1'}
+
+
+def test_records_decode_on_demand_into_fresh_objects(tmp_path):
+    monsters = make_pack(tmp_path).documents()['bestiary.json']['monsters']
+
+    first = monsters['Orc']
+    first['cr'] = '30'
+
+    assert monsters['Orc'] == DOCUMENTS['bestiary.json']['monsters']['Orc']
+    assert 'Goblin' in monsters and 'Troll' not in monsters
+    assert monsters.get('Troll') is None
+    assert list(monsters) == ['Goblin', 'Orc']
+
+
+def test_lists_index_and_slice(tmp_path):
+    armor = make_pack(tmp_path).documents()['equipment.json']['equipment']['armor']
+
+    assert len(armor) == 2
+    assert armor[-1] == {'name': 'Leather'}
+    assert armor[:1] == [{'name': 'Hide'}]
+    assert armor == [{'name': 'Hide'}, {'name': 'Leather'}]
+
+
+def test_verify_detects_a_changed_record(tmp_path):
+    path = write_pack(tmp_path / 'test.pack', DOCUMENTS)
+    CompendiumPack(path).verify()
+
+    raw = bytearray(path.read_bytes())
+    position = raw.index(b'Goblin', HEADER.size)
+    raw[position] = ord('H')
+    path.write_bytes(bytes(raw))
+
+    with pytest.raises(CompendiumPackError, match='integrity'):
+        CompendiumPack(path).verify()
+
+
+@pytest.mark.parametrize('content', [b'', b'not a pack at all, really', b'TTCPACK1' + b'\0' * 16])
+def test_rejects_files_that_are_not_packs(tmp_path, content):
+    path = tmp_path / 'bad.pack'
+    path.write_bytes(content)
+    with pytest.raises(CompendiumPackError):
+        CompendiumPack(path)
+
+
+def test_rejects_a_truncated_pack(tmp_path):
+    path = write_pack(tmp_path / 'test.pack', DOCUMENTS)
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(CompendiumPackError, match='truncated'):
+        CompendiumPack(path)
@@ -1,4 +1,5 @@
 """Tests for dice engine."""
+import pytest
 from core_table.dice import DiceEngine
 
 
@@ -62,3 +63,81 @@ def test_roll_zero_modifier():
     result = DiceEngine.roll('1d4')
     assert result.modifier == 0
     assert 1 <= result.total <= 4
+
+
+def test_compile_keeps_formula_semantics():
+    from core_table.dice import RollPlan
+    plan = DiceEngine.compile('2d6+1d8+3')
+    assert DiceEngine.compile('2d6+1d8+3') is plan
+    assert plan.dice == ((2, 6), (1, 8)) and plan.modifier == 3
+    assert (plan.min_total, plan.max_total, plan.mean) == (6, 23, 14.5)
+    # Only a trailing +K/-K is the modifier; a '-' before a group still adds it
+    assert RollPlan.parse('1d20-1d4').dice == ((1, 20), (1, 4))
+    assert RollPlan.parse('1d20-1d4').modifier == 0
+    assert RollPlan.parse('1d8-2').modifier == -2
+
+
+def test_compiled_roll_draws_like_the_scalar_engine():
+    import random
+    random.seed(3)
+    expected = [random.randint(1, 20), random.randint(1, 6), random.randint(1, 6)]
+    random.seed(3)
+    result = DiceEngine.compile('1d20+2d6+1').roll()
+    assert result.rolls == expected
+    assert result.total == sum(expected) + 1
+    assert result.is_critical == (expected[0] == 20)
+
+
+def test_exact_distribution():
+    dist = DiceEngine.compile('2d6+3').distribution()
+    assert abs(sum(dist.values()) - 1) < 1e-12
+    assert min(dist) == 5 and max(dist) == 15
+    assert abs(dist[10] - 6 / 36) < 1e-12
+    assert abs(DiceEngine.compile('1d20').distribution('advantage')[20] - 39 / 400) < 1e-12
+    assert abs(DiceEngine.compile('1d20').distribution('disadvantage')[20] - 1 / 400) < 1e-12
+    assert abs(DiceEngine.compile('1d20+5').probability_at_least(15) - 0.55) < 1e-12
+
+
+def test_exact_distribution_refuses_huge_formulas():
+    with pytest.raises(ValueError):
+        DiceEngine.compile('1000d1000').distribution()
+
+
+def _chi_square(counts: dict, dist: dict, n: int) -> float:
+    return sum((counts.get(total, 0) - n * p) ** 2 / (n * p) for total, p in dist.items())
+
+
+def test_scalar_rolls_match_exact_distribution():
+    import random
+    random.seed(11)
+    n = 20_000
+    dist = DiceEngine.compile('2d6+1d4+1').distribution()
+    counts: dict = {}
+    for _ in range(n):
+        total = DiceEngine.roll('2d6+1d4+1').total
+        counts[total] = counts.get(total, 0) + 1
+    # 13 degrees of freedom: the 99.9th percentile is about 34.5
+    assert _chi_square(counts, dist, n) < 34.5
+
+
+def test_batch_samples_match_exact_distribution():
+    np = pytest.importorskip('numpy')
+    rng = np.random.default_rng(5)
+    n = 200_000
+    for formula, advantage in (('2d6+1d4+1', None), ('1d20+4', 'advantage'), ('1d20+4', 'disadvantage')):
+        plan = DiceEngine.compile(formula)
+        samples = plan.sample(n, rng, advantage=advantage)
+        dist = plan.distribution(advantage)
+        totals, freq = np.unique(samples, return_counts=True)
+        counts = dict(zip(totals.tolist(), freq.tolist()))
+        assert set(counts) <= set(dist)
+        # At most 19 degrees of freedom: the 99.9th percentile is about 43.8
+        assert _chi_square(counts, dist, n) < 43.8
+
+
+def test_batch_sampling_large_dice_pools_in_chunks():
+    np = pytest.importorskip('numpy')
+    plan = DiceEngine.compile('40d6')
+    samples = plan.sample(300_000, np.random.default_rng(2))
+    assert samples.shape == (300_000,)
+    assert abs(samples.mean() - plan.mean) < 0.1
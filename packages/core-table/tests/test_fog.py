@@ -0,0 +1,186 @@
+import asyncio
+import json
+import random
+
+from core_table.actions_core import ActionsCore
+from core_table.fog import HIDE_TEXTURE, REVEAL_TEXTURE, FogRegion, fog_diff, legacy_fog_region
+from core_table.server import TableManager
+from core_table.table import VirtualTable
+
+
+def rect(x1, y1, x2, y2):
+    return ((x1, y1), (x2, y2))
+
+
+def inside(rects, x, y):
+    return any(min(a[0], b[0]) <= x < max(a[0], b[0]) and min(a[1], b[1]) <= y < max(a[1], b[1])
+               for a, b in rects)
+
+
+def random_rects(rng, n):
+    out = []
+    for _ in range(n):
+        x, y = rng.randrange(0, 900), rng.randrange(0, 900)
+        out.append(rect(x, y, x + rng.randrange(1, 200), y + rng.randrange(1, 200)))
+    return out
+
+
+class TestFogRegion:
+    def test_empty(self):
+        region = FogRegion()
+        assert not region
+        assert region.rectangles() == []
+        assert region.area() == 0
+        assert not region.contains(0, 0)
+
+    def test_overlapping_rectangles_merge(self):
+        region = FogRegion.from_rectangles([rect(0, 0, 10, 10), rect(5, 0, 20, 10)])
+        assert region.rectangles() == [((0, 0), (20, 10))]
+        assert region.area() == 200
+
+    def test_corner_order_is_ignored(self):
+        assert FogRegion.from_rectangles([rect(10, 10, 0, 0)]) == FogRegion.from_rectangles([rect(0, 0, 10, 10)])
+
+    def test_degenerate_and_malformed_rectangles_are_skipped(self):
+        assert not FogRegion.from_rectangles([rect(0, 0, 0, 10), 'junk', None, [[1, 2]]])
+
+    def test_canonical_form_is_independent_of_construction(self):
+        split = FogRegion.from_rectangles([rect(0, 0, 10, 5), rect(0, 5, 10, 10)])
+        whole = FogRegion.from_rectangles([rect(0, 0, 10, 10)])
+        assert split == whole
+        assert len(split.bands) == 1
+        assert hash(split) == hash(whole)
+
+    def test_reveal_punches_a_hole(self):
+        region = FogRegion.from_rectangles([rect(0, 0, 30, 30)]).reveal([rect(10, 10, 20, 20)])
+        assert region.area() == 800
+        assert not region.contains(15, 15)
+        assert region.contains(5, 15)
+        assert len(region.bands) == 3
+
+    def test_matches_browser_hide_reveal_semantics(self):
+        rng = random.Random(4)
+        hide, reveal = random_rects(rng, 60), random_rects(rng, 30)
+        region = FogRegion.from_hide_reveal(hide, reveal)
+        for _ in range(2000):
+            x, y = rng.uniform(0, 1100), rng.uniform(0, 1100)
+            assert region.contains(x, y) == (inside(hide, x, y) and not inside(reveal, x, y))
+
+    def test_rectangles_rebuild_the_region(self):
+        rng = random.Random(7)
+        region = FogRegion.from_hide_reveal(random_rects(rng, 40), random_rects(rng, 20))
+        assert FogRegion.from_rectangles(region.rectangles()) == region
+
+    def test_incremental_edits_match_a_fresh_build(self):
+        rng = random.Random(9)
+        hide, reveal = random_rects(rng, 50), random_rects(rng, 25)
+        region = FogRegion()
+        for r in hide:
+            region = region.hide([r])
+        for r in reveal:
+            region = region.reveal([r])
+        assert region == FogRegion.from_hide_reveal(hide, reveal)
+
+    def test_encode_roundtrip(self):
+        rng = random.Random(1)
+        region = FogRegion.from_rectangles(random_rects(rng, 25))
+        assert FogRegion.decode(region.encode()) == region
+
+    def test_decode_rejects_unknown_versions(self):
+        assert not FogRegion.decode({'v': 99, 'bands': [[0, 10, 0, 10]]})
+        assert not FogRegion.decode(None)
+
+
+class TestFogDiff:
+    def test_diff_describes_only_the_edit(self):
+        old = FogRegion.from_rectangles([rect(0, 0, 100, 100)])
+        new = old.reveal([rect(10, 10, 20, 20)]).hide([rect(200, 0, 210, 10)])
+        diff = fog_diff(old, new)
+        assert diff['hide'] == [((200, 0), (210, 10))]
+        assert diff['reveal'] == [((10, 10), (20, 20))]
+
+    def test_applying_the_diff_gives_the_new_region(self):
+        rng = random.Random(11)
+        old = FogRegion.from_hide_reveal(random_rects(rng, 40), random_rects(rng, 10))
+        new = old.hide(random_rects(rng, 5)).reveal(random_rects(rng, 5))
+        diff = fog_diff(old, new)
+        assert old.hide(diff['hide']).reveal(diff['reveal']) == new
+
+    def test_unchanged_fog_has_empty_diff(self):
+        region = FogRegion.from_rectangles([rect(0, 0, 10, 10)])
+        assert fog_diff(region, region.hide([rect(2, 2, 5, 5)])) == {'hide': [], 'reveal': []}
+
+
+class TestVirtualTableFog:
+    def test_fog_rectangles_property(self):
+        table = VirtualTable('Fog', 20, 20)
+        table.fog_rectangles = {'hide': [rect(0, 0, 100, 100)], 'reveal': [rect(0, 0, 50, 100)]}
+        assert table.fog_rectangles == {'hide': [((50, 0), (100, 100))], 'reveal': []}
+        assert table.fog_version == 1
+
+    def test_set_fog_only_bumps_version_on_change(self):
+        table = VirtualTable('Fog', 20, 20)
+        region = FogRegion.from_rectangles([rect(0, 0, 10, 10)])
+        table.set_fog(region)
+        assert table.set_fog(FogRegion.from_rectangles([rect(0, 0, 10, 10)])) == {'hide': [], 'reveal': []}
+        assert table.fog_version == 1
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        table = VirtualTable('Fog', 20, 20)
+        table.fog_rectangles = {'hide': [rect(0, 0, 100, 100), rect(150, 0, 200, 40)], 'reveal': []}
+        path = tmp_path / 'fog.json'
+        table.save_to_disk(str(path))
+        loaded = VirtualTable('Copy', 20, 20)
+        loaded.from_dict(json.loads(path.read_text()))
+        assert loaded.fog == table.fog
+
+    def test_legacy_entities_convert_to_region(self):
+        table = VirtualTable('Fog', 20, 20)
+        table.add_entity({'name': 'h', 'position': (0, 0), 'layer': 'fog_of_war', 'texture_path': HIDE_TEXTURE,
+                          'scale_x': 100, 'scale_y': 100})
+        table.add_entity({'name': 'r', 'position': (0, 0), 'layer': 'fog_of_war', 'texture_path': REVEAL_TEXTURE,
+                          'scale_x': 50, 'scale_y': 100})
+        assert legacy_fog_region(table.entities.values()).rectangles() == [((50, 0), (100, 100))]
+
+
+class TestActionsFog:
+    def setup_method(self):
+        self.manager = TableManager()
+        self.table = self.manager.create_table('Fog', 20, 20)
+        self.table_id = str(self.table.table_id)
+        self.actions = ActionsCore(self.manager)
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+    def test_update_keeps_fog_out_of_entities(self):
+        result = self.run(self.actions.update_fog_rectangles(
+            self.table_id, [rect(0, 0, 100, 100), rect(200, 0, 300, 100)], []))
+        assert result.success
+        assert not self.table.entities
+        assert result.data['fog_version'] == 1
+        assert len(result.data['fog_diff']['hide']) == 2
+
+    def test_edit_applies_on_top_of_current_fog(self):
+        self.run(self.actions.update_fog_rectangles(self.table_id, [rect(0, 0, 100, 100)], []))
+        result = self.run(self.actions.edit_fog(self.table_id, [], [rect(0, 0, 50, 100)]))
+        assert result.data['fog_diff'] == {'hide': [], 'reveal': [((0, 0), (50, 100))]}
+        assert self.table.fog_rectangles['hide'] == [((50, 0), (100, 100))]
+
+    def test_unchanged_edit_is_not_recorded(self):
+        self.run(self.actions.update_fog_rectangles(self.table_id, [rect(0, 0, 100, 100)], []))
+        history = len(self.actions.action_history)
+        result = self.run(self.actions.edit_fog(self.table_id, [rect(10, 10, 20, 20)], []))
+        assert result.success and result.message == 'Fog unchanged'
+        assert len(self.actions.action_history) == history
+        assert self.table.fog_version == 1
+
+    def test_legacy_fog_entities_are_replaced(self):
+        self.table.add_entity({'name': 'h', 'position': (0, 0), 'layer': 'fog_of_war', 'texture_path': HIDE_TEXTURE,
+                               'scale_x': 100, 'scale_y': 100})
+        self.run(self.actions.update_fog_rectangles(self.table_id, [rect(0, 0, 10, 10)], []))
+        assert not self.table.entities
+
+    def test_unknown_table(self):
+        result = self.run(self.actions.edit_fog('missing', [rect(0, 0, 10, 10)], []))
+        assert not result.success
@@ -0,0 +1,168 @@
+"""Parity suite: numpy grid engine vs the Python A*/BFS engine.
+
+The reference runs without a spatial hash so every step is checked against
+every wall and obstacle exactly.
+"""
+import math
+import random
+from types import SimpleNamespace
+
+import pytest
+from core_table.pathfinding import PathfindingSystem, TableSpatialIndex
+
+np = pytest.importorskip("numpy")
+
+from core_table.grid_pathfinding import GridPathfinder  # noqa: E402
+
+GRID = 50.0
+BOUNDS = (19, 14)
+
+
+def _wall(x1, y1, x2, y2, **kwargs):
+    return SimpleNamespace(
+        wall_id=f"w{x1}-{y1}-{x2}-{y2}", x1=x1, y1=y1, x2=x2, y2=y2,
+        blocks_movement=kwargs.get('blocks_movement', True),
+        is_door=kwargs.get('is_door', False), door_state=kwargs.get('door_state', 'closed'),
+    )
+
+
+def _obstacle(entity_id, x, y, w, h, obstacle_type='rectangle'):
+    return SimpleNamespace(entity_id=entity_id, position=(x, y), width=w, height=h,
+                           obstacle_type=obstacle_type, layer='obstacles')
+
+
+def _scene(seed):
+    rng = random.Random(seed)
+    walls = []
+    for _ in range(rng.randint(3, 12)):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 750)
+        if rng.random() < 0.4:
+            # Grid-aligned walls exercise the touching/collinear cases
+            x, y = round(x / GRID) * GRID, round(y / GRID) * GRID
+            length = rng.randint(2, 8) * GRID
+            x2, y2 = (x + length, y) if rng.random() < 0.5 else (x, y + length)
+        else:
+            x2, y2 = x + rng.uniform(-300, 300), y + rng.uniform(-300, 300)
+        walls.append(_wall(x, y, x2, y2, is_door=rng.random() < 0.1, door_state=rng.choice(['open', 'closed'])))
+    obstacles = [
+        _obstacle(f"o{i}", rng.uniform(0, 950), rng.uniform(0, 700), rng.uniform(20, 120), rng.uniform(20, 120),
+                  rng.choice(['rectangle', 'circle', None]))
+        for i in range(rng.randint(0, 5))
+    ]
+    difficult = {(rng.randint(0, BOUNDS[0]), rng.randint(0, BOUNDS[1])) for _ in range(rng.randint(0, 25))}
+    return walls, obstacles, difficult
+
+
+def _cell(pt):
+    return (int(pt[0] / GRID), int(pt[1] / GRID))
+
+
+def _path_cost(path, diagonal_rule, difficult):
+    cells = [_cell(p) for p in path]
+    cost = 0.0
+    for (ax, ay), (bx, by) in zip(cells, cells[1:]):
+        assert max(abs(ax - bx), abs(ay - by)) == 1
+        step = 5 * (math.sqrt(2) if diagonal_rule == 'realistic' and ax != bx and ay != by else 1)
+        cost += step * (2 if (bx, by) in difficult else 1)
+    return cost
+
+
+SEEDS = range(25)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("diagonal_rule", ["standard", "realistic"])
+def test_reachable_cells_parity(seed, diagonal_rule):
+    walls, obstacles, difficult = _scene(seed)
+    start = (random.Random(seed).uniform(0, 1000), random.Random(seed + 1).uniform(0, 750))
+    kwargs = dict(diagonal_rule=diagonal_rule, difficult_terrain=difficult, grid_bounds=BOUNDS)
+    expected = PathfindingSystem.get_reachable_cells(start, 40, walls, obstacles, GRID, **kwargs)
+    actual = PathfindingSystem.get_reachable_cells(start, 40, walls, obstacles, GRID, engine='grid', **kwargs)
+    exp = {(c['x'], c['y']): c['cost'] for c in expected}
+    act = {(c['x'], c['y']): c['cost'] for c in actual}
+    assert exp.keys() == act.keys()
+    for key, cost in exp.items():
+        assert act[key] == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_reachable_cells_parity_unbounded(seed):
+    walls, obstacles, _ = _scene(seed)
+    start = (75, 75)
+    expected = PathfindingSystem.get_reachable_cells(start, 30, walls, obstacles, GRID)
+    actual = PathfindingSystem.get_reachable_cells(start, 30, walls, obstacles, GRID, engine='grid')
+    assert {(c['x'], c['y']): c['cost'] for c in expected} == {(c['x'], c['y']): c['cost'] for c in actual}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("diagonal_rule", ["standard", "realistic"])
+def test_find_path_parity(seed, diagonal_rule):
+    walls, obstacles, difficult = _scene(seed)
+    rng = random.Random(seed * 7)
+    engine = GridPathfinder(walls, obstacles, GRID, difficult)
+    for _ in range(6):
+        start = (rng.uniform(0, 1000), rng.uniform(0, 750))
+        end = (rng.uniform(0, 1000), rng.uniform(0, 750))
+        max_distance = rng.choice([None, None, 60, 150])
+        kwargs = dict(max_distance=max_distance, grid_bounds=BOUNDS, diagonal_rule=diagonal_rule,
+                      difficult_terrain=difficult, exclude_entity_id='o0')
+        expected = PathfindingSystem.find_path_astar(start, end, walls, obstacles, GRID, **kwargs)
+        actual = PathfindingSystem.find_path_astar(start, end, walls, obstacles, GRID,
+                                                   engine='grid', grid_engine=engine, **kwargs)
+        assert (expected is None) == (actual is None)
+        if expected is None:
+            continue
+        assert actual[0] == start and actual[-1] == end
+        if len(expected) == 2 and len(actual) == 2:
+            continue  # same cell or direct line-of-sight shortcut, shared by both engines
+        assert _path_cost(actual, diagonal_rule, difficult) == pytest.approx(
+            _path_cost(expected, diagonal_rule, difficult))
+        centers = [engine.to_px(_cell(p)) for p in actual]
+        for a, b in zip(centers, centers[1:]):
+            assert not PathfindingSystem.is_path_blocked_by_walls(a, b, walls)
+            assert not PathfindingSystem.is_path_blocked_by_obstacles(a, b, obstacles, 'o0')
+
+
+def test_find_path_unreachable_enclosure():
+    # Box the target cell in completely
+    walls = [_wall(500, 500, 550, 500), _wall(550, 500, 550, 550), _wall(550, 550, 500, 550), _wall(500, 550, 500, 500)]
+    assert PathfindingSystem.find_path_astar((25, 25), (525, 525), walls, [], GRID, grid_bounds=BOUNDS) is None
+    assert PathfindingSystem.find_path_astar((25, 25), (525, 525), walls, [], GRID, grid_bounds=BOUNDS,
+                                             engine='grid') is None
+
+
+def test_distance_field_marks_walled_off_cells_unreachable():
+    wall = _wall(100, 0, 100, 1000)
+    engine = GridPathfinder([wall], [], GRID)
+    (x0, y0), dist = engine.distance_field((25, 25), grid_bounds=BOUNDS)
+    assert (x0, y0) == (0, 0)
+    assert dist.shape == (BOUNDS[1] + 1, BOUNDS[0] + 1)
+    assert np.isfinite(dist[:, :2]).all()
+    assert np.isinf(dist[:, 2:]).all()
+
+
+def test_distance_field_requires_window():
+    with pytest.raises(ValueError):
+        GridPathfinder([], [], GRID).distance_field((25, 25))
+
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        PathfindingSystem.find_path_astar((0, 0), (100, 100), [], [], GRID, engine='rust')
+
+
+def test_index_caches_grid_engine_per_version():
+    index = TableSpatialIndex(GRID)
+    index.add_wall(_wall(100, 0, 100, 500))
+    engine = index.grid_pathfinder()
+    assert index.grid_pathfinder() is engine
+    index.add_wall(_wall(300, 0, 300, 500))
+    assert index.grid_pathfinder() is not engine
+    assert index.grid_pathfinder({(1, 1)}) is not index.grid_pathfinder()
+
+
+def test_excluded_obstacle_does_not_block():
+    blocker = _obstacle('mover', 100, 0, 50, 1000)
+    engine = GridPathfinder([], [blocker], GRID)
+    assert engine.find_path((25, 25), (225, 25), grid_bounds=BOUNDS) is None
+    assert engine.find_path((25, 25), (225, 25), grid_bounds=BOUNDS, exclude_entity_id='mover') is not None
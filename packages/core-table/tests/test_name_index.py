@@ -0,0 +1,81 @@
+"""Tests for the fuzzy name index (core_table.compendiums.name_index)."""
+import random
+import string
+from difflib import SequenceMatcher
+
+import pytest
+from core_table.compendiums.name_index import FuzzyNameIndex
+
+WORDS = ['dragon', 'red', 'young', 'adult', 'goblin', 'boss', 'orc', 'war', 'chief', 'giant', 'fire', 'frost',
+         'hill', 'stone', 'elemental', 'air', 'water', 'earth', 'skeleton', 'zombie', 'ogre', 'owlbear', 'imp']
+
+
+def scan(names, query, threshold):
+    """Every name scored, as a linear SequenceMatcher pass would (first added wins ties)."""
+    scored = []
+    for position, name in enumerate(names):
+        score = SequenceMatcher(None, query.lower(), name.lower()).ratio()
+        if score > threshold:
+            scored.append((-score, position, name))
+    return [(name, -negative) for negative, _, name in sorted(scored)]
+
+
+def typo(rng, name):
+    chars = list(name)
+    edit = rng.randrange(4)
+    at = rng.randrange(len(chars))
+    if edit == 0:
+        del chars[at]
+    elif edit == 1:
+        chars.insert(at, rng.choice(string.ascii_lowercase))
+    elif edit == 2:
+        chars[at] = rng.choice(string.ascii_lowercase)
+    elif at + 1 < len(chars):
+        chars[at], chars[at + 1] = chars[at + 1], chars[at]
+    return ''.join(chars)
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    rng = random.Random(7)
+    names = list(dict.fromkeys(
+        ' '.join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(600)
+    ))
+    queries = [typo(rng, rng.choice(names)) for _ in range(150)]
+    queries += [' '.join(rng.sample(WORDS, 2)) for _ in range(50)]
+    queries += ['', 'x', 'zzzz zzzz', 'a' * 40]
+    return names, queries
+
+
+@pytest.mark.parametrize('threshold', [0.85, 0.7, 0.5, 0.0])
+def test_best_matches_a_sequence_matcher_scan(corpus, threshold):
+    names, queries = corpus
+    index = FuzzyNameIndex({name: name.upper() for name in names})
+
+    for query in queries:
+        expected = scan(names, query, threshold)
+        assert index.best(query, threshold) == (expected[0][0].upper() if expected else None), query
+
+
+def test_ranked_candidates_match_a_scan_in_order(corpus):
+    names, queries = corpus
+    index = FuzzyNameIndex({name: name for name in names})
+
+    for query in queries:
+        assert index.ranked(query, 0.6, limit=5) == scan(names, query, 0.6)[:5], query
+
+
+def test_ties_go_to_the_name_added_first():
+    index = FuzzyNameIndex({'goblin a': 'first', 'goblin b': 'second'})
+    assert index.ranked('goblin c', 0.5) == [('first', 0.875), ('second', 0.875)]
+    assert index.best('goblin c', 0.5) == 'first'
+
+
+def test_threshold_is_exclusive_and_empty_names_only_match_empty_queries():
+    index = FuzzyNameIndex({'abcd': 'abcd', '': 'blank'})
+    assert index.best('abce', 0.75) is None  # ratio is exactly 0.75
+    assert index.best('abce', 0.74) == 'abcd'
+    assert index.best('', 0.85) == 'blank'
+    assert index.best('abcd', 1.0) is None
+    assert FuzzyNameIndex({'goblin': 'Goblin'}).best('gob', 0.0) == 'Goblin'
+    assert len(index) == 2
@@ -1,5 +1,5 @@
 import pytest
-from core_table.pathfinding import PathfindingSystem
+from core_table.pathfinding import PathfindingSystem, TableSpatialIndex
 
 
 def test_segments_cross():
@@ -93,3 +93,86 @@ def test_reachable_cells_returns_cells():
     )
     assert len(cells) > 0
     assert all(c['cost'] <= 30 for c in cells)
+
+
+class IndexedWall(FakeWall):
+    def __init__(self, wall_id, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wall_id = wall_id
+
+
+class IndexedObstacle:
+    def __init__(self, entity_id, x, y, w=50, h=50, layer='obstacles'):
+        self.entity_id = entity_id
+        self.position = (x, y)
+        self.width, self.height = w, h
+        self.layer = layer
+        self.obstacle_type = 'rectangle'
+
+
+def _blocked(index, start, end):
+    return PathfindingSystem.is_path_blocked_by_walls(start, end, index.walls, index.grid)
+
+
+def test_spatial_index_add_and_remove_wall():
+    index = TableSpatialIndex(50)
+    index.add_wall(IndexedWall('w1', 100, 0, 100, 500))
+    assert _blocked(index, (25, 250), (200, 250))
+    index.remove_wall('w1')
+    assert index.wall_count == 0
+    assert not _blocked(index, (25, 250), (200, 250))
+
+
+def test_spatial_index_update_wall_refiles_moved_geometry():
+    index = TableSpatialIndex(50)
+    wall = IndexedWall('w1', 100, 0, 100, 500)
+    index.add_wall(wall)
+    wall.x1 = wall.x2 = 900
+    index.update_wall(wall)
+    assert not _blocked(index, (25, 250), (200, 250))
+    assert _blocked(index, (800, 250), (1000, 250))
+
+
+def test_spatial_index_reuses_freed_slots():
+    index = TableSpatialIndex(50)
+    index.add_wall(IndexedWall('w1', 0, 0, 10, 0))
+    index.remove_wall('w1')
+    index.add_wall(IndexedWall('w2', 0, 0, 10, 0))
+    assert len(index.walls) == 1
+
+
+def test_spatial_index_tracks_obstacle_moves_and_layer_changes():
+    index = TableSpatialIndex(50)
+    obstacle = IndexedObstacle(1, 100, 100)
+    index.add_entity(obstacle)
+    assert index.obstacle_count == 1
+    assert PathfindingSystem.is_path_blocked_by_obstacles(
+        (25, 125), (300, 125), index.obstacles, spatial_hash=index.grid)
+
+    obstacle.position = (600, 600)
+    index.update_entity(obstacle)
+    assert not PathfindingSystem.is_path_blocked_by_obstacles(
+        (25, 125), (300, 125), index.obstacles, spatial_hash=index.grid)
+
+    obstacle.layer = 'tokens'
+    index.update_entity(obstacle)
+    assert index.obstacle_count == 0
+
+
+def test_spatial_index_ignores_non_obstacle_entities():
+    index = TableSpatialIndex(50)
+    index.add_entity(IndexedObstacle(1, 100, 100, layer='tokens'))
+    assert index.obstacle_count == 0
+    assert index.entity_count == 1
+    assert index.version == 0
+
+
+def test_spatial_index_version_bumps_on_geometry_change():
+    index = TableSpatialIndex(50)
+    v0 = index.version
+    index.add_wall(IndexedWall('w1', 0, 0, 10, 0))
+    v1 = index.version
+    index.add_entity(IndexedObstacle(1, 0, 0))
+    v2 = index.version
+    index.remove_wall('missing')
+    assert v0 < v1 < v2 == index.version
@@ -2,7 +2,7 @@ import uuid
 
 import pytest
 from core_table.entities import Wall
-from core_table.table import Entity, VirtualTable
+from core_table.table import CoverZone, Entity, VirtualTable
 
 
 def make_table(w: int = 20, h: int = 20) -> VirtualTable:
@@ -198,6 +198,205 @@ class TestWalls:
         assert len(t.get_all_walls()) == 2
 
 
+class TestCoverZones:
+    def test_assigning_zones_bumps_cover_version(self):
+        t = make_table()
+        assert t.cover_zones == [] and t.cover_version == 0
+        zone = CoverZone(zone_id='z1', shape_type='rect', coords=[0, 0, 10, 10])
+        t.cover_zones = [zone]
+        assert t.cover_zones == [zone]
+        assert t.cover_version == 1
+
+
+class TestSpatialIndex:
+    def test_wall_crud_updates_index(self):
+        t = make_table()
+        w = Wall(table_id='test', x1=0, y1=0, x2=10, y2=0)
+        t.add_wall(w)
+        assert t.spatial_index.wall_count == 1
+        before = t.spatial_index.version
+        t.update_wall(w.wall_id, {'x2': 40})
+        assert t.spatial_index.version > before
+        t.remove_wall(w.wall_id)
+        assert t.spatial_index.wall_count == 0
+
+    def test_obstacle_lifecycle_updates_index(self):
+        t = make_table()
+        e = add_entity(t, 2, 2, layer='obstacles', width=1, height=1)
+        assert t.spatial_index.obstacle_count == 1
+        t.move_entity(entity_id(e), (5, 5))
+        assert t.spatial_index.obstacles[0].position == (5, 5)
+        t.remove_entity(entity_id(e))
+        assert t.spatial_index.obstacle_count == 0
+
+    def test_get_spatial_index_is_reused_without_rebuild(self):
+        t = make_table()
+        t.add_wall(Wall(table_id='test', x1=0, y1=0, x2=10, y2=0))
+        add_entity(t, 1, 1, layer='obstacles')
+        index = t.get_spatial_index()
+        rebuilds = index.rebuild_count
+        assert t.get_spatial_index() is index
+        assert index.rebuild_count == rebuilds
+
+    def test_direct_dict_writes_trigger_rebuild(self):
+        t = make_table()
+        w = Wall(table_id='test', x1=0, y1=0, x2=10, y2=0)
+        t.walls[w.wall_id] = w
+        assert t.get_spatial_index().wall_count == 1
+
+    def test_grid_size_change_triggers_rebuild(self):
+        t = make_table()
+        t.grid_cell_px = 70.0
+        assert t.get_spatial_index().cell_size == 70.0
+
+
+class TestOccupancy:
+    def test_huge_table_allocates_nothing_up_front(self):
+        t = make_table(100_000, 100_000)
+        assert all(layer.occupied_count == 0 and layer.chunk_count == 0 for layer in t.grid.values())
+        e = add_entity(t, 99_999, 99_999)
+        assert t.grid['tokens'].get(99_999, 99_999) == e.entity_id
+        assert t.grid['tokens'].chunk_count == 1
+
+    def test_dense_style_indexing_still_works(self):
+        t = make_table(10, 8)
+        e = add_entity(t, 4, 5)
+        layer = t.grid['tokens']
+        assert len(layer) == 8 and len(layer[0]) == 10
+        assert layer[5][4] == e.entity_id
+        layer[1][2] = 42
+        assert layer.get(2, 1) == 42
+        layer[1][2] = None
+        assert layer.occupied_count == 1
+        with pytest.raises(IndexError):
+            layer[8][0]
+
+    def test_area_query_by_layer_then_row_major(self):
+        t = make_table(200, 200)
+        far = add_entity(t, 150, 150)
+        b = add_entity(t, 5, 40)
+        a = add_entity(t, 90, 3)
+        dm = add_entity(t, 1, 1, layer='dungeon_master')
+        assert t.get_entities_in_area((0, 0), (100, 100)) == [a, b, dm]
+        assert t.get_entities_in_area((0, 0), (100, 100), layer='dungeon_master') == [dm]
+        assert t.get_entities_in_area((-50, -50), (500, 500)) == [a, b, far, dm]
+        assert t.get_entities_in_area((0, 0), (100, 100), layer='no_such_layer') == []
+
+    def test_area_query_matches_cell_scan(self):
+        import random
+        rng = random.Random(3)
+        t = make_table(300, 300)
+        for _ in range(150):
+            try:
+                add_entity(t, rng.randrange(300), rng.randrange(300), layer=rng.choice(['tokens', 'map']))
+            except ValueError:
+                pass
+        for _ in range(20):
+            x1, y1 = rng.randrange(300), rng.randrange(300)
+            x2, y2 = x1 + rng.randrange(120), y1 + rng.randrange(120)
+            expected = []
+            for layer in t.layers:
+                for y in range(y1, min(y2, 299) + 1):
+                    for x in range(x1, min(x2, 299) + 1):
+                        eid = t.grid[layer][y][x]
+                        if eid and t.entities[eid] not in expected:
+                            expected.append(t.entities[eid])
+            assert t.get_entities_in_area((x1, y1), (x2, y2)) == expected
+
+    def test_entity_at_position(self):
+        t = make_table()
+        e = add_entity(t, 3, 4, layer='map')
+        assert t.get_entity_at_position((3, 4)) is e
+        assert t.get_entity_at_position((3, 4), layer='tokens') is None
+        assert t.get_entity_at_position((30, 40)) is None
+
+    def test_from_dict_places_entities_sparsely(self):
+        t = make_table()
+        t.from_dict({'width': 5000, 'height': 5000,
+                     'layers': {'tokens': {'7': {'name': 'Orc', 'position': [4000, 10]}}}})
+        assert t.grid['tokens'].get(4000, 10) == 7
+        assert t.grid['tokens'].occupied_count == 1
+
+
+class TestChangeTracking:
+    def test_no_delta_without_baseline(self):
+        t = make_table()
+        add_entity(t)
+        assert t.pending_changes() is None
+
+    def test_attribute_writes_are_recorded_after_baseline(self):
+        t = make_table()
+        e = add_entity(t)
+        t.mark_persisted()
+        e.hp = 3
+        t.move_entity(entity_id(e), (4, 4))
+        delta = t.pending_changes()
+        assert delta.updated_entities == {e.entity_id}
+        assert not delta.created_entities
+        assert len(t.changes) == 0
+
+    def test_created_then_removed_only_deletes(self):
+        t = make_table()
+        t.mark_persisted()
+        e = add_entity(t)
+        e.name = 'renamed'
+        t.remove_entity(entity_id(e))
+        delta = t.pending_changes()
+        assert not delta.upsert_entities
+        assert delta.deleted_sprites == {e.sprite_id}
+        e.hp = 1  # detached: no longer recorded
+        assert len(t.changes) == 0
+
+    def test_sprite_id_change_replaces_row(self):
+        t = make_table()
+        e = add_entity(t)
+        t.mark_persisted()
+        old = e.sprite_id
+        e.sprite_id = 'new-sprite'
+        delta = t.pending_changes()
+        assert delta.deleted_sprites == {old}
+        assert delta.created_entities == {e.entity_id}
+
+    def test_wall_changes_recorded(self):
+        t = make_table()
+        w = Wall(table_id='test', x1=0, y1=0, x2=10, y2=0)
+        t.add_wall(w)
+        t.mark_persisted()
+        t.update_wall(w.wall_id, {'door_state': 'open'})
+        t.remove_wall('missing')
+        delta = t.pending_changes()
+        assert delta.updated_walls == {w.wall_id}
+        assert not delta.deleted_walls
+
+    def test_version_moves_on_every_change_and_survives_saves(self):
+        t = make_table()
+        e = add_entity(t)
+        seen = [t.version]
+        t.mark_persisted()
+        e.hp = 3
+        seen.append(t.version)
+        t.pending_changes()
+        t.add_wall(Wall(table_id='test', x1=0, y1=0, x2=10, y2=0))
+        seen.append(t.version)
+        t.cover_zones = []
+        seen.append(t.version)
+        t.from_dict({'width': 10, 'height': 10, 'layers': {}})
+        seen.append(t.version)
+        assert seen == sorted(set(seen))
+
+    def test_direct_dict_write_forces_full_resync(self):
+        t = make_table()
+        t.mark_persisted()
+        t.entities[50] = Entity('stray', (1, 1), 'tokens', entity_id=50)
+        assert t.pending_changes() is None
+
+    def test_from_dict_drops_baseline(self):
+        t = make_table()
+        t.mark_persisted()
+        t.from_dict({'width': 10, 'height': 10, 'layers': {}})
+        assert not t.changes.has_baseline
+
+
 class TestSerialization:
     def test_to_dict_roundtrip_preserves_dimensions(self):
         t = VirtualTable(name='Roundtrip', width=15, height=12)
@@ -0,0 +1,230 @@
+"""Line-of-sight fixtures for core_table.visibility.
+
+Each scene is checked with both backends. The Python caster is the
+reference, and the numpy caster must produce the same polygon.
+"""
+import math
+import random
+
+import pytest
+from core_table.entities import Wall
+from core_table.table import VirtualTable
+from core_table.visibility import (
+    VisibilityCache,
+    VisibleRegion,
+    VisionSource,
+    point_in_polygon,
+    sight_segments,
+    visibility_polygon,
+    vision_sources,
+)
+
+
+def _backends():
+    params = [pytest.param(False, id='python')]
+    try:
+        import numpy  # noqa: F401
+        params.append(pytest.param(True, id='numpy'))
+    except ImportError:  # pragma: no cover - exercised only without numpy
+        pass
+    return params
+
+
+backend = pytest.mark.parametrize('use_numpy', _backends())
+
+
+def _table(*walls, **wall_kwargs):
+    table = VirtualTable('Crypt', 2000, 2000)
+    for x1, y1, x2, y2 in walls:
+        table.add_wall(Wall(str(table.table_id), x1, y1, x2, y2, **wall_kwargs))
+    return table
+
+
+def _token(table, x, y, user_id=None, vision=300, **extra):
+    return table.add_entity({
+        'name': 'hero', 'x': x, 'y': y, 'layer': 'tokens', 'width': 50, 'height': 50,
+        'controlled_by': [user_id] if user_id is not None else [], 'vision_radius': vision, **extra,
+    })
+
+
+def _region(origin, segments, radius, use_numpy):
+    return VisibleRegion.compute(VisionSource(origin[0], origin[1], radius), segments, use_numpy)
+
+
+@backend
+def test_open_field_covers_the_whole_circle(use_numpy):
+    region = _region((500, 500), [], 100, use_numpy)
+    for angle in range(0, 360, 7):
+        x = 500 + 99.9 * math.cos(math.radians(angle))
+        y = 500 + 99.9 * math.sin(math.radians(angle))
+        assert region.contains(x, y)
+    assert not region.contains(601, 500)
+
+
+@backend
+def test_wall_casts_a_shadow(use_numpy):
+    # Vertical wall at x=600 spanning y=400..600, viewer to its left
+    region = _region((500, 500), [(600, 400, 600, 600)], 400, use_numpy)
+    assert region.contains(590, 500)
+    assert not region.contains(700, 500)
+    assert not region.contains(800, 590)
+    # Past the end of the wall the view opens up again
+    assert region.contains(700, 250)
+    assert region.contains(700, 750)
+
+
+@backend
+def test_viewer_sees_around_a_corner_but_not_through_a_room(use_numpy):
+    # Closed box around (1000, 1000)
+    box = [(900, 900, 1100, 900), (1100, 900, 1100, 1100), (1100, 1100, 900, 1100), (900, 1100, 900, 900)]
+    outside = _region((500, 1000), box, 1000, use_numpy)
+    inside = _region((1000, 1000), box, 1000, use_numpy)
+    assert not outside.contains(1000, 1000)
+    assert outside.contains(880, 1000)
+    assert outside.contains(1000, 850)  # over the top of the box
+    assert inside.contains(1050, 1050)
+    assert not inside.contains(1200, 1000)
+    assert not inside.contains(500, 1000)
+
+
+@backend
+def test_wall_crossing_the_view_edge_is_followed_exactly(use_numpy):
+    # A long wall that leaves the circle: the shadow edge runs along the wall itself
+    region = _region((0, 0), [(-500, 50, 500, 50)], 100, use_numpy)
+    assert region.contains(60, 49)
+    assert not region.contains(60, 51)
+
+
+def test_backends_agree_on_random_scenes():
+    pytest.importorskip('numpy')
+    rng = random.Random(7)
+    for _ in range(20):
+        segments = [(rng.uniform(0, 1000), rng.uniform(0, 1000), rng.uniform(0, 1000), rng.uniform(0, 1000))
+                    for _ in range(rng.randint(1, 30))]
+        origin = (rng.uniform(0, 1000), rng.uniform(0, 1000))
+        radius = rng.uniform(50, 800)
+        python = visibility_polygon(origin, segments, radius, use_numpy=False)
+        vectorized = visibility_polygon(origin, segments, radius, use_numpy=True)
+        assert len(python) == len(vectorized)
+        for (px, py), (nx, ny) in zip(python, vectorized):
+            assert px == pytest.approx(nx, abs=1e-6) and py == pytest.approx(ny, abs=1e-6)
+
+
+def test_point_in_polygon():
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    assert point_in_polygon(5, 5, square)
+    assert not point_in_polygon(15, 5, square)
+    assert not point_in_polygon(5, -1, square)
+
+
+def test_open_doors_and_see_through_walls_do_not_block():
+    table = _table()
+    tid = str(table.table_id)
+    walls = [
+        Wall(tid, 0, 0, 1, 1),
+        Wall(tid, 0, 0, 1, 1, wall_type='window'),
+        Wall(tid, 0, 0, 1, 1, is_door=True, door_state='open'),
+        Wall(tid, 0, 0, 1, 1, is_door=True, door_state='locked'),
+        None,
+    ]
+    assert len(sight_segments(walls)) == 2
+
+
+def test_player_sees_only_what_their_tokens_see():
+    table = _table((600, 0, 600, 2000))
+    _token(table, 375, 475, user_id=1)
+    near = _token(table, 500, 500)
+    behind = _token(table, 700, 475)
+    far = _token(table, 100, 1500)
+    cache = VisibilityCache()
+    assert cache.can_see(table, 1, near)
+    assert not cache.can_see(table, 1, behind)
+    assert not cache.can_see(table, 1, far)
+    # Nobody else has a token, so they see nothing but their own sprites
+    assert not cache.can_see(table, 2, near)
+    own = _token(table, 1500, 1500, user_id=2, vision=0)
+    assert cache.can_see(table, 2, own)
+
+
+def test_sprite_is_seen_when_any_corner_is_visible():
+    table = _table((600, 0, 600, 2000))
+    _token(table, 375, 475, user_id=1)
+    straddling = _token(table, 580, 475)  # left half in view, right half behind the wall
+    assert VisibilityCache().can_see(table, 1, straddling)
+
+
+def test_lights_reveal_for_everyone():
+    table = _table((600, 0, 600, 2000))
+    _token(table, 375, 475, user_id=1)
+    goblin = _token(table, 900, 900)
+    cache = VisibilityCache()
+    assert not cache.can_see(table, 1, goblin)
+    table.add_entity({'name': 'torch', 'x': 950, 'y': 950, 'layer': 'light', 'metadata': '{"radius": 150}'})
+    assert cache.can_see(table, 1, goblin)
+    table.add_entity({'name': 'lamp', 'x': 100, 'y': 100, 'layer': 'light', 'metadata': '{"isOn": false}'})
+    assert len(vision_sources(table, 1)) == 2
+
+
+def test_darkvision_extends_sight():
+    table = _table()
+    _token(table, 475, 475, user_id=1, vision=100, has_darkvision=True, darkvision_radius=400)
+    wolf = _token(table, 800, 475)
+    assert VisibilityCache().can_see(table, 1, wolf)
+
+
+def test_cache_recomputes_only_for_moves_and_wall_changes():
+    table = _table((600, 0, 600, 2000))
+    hero = _token(table, 375, 475, user_id=1)
+    _token(table, 1375, 475, user_id=2)
+    cache = VisibilityCache()
+    first = cache.regions(table, 1)
+    assert cache.regions(table, 1) is first
+    cache.regions(table, 2)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Moving player 1's token leaves player 2's entry untouched
+    table.move_entity(hero.entity_id, (400, 475))
+    assert cache.regions(table, 1) is not first
+    cache.regions(table, 2)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    # Opening a gap in the wall invalidates every entry on the table
+    goblin = _token(table, 700, 475)
+    assert not cache.can_see(table, 1, goblin)
+    wall_id = next(iter(table.walls))
+    table.update_wall(wall_id, {'is_door': True, 'door_state': 'open'})
+    assert cache.can_see(table, 1, goblin)
+
+    cache.forget(str(table.table_id))
+    assert len(cache) == 0
+
+
+def test_source_lists_are_rebuilt_only_when_the_table_changes(monkeypatch):
+    import core_table.visibility as visibility
+
+    builds = []
+    original = visibility.vision_sources
+
+    def counting(table, user_id):
+        builds.append(user_id)
+        return original(table, user_id)
+
+    monkeypatch.setattr(visibility, 'vision_sources', counting)
+    table = _table((600, 0, 600, 2000))
+    hero = _token(table, 375, 475, user_id=1)
+    goblin = _token(table, 900, 900)
+    cache = VisibilityCache()
+    for _ in range(5):
+        assert not cache.can_see(table, 1, goblin)
+    assert builds == [1]
+
+    # A light switched on through its metadata is picked up
+    torch = table.add_entity({'name': 'torch', 'x': 950, 'y': 950, 'layer': 'light', 'metadata': '{"isOn": false}'})
+    assert not cache.can_see(table, 1, goblin)
+    torch.metadata = '{"radius": 150}'
+    assert cache.can_see(table, 1, goblin)
+    table.move_entity(hero.entity_id, (400, 475))
+    cache.can_see(table, 1, goblin)
+    table.grid_cell_px = 100.0
+    cache.can_see(table, 1, goblin)
+    assert builds == [1] * 5
@@ -0,0 +1,60 @@
+"""Pack a compendium generation into a memory-mappable compendium.pack."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from core_table.compendium_pack import PACK_NAME, write_pack
+
+# Same files, in the same order, as the server's loader hashes them
+REQUIRED_FILES = (
+    "character_data.json",
+    "spellbook_optimized.json",
+    "equipment_data.json",
+    "bestiary_optimized.json",
+    "feats_data.json",
+)
+
+
+def pack_artifact(directory: Path, output: Path | None = None) -> Path:
+    """Parse every required file and write the pack next to them (or to ``output``).
+
+    The pack records the size and SHA-256 of each source file, which the
+    server compares with the manifest before trusting the pack, and the
+    generation's content digest, from which an unverified artifact version is
+    derived exactly as when the JSON files are loaded.
+    """
+    directory = directory.resolve()
+    documents = {}
+    sources = {}
+    content_hash = hashlib.sha256()
+    for filename in REQUIRED_FILES:
+        raw = (directory / filename).read_bytes()
+        value = json.loads(raw)
+        if not isinstance(value, dict):
+            raise ValueError(f"{filename} must contain a JSON object")
+        documents[filename] = value
+        sources[filename] = {"bytes": len(raw), "sha256": hashlib.sha256(raw).hexdigest()}
+        content_hash.update(filename.encode("utf-8"))
+        content_hash.update(raw)
+    return write_pack(
+        output or directory / PACK_NAME,
+        documents,
+        metadata={"sources": sources, "content_sha256": content_hash.hexdigest()},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    path = pack_artifact(args.directory, args.output)
+    print(f"{path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()